@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Benchmark for the entry-level KG diff.
+
+Builds a synthetic KG, derives a second version with a share of the entries
+added, removed, edited and shuffled, and times `diff_kg` between the two.
+
+Usage:
+    python benchmarks/bench_kg_diff.py [--concepts 200000] [--change-rate 0.05]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.diff import diff_kg  # noqa: E402
+from khora_kernel_vnext.extensions.kg.extension import KGEntry, RelationshipEntry  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concepts", type=int, default=200_000, help="Number of concepts")
+    parser.add_argument("--change-rate", type=float, default=0.05, help="Share of entries changed")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs")
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    concepts = [
+        KGEntry(f"Concept{i}", f"Description of concept {i}", f"docs/page{i % 1000}.md", i % 97 + 1)
+        for i in range(args.concepts)
+    ]
+    rules = [KGEntry(f"Rule{i}", f"Rule {i}", f"docs/page{i % 1000}.md", 1) for i in range(args.concepts // 10)]
+    relationships = [
+        RelationshipEntry(f"Concept{i}", f"Concept{(i * 7 + 1) % args.concepts}", "RelatesTo",
+                          "", f"docs/page{i % 1000}.md", 2)
+        for i in range(args.concepts)
+    ]
+
+    changed = int(args.concepts * args.change_rate)
+    new_concepts = list(concepts[changed:])
+    for i in rng.sample(range(len(new_concepts)), changed):
+        entry = new_concepts[i]
+        new_concepts[i] = KGEntry(entry.name, entry.description + " (revised)", entry.source_file, entry.line_number)
+    new_concepts += [KGEntry(f"NewConcept{i}", "Added", "docs/new.md", i + 1) for i in range(changed)]
+    rng.shuffle(new_concepts)
+
+    old = (concepts, rules, relationships)
+    new = (new_concepts, rules, relationships[changed:])
+    total = sum(map(len, old)) + sum(map(len, new))
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = diff_kg(old, new)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    counts = result.counts()
+    print(f"Diffed {total} entries: concepts {counts['concepts']}, relationships {counts['relationships']}")
+    print(f"kg diff: median {timings[len(timings) // 2] * 1000:.1f} ms, "
+          f"best {timings[0] * 1000:.1f} ms ({timings[0] / total * 1e9:.0f} ns/entry)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
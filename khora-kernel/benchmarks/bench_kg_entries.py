@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+Memory benchmark for Knowledge Graph entry objects.
+
+Loads a synthetic KG (as load_kg_files does, so every string is a fresh object
+decoded from JSON) into the current slotted, interning entry classes and into the
+previous dict-based classes, and reports the memory held per entry as measured by
+tracemalloc. Also times writing the KG files with the dict-free serializer against
+the previous to_dict() + json.dumps path and checks that both produce the same text.
+
+Usage:
+    python benchmarks/bench_kg_entries.py [--entries 200000] [--files 2000]
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.extension import (  # noqa: E402
+    KGEntry,
+    RelationshipEntry,
+    _entry_sort_key,
+    write_kg_file,
+)
+
+RELATION_TYPES = ("DependsOn", "Uses", "Contains", "Extends")
+
+
+class LegacyKGEntry:
+    """The previous KGEntry layout: a per-instance dict and no interning."""
+
+    def __init__(self, name, description, source_file="", line_number=0):
+        self.name = name
+        self.description = description
+        self.source_file = source_file
+        self.line_number = line_number
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "description": self.description,
+            "source": {"file": self.source_file, "line": self.line_number},
+        }
+
+
+class LegacyRelationshipEntry:
+    """The previous RelationshipEntry layout."""
+
+    def __init__(self, source_concept, target_concept, relation_type, description,
+                 source_file="", line_number=0):
+        self.source_concept = source_concept
+        self.target_concept = target_concept
+        self.relation_type = relation_type
+        self.description = description
+        self.source_file = source_file
+        self.line_number = line_number
+
+
+def build_documents(entries: int, files: int, seed: int = 42):
+    """Build JSON text for a concepts list and a relationships list."""
+    rng = random.Random(seed)
+    paths = [f"docs/section{i % 50}/page{i}.md" for i in range(files)]
+    names = [f"Concept{i}" for i in range(max(entries // 4, 1))]
+    concepts = [
+        {
+            "name": names[i % len(names)],
+            "description": f"Description of concept number {i}.",
+            "source": {"file": paths[rng.randrange(files)], "line": rng.randrange(1, 500)},
+        }
+        for i in range(entries)
+    ]
+    relationships = [
+        {
+            "source_concept": names[rng.randrange(len(names))],
+            "target_concept": names[rng.randrange(len(names))],
+            "relation_type": RELATION_TYPES[rng.randrange(len(RELATION_TYPES))],
+            "description": f"Relationship number {i}.",
+            "source": {"file": paths[rng.randrange(files)], "line": rng.randrange(1, 500)},
+        }
+        for i in range(entries)
+    ]
+    return json.dumps(concepts), json.dumps(relationships)
+
+
+def measure(build):
+    """Return (result, bytes still allocated by build) using tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def load(concepts_json, relationships_json, concept_cls, relationship_cls):
+    concepts = [
+        concept_cls(c["name"], c["description"], c["source"]["file"], c["source"]["line"])
+        for c in json.loads(concepts_json)
+    ]
+    relationships = [
+        relationship_cls(
+            r["source_concept"], r["target_concept"], r["relation_type"],
+            r["description"], r["source"]["file"], r["source"]["line"],
+        )
+        for r in json.loads(relationships_json)
+    ]
+    return concepts, relationships
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=200_000, help="Concepts and relationships each")
+    parser.add_argument("--files", type=int, default=2_000, help="Number of distinct source files")
+    args = parser.parse_args()
+
+    concepts_json, relationships_json = build_documents(args.entries, args.files)
+    total = 2 * args.entries
+
+    legacy, legacy_bytes = measure(
+        lambda: load(concepts_json, relationships_json, LegacyKGEntry, LegacyRelationshipEntry)
+    )
+    del legacy
+    current, current_bytes = measure(
+        lambda: load(concepts_json, relationships_json, KGEntry, RelationshipEntry)
+    )
+    concepts, relationships = current
+
+    print(f"Entries: {args.entries} concepts + {args.entries} relationships from {args.files} files")
+    print(f"  dict-based entries:  {legacy_bytes / total:8.1f} bytes/entry ({legacy_bytes / 1e6:.1f} MB)")
+    print(f"  slotted + interned:  {current_bytes / total:8.1f} bytes/entry ({current_bytes / 1e6:.1f} MB)")
+    print(f"  reduction:           {100 * (1 - current_bytes / legacy_bytes):8.1f}%")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "concepts.json"
+
+        start = time.perf_counter()
+        write_kg_file(path, "concepts", concepts)
+        stream_time = time.perf_counter() - start
+        written = json.loads(path.read_text(encoding="utf-8"))
+
+        start = time.perf_counter()
+        ordered = [entry.to_dict() for entry in sorted(concepts, key=_entry_sort_key)]
+        legacy_text = json.dumps(
+            {
+                "version": written["version"],
+                "generated_at": written["generated_at"],
+                "fingerprint": written["fingerprint"],
+                "concepts": ordered,
+            },
+            indent=2,
+        )
+        dict_time = time.perf_counter() - start
+
+        if legacy_text != path.read_text(encoding="utf-8"):
+            print("ERROR: streamed KG file differs from the json.dumps output")
+            return 1
+
+    print(f"Writing concepts.json ({args.entries} entries):")
+    print(f"  to_dict + json.dumps (serialize only): {dict_time:8.3f}s")
+    print(f"  streamed, incl. fingerprint + write:   {stream_time:8.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark for the Knowledge Graph relationship graph index.
+
+Builds a random graph of the requested size from RelationshipEntry objects and
+times index construction, neighbour lookups, shortest paths and cycle detection.
+
+Usage:
+    python benchmarks/bench_kg_graph.py [--nodes 200000] [--edges 1000000] [--queries 10000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.extension import RelationshipEntry  # noqa: E402
+from khora_kernel_vnext.extensions.kg.graph import KGGraph  # noqa: E402
+
+RELATION_TYPES = ("DependsOn", "Uses", "Contains", "Extends")
+
+
+def build_relationships(nodes: int, edges: int, seed: int = 42):
+    """Build random relationship entries between synthetic concepts."""
+    rng = random.Random(seed)
+    names = [f"Concept{i}" for i in range(nodes)]
+    return [
+        RelationshipEntry(
+            names[rng.randrange(nodes)],
+            names[rng.randrange(nodes)],
+            RELATION_TYPES[rng.randrange(len(RELATION_TYPES))],
+            "",
+        )
+        for _ in range(edges)
+    ], names
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=200_000, help="Number of concepts")
+    parser.add_argument("--edges", type=int, default=1_000_000, help="Number of relationships")
+    parser.add_argument("--queries", type=int, default=10_000, help="Number of neighbour lookups")
+    args = parser.parse_args()
+
+    relationships, names = build_relationships(args.nodes, args.edges)
+    rng = random.Random(7)
+    sample = [names[rng.randrange(len(names))] for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    graph = KGGraph.from_relationships(relationships)
+    intern_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graph.neighbors(sample[0])
+    graph.neighbors(sample[0], direction="in")
+    csr_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in sample:
+        graph.neighbors(name, direction="both")
+    lookup_time = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    for source, target in zip(sample[:100], sample[100:200]):
+        graph.shortest_path(source, target)
+    path_time = (time.perf_counter() - start) / 100
+
+    start = time.perf_counter()
+    cycles = graph.find_cycles()
+    cycle_time = time.perf_counter() - start
+
+    print(f"Graph: {graph.node_count} concepts, {graph.edge_count} relationships")
+    print(f"  intern names:          {intern_time:8.3f}s")
+    print(f"  build CSR (out + in):  {csr_time:8.3f}s")
+    print(f"  neighbors (both):      {lookup_time * 1e3:8.4f}ms per query")
+    print(f"  shortest path:         {path_time * 1e3:8.3f}ms per query")
+    print(f"  cycles ({len(cycles)} found):      {cycle_time:8.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Benchmark for building a KG history from git objects.
+
+Creates a temporary git repository with a docs tree and a series of commits
+that each edit a few files, then times `KGHistory.log` over all commits with a
+cold and a warm blob cache, and `KGHistory.entries_at` for an old revision.
+
+Usage:
+    python benchmarks/bench_kg_history.py [--files 1000] [--commits 500]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.history import KGHistory  # noqa: E402
+
+GIT_ENV = dict(
+    os.environ,
+    GIT_AUTHOR_NAME="Bench", GIT_AUTHOR_EMAIL="bench@example.com",
+    GIT_COMMITTER_NAME="Bench", GIT_COMMITTER_EMAIL="bench@example.com",
+)
+
+
+def _document(file_number: int, revision: int) -> str:
+    return "\n\n".join(
+        f"[concept:C{file_number}x{i}] - Concept {i} of file {file_number}, revision {revision}."
+        for i in range(10)
+    ) + f"\n\n[rel:C{file_number}x0->C{file_number}x1:Uses] - Revision {revision}.\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=1000, help="Number of markdown files")
+    parser.add_argument("--commits", type=int, default=500, help="Number of commits after the initial one")
+    parser.add_argument("--files-per-commit", type=int, default=3, help="Files edited by each commit")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+
+        def git(*git_args: str, **kwargs) -> None:
+            subprocess.run(["git", *git_args], cwd=repo, env=GIT_ENV, check=True, capture_output=True, **kwargs)
+
+        git("init", "-q")
+        for n in range(args.files):
+            path = repo / "docs" / f"section{n % 20}" / f"page{n}.md"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(_document(n, 0))
+        git("add", "-A")
+        git("commit", "-q", "-m", "Initial docs")
+
+        started = time.perf_counter()
+        for revision in range(1, args.commits + 1):
+            for n in rng.sample(range(args.files), args.files_per_commit):
+                (repo / "docs" / f"section{n % 20}" / f"page{n}.md").write_text(_document(n, revision))
+            git("commit", "-q", "-a", "-m", f"Revision {revision}")
+        print(f"Created {args.commits + 1} commits in {time.perf_counter() - started:.1f}s")
+
+        cache_dir = repo / ".cache"
+        for label in ("cold", "warm"):
+            with KGHistory(repo, "docs", cache_dir=cache_dir) as history:
+                start = time.perf_counter()
+                deltas = history.log()
+                elapsed = time.perf_counter() - start
+                print(f"kg log ({label} cache): {len(deltas)} commits in {elapsed:.3f}s, "
+                      f"{history.parsed} blobs parsed")
+
+        with KGHistory(repo, "docs", cache_dir=cache_dir) as history:
+            start = time.perf_counter()
+            concepts, _, _ = history.entries_at(f"HEAD~{args.commits // 2}")
+            print(f"kg at HEAD~{args.commits // 2}: {len(concepts)} concepts in "
+                  f"{time.perf_counter() - start:.3f}s, {history.parsed} blobs parsed")
+
+        naive = (args.commits + 1) * args.files
+        print(f"A checkout-and-scan history would parse {naive} files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
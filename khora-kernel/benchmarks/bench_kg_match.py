@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Benchmark for KG pattern matching.
+
+Generates a graph with several relationship types and times building the edge
+indexes, then a 3-hop pattern anchored on a constant, an unanchored 2-hop
+pattern with a closing edge, and the first matches of an open 3-hop pattern.
+
+Usage:
+    python benchmarks/bench_kg_match.py [--concepts 200000] [--relationships 1000000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.extension import RelationshipEntry  # noqa: E402
+from khora_kernel_vnext.extensions.kg.graph import KGGraph  # noqa: E402
+from khora_kernel_vnext.extensions.kg.match import PatternMatcher, parse_pattern  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concepts", type=int, default=200_000, help="Number of concepts")
+    parser.add_argument("--relationships", type=int, default=1_000_000, help="Number of relationships")
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    names = [f"Concept{i}" for i in range(args.concepts)]
+    types = ["DependsOn"] * 6 + ["Uses"] * 3 + ["Extends"]
+    # Skewed targets so a few concepts (like base classes) are heavily referenced
+    relationships = [
+        RelationshipEntry(rng.choice(names), names[int(args.concepts * rng.random() ** 3)], rng.choice(types),
+                          "", "docs/rels.md", 1)
+        for _ in range(args.relationships)
+    ]
+    graph = KGGraph.from_relationships(relationships)
+    matcher = PatternMatcher(graph)
+
+    start = time.perf_counter()
+    for relation_type in ("DependsOn", "Uses", "Extends"):
+        index = matcher._index((relation_type,))
+        index.forward, index.backward
+    print(f"Edge indexes over {len(relationships)} relationships: {time.perf_counter() - start:.2f}s")
+
+    queries = [
+        ('(a)-[DependsOn]->(b)-[Extends]->(c)-[Uses]->(d) where d = "Concept7"', None),
+        ('(a)-[DependsOn]->(b)-[DependsOn]->(c) where a = "Concept11" and c =~ "0$"', None),
+        ("(a)-[Extends]->(b)-[Extends]->(c), (c)-[Extends]->(a)", None),
+        ("(a)-[DependsOn]->(b)-[Uses]->(c)-[Extends]->(d)", 10_000),
+    ]
+    for text, limit in queries:
+        pattern = parse_pattern(text)
+        start = time.perf_counter()
+        count = sum(1 for _ in matcher.match(pattern, limit))
+        elapsed = time.perf_counter() - start
+        print(f"{text}\n    {count} matches{' (limit)' if count == limit else ''} in {elapsed * 1000:.1f} ms; "
+              f"plan: {'; '.join(matcher.explain(pattern))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Benchmark for the transitive-closure reachability index.
+
+Generates a mostly acyclic DependsOn graph (with a few cycles) among other
+relationship types, then times the index build, a rebuild after only the other
+types changed, reachability checks, and downstream/upstream sets, comparing the
+checks with a BFS over the relationship graph.
+
+Usage:
+    python benchmarks/bench_kg_reachability.py [--concepts 30000] [--depends-on 150000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.extension import RelationshipEntry  # noqa: E402
+from khora_kernel_vnext.extensions.kg.graph import KGGraph  # noqa: E402
+from khora_kernel_vnext.extensions.kg.reachability import (  # noqa: E402
+    ReachabilityIndex,
+    reachability_path,
+    write_reachability_index,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concepts", type=int, default=30_000, help="Number of concepts")
+    parser.add_argument("--depends-on", type=int, default=150_000, help="Number of DependsOn relationships")
+    parser.add_argument("--other", type=int, default=850_000, help="Number of relationships of other types")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of reachability checks")
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    names = [f"Concept{i}" for i in range(args.concepts)]
+
+    def depends_on():
+        a, b = sorted(rng.sample(range(args.concepts), 2))
+        # About 1% of the edges point backwards and close cycles
+        if rng.random() < 0.01:
+            a, b = b, a
+        return RelationshipEntry(names[a], names[b], "DependsOn", "", "docs/deps.md", 1)
+
+    def other():
+        return RelationshipEntry(rng.choice(names), rng.choice(names), rng.choice(["Uses", "Contains"]),
+                                 "", "docs/other.md", 1)
+
+    relationships = [depends_on() for _ in range(args.depends_on)] + [other() for _ in range(args.other)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp)
+        start = time.perf_counter()
+        write_reachability_index(project, relationships, ["DependsOn"])
+        print(f"Build over {len(relationships)} relationships ({args.depends_on} DependsOn): "
+              f"{time.perf_counter() - start:.2f}s, {reachability_path(project).stat().st_size >> 20} MiB")
+
+        relationships[-1000:] = [other() for _ in range(1000)]
+        start = time.perf_counter()
+        write_reachability_index(project, relationships, ["DependsOn"])
+        print(f"Rebuild after changing other types only: {time.perf_counter() - start:.2f}s")
+
+        index = ReachabilityIndex(reachability_path(project))
+        index.reaches(names[0], names[1], "DependsOn")  # load the arrays
+        pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.queries)]
+        start = time.perf_counter()
+        found = sum(index.reaches(a, b, "DependsOn") for a, b in pairs)
+        elapsed = time.perf_counter() - start
+        print(f"reaches: {elapsed / args.queries * 1e6:.1f} us per check ({found} of {args.queries} reachable)")
+
+        start = time.perf_counter()
+        downstream = index.downstream(names[args.concepts // 2], "DependsOn")
+        upstream = index.upstream(names[args.concepts // 2], "DependsOn")
+        print(f"downstream + upstream sets ({len(downstream)} + {len(upstream)} concepts): "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+        graph = KGGraph.from_relationships(relationships)
+        start = time.perf_counter()
+        for a, b in pairs[:50]:
+            any(name == b for name, _ in graph.bfs(a, relation_type="DependsOn"))
+        print(f"BFS for comparison: {(time.perf_counter() - start) / 50 * 1e3:.1f} ms per check")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Benchmark for `khora kg rename` on a large docs tree.
+
+Writes a synthetic docs tree in which a few files mention a hub concept,
+extracts the KG once (filling the extraction cache), then times a rename of
+the hub concept against the time it takes just to write the affected files.
+With the JSON format, the rename also rewrites the KG documents; JSON Lines
+logs are appended to instead.
+
+Usage:
+    python benchmarks/bench_kg_rename.py [--files 10000] [--concepts-per-file 10] [--referencing 200] [--format json]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.cache import atomic_write_bytes, default_cache_dir  # noqa: E402
+from khora_kernel_vnext.extensions.kg.extension import generate_kg_files, scan_markdown_files  # noqa: E402
+from khora_kernel_vnext.extensions.kg.rename import rename_concept  # noqa: E402
+
+
+def _document(file_number: int, concepts: int, references_hub: bool) -> str:
+    parts = [
+        f"[concept:C{file_number}x{i}] - Concept {i} of file {file_number}.\n\n"
+        f"[rel:C{file_number}x{i}->C{file_number}x{(i + 1) % concepts}:Uses] - Next concept."
+        for i in range(concepts)
+    ]
+    if references_hub:
+        parts.append(f"[rel:C{file_number}x0->Hub:DependsOn] - Everything depends on the hub.")
+    return "\n\n".join(parts) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=10_000, help="Number of markdown files")
+    parser.add_argument("--concepts-per-file", type=int, default=10, help="Concepts per file")
+    parser.add_argument("--referencing", type=int, default=200, help="Files that mention the renamed concept")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json", help="KG file format")
+    parser.add_argument("--jobs", type=int, default=0, help="Worker processes for the initial extraction")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp)
+        step = max(1, args.files // args.referencing)
+        for n in range(args.files):
+            directory = project / "docs" / f"section{n % 50}"
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"page{n}.md").write_text(_document(n, args.concepts_per_file, n % step == 0))
+        (project / "docs" / "hub.md").write_text("[concept:Hub] - The hub.\n")
+
+        start = time.perf_counter()
+        generate_kg_files(project, *scan_markdown_files(
+            project / "docs", cache_dir=default_cache_dir(project), jobs=args.jobs,
+        ), file_format=args.format)
+        print(f"Initial extraction of {args.files} files: {time.perf_counter() - start:.2f}s")
+
+        result = rename_concept(project, "Hub", "CentralHub")
+        print(f"Rename: {result.occurrences} occurrences in {len(result.files)} files, "
+              f"KG updated: {result.kg_updated}, {result.elapsed:.3f}s")
+
+        start = time.perf_counter()
+        for rel_path in result.files:
+            path = project / rel_path
+            atomic_write_bytes(path, path.read_bytes())
+        print(f"Reading and atomically writing the same files: {time.perf_counter() - start:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark for the TF-IDF similarity index.
+
+Generates concepts with random descriptions over a Zipf-like vocabulary, then
+times a full index build, a rebuild after editing a few source files, loading
+the index, and `similar` queries for random concepts.
+
+Usage:
+    python benchmarks/bench_kg_similarity.py [--concepts 100000] [--files 2000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.extension import KGEntry  # noqa: E402
+from khora_kernel_vnext.extensions.kg.similarity import (  # noqa: E402
+    SimilarityIndex,
+    similarity_path,
+    write_similarity_index,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concepts", type=int, default=100_000, help="Number of concepts")
+    parser.add_argument("--files", type=int, default=2000, help="Number of source files")
+    parser.add_argument("--changed-files", type=int, default=20, help="Source files edited before the rebuild")
+    parser.add_argument("--queries", type=int, default=200, help="Number of similar queries")
+    args = parser.parse_args()
+
+    rng = random.Random(9)
+    vocabulary = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10)))
+        for _ in range(20000)
+    ]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def description() -> str:
+        return " ".join(rng.choices(vocabulary, weights, k=rng.randint(8, 20)))
+
+    concepts = [
+        KGEntry(f"Concept{i}", description(), f"docs/page{i % args.files}.md", i // args.files + 1)
+        for i in range(args.concepts)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp)
+        start = time.perf_counter()
+        write_similarity_index(project, concepts, [])
+        print(f"Full build of {len(concepts)} documents: {time.perf_counter() - start:.2f}s, "
+              f"{similarity_path(project).stat().st_size / 1e6:.1f} MB")
+
+        changed = {f"docs/page{n}.md" for n in rng.sample(range(args.files), args.changed_files)}
+        concepts = [
+            KGEntry(c.name, description(), c.source_file, c.line_number) if c.source_file in changed else c
+            for c in concepts
+        ]
+        start = time.perf_counter()
+        write_similarity_index(project, concepts, [])
+        print(f"Rebuild after editing {args.changed_files} files: {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        index = SimilarityIndex(similarity_path(project))
+        print(f"Load: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        timings = []
+        for _ in range(args.queries):
+            name = f"Concept{rng.randrange(args.concepts)}"
+            start = time.perf_counter()
+            index.similar(index.find(name)[0], 10)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"similar --top 10: median {timings[len(timings) // 2] * 1000:.2f} ms, "
+              f"p95 {timings[int(len(timings) * 0.95)] * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Benchmark for reading the Knowledge Graph from kg/kg.bin versus the JSON files.
+
+Writes a synthetic KG and its snapshot to a temporary project, then times a
+full load from JSON, opening the snapshot, materializing all entries from it,
+building the relationship graph from its edge arrays, and name lookups.
+
+Usage:
+    python benchmarks/bench_kg_snapshot.py [--concepts 100000] [--relationships 200000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.extension import (  # noqa: E402
+    KGEntry,
+    RelationshipEntry,
+    generate_kg_files,
+    iter_kg_entries,
+)
+from khora_kernel_vnext.extensions.kg.graph import KGGraph  # noqa: E402
+from khora_kernel_vnext.extensions.kg.snapshot import open_kg_snapshot, write_kg_snapshot  # noqa: E402
+
+RELATION_TYPES = ("DependsOn", "Uses", "Contains", "Extends")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concepts", type=int, default=100_000, help="Number of concepts")
+    parser.add_argument("--relationships", type=int, default=200_000, help="Number of relationships")
+    parser.add_argument("--queries", type=int, default=10_000, help="Number of name lookups")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    names = [f"Concept{i}" for i in range(args.concepts)]
+    concepts = [
+        KGEntry(name, f"Description of {name}", f"docs/f{i % 2000}.md", i % 300 + 1)
+        for i, name in enumerate(names)
+    ]
+    relationships = [
+        RelationshipEntry(
+            rng.choice(names), rng.choice(names), rng.choice(RELATION_TYPES),
+            f"Relationship {i}", f"docs/f{i % 2000}.md", i % 300 + 1,
+        )
+        for i in range(args.relationships)
+    ]
+    sample = [rng.choice(names) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp)
+        generate_kg_files(project, concepts, [], relationships)
+        start = time.perf_counter()
+        write_kg_snapshot(project, concepts, [], relationships)
+        write_time = time.perf_counter() - start
+        json_size = sum(path.stat().st_size for path in (project / "kg").glob("*.json"))
+        snapshot_size = (project / "kg" / "kg.bin").stat().st_size
+
+        start = time.perf_counter()
+        loaded = [
+            [KGEntry.from_dict(item) for item in iter_kg_entries(project, "concepts")],
+            [RelationshipEntry.from_dict(item) for item in iter_kg_entries(project, "relationships")],
+        ]
+        json_time = time.perf_counter() - start
+        del loaded
+
+        start = time.perf_counter()
+        snapshot = open_kg_snapshot(project)
+        open_time = time.perf_counter() - start
+
+        with snapshot:
+            start = time.perf_counter()
+            materialized = [list(snapshot.concepts), list(snapshot.relationships)]
+            materialize_time = time.perf_counter() - start
+            del materialized
+
+            start = time.perf_counter()
+            graph = KGGraph.from_snapshot(snapshot)
+            graph_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for name in sample:
+                snapshot.concepts.find(name)
+            lookup_time = (time.perf_counter() - start) / len(sample)
+
+        start = time.perf_counter()
+        KGGraph.from_relationships(relationships, names)
+        entry_graph_time = time.perf_counter() - start
+
+    print(f"KG: {len(concepts)} concepts, {len(relationships)} relationships")
+    print(f"  JSON files:                    {json_size / 1e6:8.1f} MB")
+    print(f"  snapshot:                      {snapshot_size / 1e6:8.1f} MB, written in {write_time:.3f}s")
+    print(f"  load all entries from JSON:    {json_time:8.3f}s")
+    print(f"  open snapshot:                 {open_time * 1e3:8.3f}ms")
+    print(f"  materialize from snapshot:     {materialize_time:8.3f}s")
+    print(f"  graph from snapshot:           {graph_time:8.3f}s ({graph.edge_count} edges)")
+    print(f"  graph from loaded entries:     {entry_graph_time:8.3f}s")
+    print(f"  concept lookup by name:        {lookup_time * 1e6:8.1f}us per query")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Benchmark for the Knowledge Graph tag tokenizer.
+
+Compares the single-pass tokenizer used by ``extract_concepts_and_rules`` with the
+previous implementation, which ran three separate DOTALL regex sweeps and
+recomputed line numbers by counting newlines in the prefix before every match.
+
+The legacy implementation is quadratic in the file size, so by default it is only
+run on a prefix of the corpus; the new tokenizer is run on both the prefix (for a
+like-for-like comparison) and the full corpus.
+
+Usage:
+    python benchmarks/bench_kg_tokenizer.py [--size-mb 50] [--legacy-size-mb 2]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.extension import (  # noqa: E402
+    CONCEPT_PATTERN,
+    RELATIONSHIP_PATTERN,
+    RULE_PATTERN,
+    tokenize_kg_tags,
+)
+
+FILLER_WORDS = (
+    "the kernel scaffolds projects with extensions that render templates and "
+    "write context files for agents to consume during development"
+).split()
+
+
+def build_corpus(size_bytes: int, seed: int = 42) -> str:
+    """Build a synthetic markdown document of roughly the requested size."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    counter = 0
+    while total < size_bytes:
+        counter += 1
+        choice = rng.random()
+        prose = " ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(8, 40)))
+        if choice < 0.15:
+            block = f"[concept:Concept{counter}] - {prose}\n\n"
+        elif choice < 0.25:
+            block = f"[rule:Rule{counter}] - {prose}\n\n"
+        elif choice < 0.35:
+            block = f"[rel:Concept{counter}->Concept{counter + 1}:DependsOn] - {prose}\n\n"
+        elif choice < 0.40:
+            block = f"## Section {counter}\n\n"
+        else:
+            block = f"{prose}\n{prose}\n\n"
+        parts.append(block)
+        total += len(block)
+    return "".join(parts)
+
+
+def legacy_extract(content: str) -> list:
+    """The previous three-pass extraction, reduced to (start, line) pairs."""
+    results = []
+    for pattern in (CONCEPT_PATTERN, RULE_PATTERN, RELATIONSHIP_PATTERN):
+        for match in re.finditer(pattern, content, re.DOTALL):
+            line_number = content[:match.start()].count("\n") + 1
+            results.append((match.start(), line_number))
+    return sorted(results)
+
+
+def new_extract(content: str) -> list:
+    """The single-pass tokenizer, reduced to (start, line) pairs."""
+    return [(token.start, token.line_number) for token in tokenize_kg_tags(content)]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=float, default=50.0, help="Full corpus size in MB")
+    parser.add_argument(
+        "--legacy-size-mb",
+        type=float,
+        default=2.0,
+        help="Prefix size in MB on which the legacy implementation is timed",
+    )
+    args = parser.parse_args()
+
+    corpus = build_corpus(int(args.size_mb * 1024 * 1024))
+    prefix = corpus[: int(args.legacy_size_mb * 1024 * 1024)]
+
+    legacy_result, legacy_time = timed(legacy_extract, prefix)
+    new_prefix_result, new_prefix_time = timed(new_extract, prefix)
+    if legacy_result != new_prefix_result:
+        print("ERROR: tokenizer output differs from the legacy implementation")
+        return 1
+
+    new_full_result, new_full_time = timed(new_extract, corpus)
+
+    print(f"Prefix ({len(prefix) / 1e6:.1f} MB, {len(legacy_result)} tags):")
+    print(f"  legacy three-pass: {legacy_time:8.3f}s")
+    print(f"  single-pass:       {new_prefix_time:8.3f}s")
+    print(f"  speedup:           {legacy_time / max(new_prefix_time, 1e-9):8.1f}x")
+    print(f"Full corpus ({len(corpus) / 1e6:.1f} MB, {len(new_full_result)} tags):")
+    print(f"  single-pass:       {new_full_time:8.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
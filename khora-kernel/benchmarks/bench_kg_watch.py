@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Benchmark for the latency of `khora kg watch` on single-file edits.
+
+Writes a synthetic docs tree to a temporary project, starts a KGWatcher on it,
+then edits one file at a time and measures the time from the save to the
+updated KG files (event delivery, debounce, re-extraction and writes).
+
+Usage:
+    python benchmarks/bench_kg_watch.py [--files 5000] [--concepts-per-file 20] [--format json]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from khora_kernel_vnext.extensions.kg.watch import KGWatcher  # noqa: E402
+
+
+def _document(file_number: int, concepts: int, revision: int = 0) -> str:
+    return "\n\n".join(
+        f"[concept:C{file_number}x{i}] - Concept {i} of file {file_number}, revision {revision}."
+        for i in range(concepts)
+    ) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=5000, help="Number of markdown files")
+    parser.add_argument("--concepts-per-file", type=int, default=20, help="Concepts per file")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json", help="KG file format")
+    parser.add_argument("--edits", type=int, default=20, help="Number of single-file edits")
+    parser.add_argument("--poll", action="store_true", help="Use the polling backend")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp)
+        for n in range(args.files):
+            directory = project / "docs" / f"section{n % 50}"
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"page{n}.md").write_text(_document(n, args.concepts_per_file))
+
+        watcher = KGWatcher(project, "docs", file_format=args.format, use_inotify=not args.poll)
+        start = time.perf_counter()
+        watcher.start()
+        print(f"Initial extraction of {args.files} files: {time.perf_counter() - start:.2f}s "
+              f"({watcher.backend_name})")
+
+        latencies = []
+        apply_times = []
+        for edit in range(args.edits):
+            n = (edit * 7919) % args.files
+            path = project / "docs" / f"section{n % 50}" / f"page{n}.md"
+            saved = time.perf_counter()
+            path.write_text(_document(n, args.concepts_per_file, edit + 1))
+            update = None
+            while update is None:
+                update = watcher.apply(watcher.next_batch())
+            latencies.append(time.perf_counter() - saved)
+            apply_times.append(update.elapsed)
+        watcher.close()
+
+    print(f"Save-to-KG latency over {args.edits} edits ({args.files * args.concepts_per_file} concepts):")
+    print(f"  median: {statistics.median(latencies) * 1000:8.1f} ms")
+    print(f"  max:    {max(latencies) * 1000:8.1f} ms")
+    print(f"  update (extract + write) median: {statistics.median(apply_times) * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
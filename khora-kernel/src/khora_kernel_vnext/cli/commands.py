@@ -11,11 +11,22 @@ import tomlkit
 import importlib
 import pkg_resources
 import json
+import time
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple, Union
 
 # Import the validation function directly - make sure it's accessible
-from khora_kernel_vnext.extensions.kg.extension import validate_source_links, KGEntry
+from khora_kernel_vnext.extensions.kg.extension import (
+    KGEntry,
+    RelationshipEntry,
+    SourceFileChecker,
+    iter_kg_entries,
+    kg_file_path,
+    validate_source_links,
+)
+from khora_kernel_vnext.extensions.kg.integrity import check_kg_integrity
+from khora_kernel_vnext.extensions.kg.jsonl import DEFAULT_COMPACT_THRESHOLD, compact_kg_logs
+from khora_kernel_vnext.sdk.file_index import ProjectFileIndex
 from khora_kernel_vnext.extensions.core.manifest import (
     KhoraManifestConfig,
     KhoraManifestNotFoundError,
@@ -113,12 +124,32 @@ def bump_version(new: str, changelog: bool):
     "--khora-env",
     help="Environment to use for manifest layering (e.g., 'dev', 'prod')",
 )
-def health(verbose: bool, json_output: bool, khora_env: Optional[str] = None):
+@click.option(
+    "--check-tags",
+    is_flag=True,
+    default=False,
+    help="Also check that each KG entry's source line still contains its tag",
+)
+@click.option(
+    "--strict-integrity",
+    is_flag=True,
+    default=False,
+    help="Count KG integrity findings (dangling relationships, duplicates, self-loops) as issues",
+)
+def health(
+    verbose: bool,
+    json_output: bool,
+    khora_env: Optional[str] = None,
+    check_tags: bool = False,
+    strict_integrity: bool = False,
+):
     """
     Check the health of a Khora project.
     
     Performs basic checks on project structure and configuration files to ensure
     they follow Khora conventions. Returns non-zero exit code if issues are found.
+    KG integrity findings are reported as warnings, which do not change the exit
+    code unless --strict-integrity is given.
     
     With --json-output, returns a structured JSON response suitable for AI consumption.
     With --khora-env, applies environment-specific manifest overrides.
@@ -126,6 +157,11 @@ def health(verbose: bool, json_output: bool, khora_env: Optional[str] = None):
     project_root = find_project_root()
     issues_found = False
     check_results = {}
+    kg_integrity = None
+    warnings = []
+    
+    # All file probes below share one set of cached directory listings
+    file_index = ProjectFileIndex(project_root)
     
     if not json_output:
         click.echo("Running Khora health check...")
@@ -134,7 +170,7 @@ def health(verbose: bool, json_output: bool, khora_env: Optional[str] = None):
     pyproject_path = project_root / "pyproject.toml"
     check_results["pyproject.toml"] = {"exists": False, "khora_tool": False, "issues": []}
     
-    if not pyproject_path.exists():
+    if not file_index.is_file("pyproject.toml"):
         check_results["pyproject.toml"]["issues"].append("pyproject.toml not found")
         issues_found = True
     else:
@@ -158,7 +194,7 @@ def health(verbose: bool, json_output: bool, khora_env: Optional[str] = None):
     khora_context_path = project_root / ".khora" / "context.yaml"
     check_results[".khora/context.yaml"] = {"exists": False, "valid": False, "issues": []}
     
-    if not khora_context_path.exists():
+    if not file_index.exists(".khora/context.yaml"):
         check_results[".khora/context.yaml"]["issues"].append(".khora/context.yaml not found")
         issues_found = True
     else:
@@ -188,10 +224,9 @@ def health(verbose: bool, json_output: bool, khora_env: Optional[str] = None):
             pass  # Already logged in previous check
     
     if docker_enabled:
-        docker_compose_path = project_root / "docker-compose.yml"
         check_results["docker-compose.yml"] = {"exists": False, "issues": []}
         
-        if not docker_compose_path.exists():
+        if not file_index.exists("docker-compose.yml"):
             check_results["docker-compose.yml"]["issues"].append("docker-compose.yml not found but Docker feature is enabled")
             issues_found = True
         else:
@@ -201,78 +236,67 @@ def health(verbose: bool, json_output: bool, khora_env: Optional[str] = None):
     if kg_enabled:
         check_results["kg"] = {"exists": False, "valid_links": False, "issues": []}
         
-        kg_dir = project_root / "kg"
-        concepts_file = kg_dir / "concepts.json"
-        rules_file = kg_dir / "rules.json"
-        
-        if not kg_dir.exists() or not kg_dir.is_dir():
+        if not file_index.is_dir("kg"):
             check_results["kg"]["issues"].append("kg directory not found but KG feature is enabled")
             issues_found = True
         else:
             check_results["kg"]["exists"] = True
             
-            # Check for concepts.json and rules.json
-            if not concepts_file.exists() and not rules_file.exists():
+            # Check for concepts and rules, stored as JSON documents or JSON Lines logs
+            if not any(
+                file_index.exists(f"kg/{key}.{suffix}")
+                for key in ("concepts", "rules")
+                for suffix in ("json", "jsonl")
+            ):
                 check_results["kg"]["issues"].append("Neither concepts.json nor rules.json found in kg directory")
                 issues_found = True
             else:
                 # Validate source links
                 try:
-                    import json
-                    concepts = []
-                    rules = []
+                    entries = {}
                     
-                    # Extract concepts from concepts.json
-                    if concepts_file.exists():
+                    # Stream concepts, rules and relationships from their KG files
+                    for key, entry_cls in (
+                        ("concepts", KGEntry),
+                        ("rules", KGEntry),
+                        ("relationships", RelationshipEntry),
+                    ):
+                        entries[key] = []
                         try:
-                            with open(concepts_file, "r", encoding="utf-8") as f:
-                                concepts_data = json.load(f)
-                                for concept in concepts_data.get("concepts", []):
-                                    name = concept.get("name", "")
-                                    description = concept.get("description", "")
-                                    source_file = concept.get("source", {}).get("file", "")
-                                    line_number = concept.get("source", {}).get("line", 0)
-                                    concepts.append(KGEntry(name, description, source_file, line_number))
+                            entries[key] = [entry_cls.from_dict(item) for item in iter_kg_entries(project_root, key)]
                         except Exception as e:
-                            check_results["kg"]["issues"].append(f"Error parsing concepts.json: {str(e)}")
+                            kg_file = kg_file_path(project_root, key)
+                            check_results["kg"]["issues"].append(f"Error parsing {kg_file.name}: {str(e)}")
                             issues_found = True
                     
-                    # Extract rules from rules.json
-                    if rules_file.exists():
-                        try:
-                            with open(rules_file, "r", encoding="utf-8") as f:
-                                rules_data = json.load(f)
-                                for rule in rules_data.get("rules", []):
-                                    name = rule.get("name", "")
-                                    description = rule.get("description", "")
-                                    source_file = rule.get("source", {}).get("file", "")
-                                    line_number = rule.get("source", {}).get("line", 0)
-                                    rules.append(KGEntry(name, description, source_file, line_number))
-                        except Exception as e:
-                            check_results["kg"]["issues"].append(f"Error parsing rules.json: {str(e)}")
+                    # Validate source links of all entries, listing each directory once
+                    checker = SourceFileChecker(project_root, file_index=file_index)
+                    for key, label in (("concepts", "Concept"), ("rules", "Rule"), ("relationships", "Relationship")):
+                        if not entries[key]:
+                            continue
+                        validation = validate_source_links(
+                            entries[key], project_root, check_tags=check_tags, checker=checker
+                        )
+                        if not validation.valid:
                             issues_found = True
+                            for warning in validation.warnings:
+                                check_results["kg"]["issues"].append(f"{label} source link issue: {warning}")
                     
-                    # Validate source links for both concepts and rules
-                    if concepts or rules:
-                        # Validate concepts
-                        if concepts:
-                            concept_validation = validate_source_links(concepts, project_root)
-                            if not concept_validation.valid:
-                                issues_found = True
-                                for warning in concept_validation.warnings:
-                                    check_results["kg"]["issues"].append(f"Concept source link issue: {warning}")
-                        
-                        # Validate rules
-                        if rules:
-                            rule_validation = validate_source_links(rules, project_root)
-                            if not rule_validation.valid:
-                                issues_found = True
-                                for warning in rule_validation.warnings:
-                                    check_results["kg"]["issues"].append(f"Rule source link issue: {warning}")
-                        
-                        # Set validation status
-                        if not check_results["kg"]["issues"]:
-                            check_results["kg"]["valid_links"] = True
+                    # Set validation status
+                    if any(entries.values()) and not check_results["kg"]["issues"]:
+                        check_results["kg"]["valid_links"] = True
+                    
+                    # Check referential integrity: dangling endpoints, duplicates, self-loops
+                    integrity = check_kg_integrity(entries["concepts"], entries["rules"], entries["relationships"])
+                    kg_integrity = integrity.to_dict()
+                    check_results["kg"]["integrity"] = integrity.valid
+                    if not integrity.valid:
+                        messages = [f"Integrity issue: {message}" for message in integrity.messages()]
+                        if strict_integrity:
+                            issues_found = True
+                            check_results["kg"]["issues"].extend(messages)
+                        else:
+                            warnings.extend(messages)
                         
                 except Exception as e:
                     check_results["kg"]["issues"].append(f"Error validating source links: {str(e)}")
@@ -292,8 +316,11 @@ def health(verbose: bool, json_output: bool, khora_env: Optional[str] = None):
             "total_checks": sum(len(r.keys()) - 1 for r in check_results.values()),  # -1 to exclude "issues" key
             "passed_checks": sum(sum(1 for k, v in r.items() if k != "issues" and v is True) for r in check_results.values()),
             "checks": check_results,
-            "issues_found": issues_found
+            "issues_found": issues_found,
+            "warnings": warnings,
         }
+        if kg_integrity is not None:
+            result["kg_integrity"] = kg_integrity
         import json  # Import json in local scope to avoid UnboundLocalError
         click.echo(json.dumps(result, indent=2))
         
@@ -323,6 +350,11 @@ def health(verbose: bool, json_output: bool, khora_env: Optional[str] = None):
         
         click.echo(f"\nHealth check summary: {passed_checks}/{total_checks} checks passed")
         
+        if warnings:
+            click.echo("⚠️  Warnings (use --strict-integrity to count them as issues):")
+            for warning in warnings:
+                click.echo(f"    * {warning}")
+        
         if issues_found:
             click.echo("❌ Issues were found in the project:")
             # Always show issues regardless of verbose flag
@@ -426,26 +458,22 @@ def inspect(out: Optional[str], json_output: bool, khora_env: Optional[str] = No
     # File structure analysis
     report.append("\n## File Structure Analysis")
     
-    # Calculate and add directory statistics
+    # Calculate and add directory statistics; the index prunes .git, virtualenvs,
+    # caches and anything excluded by .gitignore or .khoraignore
     total_files = 0
     file_types = {}
     python_files = []
+    file_index = ProjectFileIndex(project_root)
     
-    for root, dirs, files in os.walk(project_root):
-        # Skip .git, venv and other common non-project dirs
-        if any(skip_dir in root for skip_dir in [".git", "venv", ".venv", "__pycache__", ".pytest_cache"]):
-            continue
-            
-        for file in files:
-            total_files += 1
-            ext = os.path.splitext(file)[1].lower()
-            
-            if ext:
-                file_types[ext] = file_types.get(ext, 0) + 1
-            
-            if ext == ".py":
-                rel_path = os.path.relpath(os.path.join(root, file), project_root)
-                python_files.append(rel_path)
+    for rel_path in file_index.files():
+        total_files += 1
+        ext = os.path.splitext(rel_path)[1].lower()
+        
+        if ext:
+            file_types[ext] = file_types.get(ext, 0) + 1
+        
+        if ext == ".py":
+            python_files.append(rel_path)
     
     report.append(f"\n- Total files: {total_files}")
     report.append("\n- File types breakdown:")
@@ -476,8 +504,11 @@ def inspect(out: Optional[str], json_output: bool, khora_env: Optional[str] = No
     kg_dir = project_root / ".khora" / "kg"
     report.append("\n## Knowledge Graph Analysis")
     
-    if kg_dir.exists() and kg_dir.is_dir():
-        kg_files = list(kg_dir.glob("*.json"))
+    kg_files = [
+        name for name, is_dir in file_index.listing(".khora/kg").items()
+        if not is_dir and name.endswith(".json")
+    ]
+    if file_index.is_dir(".khora/kg"):
         report.append(f"\n- KG files found: {len(kg_files)}")
         
         # We could add more KG validation here in the future
@@ -507,15 +538,15 @@ def inspect(out: Optional[str], json_output: bool, khora_env: Optional[str] = No
         score += 20
     
     # Add points for KG
-    if kg_dir.exists() and kg_dir.is_dir() and list(kg_dir.glob("*.json")):
+    if kg_files:
         score += 20
     
     # Add points for CI
-    if (project_root / ".github" / "workflows").exists():
+    if file_index.exists(".github/workflows"):
         score += 10
     
     # Add points for Docker setup
-    if (project_root / "docker-compose.yml").exists():
+    if file_index.exists("docker-compose.yml"):
         score += 10
     
     # Final score calculation
@@ -528,9 +559,9 @@ def inspect(out: Optional[str], json_output: bool, khora_env: Optional[str] = No
     report.append("\n## Recommendations")
     if not khora_config_found:
         report.append("\n- Add a [tool.khora] section to pyproject.toml")
-    if not (project_root / ".khora" / "context.yaml").exists():
+    if not file_index.exists(".khora/context.yaml"):
         report.append("\n- Create a .khora/context.yaml file")
-    if not (project_root / ".github" / "workflows").exists() and khora_config_found:
+    if not file_index.exists(".github/workflows") and khora_config_found:
         report.append("\n- Enable CI with `[tool.khora.features].ci_github_actions = true`")
     
     # Prepare and output the report
@@ -774,6 +805,967 @@ def list_plugins(installed: bool, pypi: bool, verbose: bool):
         click.echo("")
 
 
+@main_cli.group()
+def kg():
+    """Query and maintain the project's Knowledge Graph."""
+    pass
+
+
+def _echo_kg_entries(entries: List[Dict[str, Any]]) -> None:
+    """Print KG entries (in to_dict form plus a "kind" key) one per line."""
+    for entry in entries:
+        source = entry.get("source", {})
+        location = f"{source.get('file', '')}:{source.get('line', 0)}"
+        if entry["kind"] == "relationship":
+            label = f"{entry['source_concept']} -> {entry['target_concept']} [{entry['relation_type']}]"
+        else:
+            label = entry["name"]
+        click.echo(f"{entry['kind']:<12} {label} - {entry['description']} ({location})")
+
+
+@kg.command()
+@click.option("--name", help="Find concepts/rules with exactly this name")
+@click.option("--prefix", help="Find concepts/rules whose name starts with this prefix")
+@click.option("--text", help="Full-text search over names and descriptions")
+@click.option("--touching", help="Find all relationships whose source or target is this concept")
+@click.option("--file", "source_file", help="Find concepts/rules defined in this source file")
+@click.option("--relation-type", help="Restrict relationships to this type (alone: list all of this type)")
+@click.option(
+    "--kind",
+    type=click.Choice(["concept", "rule", "all"]),
+    default="all",
+    show_default=True,
+    help="Entry kind for --name, --prefix and --file lookups",
+)
+@click.option("--limit", type=int, default=50, show_default=True, help="Maximum number of results")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def query(
+    name: Optional[str],
+    prefix: Optional[str],
+    text: Optional[str],
+    touching: Optional[str],
+    source_file: Optional[str],
+    relation_type: Optional[str],
+    kind: str,
+    limit: int,
+    json_output: bool,
+):
+    """
+    Look up Knowledge Graph entries through the SQLite index.
+    
+    Uses kg/index.sqlite, (re)building it from the kg/*.json files first if it
+    is missing or out of date. Exactly one lookup option must be given.
+    """
+    from khora_kernel_vnext.extensions.kg.index import KGIndex, ensure_sqlite_index
+    
+    lookups = {
+        "name": name,
+        "prefix": prefix,
+        "text": text,
+        "touching": touching,
+        "file": source_file,
+    }
+    selected = [key for key, value in lookups.items() if value is not None]
+    if not selected and relation_type:
+        selected = ["relation_type"]
+    if len(selected) != 1:
+        click.echo(
+            "Error: specify exactly one of --name, --prefix, --text, --touching, --file "
+            "(or --relation-type alone)",
+            err=True,
+        )
+        sys.exit(1)
+    
+    project_root = find_project_root()
+    if not (project_root / "kg").is_dir():
+        click.echo(f"Error: no kg directory found in {project_root}", err=True)
+        sys.exit(1)
+    
+    started = datetime.datetime.now()
+    index_file = ensure_sqlite_index(project_root)
+    kinds = ("concept", "rule") if kind == "all" else (kind,)
+    
+    with KGIndex(index_file) as index:
+        lookup = selected[0]
+        if lookup == "name":
+            results = index.find_by_name(name, kinds, limit)
+        elif lookup == "prefix":
+            results = index.find_by_prefix(prefix, kinds, limit)
+        elif lookup == "text":
+            results = index.search(text, limit)
+        elif lookup == "touching":
+            results = index.relationships_touching(touching, relation_type, limit)
+        elif lookup == "file":
+            results = index.find_by_source_file(source_file, kinds, limit)
+        else:
+            results = index.relationships_of_type(relation_type, limit)
+    
+    elapsed_ms = (datetime.datetime.now() - started).total_seconds() * 1000
+    
+    if json_output:
+        click.echo(json.dumps({
+            "query": {lookup: lookups.get(lookup, relation_type)},
+            "count": len(results),
+            "elapsed_ms": round(elapsed_ms, 3),
+            "results": results,
+        }, indent=2))
+    else:
+        if not results:
+            click.echo("No matching entries found.")
+        else:
+            _echo_kg_entries(results)
+            click.echo(f"\n{len(results)} result(s) in {elapsed_ms:.1f} ms")
+
+
+def _load_kg_graph(project_root: Path):
+    """Build the relationship graph of a project from its KG files, exiting on error."""
+    from khora_kernel_vnext.extensions.kg.extension import load_kg_files
+    from khora_kernel_vnext.extensions.kg.graph import KGGraph
+    from khora_kernel_vnext.extensions.kg.snapshot import open_kg_snapshot
+    
+    if not (project_root / "kg").is_dir():
+        click.echo(f"Error: no kg directory found in {project_root}", err=True)
+        sys.exit(1)
+    
+    # The snapshot's edge arrays build the graph without decoding descriptions
+    snapshot = open_kg_snapshot(project_root)
+    if snapshot is not None:
+        with snapshot:
+            return KGGraph.from_snapshot(snapshot)
+    try:
+        concepts, _, relationships = load_kg_files(project_root)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: could not load KG files: {e}", err=True)
+        sys.exit(1)
+    return KGGraph.from_relationships(relationships, (c.name for c in concepts))
+
+
+def _require_concepts(graph, *names: str) -> None:
+    """Exit with an error if any of the given concepts is not in the graph."""
+    for name in names:
+        if name not in graph:
+            click.echo(f"Error: unknown concept '{name}'", err=True)
+            sys.exit(1)
+
+
+@kg.command()
+@click.argument("concept")
+@click.option(
+    "--direction",
+    type=click.Choice(["out", "in", "both"]),
+    default="out",
+    show_default=True,
+    help="Follow outgoing edges, incoming edges, or both",
+)
+@click.option("--relation-type", help="Only follow relationships of this type")
+@click.option("--depth", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Include concepts up to this many hops away")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def neighbors(concept: str, direction: str, relation_type: Optional[str], depth: int, json_output: bool):
+    """List the concepts related to CONCEPT, optionally transitively."""
+    graph = _load_kg_graph(find_project_root())
+    _require_concepts(graph, concept)
+    
+    found = list(graph.bfs(concept, direction, relation_type, max_depth=depth))
+    
+    if json_output:
+        click.echo(json.dumps({
+            "concept": concept,
+            "direction": direction,
+            "relation_type": relation_type,
+            "neighbors": [{"name": name, "depth": hops} for name, hops in found],
+            "count": len(found),
+        }, indent=2))
+    elif not found:
+        click.echo(f"'{concept}' has no related concepts.")
+    else:
+        for name, hops in found:
+            click.echo(f"{name} (depth {hops})" if depth > 1 else name)
+
+
+@kg.command(name="path")
+@click.argument("source")
+@click.argument("target")
+@click.option("--relation-type", help="Only follow relationships of this type")
+@click.option("--undirected", is_flag=True, default=False, help="Ignore relationship direction")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def kg_path(source: str, target: str, relation_type: Optional[str], undirected: bool, json_output: bool):
+    """Show a shortest chain of relationships from SOURCE to TARGET."""
+    graph = _load_kg_graph(find_project_root())
+    _require_concepts(graph, source, target)
+    
+    found = graph.shortest_path(source, target, "both" if undirected else "out", relation_type)
+    
+    if json_output:
+        click.echo(json.dumps({
+            "source": source,
+            "target": target,
+            "path": found,
+            "length": len(found) - 1 if found else None,
+        }, indent=2))
+    elif found is None:
+        click.echo(f"No path from '{source}' to '{target}'.")
+    else:
+        click.echo(" -> ".join(found))
+
+
+@kg.command()
+@click.option("--relation-type", help="Only consider relationships of this type")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def cycles(relation_type: Optional[str], json_output: bool):
+    """
+    Report cyclic relationship chains.
+    
+    One shortest cycle is shown for each group of mutually reachable concepts.
+    Exits with status 1 if any cycle is found.
+    """
+    graph = _load_kg_graph(find_project_root())
+    found = graph.find_cycles(relation_type)
+    
+    if json_output:
+        click.echo(json.dumps({
+            "relation_type": relation_type,
+            "cycles": found,
+            "count": len(found),
+        }, indent=2))
+    elif not found:
+        click.echo("No cycles found.")
+    else:
+        for cycle in found:
+            click.echo(" -> ".join(cycle + cycle[:1]))
+    
+    if found:
+        sys.exit(1)
+
+
+@kg.command()
+@click.argument("pattern")
+@click.option("--limit", type=click.IntRange(min=0), help="Stop after this many matches")
+@click.option("--explain", is_flag=True, default=False, help="Print the join plan instead of running the query")
+def match(pattern: str, limit: Optional[int], explain: bool):
+    """
+    Find concepts matching a relationship PATTERN, one JSON object per line.
+
+    \b
+    Example:
+        khora kg match '(a)-[DependsOn]->(b)-[Extends]->(c) where c = "BaseService"'
+
+    \b
+    Edges are -[T]-> (forwards), <-[T]- (backwards) or -[T]- (either way);
+    [A|B] accepts several types and [] any type. Comma-separated chains must
+    all match. Conditions after 'where' are joined by 'and': v = "X", v != "X",
+    v in ("X", "Y"), v =~ "regex", v = w and v != w.
+    """
+    from khora_kernel_vnext.extensions.kg.match import PatternError, PatternMatcher, parse_pattern
+
+    try:
+        parsed = parse_pattern(pattern)
+    except PatternError as e:
+        click.echo(f"Error: invalid pattern: {e}", err=True)
+        sys.exit(1)
+
+    graph = _load_kg_graph(find_project_root())
+    unknown = sorted({t for edge in parsed.edges for t in edge.types or () if t not in graph.relation_types})
+    if unknown:
+        click.echo(f"Warning: unknown relation type(s): {', '.join(unknown)}", err=True)
+
+    matcher = PatternMatcher(graph)
+    if explain:
+        for number, step in enumerate(matcher.explain(parsed), 1):
+            click.echo(f"{number}. {step}")
+        return
+    for found in matcher.match(parsed, limit):
+        click.echo(json.dumps(found))
+
+
+@kg.command()
+@click.argument("old")
+@click.argument("new")
+@click.option("--dry-run", is_flag=True, default=False, help="List the files that would change without writing them")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def rename(old: str, new: str, dry_run: bool, json_output: bool):
+    """
+    Rename concept OLD to NEW in every [concept:...] and [rel:...] tag.
+
+    Only the markdown files whose tags name OLD are rewritten, each atomically,
+    and the KG entries of those files are updated in place. Mentions of OLD in
+    descriptions and running text are not changed. Exits with status 1 if no
+    tag names OLD.
+    """
+    from khora_kernel_vnext.extensions.kg.rename import rename_concept
+
+    project_root = find_project_root()
+    docs_dir, kg_config = _kg_settings(project_root)
+    try:
+        result = rename_concept(
+            project_root, old, new, docs_dir=docs_dir, jobs=kg_config.jobs, dry_run=dry_run,
+            source_dirs=kg_config.source_dirs, extractors=kg_config.extractors,
+        )
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    if json_output:
+        click.echo(json.dumps({
+            "old": old,
+            "new": new,
+            "dry_run": dry_run,
+            "files": result.files,
+            "occurrences": result.occurrences,
+            "kg_updated": result.kg_updated,
+            "elapsed_ms": round(result.elapsed * 1000, 1),
+        }, indent=2))
+    elif not result.files:
+        click.echo(f"No tags name '{old}'.")
+    else:
+        for path in result.files:
+            click.echo(path)
+        verb = "Would rename" if dry_run else "Renamed"
+        click.echo(
+            f"{verb} {result.occurrences} occurrence(s) of '{old}' in {len(result.files)} file(s) "
+            f"in {result.elapsed * 1000:.0f} ms."
+        )
+    if not result.files:
+        sys.exit(1)
+
+
+@kg.command()
+@click.option(
+    "--threshold",
+    type=click.FloatRange(0, 1),
+    default=DEFAULT_COMPACT_THRESHOLD,
+    show_default=True,
+    help="Compact a log once more than this fraction of its records is dead",
+)
+@click.option("--force", is_flag=True, default=False, help="Compact every log that has dead records")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def compact(threshold: float, force: bool, json_output: bool):
+    """
+    Rewrite JSON Lines KG logs without their dead records.
+    
+    Applies to a KG stored with [tool.khora.plugins_config.kg] format = "jsonl".
+    """
+    project_root = find_project_root()
+    try:
+        results = compact_kg_logs(project_root, threshold, force=force)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: could not compact KG logs: {e}", err=True)
+        sys.exit(1)
+    
+    if json_output:
+        click.echo(json.dumps({"logs": results}, indent=2))
+    elif not results:
+        click.echo("No JSON Lines KG logs found in kg/.")
+    else:
+        for result in results:
+            status = "compacted" if result["compacted"] else "kept"
+            click.echo(
+                f"{result['file']}: {result['live']} live, {result['dead']} dead "
+                f"({result['dead_ratio']:.0%}) - {status}"
+            )
+
+
+@kg.command()
+@click.argument("source")
+@click.argument("target", required=False)
+@click.option("--relation-type", required=True, help="Relation type to follow, e.g. DependsOn")
+@click.option("--upstream", is_flag=True, default=False,
+              help="Without TARGET, list the concepts that reach SOURCE instead")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def reach(source: str, target: Optional[str], relation_type: str, upstream: bool, json_output: bool):
+    """
+    Check whether SOURCE eventually reaches TARGET, or list everything downstream of SOURCE.
+
+    Answers come from kg/reachability.npz, a transitive-closure index per
+    relation type that is built on first use for RELATION_TYPE. Set
+    reachability_types in [tool.khora.plugins_config.kg] to maintain it with
+    the KG files. With TARGET, exits with status 1 if there is no chain of
+    relationships from SOURCE to TARGET. Requires NumPy.
+    """
+    from khora_kernel_vnext.extensions.kg.reachability import ensure_reachability_index
+
+    project_root = find_project_root()
+    if not (project_root / "kg").is_dir():
+        click.echo(f"Error: no kg directory found in {project_root}", err=True)
+        sys.exit(1)
+
+    try:
+        index = ensure_reachability_index(project_root, [relation_type])
+    except ImportError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: could not build the KG reachability index: {e}", err=True)
+        sys.exit(1)
+    if relation_type in index.skipped:
+        click.echo(
+            f"Error: {relation_type} is too large to index ({index.skipped[relation_type]['reason']}); "
+            f"use 'khora kg path' instead",
+            err=True,
+        )
+        sys.exit(1)
+
+    if target is not None:
+        reachable = index.reaches(source, target, relation_type)
+        if json_output:
+            click.echo(json.dumps({
+                "source": source,
+                "target": target,
+                "relation_type": relation_type,
+                "reachable": reachable,
+            }, indent=2))
+        else:
+            verb = "reaches" if reachable else "does not reach"
+            click.echo(f"'{source}' {verb} '{target}' via {relation_type}.")
+        if not reachable:
+            sys.exit(1)
+        return
+
+    found = index.upstream(source, relation_type) if upstream else index.downstream(source, relation_type)
+    if json_output:
+        click.echo(json.dumps({
+            "concept": source,
+            "relation_type": relation_type,
+            "direction": "upstream" if upstream else "downstream",
+            "concepts": found,
+            "count": len(found),
+        }, indent=2))
+    elif not found:
+        click.echo(f"Nothing is {'upstream' if upstream else 'downstream'} of '{source}' via {relation_type}.")
+    else:
+        for name in found:
+            click.echo(name)
+
+
+@kg.command()
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def snapshot(json_output: bool):
+    """
+    Write kg/kg.bin, a memory-mapped snapshot of the KG, if it is missing or stale.
+    
+    Set [tool.khora.plugins_config.kg] snapshot = true to keep it updated on
+    every extraction.
+    """
+    from khora_kernel_vnext.extensions.kg.snapshot import KGSnapshot, ensure_kg_snapshot
+    
+    project_root = find_project_root()
+    if not (project_root / "kg").is_dir():
+        click.echo(f"Error: no kg directory found in {project_root}", err=True)
+        sys.exit(1)
+    try:
+        path = ensure_kg_snapshot(project_root)
+        with KGSnapshot(path) as written:
+            counts = written.metadata.get("counts", {})
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: could not write KG snapshot: {e}", err=True)
+        sys.exit(1)
+    
+    if json_output:
+        click.echo(json.dumps({"path": str(path), "size": path.stat().st_size, "counts": counts}, indent=2))
+    else:
+        click.echo(
+            f"{path}: {counts.get('concepts', 0)} concepts, {counts.get('rules', 0)} rules, "
+            f"{counts.get('relationships', 0)} relationships ({path.stat().st_size} bytes)"
+        )
+
+
+def _kg_settings(project_root: Path):
+    """Return the docs directory and [tool.khora.plugins_config.kg] settings, or their defaults."""
+    from khora_kernel_vnext.extensions.core.manifest import KhoraKGPluginConfig, KhoraPathsConfig
+
+    try:
+        config = KhoraManifestConfig.from_project_toml(project_root)
+        return config.paths.docs_dir or KhoraPathsConfig().docs_dir, config.plugins_config.kg
+    except (KhoraManifestNotFoundError, KhoraManifestInvalidError):
+        return KhoraPathsConfig().docs_dir, KhoraKGPluginConfig()
+
+
+@kg.command()
+@click.option(
+    "--debounce",
+    type=click.IntRange(min=0),
+    default=50,
+    show_default=True,
+    help="Milliseconds without further changes that end a burst of edits",
+)
+@click.option("--poll", is_flag=True, default=False, help="Poll for changes even where inotify is available")
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.01),
+    default=0.5,
+    show_default=True,
+    help="Seconds between scans when polling",
+)
+def watch(debounce: int, poll: bool, interval: float):
+    """
+    Keep the KG files current while the docs change.
+
+    Extracts the whole KG once, then re-extracts only the markdown files that
+    change and rewrites the affected kg/ files. The enabled derived artifacts
+    and the knowledge_graph_summary in .khora/context.yaml are refreshed once
+    the edits pause. Stop with Ctrl-C.
+    """
+    from khora_kernel_vnext.extensions.kg.watch import KGWatcher
+
+    project_root = find_project_root()
+    docs_dir, kg_config = _kg_settings(project_root)
+    enabled = {
+        "snapshot": kg_config.snapshot,
+        "similarity_index": kg_config.similarity_index,
+        "modules": kg_config.modules,
+        "reachability": bool(kg_config.reachability_types),
+    }
+    watcher = KGWatcher(
+        project_root, docs_dir, file_format=kg_config.format, debounce=debounce / 1000,
+        use_inotify=not poll, poll_interval=interval, jobs=kg_config.jobs,
+        source_dirs=kg_config.source_dirs, extractors=kg_config.extractors,
+        artifacts=[name for name, on in enabled.items() if on],
+    )
+    try:
+        watcher.start()
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: could not extract the KG: {e}", err=True)
+        sys.exit(1)
+
+    def report(update) -> None:
+        files = ", ".join(update.files)
+        written = ", ".join(update.written) or "no files"
+        click.echo(f"Updated {written} in {update.elapsed * 1000:.1f} ms ({files})")
+
+    click.echo(f"Watching {watcher.docs_dir} ({watcher.backend_name}); press Ctrl-C to stop")
+    try:
+        watcher.run(on_update=report)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def _open_kg_history(project_root: Path):
+    """Open the KG history of a project, exiting on error."""
+    from khora_kernel_vnext.extensions.kg.history import KGHistory
+
+    docs_dir, kg_config = _kg_settings(project_root)
+    try:
+        return KGHistory(
+            project_root, docs_dir, source_dirs=kg_config.source_dirs, extractors=kg_config.extractors
+        )
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: cannot read the git history of {project_root}: {e}", err=True)
+        sys.exit(1)
+
+
+@kg.command(name="at")
+@click.argument("rev")
+@click.option(
+    "--out",
+    type=click.Path(file_okay=False),
+    help="Write the KG files of REV to OUT/kg instead of printing a summary",
+)
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def kg_at(rev: str, out: Optional[str], json_output: bool):
+    """
+    Show the KG as it was at revision REV.
+    
+    The markdown files are read from the git object store, so nothing is
+    checked out; file contents parsed before (at any revision) are not parsed again.
+    """
+    from khora_kernel_vnext.extensions.kg.extension import generate_kg_files
+    
+    with _open_kg_history(find_project_root()) as history:
+        try:
+            commit = history.resolve(rev)
+            concepts, rules, relationships = history.entries_at(commit)
+        except (OSError, ValueError) as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        parsed = history.parsed
+    
+    counts = {"concepts": len(concepts), "rules": len(rules), "relationships": len(relationships)}
+    if out:
+        Path(out).mkdir(parents=True, exist_ok=True)
+        generate_kg_files(Path(out), concepts, rules, relationships)
+    
+    if json_output:
+        result: Dict[str, Any] = {"rev": rev, "commit": commit, "counts": counts, "parsed_blobs": parsed}
+        if out:
+            result["out"] = str(Path(out) / "kg")
+        else:
+            result.update({
+                "concepts": [entry.to_dict() for entry in concepts],
+                "rules": [entry.to_dict() for entry in rules],
+                "relationships": [entry.to_dict() for entry in relationships],
+            })
+        click.echo(json.dumps(result, indent=2))
+    else:
+        click.echo(
+            f"KG at {commit[:12]}: {counts['concepts']} concepts, {counts['rules']} rules, "
+            f"{counts['relationships']} relationships ({parsed} files parsed)"
+        )
+        if out:
+            click.echo(f"Wrote the KG files to {Path(out) / 'kg'}")
+
+
+@kg.command(name="log")
+@click.argument("revision_range", required=False)
+@click.option("-n", "--max-count", type=click.IntRange(min=1), help="Only the most recent N commits that changed docs")
+@click.option("--entries", "show_entries", is_flag=True, default=False, help="List the added and removed entries")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def kg_log(revision_range: Optional[str], max_count: Optional[int], show_entries: bool, json_output: bool):
+    """
+    Show how each commit changed the KG, oldest first.
+    
+    REVISION_RANGE is anything git log accepts (default HEAD). Only the blobs
+    the commits changed are read from the git object store.
+    """
+    with _open_kg_history(find_project_root()) as history:
+        try:
+            deltas = history.log(revision_range, max_count)
+        except (OSError, ValueError) as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        parsed = history.parsed
+    
+    if json_output:
+        click.echo(json.dumps({
+            "commits": [delta.to_dict() for delta in deltas],
+            "count": len(deltas),
+            "parsed_blobs": parsed,
+        }, indent=2))
+        return
+    
+    for delta in deltas:
+        date = datetime.datetime.fromtimestamp(delta.timestamp).strftime("%Y-%m-%d")
+        changes = ", ".join(
+            f"+{len(delta.added[key])}/-{len(delta.removed[key])} {key}"
+            for key in ("concepts", "rules", "relationships")
+            if delta.added[key] or delta.removed[key]
+        )
+        click.echo(f"{delta.commit[:12]} {date} {delta.subject}: {changes or 'no KG changes'}")
+        if show_entries:
+            for sign, entries_by_key in (("+", delta.added), ("-", delta.removed)):
+                for key, entries in entries_by_key.items():
+                    for entry in entries:
+                        if isinstance(entry, RelationshipEntry):
+                            label = f"{entry.source_concept} -> {entry.target_concept} [{entry.relation_type}]"
+                        else:
+                            label = entry.name
+                        click.echo(f"    {sign} {key[:-1]:<12} {label} ({entry.source_file})")
+
+
+@kg.command(name="diff")
+@click.argument("old")
+@click.argument("new", default=".")
+@click.option(
+    "--exit-code",
+    is_flag=True,
+    default=False,
+    help="Exit with status 1 if the KGs differ",
+)
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def kg_diff(old: str, new: str, exit_code: bool, json_output: bool):
+    """
+    Show the concepts, rules and relationships added, removed or modified between two KGs.
+
+    OLD and NEW are each a directory holding generated KG files (a project
+    directory with kg/, or kg/ itself) or a git revision, whose KG is
+    extracted from the git object store. NEW defaults to the current
+    directory. Entries are matched by name (relationships by source, target
+    and type); an entry that only moved to another line is unchanged.
+    """
+    from khora_kernel_vnext.extensions.kg.diff import diff_kg, load_kg_source
+
+    project_root = find_project_root()
+    history = None
+    try:
+        if not (Path(old).is_dir() and Path(new).is_dir()):
+            history = _open_kg_history(project_root)
+        old_entries = load_kg_source(old, history)
+        new_entries = load_kg_source(new, history)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    finally:
+        if history is not None:
+            history.close()
+
+    result = diff_kg(old_entries, new_entries)
+    if json_output:
+        click.echo(json.dumps({"old": old, "new": new, **result.to_dict()}, indent=2))
+    else:
+        for key, counts in result.counts().items():
+            click.echo(f"{key}: +{counts['added']} added, -{counts['removed']} removed, ~{counts['modified']} modified")
+        for key in ("concepts", "rules", "relationships"):
+            for sign, changes in (("+", result.added[key]), ("-", result.removed[key])):
+                for entry_id, entry in changes:
+                    click.echo(f"  {sign} {entry_id} ({entry.source_file})")
+            for entry_id, old_entry, new_entry in result.modified[key]:
+                if old_entry.source_file != new_entry.source_file:
+                    location = f"{old_entry.source_file} -> {new_entry.source_file}"
+                else:
+                    location = new_entry.source_file
+                click.echo(f"  ~ {entry_id} ({location})")
+
+    if exit_code and not result.is_empty:
+        sys.exit(1)
+
+
+@kg.command()
+@click.option(
+    "--threshold",
+    type=click.FloatRange(0, 1, min_open=True),
+    default=0.7,
+    show_default=True,
+    help="Minimum estimated Jaccard similarity of two descriptions",
+)
+@click.option(
+    "--num-perm",
+    type=click.IntRange(min=8),
+    default=128,
+    show_default=True,
+    help="MinHash signature length; longer is more accurate and slower",
+)
+@click.option("--shingle-size", type=click.IntRange(min=1), default=5, show_default=True, help="Characters per shingle")
+@click.option("--limit", type=int, default=50, show_default=True, help="Maximum number of clusters to show")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def dedupe(threshold: float, num_perm: int, shingle_size: int, limit: int, json_output: bool):
+    """
+    Find concepts and rules whose descriptions are near-duplicates.
+
+    Catches the same concept described under different names and copies of a
+    description that drifted apart. Uses MinHash signatures with LSH banding,
+    so it stays fast on large KGs. Requires NumPy.
+    """
+    from khora_kernel_vnext.extensions.kg.dedupe import find_near_duplicates
+    from khora_kernel_vnext.extensions.kg.extension import load_kg_files
+
+    project_root = find_project_root()
+    if not (project_root / "kg").is_dir():
+        click.echo(f"Error: no kg directory found in {project_root}", err=True)
+        sys.exit(1)
+
+    try:
+        concepts, rules, _ = load_kg_files(project_root)
+        start = time.perf_counter()
+        clusters = find_near_duplicates(concepts, rules, threshold, num_perm, shingle_size)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    except ImportError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: could not load KG files: {e}", err=True)
+        sys.exit(1)
+
+    if json_output:
+        click.echo(json.dumps({
+            "threshold": threshold,
+            "entries": len(concepts) + len(rules),
+            "cluster_count": len(clusters),
+            "clusters": [cluster.to_dict() for cluster in clusters[:limit]],
+        }, indent=2))
+        return
+
+    for number, cluster in enumerate(clusters[:limit], 1):
+        click.echo(
+            f"Cluster {number}: {len(cluster.entries)} entries, "
+            f"similarity {cluster.min_similarity:.2f}-{cluster.max_similarity:.2f}"
+        )
+        for kind, entry in cluster.entries:
+            click.echo(f"  {kind:<8} {entry.name} ({entry.source_file}:{entry.line_number})")
+    click.echo(
+        f"\n{len(clusters)} near-duplicate cluster(s) among {len(concepts) + len(rules)} "
+        f"entries in {elapsed_ms:.1f} ms"
+    )
+
+
+@kg.command()
+@click.argument("name")
+@click.option("--top", type=click.IntRange(min=1), default=10, show_default=True, help="Number of results")
+@click.option("--kind", type=click.Choice(["concept", "rule"]), help="Only look up a concept or a rule named NAME")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def similar(name: str, top: int, kind: Optional[str], json_output: bool):
+    """
+    List the concepts and rules whose descriptions are most similar to NAME's.
+
+    Ranks by TF-IDF cosine similarity of names and descriptions, computed
+    locally from kg/similarity.npz. The index is built (or brought up to date)
+    on first use; set similarity_index = true in [tool.khora.plugins_config.kg]
+    to maintain it with the KG files. Requires NumPy.
+    """
+    from khora_kernel_vnext.extensions.kg.similarity import ensure_similarity_index
+
+    project_root = find_project_root()
+    if not (project_root / "kg").is_dir():
+        click.echo(f"Error: no kg directory found in {project_root}", err=True)
+        sys.exit(1)
+
+    try:
+        index = ensure_similarity_index(project_root)
+    except ImportError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: could not build the KG similarity index: {e}", err=True)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    rows = index.find(name, kind)
+    if not rows:
+        click.echo(f"Error: unknown {kind or 'concept or rule'} '{name}'", err=True)
+        sys.exit(1)
+    matches = index.similar(rows[0], top)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if json_output:
+        click.echo(json.dumps({
+            "query": index.entry(rows[0]),
+            "results": [{"score": round(score, 4), **index.entry(row)} for row, score in matches],
+        }, indent=2))
+        return
+
+    for row, score in matches:
+        entry = index.entry(row)
+        click.echo(f"{score:.3f}  {entry['kind']:<8} {entry['name']} ({entry['source']['file']}:{entry['source']['line']})")
+    click.echo(f"\n{len(matches)} result(s) in {elapsed_ms:.1f} ms")
+
+
+@kg.command()
+@click.option("--limit", type=int, default=20, show_default=True, help="Maximum number of modules to show")
+@click.option("--members", type=int, default=8, show_default=True, help="Members to list per module")
+@click.option(
+    "--json-output",
+    is_flag=True,
+    default=False,
+    help="Output results in JSON format for AI consumption",
+)
+def communities(limit: int, members: int, json_output: bool):
+    """
+    Group concepts into modules by their relationships.
+
+    Runs label propagation over the relationship graph and writes the modules
+    to kg/modules.json, where they are kept until the relationships change.
+    Set modules = true in [tool.khora.plugins_config.kg] to maintain the file
+    with the KG files. Requires NumPy.
+    """
+    from khora_kernel_vnext.extensions.kg.communities import read_modules, write_modules
+    from khora_kernel_vnext.extensions.kg.extension import (
+        RelationshipEntry,
+        iter_kg_entries,
+        update_context_summary,
+    )
+
+    project_root = find_project_root()
+    if not (project_root / "kg").is_dir():
+        click.echo(f"Error: no kg directory found in {project_root}", err=True)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    document = read_modules(project_root)
+    cached = document is not None
+    if document is None:
+        try:
+            relationships = [
+                RelationshipEntry.from_dict(r) for r in iter_kg_entries(project_root, "relationships")
+            ]
+            document = write_modules(project_root, relationships)
+        except ImportError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        except (OSError, ValueError) as e:
+            click.echo(f"Error: could not detect KG modules: {e}", err=True)
+            sys.exit(1)
+        update_context_summary(project_root)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if json_output:
+        click.echo(json.dumps({
+            "module_count": document["module_count"],
+            "concept_count": document["concept_count"],
+            "cached": cached,
+            "modules": [
+                {**module, "members": module["members"][:members]}
+                for module in document["modules"][:limit]
+            ],
+        }, indent=2))
+        return
+
+    for module in document["modules"][:limit]:
+        listed = module["members"][:members]
+        more = f", ... (+{module['size'] - len(listed)})" if module["size"] > len(listed) else ""
+        click.echo(f"Module {module['id']}: {module['name']} ({module['size']} concepts)")
+        click.echo(f"  {', '.join(listed)}{more}")
+    source = "read from kg/modules.json" if cached else "computed"
+    click.echo(
+        f"\n{document['module_count']} module(s) over {document['concept_count']} concepts, "
+        f"{source} in {elapsed_ms:.1f} ms"
+    )
+
+
 def find_installed_plugins(verbose: bool = False) -> List[Dict[str, Any]]:
     """
     Find locally installed Khora plugins.
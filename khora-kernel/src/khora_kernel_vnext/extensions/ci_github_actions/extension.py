@@ -113,9 +113,11 @@ def add_ci_workflow_file(
     # Generate context-delta.yml workflow for KG feature
     context_delta_template = get_template("context_delta_yml", relative_to="khora_kernel_vnext.extensions.ci_github_actions")
     
+    docs_dir = getattr(getattr(khora_config, "paths", None), "docs_dir", None) or "docs"
     context_delta_content = context_delta_template.substitute(
         python_version=python_version,
         project_name=project_name,
+        docs_dir=Path(docs_dir).as_posix(),
         HOME_PATH="$HOME",
         GITHUB_PATH="$GITHUB_PATH"
     )
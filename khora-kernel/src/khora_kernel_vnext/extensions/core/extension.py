@@ -127,8 +127,12 @@ class CoreExtension(Extension):
         """
         Generate the knowledge graph summary for context.yaml.
         
-        This method checks for kg/concepts.json and kg/rules.json files,
-        and if they exist, calculates summary information for them.
+        This method summarizes the kg/*.json files using the kg/manifest.json
+        sidecar written alongside them (falling back to reading files it does
+        not cover), or the extraction results in opts if there are no KG files.
+        If NumPy is installed, the summary also lists the key concepts: the
+        most central concepts of the relationship graph (see kg/centrality.py).
+        Current kg/modules.json module assignments are summarized as well.
         
         Args:
             project_path: Path to the project root
@@ -137,8 +141,7 @@ class CoreExtension(Extension):
             Dictionary with KG summary information
         """
         try:
-            concepts_file = project_path / "kg" / "concepts.json"
-            rules_file = project_path / "kg" / "rules.json"
+            from khora_kernel_vnext.extensions.kg.extension import summarize_kg_files
             
             # Default values
             kg_summary = {
@@ -153,85 +156,23 @@ class CoreExtension(Extension):
                 "last_updated": None
             }
             
-            # Process concepts file if it exists
-            if concepts_file.exists():
-                try:
-                    import json
-                    from hashlib import sha1
-                    
-                    concepts_data = json.loads(concepts_file.read_text(encoding="utf-8"))
-                    concepts = concepts_data.get("concepts", [])
-                    
-                    kg_summary["concept_count"] = len(concepts)
-                    kg_summary["concepts_hash"] = sha1(json.dumps(concepts, sort_keys=True).encode()).hexdigest()
-                    kg_summary["last_updated"] = concepts_data.get("generated_at")
-                    
-                    logger.info(f"Found {len(concepts)} concepts in {concepts_file}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error processing concepts.json - invalid JSON: {e}")
-                    return "Error generating knowledge graph summary"
-                except Exception as e:
-                    logger.error(f"Error processing concepts.json: {e}")
-                    return "Error generating knowledge graph summary"
+            try:
+                file_summary = summarize_kg_files(project_path)
+            except ValueError as e:
+                logger.error(f"Error processing knowledge graph files - invalid JSON: {e}")
+                return "Error generating knowledge graph summary"
+            except Exception as e:
+                logger.error(f"Error processing knowledge graph files: {e}")
+                return "Error generating knowledge graph summary"
             
-            # Process rules file if it exists
-            if rules_file.exists():
-                try:
-                    import json
-                    from hashlib import sha1
-                    
-                    rules_data = json.loads(rules_file.read_text(encoding="utf-8"))
-                    rules = rules_data.get("rules", [])
-                    
-                    kg_summary["rule_count"] = len(rules)
-                    kg_summary["rules_hash"] = sha1(json.dumps(rules, sort_keys=True).encode()).hexdigest()
-                    
-                    # Use rules last_updated if no concepts or if rules are newer
-                    rules_updated = rules_data.get("generated_at")
-                    if rules_updated and (not kg_summary["last_updated"] or rules_updated > kg_summary["last_updated"]):
-                        kg_summary["last_updated"] = rules_updated
-                    
-                    logger.info(f"Found {len(rules)} rules in {rules_file}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error processing rules.json - invalid JSON: {e}")
-                    return "Error generating knowledge graph summary"
-                except Exception as e:
-                    logger.error(f"Error processing rules.json: {e}")
-                    return "Error generating knowledge graph summary"
-                    
-            # Process relationships file if it exists
-            relationships_file = project_path / "kg" / "relationships.json"
-            if relationships_file.exists():
-                try:
-                    import json
-                    from hashlib import sha1
-                    
-                    relationships_data = json.loads(relationships_file.read_text(encoding="utf-8"))
-                    relationships = relationships_data.get("relationships", [])
-                    
-                    kg_summary["relationship_count"] = len(relationships)
-                    kg_summary["relationships_hash"] = sha1(json.dumps(relationships, sort_keys=True).encode()).hexdigest()
-                    
-                    # Extract unique relationship types
-                    if relationships:
-                        relation_types = set()
-                        for rel in relationships:
-                            if "relation_type" in rel:
-                                relation_types.add(rel["relation_type"])
-                        kg_summary["relationship_types"] = sorted(list(relation_types))
-                    
-                    # Use relationships last_updated if it's newer than concepts and rules
-                    relationships_updated = relationships_data.get("generated_at")
-                    if relationships_updated and (not kg_summary["last_updated"] or relationships_updated > kg_summary["last_updated"]):
-                        kg_summary["last_updated"] = relationships_updated
-                    
-                    logger.info(f"Found {len(relationships)} relationships in {relationships_file}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error processing relationships.json - invalid JSON: {e}")
-                    return "Error generating knowledge graph summary"
-                except Exception as e:
-                    logger.error(f"Error processing relationships.json: {e}")
-                    return "Error generating knowledge graph summary"
+            if file_summary:
+                kg_summary.update(file_summary)
+                logger.info(
+                    f"Found {kg_summary['concept_count']} concepts, {kg_summary['rule_count']} rules, "
+                    f"and {kg_summary['relationship_count']} relationships in {project_path / 'kg'}"
+                )
+                self._add_key_concepts(kg_summary, project_path)
+                self._add_modules(kg_summary, project_path)
                     
             # If we found either concepts or rules, return the summary
             if kg_summary["concept_count"] > 0 or kg_summary["rule_count"] > 0:
@@ -255,24 +196,20 @@ class CoreExtension(Extension):
                     kg_summary["relationship_types"] = rel_summary.get("types", [])
             
             if concepts or rules or relationships:
-                import json
-                from hashlib import sha1
                 from datetime import datetime, timezone
+                from khora_kernel_vnext.extensions.kg.extension import kg_entries_hash
                 
                 kg_summary["concept_count"] = len(concepts)
                 if concepts:
-                    concept_dicts = [c.to_dict() for c in concepts]
-                    kg_summary["concepts_hash"] = sha1(json.dumps(concept_dicts, sort_keys=True).encode()).hexdigest()
+                    kg_summary["concepts_hash"] = kg_entries_hash(concepts)
                 
                 kg_summary["rule_count"] = len(rules)
                 if rules:
-                    rule_dicts = [r.to_dict() for r in rules]
-                    kg_summary["rules_hash"] = sha1(json.dumps(rule_dicts, sort_keys=True).encode()).hexdigest()
+                    kg_summary["rules_hash"] = kg_entries_hash(rules)
                 
                 kg_summary["relationship_count"] = len(relationships)
                 if relationships:
-                    relationship_dicts = [r.to_dict() for r in relationships]
-                    kg_summary["relationships_hash"] = sha1(json.dumps(relationship_dicts, sort_keys=True).encode()).hexdigest()
+                    kg_summary["relationships_hash"] = kg_entries_hash(relationships)
                     
                     # Extract relationship types if not already provided in summary
                     if not kg_summary["relationship_types"] and relationships:
@@ -282,6 +219,7 @@ class CoreExtension(Extension):
                         kg_summary["relationship_types"] = sorted(list(relation_types))
                 
                 kg_summary["last_updated"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                self._add_key_concepts(kg_summary, project_path, (concepts, rules, relationships))
                 
                 logger.info(
                     f"Using {len(concepts)} concepts, {len(rules)} rules, and "
@@ -296,6 +234,47 @@ class CoreExtension(Extension):
             logger.error(f"Error generating KG summary: {e}")
             return "Error generating knowledge graph summary"
 
+    def _add_key_concepts(self, kg_summary: dict, project_path: Path, entries=None) -> None:
+        """
+        Add the centrality-ranked key concepts to a KG summary.
+        
+        Ranking is skipped if NumPy is not installed; errors are logged and
+        leave the rest of the summary intact.
+        
+        Args:
+            kg_summary: The summary to extend
+            project_path: Path to the project root
+            entries: (concepts, rules, relationships) to rank instead of the KG files
+        """
+        try:
+            from khora_kernel_vnext.extensions.kg.centrality import summarize_key_concepts
+            
+            key_concepts = summarize_key_concepts(project_path, kg_summary, entries)
+        except Exception as e:
+            logger.error(f"Error ranking key concepts: {e}")
+            return
+        if key_concepts is not None:
+            kg_summary["key_concepts"] = key_concepts
+
+    def _add_modules(self, kg_summary: dict, project_path: Path) -> None:
+        """
+        Add the module count and largest modules from kg/modules.json to a KG summary.
+        
+        Nothing is added unless the file exists and is current.
+        
+        Args:
+            kg_summary: The summary to extend
+            project_path: Path to the project root
+        """
+        try:
+            from khora_kernel_vnext.extensions.kg.communities import read_modules, summarize_modules
+            
+            modules = read_modules(project_path)
+            if modules is not None:
+                kg_summary["modules"] = summarize_modules(modules)
+        except Exception as e:
+            logger.error(f"Error summarizing KG modules: {e}")
+
     def _generate_khora_context_yaml(
         self, struct: Structure, opts: ScaffoldOpts
     ) -> ActionParams:
@@ -3,7 +3,7 @@ Parses and validates the [tool.khora] section of a pyproject.toml file.
 """
 import tomllib  # Requires Python 3.11+
 from pathlib import Path
-from typing import Any, Dict, Optional, Union, List
+from typing import Any, Dict, Literal, Optional, Union, List
 
 from pydantic import (
     BaseModel,
@@ -90,8 +90,30 @@ class KhoraDockerPluginConfig(BaseModel):
     api_service_name: str = "api"
 
 
+class KhoraKGPluginConfig(BaseModel):
+    # Worker processes for KG extraction; None (or 0) means one per CPU
+    jobs: Optional[int] = Field(None, ge=0)
+    # Build kg/index.sqlite alongside the JSON files
+    sqlite_index: bool = False
+    # "json" documents, or append-only "jsonl" logs (compacted by `khora kg compact`)
+    format: Literal["json", "jsonl"] = "json"
+    # Write the memory-mapped kg/kg.bin snapshot alongside the KG files
+    snapshot: bool = False
+    # Write the TF-IDF kg/similarity.npz used by `khora kg similar` (needs NumPy)
+    similarity_index: bool = False
+    # Write kg/modules.json, the concept communities of `khora kg communities` (needs NumPy)
+    modules: bool = False
+    # Relation types (e.g. "DependsOn") to keep a kg/reachability.npz closure index for (needs NumPy)
+    reachability_types: List[str] = Field(default_factory=list)
+    # Tag extractors to run, by name ("markdown", "rst", "python"; see kg.extractors)
+    extractors: List[str] = Field(default_factory=lambda: ["markdown"])
+    # Directories scanned besides docs_dir, e.g. ["src"] for tags in module docstrings
+    source_dirs: List[str] = Field(default_factory=list)
+
+
 class KhoraPluginsConfig(BaseModel):
     docker: KhoraDockerPluginConfig = Field(default_factory=KhoraDockerPluginConfig)
+    kg: KhoraKGPluginConfig = Field(default_factory=KhoraKGPluginConfig)
 
 
 class KhoraManifestConfig(BaseModel):
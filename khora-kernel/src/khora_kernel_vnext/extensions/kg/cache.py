@@ -0,0 +1,366 @@
+"""
+Persistent per-file extraction cache for the Knowledge Graph extension.
+
+Each cached record is keyed by the file's project-relative path and validated
+against the file's size, modification time and content hash. A record whose size
+and mtime still match is reused without reading the file; if only the stat data
+changed (e.g. after a checkout) the content hash decides whether the cached
+extraction result is still valid.
+
+The cache lives in a single JSON document (by default
+``.khora/cache/kg/extraction_cache.json``) so that a warm run costs one read and
+one stat per source file.
+
+Extraction results for past revisions (see history.py) are cached separately
+by git blob SHA in ``blob_cache.json``.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the payload layout or the extraction semantics change
+CACHE_VERSION = 3
+CACHE_FILENAME = "extraction_cache.json"
+BLOB_CACHE_FILENAME = "blob_cache.json"
+# Payloads kept by BlobCache; the least recently used are evicted beyond this
+DEFAULT_BLOB_CACHE_ENTRIES = 50_000
+
+
+def default_cache_dir(project_dir: Path) -> Path:
+    """Return the default KG cache directory for a project."""
+    return project_dir / ".khora" / "cache" / "kg"
+
+
+def file_digest(raw: bytes) -> str:
+    """Return the content hash used to validate cache records."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def decode_text(raw: bytes, errors: str = "strict") -> str:
+    """
+    Decode a UTF-8 source file with universal newlines, as Path.read_text does.
+
+    Scans, the watcher and the pre-commit hook must see the same text for a
+    file, whatever its line endings.
+    """
+    return raw.decode("utf-8", errors).replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _atomic_write(path: Path, mode: str, content: Union[str, bytes, Iterable[Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({"encoding": "utf-8"} if mode == "w" else {})) as f:
+            if isinstance(content, (str, bytes)):
+                f.write(content)
+            else:
+                f.writelines(content)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, content: Union[str, Iterable[str]]) -> None:
+    """
+    Write text to a file atomically by writing a temporary file and renaming it.
+
+    Args:
+        path: Destination file path
+        content: Text content to write, either as one string or as an iterable of
+            chunks that are written as they are produced
+    """
+    _atomic_write(path, "w", content)
+
+
+def atomic_write_bytes(path: Path, content: Union[bytes, Iterable[bytes]]) -> None:
+    """
+    Write binary data to a file atomically by writing a temporary file and renaming it.
+
+    Processes that still have the previous file open (or memory-mapped) keep
+    reading its old content.
+
+    Args:
+        path: Destination file path
+        content: Data to write, either as one bytes object or as an iterable of chunks
+    """
+    _atomic_write(path, "wb", content)
+
+
+class ExtractionCache:
+    """
+    Per-file cache of extraction results.
+
+    Payloads are opaque JSON-serializable values produced by the caller; the cache
+    only decides whether a stored payload is still valid for a file.
+    """
+
+    def __init__(self, cache_dir: Path, records: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.cache_dir = cache_dir
+        self.cache_file = cache_dir / CACHE_FILENAME
+        self._records: Dict[str, Dict[str, Any]] = records if records is not None else {}
+        self._dirty = False
+        self.cold = records is None
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @classmethod
+    def load(cls, cache_dir: Path) -> "ExtractionCache":
+        """
+        Load the cache from disk, starting empty if it is missing or unusable.
+
+        Args:
+            cache_dir: Directory holding the cache file
+
+        Returns:
+            An ExtractionCache instance
+        """
+        cache_file = cache_dir / CACHE_FILENAME
+        if not cache_file.exists():
+            return cls(cache_dir)
+
+        try:
+            data = json.loads(cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable KG cache {cache_file}: {e}")
+            return cls(cache_dir)
+
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            logger.info(f"KG cache {cache_file} has an incompatible version, rebuilding")
+            return cls(cache_dir)
+
+        return cls(cache_dir, data.get("files", {}))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def lookup(
+        self, file_path: Path, key: str, stat: Optional[os.stat_result] = None
+    ) -> Optional[Any]:
+        """
+        Return the cached payload for a file if it is still valid.
+
+        Args:
+            file_path: Path of the file on disk
+            key: Stable cache key for the file (its project-relative path)
+            stat: The file's stat result, if the caller already has it
+
+        Returns:
+            The cached payload, or None if the file must be (re-)extracted
+        """
+        record = self._records.get(key)
+        if record is None:
+            self.misses += 1
+            return None
+
+        if stat is None:
+            stat = file_path.stat()
+        if record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            self.hits += 1
+            return record["payload"]
+
+        if record["sha256"] == file_digest(file_path.read_bytes()):
+            # Touched but not modified: refresh the stat data only
+            record["size"] = stat.st_size
+            record["mtime_ns"] = stat.st_mtime_ns
+            self._dirty = True
+            self.hits += 1
+            return record["payload"]
+
+        self.misses += 1
+        return None
+
+    def store(self, key: str, size: int, mtime_ns: int, digest: str, payload: Any) -> None:
+        """
+        Store a freshly computed payload for a file.
+
+        Args:
+            key: Stable cache key for the file
+            size: File size the payload was computed from
+            mtime_ns: File modification time the payload was computed from
+            digest: Content hash as returned by file_digest
+            payload: JSON-serializable extraction result
+        """
+        self._records[key] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha256": digest,
+            "payload": payload,
+        }
+        self._dirty = True
+
+    def fetch(self, file_path: Path, key: str, compute: Callable[[str], Any]) -> Any:
+        """
+        Return the cached payload for a file, recomputing it if the file changed.
+
+        Args:
+            file_path: Path of the file on disk
+            key: Stable cache key for the file (its project-relative path)
+            compute: Called with the decoded file text to produce a fresh payload
+
+        Returns:
+            The cached or freshly computed payload
+        """
+        payload = self.lookup(file_path, key)
+        if payload is not None:
+            return payload
+
+        stat = file_path.stat()
+        raw = file_path.read_bytes()
+        payload = compute(decode_text(raw))
+        self.store(key, stat.st_size, stat.st_mtime_ns, file_digest(raw), payload)
+        return payload
+
+    def prune(self, live_keys: Iterable[str]) -> int:
+        """
+        Evict records for files that no longer exist.
+
+        Args:
+            live_keys: Keys of all files that are still present
+
+        Returns:
+            Number of evicted records
+        """
+        live = set(live_keys)
+        stale = [key for key in self._records if key not in live]
+        for key in stale:
+            del self._records[key]
+        if stale:
+            self._dirty = True
+            self.evicted += len(stale)
+        return len(stale)
+
+    def save(self) -> bool:
+        """
+        Persist the cache if it changed since it was loaded.
+
+        Returns:
+            True if the cache file was written
+        """
+        if not self._dirty:
+            return False
+
+        _write_cache_document(self.cache_file, {"version": CACHE_VERSION, "files": self._records})
+        self._dirty = False
+        return True
+
+
+class BlobCache:
+    """
+    Extraction results keyed by git blob SHA, for building the KG of past revisions.
+
+    A blob's content never changes, so a stored payload never goes stale and the
+    same file content is parsed once across all revisions it appears in. The
+    cache holds at most max_entries payloads, evicting the least recently used,
+    so a long history does not keep every payload in memory (or on disk).
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        payloads: Optional[Dict[str, Any]] = None,
+        max_entries: int = DEFAULT_BLOB_CACHE_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.cache_file = cache_dir / BLOB_CACHE_FILENAME
+        self.max_entries = max_entries
+        # Least recently used first; saved in this order, so it survives a reload
+        self._payloads: "OrderedDict[str, Any]" = OrderedDict(payloads or {})
+        self._dirty = False
+        self._evict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, cache_dir: Path, max_entries: int = DEFAULT_BLOB_CACHE_ENTRIES) -> "BlobCache":
+        """
+        Load the cache from disk, starting empty if it is missing or unusable.
+
+        Args:
+            cache_dir: Directory holding the cache file
+            max_entries: Maximum number of payloads to keep
+
+        Returns:
+            A BlobCache instance
+        """
+        cache_file = cache_dir / BLOB_CACHE_FILENAME
+        if not cache_file.exists():
+            return cls(cache_dir, max_entries=max_entries)
+
+        try:
+            data = json.loads(cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable KG blob cache {cache_file}: {e}")
+            return cls(cache_dir, max_entries=max_entries)
+
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            logger.info(f"KG blob cache {cache_file} has an incompatible version, rebuilding")
+            return cls(cache_dir, max_entries=max_entries)
+
+        return cls(cache_dir, data.get("blobs", {}), max_entries=max_entries)
+
+    def _evict(self) -> None:
+        while len(self._payloads) > self.max_entries:
+            self._payloads.popitem(last=False)
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def __contains__(self, sha: str) -> bool:
+        return sha in self._payloads
+
+    def get(self, sha: str) -> Optional[Any]:
+        """Return the payload stored for a blob, or None if it was never parsed."""
+        payload = self._payloads.get(sha)
+        if payload is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._payloads.move_to_end(sha)
+        return payload
+
+    def store(self, sha: str, payload: Any) -> None:
+        """Store the extraction result of a blob, evicting the least recently used beyond max_entries."""
+        self._payloads[sha] = payload
+        self._payloads.move_to_end(sha)
+        self._dirty = True
+        self._evict()
+
+    def save(self) -> bool:
+        """
+        Persist the cache if it changed since it was loaded.
+
+        Returns:
+            True if the cache file was written
+        """
+        if not self._dirty:
+            return False
+
+        _write_cache_document(self.cache_file, {"version": CACHE_VERSION, "blobs": self._payloads})
+        self._dirty = False
+        return True
+
+
+def _write_cache_document(cache_file: Path, data: Dict[str, Any]) -> None:
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    # Keep the cache directory out of version control
+    gitignore = cache_file.parent.parent / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("*\n", encoding="utf-8")
+
+    atomic_write_text(cache_file, json.dumps(data, separators=(",", ":")))
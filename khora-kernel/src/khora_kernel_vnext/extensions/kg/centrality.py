@@ -0,0 +1,247 @@
+"""
+Centrality ranking of KG concepts for the ``key_concepts`` list in context.yaml.
+
+Concepts are ranked by PageRank over the relationship graph, with total degree
+breaking ties. PageRank runs as a power iteration on the edge arrays of a
+``KGGraph``: every step scatters ``rank / out_degree`` along the edges with
+``np.bincount``, then adds the teleport term and the rank of dangling nodes
+(nodes without outgoing edges) spread evenly over all nodes. Edges are sorted by
+target once up front so the scatter writes memory sequentially; an iteration
+over a million edges takes a few milliseconds.
+
+The top concepts are summarized with their scores, degrees, source location
+and description, truncated to a byte budget, so agents get the most connected
+parts of the KG without loading it. Results are cached under
+``.khora/cache/kg`` keyed by the hashes of the concepts and relationships files.
+
+NumPy is an optional dependency (``pip install khora-kernel[analysis]``).
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .cache import atomic_write_text, default_cache_dir
+from .dedupe import require_numpy
+from .extension import KGEntry, RelationshipEntry, load_kg_files
+from .graph import KGGraph
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DAMPING = 0.85
+DEFAULT_TOLERANCE = 1e-6
+DEFAULT_MAX_ITERATIONS = 100
+DEFAULT_KEY_CONCEPTS = 20
+DEFAULT_DESCRIPTION_BYTES = 240
+
+KEY_CONCEPTS_CACHE_FILENAME = "key_concepts.json"
+# Bump whenever the ranking or the payload changes; older caches are ignored
+KEY_CONCEPTS_VERSION = 1
+
+_ELLIPSIS = "..."
+
+
+def pagerank(
+    sources: Any,
+    targets: Any,
+    node_count: int,
+    damping: float = DEFAULT_DAMPING,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+) -> "np.ndarray":
+    """
+    Compute PageRank scores by power iteration.
+
+    Parallel edges count once each, so a concept referenced twice by the same
+    source receives twice its share.
+
+    Args:
+        sources: Source node ID of each edge
+        targets: Target node ID of each edge
+        node_count: Number of nodes; IDs must be below it
+        damping: Probability of following an edge rather than teleporting
+        tolerance: Stop once the L1 change between iterations falls below this
+        max_iterations: Stop after this many iterations even if not converged
+
+    Returns:
+        A float64 array of scores summing to 1 (empty for an empty graph)
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    if node_count == 0:
+        return np.zeros(0)
+    sources = np.asarray(sources, dtype=np.intp)
+    targets = np.asarray(targets, dtype=np.intp)
+    order = np.argsort(targets, kind="stable")
+    sources, targets = sources[order], targets[order]
+
+    out_degree = np.bincount(sources, minlength=node_count).astype(np.float64)
+    dangling = out_degree == 0
+    inverse_out = np.divide(1.0, out_degree, out=np.zeros(node_count), where=~dangling)
+
+    rank = np.full(node_count, 1.0 / node_count)
+    teleport = (1.0 - damping) / node_count
+    for iteration in range(1, max_iterations + 1):
+        new_rank = np.bincount(targets, weights=(rank * inverse_out)[sources], minlength=node_count)
+        new_rank *= damping
+        new_rank += teleport + damping * rank[dangling].sum() / node_count
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if change < tolerance:
+            logger.debug(f"PageRank converged after {iteration} iterations")
+            break
+    else:
+        logger.debug(f"PageRank stopped after {max_iterations} iterations (change {change:.2e})")
+    return rank
+
+
+def truncate_utf8(text: str, max_bytes: int) -> str:
+    """
+    Collapse whitespace and cut text to at most max_bytes of UTF-8.
+
+    Cut text ends in "..." and never splits a multi-byte character.
+
+    Args:
+        text: The text to truncate
+        max_bytes: Byte budget, including the ellipsis
+
+    Returns:
+        The (possibly) shortened text
+    """
+    text = " ".join(text.split())
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    budget = max(max_bytes - len(_ELLIPSIS), 0)
+    return encoded[:budget].decode("utf-8", "ignore").rstrip() + _ELLIPSIS
+
+
+def rank_key_concepts(
+    concepts: Sequence[KGEntry],
+    relationships: Sequence[RelationshipEntry],
+    top: int = DEFAULT_KEY_CONCEPTS,
+    description_bytes: int = DEFAULT_DESCRIPTION_BYTES,
+) -> List[Dict[str, Any]]:
+    """
+    Rank the defined concepts by centrality in the relationship graph.
+
+    Relationship endpoints that are not defined as concepts still take part in
+    the ranking but are not listed, and neither are concepts without
+    relationships. A concept defined more than once is described by its first
+    definition.
+
+    Args:
+        concepts: Concept entries
+        relationships: Relationship entries
+        top: Maximum number of concepts to return
+        description_bytes: UTF-8 byte budget of each description
+
+    Returns:
+        Up to ``top`` dictionaries with the concept's name, PageRank (to four
+        significant digits), in and out degree, source and truncated description,
+        best first
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    definitions: Dict[str, KGEntry] = {}
+    for concept in concepts:
+        definitions.setdefault(concept.name, concept)
+    graph = KGGraph.from_relationships(relationships, definitions)
+    if top <= 0 or graph.edge_count == 0:
+        return []
+
+    sources, targets, _ = graph.edge_arrays()
+    sources = np.frombuffer(sources, dtype=np.dtype(sources.typecode))
+    targets = np.frombuffer(targets, dtype=np.dtype(targets.typecode))
+    node_count = graph.node_count
+    scores = pagerank(sources, targets, node_count)
+    in_degree = np.bincount(targets, minlength=node_count)
+    out_degree = np.bincount(sources, minlength=node_count)
+
+    # Defined concepts were interned first, so they are the lowest node IDs
+    defined = len(definitions)
+    degree = (in_degree + out_degree)[:defined]
+    candidates = np.flatnonzero(degree)
+    # lexsort is stable and sorts by its last key first: score, then degree,
+    # then definition order
+    order = np.lexsort((-degree[candidates], -scores[candidates]))
+    ranked = candidates[order[:top]]
+
+    result = []
+    for node in ranked.tolist():
+        concept = definitions[graph.names[node]]
+        result.append({
+            "name": concept.name,
+            "pagerank": float(f"{scores[node]:.4g}"),
+            "in_degree": int(in_degree[node]),
+            "out_degree": int(out_degree[node]),
+            "source": {"file": concept.source_file, "line": concept.line_number},
+            "description": truncate_utf8(concept.description, description_bytes),
+        })
+    return result
+
+
+def summarize_key_concepts(
+    project_dir: Path,
+    kg_summary: Dict[str, Any],
+    entries: Optional[Tuple[Sequence[KGEntry], Sequence[KGEntry], Sequence[RelationshipEntry]]] = None,
+    top: int = DEFAULT_KEY_CONCEPTS,
+    description_bytes: int = DEFAULT_DESCRIPTION_BYTES,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return the key concepts of a project's KG files, computing them only if they changed.
+
+    Args:
+        project_dir: The root directory of the project.
+        kg_summary: The summary of the KG files (see ``summarize_kg_files``);
+            its concepts and relationships hashes key the cache.
+        entries: The (concepts, rules, relationships) the KG files were written
+            from; loaded from the KG files when not given and needed.
+        top: Maximum number of concepts to return
+        description_bytes: UTF-8 byte budget of each description
+
+    Returns:
+        The ranked concepts (see ``rank_key_concepts``), or None if NumPy is not
+        installed.
+
+    Raises:
+        ValueError: If a KG file has to be loaded and is malformed.
+        OSError: If a KG file has to be loaded and cannot be read.
+    """
+    if np is None:
+        logger.debug("NumPy is not installed; skipping the key concepts ranking")
+        return None
+
+    key = {
+        "version": KEY_CONCEPTS_VERSION,
+        "concepts_hash": kg_summary.get("concepts_hash"),
+        "relationships_hash": kg_summary.get("relationships_hash"),
+        "top": top,
+        "description_bytes": description_bytes,
+    }
+    cache_file = default_cache_dir(project_dir) / KEY_CONCEPTS_CACHE_FILENAME
+    try:
+        cached = json.loads(cache_file.read_text(encoding="utf-8"))
+        if cached.get("key") == key:
+            return cached["key_concepts"]
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass
+
+    if entries is None:
+        entries = load_kg_files(project_dir)
+    key_concepts = rank_key_concepts(entries[0], entries[2], top, description_bytes)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(cache_file, json.dumps({"key": key, "key_concepts": key_concepts}))
+    except OSError as e:
+        logger.debug(f"Could not write key concepts cache {cache_file}: {e}")
+    return key_concepts
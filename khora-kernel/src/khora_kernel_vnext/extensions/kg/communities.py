@@ -0,0 +1,314 @@
+"""
+Community detection that groups KG concepts into modules.
+
+Modules are found by label propagation over the relationship graph, with edges
+taken as undirected and parallel edges adding weight. Every concept starts in
+its own module; each round, every concept looks at the modules of its
+neighbours and moves to the most common one, with ties broken by a random
+priority per module and round. Rounds are semi-synchronous: only a random half
+of the concepts that want to move do so, which keeps two-coloured structures
+from flipping back and forth. Propagation stops once every concept is in one
+of the most common modules among its neighbours.
+
+A round is a handful of array operations over the edge list: one sort of the
+(concept, neighbour module) pairs, a run-length count, and a per-concept
+maximum with ``np.maximum.reduceat``. A million edges take a few seconds.
+
+``kg/modules.json`` stores the modules, largest first, each named after its
+best-connected member and listing its members by degree. The file records the
+fingerprints of the relationships file it was computed from, and is only
+recomputed once that changes.
+
+NumPy is an optional dependency (``pip install khora-kernel[analysis]``).
+"""
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from .cache import atomic_write_text
+from .dedupe import require_numpy
+from .extension import RelationshipEntry, iter_kg_entries, kg_file_fingerprints
+from .graph import KGGraph
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MODULES_FILENAME = "modules.json"
+# Bump whenever the algorithm or the file layout changes; older files are recomputed
+MODULES_VERSION = 1
+
+DEFAULT_MAX_ITERATIONS = 100
+DEFAULT_SEED = 0
+# Number of modules listed in knowledge_graph_summary
+SUMMARY_MODULES = 5
+
+
+class Module(NamedTuple):
+    """A group of closely related concepts."""
+    id: int
+    name: str
+    members: List[str]
+
+    @property
+    def size(self) -> int:
+        return len(self.members)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "name": self.name, "size": self.size, "members": self.members}
+
+
+def modules_path(project_dir: Path) -> Path:
+    """Return the path of a project's module assignments."""
+    return project_dir / "kg" / MODULES_FILENAME
+
+
+def _relationship_fingerprints(project_dir: Path) -> Dict[str, Optional[str]]:
+    # Only the relationships feed the modules
+    return {
+        name: fingerprint
+        for name, fingerprint in kg_file_fingerprints(project_dir).items()
+        if name.startswith("relationships.")
+    }
+
+
+def label_propagation(
+    sources: Any,
+    targets: Any,
+    node_count: int,
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+    seed: int = DEFAULT_SEED,
+) -> "np.ndarray":
+    """
+    Assign nodes to communities by semi-synchronous label propagation.
+
+    Args:
+        sources: Source node ID of each edge
+        targets: Target node ID of each edge
+        node_count: Number of nodes; IDs must be below it
+        max_iterations: Stop after this many rounds even if labels still change
+        seed: Seed of the random tie-breaking and update choices
+
+    Returns:
+        The community of every node, numbered from 0 by decreasing size (ties
+        by smallest member); nodes without edges get a community of their own
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    loops = sources == targets
+    # Both directions, so labels flow along edges regardless of their direction
+    nodes = np.concatenate([targets[~loops], sources[~loops]])
+    neighbors = np.concatenate([sources[~loops], targets[~loops]])
+    order = np.argsort(nodes, kind="stable")
+    nodes, neighbors = nodes[order], neighbors[order]
+
+    rng = np.random.default_rng(seed)
+    labels = np.arange(node_count, dtype=np.int64)
+    for iteration in range(1, max_iterations + 1):
+        if not len(nodes):
+            break
+        # Count every (node, neighbour label) pair; nodes are the major key,
+        # so the sort only reorders labels within each node's run
+        pairs = np.sort(nodes * node_count + labels[neighbors])
+        starts = np.flatnonzero(np.concatenate(([True], pairs[1:] != pairs[:-1])))
+        counts = np.diff(np.append(starts, len(pairs)))
+        pair_nodes, pair_labels = np.divmod(pairs[starts], node_count)
+
+        node_starts = np.flatnonzero(np.concatenate(([True], pair_nodes[1:] != pair_nodes[:-1])))
+        group_sizes = np.diff(np.append(node_starts, len(counts)))
+        most = np.repeat(np.maximum.reduceat(counts, node_starts), group_sizes)
+        # Done once every node's label is one of its most common neighbour labels
+        settled = np.ones(node_count, dtype=bool)
+        current = pair_labels == labels[pair_nodes]
+        settled[pair_nodes] = False
+        settled[pair_nodes[current & (counts == most)]] = True
+        if settled.all():
+            logger.debug(f"Label propagation converged after {iteration} rounds")
+            break
+
+        # Ties between the most common labels go to a random priority per
+        # label, so fronts between tied labels keep moving until one wins
+        score = np.where(counts == most, rng.random(node_count)[pair_labels], -1.0)
+        best = np.repeat(np.maximum.reduceat(score, node_starts), group_sizes)
+        winners = score == best
+        proposed = labels.copy()
+        proposed[pair_nodes[winners]] = pair_labels[winners]
+        moving = (proposed != labels) & (rng.random(node_count) < 0.5)
+        labels[moving] = proposed[moving]
+    else:
+        logger.debug(f"Label propagation stopped after {max_iterations} rounds")
+
+    # Number communities by decreasing size; labels are node IDs, so the
+    # stable sort breaks ties by the community's smallest member
+    unique, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(unique), dtype=np.int64)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(unique))
+    return rank[inverse]
+
+
+def detect_modules(
+    relationships: Sequence[RelationshipEntry],
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+    seed: int = DEFAULT_SEED,
+) -> List[Module]:
+    """
+    Group the concepts connected by relationships into modules.
+
+    Concepts without relationships belong to no module.
+
+    Args:
+        relationships: Relationship entries
+        max_iterations: Maximum number of label propagation rounds
+        seed: Seed of the label propagation
+
+    Returns:
+        Modules, largest first; each is named after its member with the most
+        relationships and lists its members by decreasing degree, then name
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    graph = KGGraph.from_relationships(relationships)
+    if graph.node_count == 0:
+        return []
+    sources, targets, _ = graph.edge_arrays()
+    sources = np.frombuffer(sources, dtype=np.dtype(sources.typecode))
+    targets = np.frombuffer(targets, dtype=np.dtype(targets.typecode))
+    node_count = graph.node_count
+    communities = label_propagation(sources, targets, node_count, max_iterations, seed)
+    degree = np.bincount(sources, minlength=node_count) + np.bincount(targets, minlength=node_count)
+
+    # Name order as the last tie-breaker keeps member lists deterministic
+    name_rank = np.empty(node_count, dtype=np.int64)
+    name_rank[sorted(range(node_count), key=graph.names.__getitem__)] = np.arange(node_count)
+    order = np.lexsort((name_rank, -degree, communities))
+    boundaries = np.flatnonzero(np.diff(communities[order])) + 1
+
+    names = graph.names
+    modules = []
+    for module_id, members in enumerate(np.split(order, boundaries)):
+        member_names = [names[node] for node in members.tolist()]
+        modules.append(Module(module_id, member_names[0], member_names))
+    return modules
+
+
+def write_modules(
+    project_dir: Path,
+    relationships: Sequence[RelationshipEntry],
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+    seed: int = DEFAULT_SEED,
+) -> Dict[str, Any]:
+    """
+    Detect modules and write them to kg/modules.json atomically.
+
+    Args:
+        project_dir: The root directory of the project.
+        relationships: The relationships that were just written to the KG files
+        max_iterations: Maximum number of label propagation rounds
+        seed: Seed of the label propagation
+
+    Returns:
+        The written document
+    """
+    modules = detect_modules(relationships, max_iterations, seed)
+    document = {
+        "version": MODULES_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "fingerprints": _relationship_fingerprints(project_dir),
+        "algorithm": "label_propagation",
+        "module_count": len(modules),
+        "concept_count": sum(module.size for module in modules),
+        "modules": [module.to_dict() for module in modules],
+    }
+    path = modules_path(project_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(path, json.dumps(document, indent=1))
+    logger.info(f"Wrote {len(modules)} KG modules to {path}")
+    return document
+
+
+def read_modules(project_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read a project's module assignments if they are current.
+
+    Args:
+        project_dir: The root directory of the project.
+
+    Returns:
+        The kg/modules.json document, or None if it is missing, unreadable, of
+        another version, or older than the relationships file.
+    """
+    path = modules_path(project_dir)
+    try:
+        document = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.info(f"Ignoring KG modules {path}: {e}")
+        return None
+    if not isinstance(document, dict) or document.get("version") != MODULES_VERSION:
+        logger.info(f"Ignoring KG modules {path} of another version")
+        return None
+    if document.get("fingerprints") != _relationship_fingerprints(project_dir):
+        logger.info(f"Ignoring stale KG modules {path}")
+        return None
+    return document
+
+
+def ensure_modules(
+    project_dir: Path,
+    relationships: Optional[Sequence[RelationshipEntry]] = None,
+) -> Dict[str, Any]:
+    """
+    Return current module assignments, recomputing them if the relationships changed.
+
+    Args:
+        project_dir: The root directory of the project.
+        relationships: The relationships the KG files were just written from;
+            loaded from the relationships file when not given.
+
+    Returns:
+        The kg/modules.json document
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    document = read_modules(project_dir)
+    if document is not None:
+        return document
+    if relationships is None:
+        relationships = [
+            RelationshipEntry.from_dict(r) for r in iter_kg_entries(project_dir, "relationships")
+        ]
+    return write_modules(project_dir, relationships)
+
+
+def summarize_modules(document: Dict[str, Any], largest: int = SUMMARY_MODULES) -> Dict[str, Any]:
+    """
+    Summarize module assignments for the knowledge_graph_summary in context.yaml.
+
+    Args:
+        document: A kg/modules.json document
+        largest: Number of modules to list
+
+    Returns:
+        The module count and the name and size of the largest modules
+    """
+    return {
+        "module_count": document["module_count"],
+        "largest_modules": [
+            {"name": module["name"], "size": module["size"]}
+            for module in document["modules"][:largest]
+        ],
+    }
@@ -0,0 +1,340 @@
+"""
+Near-duplicate detection for KG concepts and rules.
+
+Descriptions are normalized (lowercased, runs of non-alphanumerics collapsed to
+one space) and split into overlapping character k-grams ("shingles"). Each
+description gets a MinHash signature: for every one of ``num_perm`` hash
+functions the minimum hash over its shingles. The fraction of equal signature
+positions estimates the Jaccard similarity of two shingle sets.
+
+Shingling and MinHash run over the whole corpus at once with NumPy: the
+descriptions are concatenated into one byte array, every k-gram is hashed to
+32 bits from k shifted views of it, each hash function is a random odd
+multiply-add modulo 2**32, and per-description minima are taken with
+``np.minimum.reduceat``. Candidate pairs come from LSH banding (descriptions
+that agree on every row of at least one band), so only likely near-duplicates
+are compared and the cost stays far below all-pairs. Candidates are then
+checked against the similarity threshold and merged into clusters.
+
+NumPy is an optional dependency (``pip install khora-kernel[analysis]``).
+"""
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+from .extension import KGEntry
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 5
+
+# Shingles hashed per block; bounds the (block, num_perm) hash matrix
+_BLOCK_SHINGLES = 1 << 17
+_NORMALIZE = re.compile(r"[\W_]+")
+
+
+def require_numpy() -> None:
+    """
+    Raise ImportError with an installation hint if NumPy is missing.
+
+    Raises:
+        ImportError: If NumPy cannot be imported
+    """
+    if np is None:
+        raise ImportError(
+            "KG analyses require NumPy; install it with "
+            "'pip install numpy' or 'pip install khora-kernel[analysis]'"
+        )
+
+
+class DuplicateCluster(NamedTuple):
+    """A group of entries whose descriptions are near-duplicates."""
+    # (kind, entry) pairs, kind being "concept" or "rule", in KG order
+    entries: List[Tuple[str, KGEntry]]
+    # (index, index, estimated Jaccard similarity) for every matched pair
+    pairs: List[Tuple[int, int, float]]
+
+    @property
+    def max_similarity(self) -> float:
+        return max(similarity for _, _, similarity in self.pairs)
+
+    @property
+    def min_similarity(self) -> float:
+        return min(similarity for _, _, similarity in self.pairs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary for JSON output."""
+        return {
+            "entries": [
+                {"kind": kind, "name": entry.name, "description": entry.description,
+                 "source": {"file": entry.source_file, "line": entry.line_number}}
+                for kind, entry in self.entries
+            ],
+            "pairs": [
+                {"a": self.entries[a][1].name, "b": self.entries[b][1].name,
+                 "similarity": round(similarity, 4)}
+                for a, b, similarity in self.pairs
+            ],
+            "max_similarity": round(self.max_similarity, 4),
+        }
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text and collapse runs of punctuation and whitespace to one space."""
+    return _NORMALIZE.sub(" ", text.lower()).strip()
+
+
+def _hash_parameters(num_perm: int, seed: int) -> Tuple[Any, Any]:
+    rng = np.random.default_rng(seed)
+    # Odd multipliers make each a * x + b a permutation of the 32-bit integers
+    a = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint32) * np.uint32(2) + np.uint32(1)
+    b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint32)
+    return a[:, None], b[:, None]
+
+
+def _shingle_values(texts: Sequence[bytes], shingle_size: int) -> Tuple[Any, Any]:
+    """
+    Hash the k-grams of all texts to 32-bit integers.
+
+    Returns:
+        (values, counts): the k-gram hashes of all texts, text by text, and the
+        number of k-grams of each text (texts shorter than k yield one, padded)
+    """
+    lengths = np.fromiter((max(len(t), shingle_size) for t in texts), dtype=np.int64, count=len(texts))
+    padded = b"".join(t.ljust(shingle_size) for t in texts)
+    data = np.frombuffer(padded, dtype=np.uint8).astype(np.uint64)
+
+    # FNV-style mixing of the k bytes starting at every position
+    grams = len(data) - shingle_size + 1
+    values = np.zeros(grams, dtype=np.uint64)
+    for offset in range(shingle_size):
+        values *= np.uint64(0x100000001B3)
+        values ^= data[offset:offset + grams]
+    # Final avalanche so that the high 32 bits depend on every byte
+    values ^= values >> np.uint64(33)
+    values *= np.uint64(0xFF51AFD7ED558CCD)
+    values ^= values >> np.uint64(33)
+    values = (values >> np.uint64(32)).astype(np.uint32)
+
+    # Keep only the k-grams that start and end inside one text
+    counts = lengths - shingle_size + 1
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    keep = np.zeros(len(data) + 1, dtype=np.int64)
+    np.add.at(keep, starts, 1)
+    np.add.at(keep, starts + counts, -1)
+    return values[np.cumsum(keep[:grams]) > 0], counts
+
+
+def minhash_signatures(
+    texts: Sequence[str],
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    seed: int = 1,
+) -> Any:
+    """
+    Compute MinHash signatures of normalized texts.
+
+    Args:
+        texts: Texts to sign; they should not be empty
+        num_perm: Number of hash functions (signature length)
+        shingle_size: Characters per shingle
+        seed: Seed of the hash functions; signatures are only comparable with
+            the same seed and parameters
+
+    Returns:
+        A (len(texts), num_perm) uint32 array
+    """
+    require_numpy()
+    # Built hash function by hash function, so reductions run over contiguous rows
+    signatures = np.empty((num_perm, len(texts)), dtype=np.uint32)
+    if not texts:
+        return signatures.T.copy()
+
+    encoded = [text.encode("utf-8") for text in texts]
+    values, counts = _shingle_values(encoded, shingle_size)
+    a, b = _hash_parameters(num_perm, seed)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    # Hash whole texts in blocks of about _BLOCK_SHINGLES shingles
+    first = 0
+    while first < len(texts):
+        last = int(np.searchsorted(offsets, offsets[first] + _BLOCK_SHINGLES, side="right")) - 1
+        last = max(last, first + 1)
+        hashed = a * values[offsets[first]:offsets[last]]
+        hashed += b
+        signatures[:, first:last] = np.minimum.reduceat(hashed, offsets[first:last] - offsets[first], axis=1)
+        first = last
+    return signatures.T.copy()
+
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Choose the LSH banding for a similarity threshold.
+
+    Picks the largest number of rows per band whose S-curve midpoint
+    (1 / bands) ** (1 / rows) does not exceed the threshold, so pairs at the
+    threshold are found with high probability while dissimilar pairs rarely
+    become candidates.
+
+    Returns:
+        (bands, rows) with bands * rows == num_perm
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+def lsh_candidate_pairs(signatures: Any, bands: int) -> Any:
+    """
+    Find the pairs of rows that agree on all rows of at least one band.
+
+    Args:
+        signatures: (n, num_perm) MinHash signatures
+        bands: Number of bands; must divide num_perm
+
+    Returns:
+        A (m, 2) int64 array of unique pairs (i, j) with i < j
+    """
+    require_numpy()
+    count, num_perm = signatures.shape
+    rows = num_perm // bands
+    rng = np.random.default_rng(0)
+    multipliers = rng.integers(1, 1 << 63, size=rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+    found = []
+    for band in range(bands):
+        columns = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (columns * multipliers).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+        starts = np.concatenate(([0], boundaries))
+        sizes = np.diff(np.concatenate((starts, [count])))
+
+        # Buckets of two are by far the most common; emit them in one step
+        pair_starts = starts[sizes == 2]
+        found.append(np.stack((order[pair_starts], order[pair_starts + 1]), axis=1))
+        for start, size in zip(starts[sizes > 2], sizes[sizes > 2]):
+            members = order[start:start + size]
+            i, j = np.triu_indices(size, k=1)
+            found.append(np.stack((members[i], members[j]), axis=1))
+
+    pairs = np.concatenate(found) if found else np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(pairs, axis=1).astype(np.int64)
+    codes = np.unique(pairs[:, 0] * count + pairs[:, 1])
+    return np.stack((codes // count, codes % count), axis=1)
+
+
+def _signature_similarity(signatures: Any, pairs: Any, block: int = 1 << 16) -> Any:
+    """Estimate the Jaccard similarity of each pair from its signatures."""
+    similarity = np.empty(len(pairs), dtype=np.float64)
+    for start in range(0, len(pairs), block):
+        chunk = pairs[start:start + block]
+        similarity[start:start + block] = (
+            signatures[chunk[:, 0]] == signatures[chunk[:, 1]]
+        ).mean(axis=1)
+    return similarity
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def find_near_duplicates(
+    concepts: Sequence[KGEntry],
+    rules: Sequence[KGEntry],
+    threshold: float = DEFAULT_THRESHOLD,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+) -> List[DuplicateCluster]:
+    """
+    Group concepts and rules whose descriptions are near-duplicates.
+
+    Entries with an empty description are ignored. Entries with identical
+    normalized descriptions are grouped directly; the remaining descriptions
+    are compared through LSH candidates only.
+
+    Args:
+        concepts: Concept entries
+        rules: Rule entries
+        threshold: Minimum estimated Jaccard similarity of two descriptions
+        num_perm: MinHash signature length; longer is more accurate and slower
+        shingle_size: Characters per shingle
+
+    Returns:
+        Clusters of two or more entries, largest first
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    entries: List[Tuple[str, KGEntry]] = [("concept", c) for c in concepts] + [("rule", r) for r in rules]
+
+    # Copies of the same text share one signature row
+    texts: Dict[str, int] = {}
+    text_of_entry: List[int] = []
+    entry_indexes: List[int] = []
+    for index, (_, entry) in enumerate(entries):
+        text = normalize_text(entry.description)
+        if text:
+            entry_indexes.append(index)
+            text_of_entry.append(texts.setdefault(text, len(texts)))
+
+    signatures = minhash_signatures(list(texts), num_perm, shingle_size)
+    bands, _ = lsh_bands(num_perm, threshold)
+    candidates = lsh_candidate_pairs(signatures, bands)
+    similarity = _signature_similarity(signatures, candidates)
+    matched = similarity >= threshold
+    logger.debug(
+        f"Near-duplicate search: {len(texts)} distinct descriptions, "
+        f"{len(candidates)} candidate pairs, {int(matched.sum())} above {threshold}"
+    )
+
+    # Union the entries sharing a text, then the matched text pairs
+    parent = list(range(len(entries)))
+    first_entry_of_text: Dict[int, int] = {}
+    pairs: List[Tuple[int, int, float]] = []
+    for index, text in zip(entry_indexes, text_of_entry):
+        first = first_entry_of_text.setdefault(text, index)
+        if first != index:
+            parent[_find(parent, index)] = _find(parent, first)
+            pairs.append((first, index, 1.0))
+    for (a, b), score in zip(candidates[matched].tolist(), similarity[matched].tolist()):
+        first_a, first_b = first_entry_of_text[a], first_entry_of_text[b]
+        parent[_find(parent, first_b)] = _find(parent, first_a)
+        pairs.append((min(first_a, first_b), max(first_a, first_b), score))
+
+    members: Dict[int, List[int]] = {}
+    for index in entry_indexes:
+        members.setdefault(_find(parent, index), []).append(index)
+    pairs_by_root: Dict[int, List[Tuple[int, int, float]]] = {}
+    for a, b, score in pairs:
+        pairs_by_root.setdefault(_find(parent, a), []).append((a, b, score))
+
+    clusters = []
+    for root, indexes in members.items():
+        if len(indexes) < 2:
+            continue
+        position = {index: i for i, index in enumerate(indexes)}
+        clusters.append(DuplicateCluster(
+            [entries[index] for index in indexes],
+            sorted((position[a], position[b], score) for a, b, score in pairs_by_root[root]),
+        ))
+    clusters.sort(key=lambda cluster: (-len(cluster.entries), -cluster.max_similarity))
+    return clusters
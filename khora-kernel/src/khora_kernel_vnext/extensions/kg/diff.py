@@ -0,0 +1,203 @@
+"""
+Entry-level diff of two Knowledge Graphs.
+
+Every entry is keyed by a stable ID derived from what it defines rather than
+where: ``concept:<name>``, ``rule:<name>`` and
+``rel:<source>-><target>:<type>``. An ID defined more than once gets a
+``#<n>`` suffix on its n-th definition, in KG order.
+
+The old side is indexed into a hash table by ID and one pass over the new side
+joins the two, so a diff costs O(n + m) regardless of entry order. Matched
+entries are compared on their content, the description and the source file
+but not the line number: an entry that only moved within its file is
+unchanged. entry_content_hash gives a stable hash of the same content, for
+recording it across runs.
+
+KG sources are directories holding generated KG files or git revisions, which
+are extracted from the object store (see history.py).
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .extension import KGEntry, RelationshipEntry, load_kg_files
+
+logger = logging.getLogger(__name__)
+
+KG_KEYS = ("concepts", "rules", "relationships")
+
+Entry = Union[KGEntry, RelationshipEntry]
+KGEntries = Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]
+
+
+class KGDiff(NamedTuple):
+    """Entries added, removed and modified between two KGs, per KG key, in KG order."""
+    added: Dict[str, List[Tuple[str, Entry]]]
+    removed: Dict[str, List[Tuple[str, Entry]]]
+    modified: Dict[str, List[Tuple[str, Entry, Entry]]]
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(
+            self.added[key] or self.removed[key] or self.modified[key] for key in KG_KEYS
+        )
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of added, removed and modified entries per KG key."""
+        return {
+            key: {
+                "added": len(self.added[key]),
+                "removed": len(self.removed[key]),
+                "modified": len(self.modified[key]),
+            }
+            for key in KG_KEYS
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary for JSON output."""
+        result: Dict[str, Any] = {"changed": not self.is_empty, "counts": self.counts()}
+        for key in KG_KEYS:
+            result[key] = {
+                "added": [{"id": entry_id, **entry.to_dict()} for entry_id, entry in self.added[key]],
+                "removed": [{"id": entry_id, **entry.to_dict()} for entry_id, entry in self.removed[key]],
+                "modified": [
+                    {
+                        "id": entry_id,
+                        "changed": changed_fields(old, new),
+                        "old": old.to_dict(),
+                        "new": new.to_dict(),
+                    }
+                    for entry_id, old, new in self.modified[key]
+                ],
+            }
+        return result
+
+
+def base_entry_id(entry: Entry, key: str) -> str:
+    """Return the stable ID of an entry of the given KG key, before duplicates are numbered."""
+    if isinstance(entry, RelationshipEntry):
+        return f"rel:{entry.source_concept}->{entry.target_concept}:{entry.relation_type}"
+    return f"{key[:-1]}:{entry.name}"
+
+
+def entry_content_hash(entry: Entry) -> str:
+    """
+    Hash the content of an entry that a diff compares (not its line number).
+
+    The hash is a SHA-256 of the canonical JSON of the compared fields, like the
+    KG file fingerprints, so it is stable across processes and can be stored.
+    """
+    canonical = json.dumps([entry.description, entry.source_file], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def changed_fields(old: Entry, new: Entry) -> List[str]:
+    """Name the compared fields that differ between two versions of an entry."""
+    fields = []
+    if old.description != new.description:
+        fields.append("description")
+    if old.source_file != new.source_file:
+        fields.append("source_file")
+    return fields
+
+
+def _keyed_entries(key: str, entries: Sequence[Entry]) -> Dict[str, Entry]:
+    """Index entries by stable ID, numbering repeated definitions."""
+    if key == "relationships":
+        ids = (f"rel:{r.source_concept}->{r.target_concept}:{r.relation_type}" for r in entries)
+    else:
+        prefix = f"{key[:-1]}:"
+        ids = (prefix + e.name for e in entries)
+
+    index: Dict[str, Entry] = {}
+    repeats: Dict[str, int] = {}
+    for entry_id, entry in zip(ids, entries):
+        if entry_id in index:
+            occurrence = repeats.get(entry_id, 1) + 1
+            repeats[entry_id] = occurrence
+            entry_id = f"{entry_id}#{occurrence}"
+        index[entry_id] = entry
+    return index
+
+
+def diff_entries(
+    key: str, old: Sequence[Entry], new: Sequence[Entry]
+) -> Tuple[List[Tuple[str, Entry]], List[Tuple[str, Entry]], List[Tuple[str, Entry, Entry]]]:
+    """
+    Diff one kind of entries with a hash join on their stable IDs.
+
+    Contents are only compared for IDs present on both sides.
+
+    Args:
+        key: KG key of the entries ("concepts", "rules" or "relationships")
+        old: Entries of the old KG
+        new: Entries of the new KG
+
+    Returns:
+        (added, removed, modified) lists of (id, entry) and (id, old, new) tuples
+    """
+    remaining = _keyed_entries(key, old)
+    added: List[Tuple[str, Entry]] = []
+    modified: List[Tuple[str, Entry, Entry]] = []
+    for entry_id, entry in _keyed_entries(key, new).items():
+        match = remaining.pop(entry_id, None)
+        if match is None:
+            added.append((entry_id, entry))
+        elif match.description != entry.description or match.source_file != entry.source_file:
+            modified.append((entry_id, match, entry))
+    removed = list(remaining.items())
+    return added, removed, modified
+
+
+def diff_kg(old: KGEntries, new: KGEntries) -> KGDiff:
+    """
+    Diff two KGs entry by entry.
+
+    Args:
+        old: (concepts, rules, relationships) of the old KG
+        new: (concepts, rules, relationships) of the new KG
+
+    Returns:
+        KGDiff with the added, removed and modified entries of each kind
+    """
+    result = KGDiff({}, {}, {})
+    for key, old_entries, new_entries in zip(KG_KEYS, old, new):
+        result.added[key], result.removed[key], result.modified[key] = diff_entries(
+            key, old_entries, new_entries
+        )
+    return result
+
+
+def load_kg_source(source: str, history: Optional[Any] = None) -> KGEntries:
+    """
+    Load the KG named by a diff argument.
+
+    A source that is an existing directory is read as a project directory
+    containing kg/ (or as the kg/ directory itself); anything else is taken to
+    be a git revision and extracted from the object store.
+
+    Args:
+        source: Directory path or git revision
+        history: KGHistory used to read revisions; required unless source is a directory
+
+    Returns:
+        (concepts, rules, relationships) of the source
+
+    Raises:
+        ValueError: If the source is neither a KG directory nor a known revision,
+            or if its KG files are malformed
+        OSError: If the KG files cannot be read
+    """
+    path = Path(source)
+    if path.is_dir():
+        if not (path / "kg").is_dir():
+            if path.resolve().name != "kg":
+                raise ValueError(f"No kg directory found in {path}")
+            path = path.resolve().parent
+        return load_kg_files(path)
+
+    if history is None:
+        raise ValueError(f"{source} is not a directory and no git history is available")
+    return history.entries_at(history.resolve(source))
@@ -30,21 +30,41 @@ The extension generates three JSON files in the project's `kg/` directory:
 1. `concepts.json`: Contains all extracted concepts with their descriptions and source locations
 2. `rules.json`: Contains all extracted rules with their descriptions and source locations
 3. `relationships.json`: Contains all extracted relationships with their descriptions and source locations
+4. `manifest.json`: Entry counts, hashes, relation types and timestamps of the three files above
+5. `kg.bin` (optional): A memory-mapped columnar snapshot of the entries; see `snapshot.py`
+6. `modules.json` (optional): Concepts grouped into modules by their relationships; see `communities.py`
+7. `reachability.npz` (optional): Transitive closure of chosen relation types; see `reachability.py`
+
+With `[tool.khora.plugins_config.kg] format = "jsonl"`, the first three are written as
+append-only JSON Lines logs (`concepts.jsonl`, `rules.jsonl`, `relationships.jsonl`)
+instead; see `jsonl.py`.
 
 These files are used by the core extension to generate the knowledge graph summary in context.yaml.
 """
 import argparse
+import hashlib
 import logging
 import json
+import os
+import posixpath
 import re
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Any, Union, NamedTuple
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Any, Union, NamedTuple
 
 from pyscaffold.actions import Action, ActionParams, ScaffoldOpts, Structure
 from pyscaffold.extensions import Extension
 from pyscaffold.operations import no_overwrite
 
+from ...sdk.file_index import ProjectFileIndex
+from .cache import ExtractionCache, atomic_write_text, decode_text, default_cache_dir, file_digest
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -53,13 +73,59 @@ CONCEPT_PATTERN = r"\[concept:([a-zA-Z0-9]*)\]\s*[-–]\s*(.*?)(?=\n\n|\n\[|\Z)"
 RULE_PATTERN = r"\[rule:([a-zA-Z0-9]*)\]\s*[-–]\s*(.*?)(?=\n\n|\n\[|\Z)"
 RELATIONSHIP_PATTERN = r"\[rel:([a-zA-Z0-9]*)->([a-zA-Z0-9]*):([a-zA-Z0-9]*)\]\s*[-–]\s*(.*?)(?=\n\n|\n\[|\Z)"
 
+# The patterns above document the tag grammar. Extraction itself uses a single
+# combined header pattern plus a description terminator search so that all three
+# tag kinds are found in one pass over the text. Possessive quantifiers keep the
+# header match free of backtracking.
+TAG_HEADER_PATTERN = re.compile(
+    r"\[(?:(concept|rule):([a-zA-Z0-9]*+)"
+    r"|rel:([a-zA-Z0-9]*+)->([a-zA-Z0-9]*+):([a-zA-Z0-9]*+))"
+    r"\]\s*+[-–]\s*+"
+)
+DESCRIPTION_END_PATTERN = re.compile(r"\n[\n\[]")
+CAMEL_CASE_PATTERN = re.compile(r"^[A-Z][a-zA-Z0-9]*$")
+
+# Below this many files to parse, a process pool costs more than it saves
+PARALLEL_MIN_FILES = 500
+
+# Format version written to the header of each KG file
+KG_FORMAT_VERSION = "0.1.0"
+# The fingerprint is written within this many characters of the start of a KG file
+KG_HEADER_SIZE = 512
+FINGERPRINT_PATTERN = re.compile(r'"fingerprint":\s*"([0-9a-f]{64})"')
+GENERATED_AT_PATTERN = re.compile(r'"generated_at":\s*"([^"]*)"')
+# Sidecar written next to the KG files with their counts and hashes
+KG_MANIFEST_FILENAME = "manifest.json"
+KG_FILE_KEYS = (
+    ("concepts.json", "concepts"),
+    ("rules.json", "rules"),
+    ("relationships.json", "relationships"),
+)
+# Storage formats: one JSON document per file, or an append-only JSON Lines log
+KG_FILE_FORMATS = ("json", "jsonl")
+_NEWLINE_PATTERN = re.compile(r"\n")
+_CRLF_PATTERN = re.compile(rb"\r\n")
+
+# JSON string encoders matching json.dumps with ensure_ascii=True / False
+_json_string = json.encoder.encode_basestring_ascii
+_json_string_unicode = json.encoder.encode_basestring
+
+
+def _intern(value: Any) -> Any:
+    """Intern strings that repeat across many entries (names, file paths, types)."""
+    return sys.intern(value) if type(value) is str else value
+
+
 class KGEntry:
     """Represents a Knowledge Graph entry (concept or rule)."""
     
+    # Large KGs hold hundreds of thousands of entries, so avoid a per-instance dict
+    __slots__ = ("name", "description", "source_file", "line_number")
+    
     def __init__(self, name: str, description: str, source_file: str = "", line_number: int = 0):
-        self.name = name
+        self.name = _intern(name)
         self.description = description
-        self.source_file = source_file
+        self.source_file = _intern(source_file)
         self.line_number = line_number
         
     def to_dict(self) -> Dict[str, Any]:
@@ -73,6 +139,17 @@ class KGEntry:
             }
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KGEntry":
+        """Create an entry from its JSON dictionary form (see to_dict)."""
+        source = data.get("source", {})
+        return cls(
+            data.get("name", ""),
+            data.get("description", ""),
+            source.get("file", ""),
+            source.get("line", 0)
+        )
+    
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, KGEntry):
             return False
@@ -88,6 +165,11 @@ class KGEntry:
 class RelationshipEntry:
     """Represents a relationship between two concepts in the Knowledge Graph."""
     
+    __slots__ = (
+        "source_concept", "target_concept", "relation_type",
+        "description", "source_file", "line_number",
+    )
+    
     def __init__(
         self, 
         source_concept: str, 
@@ -97,11 +179,11 @@ class RelationshipEntry:
         source_file: str = "", 
         line_number: int = 0
     ):
-        self.source_concept = source_concept
-        self.target_concept = target_concept
-        self.relation_type = relation_type
+        self.source_concept = _intern(source_concept)
+        self.target_concept = _intern(target_concept)
+        self.relation_type = _intern(relation_type)
         self.description = description
-        self.source_file = source_file
+        self.source_file = _intern(source_file)
         self.line_number = line_number
         
     def to_dict(self) -> Dict[str, Any]:
@@ -117,6 +199,19 @@ class RelationshipEntry:
             }
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RelationshipEntry":
+        """Create an entry from its JSON dictionary form (see to_dict)."""
+        source = data.get("source", {})
+        return cls(
+            data.get("source_concept", ""),
+            data.get("target_concept", ""),
+            data.get("relation_type", ""),
+            data.get("description", ""),
+            source.get("file", ""),
+            source.get("line", 0)
+        )
+    
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, RelationshipEntry):
             return False
@@ -151,6 +246,15 @@ class KGExtension(Extension):
             default=False,
             help="Enable Knowledge Graph extraction from markdown files",
         )
+        parser.add_argument(
+            "--khora-kg-jobs",
+            dest="khora_kg_jobs",
+            type=int,
+            default=None,
+            metavar="N",
+            help="Number of worker processes for KG extraction (0 = one per CPU; "
+                 "overrides [tool.khora.plugins_config.kg] jobs)",
+        )
         return self
     
     def activate(self, actions: List[Action]) -> List[Action]:
@@ -168,8 +272,126 @@ class KGExtension(Extension):
         return actions
 
 
+class LineIndex:
+    """Maps character offsets in a text to 1-based line numbers."""
+
+    __slots__ = ("_line_starts",)
+
+    def __init__(self, text: str):
+        # Offsets at which each line starts; line 1 always starts at 0
+        self._line_starts = array("q", [0])
+        self._line_starts.extend(m.end() for m in _NEWLINE_PATTERN.finditer(text))
+
+    def line_of(self, offset: int) -> int:
+        """Return the 1-based line number containing the given offset."""
+        return bisect_right(self._line_starts, offset)
+
+
+class KGToken(NamedTuple):
+    """A single tag found by the KG tokenizer."""
+    kind: str  # "concept", "rule" or "rel"
+    name: str  # Concept/rule name; empty for relationships
+    source_concept: str
+    target_concept: str
+    relation_type: str
+    description: str
+    start: int  # Offset of the opening "[" of the tag
+    end: int  # Offset where the description ends
+    line_number: int
+
+
+def tokenize_kg_tags(markdown_content: str) -> Iterator[KGToken]:
+    """
+    Find all concept, rule and relationship tags in a single pass.
+    
+    Produces the same matches as running CONCEPT_PATTERN, RULE_PATTERN and
+    RELATIONSHIP_PATTERN separately: a description runs until the next blank line,
+    the next line starting with "[", or the end of the text, and tags of the same
+    kind never overlap (tags of different kinds may). Runs in time linear in the
+    length of the text, since the description terminator is only ever searched
+    forward from the furthest position seen so far.
+    
+    Args:
+        markdown_content: The content of a markdown file.
+        
+    Yields:
+        KGToken for each tag, in order of appearance.
+    """
+    text_length = len(markdown_content)
+    line_index: Optional[LineIndex] = None
+    kind_end = {"concept": 0, "rule": 0, "rel": 0}
+    description_end = -1
+    
+    for match in TAG_HEADER_PATTERN.finditer(markdown_content):
+        kind = match.group(1) or "rel"
+        start = match.start()
+        
+        # Skip tags swallowed by the description of a previous tag of the same kind
+        if start < kind_end[kind]:
+            continue
+        
+        description_start = match.end()
+        if description_end < description_start:
+            end_match = DESCRIPTION_END_PATTERN.search(markdown_content, description_start)
+            description_end = end_match.start() if end_match else text_length
+        kind_end[kind] = description_end
+        
+        if line_index is None:
+            line_index = LineIndex(markdown_content)
+        
+        description = markdown_content[description_start:description_end].strip()
+        if kind == "rel":
+            yield KGToken(
+                kind, "", match.group(3), match.group(4), match.group(5),
+                description, start, description_end, line_index.line_of(start)
+            )
+        else:
+            yield KGToken(
+                kind, match.group(2), "", "", "",
+                description, start, description_end, line_index.line_of(start)
+            )
+
+
+def concept_name_spans(tokens: Iterable[KGToken], text: str) -> List[List[Any]]:
+    """
+    Locate the concept names written in tags, for rewriting them in place.
+    
+    Covers the names of concept tags and both ends of relationship tags. Names
+    are ASCII, so a name ends len(name) bytes after its offset. Tags without
+    a known position in text (a negative start) are skipped.
+    
+    Args:
+        tokens: Tags found in text by its extractor (see extractors).
+        text: The text the tags were found in.
+        
+    Returns:
+        [byte_offset, name] pairs in order of appearance, with offsets into the
+        UTF-8 encoding of text.
+    """
+    spans = []
+    for token in tokens:
+        if token.start < 0:
+            continue
+        if token.kind == "concept":
+            spans.append([token.start + len("[concept:"), token.name])
+        elif token.kind == "rel":
+            source_start = token.start + len("[rel:")
+            spans.append([source_start, token.source_concept])
+            spans.append([source_start + len(token.source_concept) + len("->"), token.target_concept])
+    spans = [span for span in spans if span[1]]
+    
+    if not text.isascii():
+        # Headers appear in increasing offset order, so one forward pass converts them
+        byte_offset = char_offset = 0
+        for span in spans:
+            byte_offset += len(text[char_offset:span[0]].encode("utf-8"))
+            char_offset = span[0]
+            span[0] = byte_offset
+    return spans
+
+
 def extract_concepts_and_rules(
-    markdown_content: str, file_path: str = ""
+    markdown_content: str, file_path: str = "", tokens: Optional[Iterable[KGToken]] = None
 ) -> Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]:
     """
     Extract concepts, rules, and relationships from markdown content.
@@ -177,6 +399,7 @@ def extract_concepts_and_rules(
     Args:
         markdown_content: The content of a markdown file.
         file_path: The path to the markdown file (for reference).
+        tokens: The tags of markdown_content, if the caller already tokenized it.
         
     Returns:
         A tuple containing lists of concept, rule, and relationship entries.
@@ -185,120 +408,345 @@ def extract_concepts_and_rules(
     rules = []
     relationships = []
     
-    # Find all concept matches
-    concept_matches = re.finditer(CONCEPT_PATTERN, markdown_content, re.DOTALL)
-    for match in concept_matches:
-        name = match.group(1)
-        description = match.group(2).strip()
-        
-        # Calculate approximate line number (crude estimation)
-        line_number = markdown_content[:match.start()].count('\n') + 1
+    if tokens is None:
+        tokens = tokenize_kg_tags(markdown_content)
+    for token in tokens:
+        line_number = token.line_number
+        description = token.description
         
-        # Validate concept name and description
-        if not name:
-            logger.warning(
-                f"Found empty concept name in {file_path}:{line_number}"
-            )
-            continue
+        if token.kind == "rel":
+            source_concept = token.source_concept
+            target_concept = token.target_concept
+            relation_type = token.relation_type
             
-        if not description:
-            logger.warning(
-                f"Found empty description for concept '{name}' in {file_path}:{line_number}"
-            )
-            continue
+            # Validate relationship components
+            if not source_concept or not target_concept or not relation_type:
+                if not source_concept:
+                    logger.warning(
+                        f"Missing source concept in relationship in {file_path}:{line_number}"
+                    )
+                if not target_concept:
+                    logger.warning(
+                        f"Missing target concept in relationship in {file_path}:{line_number}"
+                    )
+                if not relation_type:
+                    logger.warning(
+                        f"Missing relation type in relationship in {file_path}:{line_number}"
+                    )
+                continue
+                
+            # Validate that source and target are CamelCase
+            if not CAMEL_CASE_PATTERN.match(source_concept):
+                logger.warning(
+                    f"Relationship source '{source_concept}' in {file_path}:{line_number} should be CamelCase"
+                )
+                
+            if not CAMEL_CASE_PATTERN.match(target_concept):
+                logger.warning(
+                    f"Relationship target '{target_concept}' in {file_path}:{line_number} should be CamelCase"
+                )
+                
+            if not CAMEL_CASE_PATTERN.match(relation_type):
+                logger.warning(
+                    f"Relationship type '{relation_type}' in {file_path}:{line_number} should be CamelCase"
+                )
             
-        if not re.match(r'^[A-Z][a-zA-Z0-9]*$', name):
-            logger.warning(
-                f"Concept name '{name}' in {file_path}:{line_number} should be CamelCase"
-            )
-        
-        concepts.append(KGEntry(name, description, file_path, line_number))
-    
-    # Find all rule matches
-    rule_matches = re.finditer(RULE_PATTERN, markdown_content, re.DOTALL)
-    for match in rule_matches:
-        name = match.group(1)
-        description = match.group(2).strip()
+            relationships.append(RelationshipEntry(
+                source_concept, target_concept, relation_type, description, file_path, line_number
+            ))
+            continue
         
-        # Calculate approximate line number
-        line_number = markdown_content[:match.start()].count('\n') + 1
+        name = token.name
+        label = token.kind  # "concept" or "rule"
         
-        # Validate rule name and description  
+        # Validate name and description
         if not name:
             logger.warning(
-                f"Found empty rule name in {file_path}:{line_number}"
+                f"Found empty {label} name in {file_path}:{line_number}"
             )
             continue
             
         if not description:
             logger.warning(
-                f"Found empty description for rule '{name}' in {file_path}:{line_number}"
+                f"Found empty description for {label} '{name}' in {file_path}:{line_number}"
             )
             continue
             
-        if not re.match(r'^[A-Z][a-zA-Z0-9]*$', name):
+        if not CAMEL_CASE_PATTERN.match(name):
             logger.warning(
-                f"Rule name '{name}' in {file_path}:{line_number} should be CamelCase"
+                f"{label.capitalize()} name '{name}' in {file_path}:{line_number} should be CamelCase"
             )
         
-        rules.append(KGEntry(name, description, file_path, line_number))
+        entry = KGEntry(name, description, file_path, line_number)
+        if label == "concept":
+            concepts.append(entry)
+        else:
+            rules.append(entry)
+    
+    return concepts, rules, relationships
+
+
+def _extraction_to_payload(
+    extraction: Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]
+) -> Dict[str, List[List[Any]]]:
+    """
+    Convert a per-file extraction result into a compact cache payload.
+    
+    The source file is implied by the cache key, so only the per-entry fields
+    are stored, as flat lists. Callers that have the tags add their concept name
+    spans (see concept_name_spans) under "spans".
+    """
+    concepts, rules, relationships = extraction
+    return {
+        "concepts": [[c.name, c.description, c.line_number] for c in concepts],
+        "rules": [[r.name, r.description, r.line_number] for r in rules],
+        "relationships": [
+            [r.source_concept, r.target_concept, r.relation_type, r.description, r.line_number]
+            for r in relationships
+        ],
+    }
+
+
+def _extraction_from_payload(
+    payload: Dict[str, List[List[Any]]], source_file: str
+) -> Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]:
+    """Rebuild a per-file extraction result from a cache payload."""
+    return (
+        [KGEntry(name, desc, source_file, line) for name, desc, line in payload["concepts"]],
+        [KGEntry(name, desc, source_file, line) for name, desc, line in payload["rules"]],
+        [
+            RelationshipEntry(src, tgt, rtype, desc, source_file, line)
+            for src, tgt, rtype, desc, line in payload["relationships"]
+        ],
+    )
+
+
+def _file_tokens(text: str, rel_path: str) -> List[KGToken]:
+    """Find the tags of a file with the extractor registered for its type."""
+    from .extractors import extractor_for
     
-    # Find all relationship matches
-    relationship_matches = re.finditer(RELATIONSHIP_PATTERN, markdown_content, re.DOTALL)
-    for match in relationship_matches:
-        source_concept = match.group(1)
-        target_concept = match.group(2)
-        relation_type = match.group(3)
-        description = match.group(4).strip()
+    extractor = extractor_for(rel_path)
+    if extractor is None:
+        raise ValueError(f"No KG extractor for {rel_path}")
+    return list(extractor.tokenize(text))
+
+
+def extract_file_entries(
+    content: str, rel_path: str
+) -> Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]:
+    """
+    Extract concepts, rules, and relationships from a file of any registered type.
+    
+    Args:
+        content: The file's content.
+        rel_path: The file's path, whose suffix selects the extractor; recorded
+            as the entries' source file.
         
-        # Calculate approximate line number
-        line_number = markdown_content[:match.start()].count('\n') + 1
+    Raises:
+        ValueError: If no extractor handles the file's type.
+    """
+    return extract_concepts_and_rules(content, rel_path, _file_tokens(content, rel_path))
+
+
+def extract_payload(raw: bytes, rel_path: str) -> Dict[str, List[List[Any]]]:
+    """
+    Extract the contents of a source file into a cache payload, including tag spans.
+    
+    Args:
+        raw: The file's content.
+        rel_path: Project-relative path recorded as the entries' source file; its
+            suffix selects the extractor.
+    """
+    text = decode_text(raw)
+    tokens = _file_tokens(text, rel_path)
+    payload = _extraction_to_payload(extract_concepts_and_rules(text, rel_path, tokens))
+    spans = concept_name_spans(tokens, text)
+    if b"\r\n" in raw:
+        # Offsets are into the text with CRLF collapsed; shift them past the
+        # dropped carriage returns so they point into the file's bytes
+        collapsed = [match.start() - i for i, match in enumerate(_CRLF_PATTERN.finditer(raw))]
+        for span in spans:
+            span[0] += bisect_left(collapsed, span[0])
+    payload["spans"] = spans
+    return payload
+
+
+def _extract_file(path: str, rel_path: str) -> Tuple[Optional[Tuple[int, int, str, Any]], str]:
+    """
+    Extract one file into a cache payload; runs in worker processes.
+    
+    Args:
+        path: Path of the source file on disk.
+        rel_path: Project-relative path recorded as the entries' source file.
         
-        # Validate relationship components
-        if not source_concept or not target_concept or not relation_type:
-            if not source_concept:
-                logger.warning(
-                    f"Missing source concept in relationship in {file_path}:{line_number}"
-                )
-            if not target_concept:
-                logger.warning(
-                    f"Missing target concept in relationship in {file_path}:{line_number}"
-                )
-            if not relation_type:
-                logger.warning(
-                    f"Missing relation type in relationship in {file_path}:{line_number}"
-                )
-            continue
-            
-        # Validate that source and target are CamelCase
-        if not re.match(r'^[A-Z][a-zA-Z0-9]*$', source_concept):
-            logger.warning(
-                f"Relationship source '{source_concept}' in {file_path}:{line_number} should be CamelCase"
-            )
-            
-        if not re.match(r'^[A-Z][a-zA-Z0-9]*$', target_concept):
-            logger.warning(
-                f"Relationship target '{target_concept}' in {file_path}:{line_number} should be CamelCase"
-            )
-            
-        if not re.match(r'^[A-Z][a-zA-Z0-9]*$', relation_type):
-            logger.warning(
-                f"Relationship type '{relation_type}' in {file_path}:{line_number} should be CamelCase"
-            )
+    Returns:
+        A tuple of ((size, mtime_ns, digest, payload), "") on success, or
+        (None, error message) on failure so one bad file doesn't abort a batch.
+    """
+    try:
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+        return (stat.st_size, stat.st_mtime_ns, file_digest(raw), extract_payload(raw, rel_path)), ""
+    except Exception as e:
+        return None, str(e)
+
+
+def _extract_file_star(args: Tuple[str, str]) -> Tuple[Optional[Tuple[int, int, str, Any]], str]:
+    return _extract_file(*args)
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    """
+    Resolve a requested worker count.
+    
+    Args:
+        jobs: Requested number of worker processes; None or 0 means one per CPU.
         
-        relationships.append(RelationshipEntry(
-            source_concept, target_concept, relation_type, description, file_path, line_number
-        ))
+    Returns:
+        The number of worker processes to use (at least 1).
+    """
+    if not jobs or jobs < 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _extract_files(
+    pending: List[Tuple[str, str]], jobs: int
+) -> List[Tuple[Optional[Tuple[int, int, str, Any]], str]]:
+    """
+    Extract a list of (path, rel_path) pairs, in parallel when worthwhile.
     
-    return concepts, rules, relationships
+    Results are returned in the same order as the input, whichever path is used.
+    """
+    if jobs <= 1 or len(pending) < PARALLEL_MIN_FILES:
+        return [_extract_file(path, rel_path) for path, rel_path in pending]
+    
+    workers = min(jobs, len(pending))
+    # A few chunks per worker balances load without paying IPC per file
+    chunksize = max(1, len(pending) // (workers * 4))
+    logger.info(
+        f"Extracting {len(pending)} files with {workers} worker processes "
+        f"(chunks of {chunksize})"
+    )
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_extract_file_star, pending, chunksize=chunksize))
+    except (OSError, NotImplementedError, BrokenProcessPool) as e:
+        logger.warning(f"Parallel KG extraction unavailable ({e}), falling back to serial")
+        return [_extract_file(path, rel_path) for path, rel_path in pending]
 
 
-def scan_markdown_files(docs_dir: Path) -> Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]:
+def scan_payloads(
+    docs_dir: Path,
+    cache: Optional[ExtractionCache],
+    jobs: Optional[int],
+    file_index: ProjectFileIndex,
+    source_dirs: Iterable[Union[str, Path]] = (),
+    extractors: Optional[Iterable[str]] = None,
+) -> Tuple[List[str], Dict[str, Any], int]:
     """
-    Scan all markdown files in the docs directory for concepts, rules, and relationships.
+    Find the tagged source files and their extraction payloads.
+    
+    The docs directory and each source directory are walked once, for the
+    suffixes of all enabled extractors together. Payloads come from the cache
+    where it is still valid; the other files are parsed (see extract_payload)
+    and stored in the cache. The cache is not saved.
     
     Args:
         docs_dir: Path to the docs directory.
+        cache: Extraction cache, or None to parse every file.
+        jobs: Number of worker processes used to parse files (see scan_markdown_files).
+        file_index: Project file index to find the source files with.
+        source_dirs: Further directories to scan, e.g. for Python docstrings;
+            relative paths are resolved against the parent of docs_dir.
+        extractors: Names of the extractors to use (see extractors); None for
+            DEFAULT_EXTRACTORS (markdown only).
+        
+    Returns:
+        A tuple (rel_paths, payloads, parsed): the source file paths (relative to
+        the parent of docs_dir) in sorted order, their payloads by path (files
+        that could not be read are missing), and the number of files parsed.
+    """
+    from .extractors import extractor_suffixes
+    
+    # Entries record paths relative to the parent of docs_dir, which is usually
+    # the index root
+    docs_rel = file_index.relative(os.path.relpath(docs_dir, file_index.root))
+    base_rel = posixpath.dirname(docs_rel)
+    roots = [docs_rel]
+    for source_dir in source_dirs:
+        source_path = Path(docs_dir).parent / source_dir
+        roots.append(file_index.relative(os.path.relpath(source_path, file_index.root)))
+    
+    suffixes = extractor_suffixes(extractors)
+    index_paths = sorted({path for root in roots for path in file_index.files(root, suffixes=suffixes)})
+    source_files = [os.path.join(file_index.root, index_path) for index_path in index_paths]
+    rel_paths = [
+        (posixpath.relpath(index_path, base_rel) if base_rel else index_path).replace("/", os.sep)
+        for index_path in index_paths
+    ]
+    logger.info(f"Found {len(source_files)} source files in {', '.join(root or '.' for root in roots)}")
+    
+    # First resolve what the cache can answer, then parse the rest
+    payloads: Dict[str, Any] = {}
+    pending: List[Tuple[str, str]] = []
+    for source_file, rel_path, index_path in zip(source_files, rel_paths, index_paths):
+        try:
+            payload = (
+                cache.lookup(Path(source_file), rel_path, stat=file_index.stat(index_path))
+                if cache is not None else None
+            )
+        except Exception as e:
+            logger.error(f"Error processing {source_file}: {e}")
+            continue
+        if payload is None:
+            pending.append((source_file, rel_path))
+        else:
+            payloads[rel_path] = payload
+    
+    extracted = _extract_files(pending, resolve_jobs(jobs))
+    for (source_file, rel_path), (result, error) in zip(pending, extracted):
+        if result is None:
+            logger.error(f"Error processing {source_file}: {error}")
+            continue
+        size, mtime_ns, digest, payload = result
+        if cache is not None:
+            cache.store(rel_path, size, mtime_ns, digest, payload)
+        payloads[rel_path] = payload
+    
+    return rel_paths, payloads, len(pending)
+
+
+def scan_markdown_files(
+    docs_dir: Path,
+    cache_dir: Optional[Path] = None,
+    jobs: Optional[int] = 1,
+    file_index: Optional[ProjectFileIndex] = None,
+    source_dirs: Iterable[Union[str, Path]] = (),
+    extractors: Optional[Iterable[str]] = None,
+) -> Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]:
+    """
+    Scan the docs directory for concepts, rules, and relationships.
+    
+    The files of every enabled extractor's type (see extractors; markdown by
+    default) are scanned, in the docs directory and in source_dirs. Files are
+    processed in sorted path order, so the output and any duplicate warnings
+    are the same whether or not extraction runs in parallel.
+    
+    Args:
+        docs_dir: Path to the docs directory.
+        cache_dir: Optional directory for the persistent extraction cache. When given,
+            only files whose content changed since the previous scan are re-parsed,
+            and cache records for deleted files are evicted.
+        jobs: Number of worker processes used to parse files; None or 0 means one
+            per CPU. Below PARALLEL_MIN_FILES files to parse, parsing stays serial.
+        file_index: Project file index to find the source files with; files
+            excluded by .gitignore or .khoraignore are skipped. Defaults to an
+            index rooted at the parent of docs_dir.
+        source_dirs: Further directories to scan, relative to the parent of
+            docs_dir (e.g. "src" for module docstrings).
+        extractors: Names of the extractors to use; None for DEFAULT_EXTRACTORS.
         
     Returns:
         A tuple containing lists of all concept, rule, and relationship entries.
@@ -310,111 +758,799 @@ def scan_markdown_files(docs_dir: Path) -> Tuple[List[KGEntry], List[KGEntry], L
     seen_rules: Set[str] = set()
     seen_relationships: Set[Tuple[str, str, str]] = set()  # (source, target, type)
     
-    # Find all markdown files
-    markdown_files = list(docs_dir.glob("**/*.md"))
-    logger.info(f"Found {len(markdown_files)} markdown files in {docs_dir}")
+    started = time.perf_counter()
+    cache = ExtractionCache.load(cache_dir) if cache_dir is not None else None
+    if file_index is None:
+        file_index = ProjectFileIndex(docs_dir.parent)
+    rel_paths, payloads, parsed = scan_payloads(
+        docs_dir, cache, jobs, file_index, source_dirs=source_dirs, extractors=extractors
+    )
     
-    for md_file in markdown_files:
-        try:
-            content = md_file.read_text(encoding="utf-8")
-            rel_path = md_file.relative_to(docs_dir.parent)
+    # Merge per-file results in sorted path order
+    for rel_path in rel_paths:
+        payload = payloads.get(rel_path)
+        if payload is None:
+            continue
+        file_concepts, file_rules, file_relationships = _extraction_from_payload(payload, rel_path)
+        
+        # Check for duplicates
+        for concept in file_concepts:
+            if concept.name in seen_concepts:
+                logger.warning(
+                    f"Duplicate concept '{concept.name}' found in {rel_path}"
+                )
+            seen_concepts.add(concept.name)
+            all_concepts.append(concept)
             
-            file_concepts, file_rules, file_relationships = extract_concepts_and_rules(content, str(rel_path))
+        for rule in file_rules:
+            if rule.name in seen_rules:
+                logger.warning(
+                    f"Duplicate rule '{rule.name}' found in {rel_path}"
+                )
+            seen_rules.add(rule.name)
+            all_rules.append(rule)
             
-            # Check for duplicates
-            for concept in file_concepts:
-                if concept.name in seen_concepts:
-                    logger.warning(
-                        f"Duplicate concept '{concept.name}' found in {rel_path}"
-                    )
-                seen_concepts.add(concept.name)
-                all_concepts.append(concept)
-                
-            for rule in file_rules:
-                if rule.name in seen_rules:
-                    logger.warning(
-                        f"Duplicate rule '{rule.name}' found in {rel_path}"
-                    )
-                seen_rules.add(rule.name)
-                all_rules.append(rule)
-                
-            for relationship in file_relationships:
-                rel_key = (relationship.source_concept, relationship.target_concept, relationship.relation_type)
-                if rel_key in seen_relationships:
-                    logger.warning(
-                        f"Duplicate relationship '{relationship.source_concept}->{relationship.target_concept}:{relationship.relation_type}' found in {rel_path}"
-                    )
-                seen_relationships.add(rel_key)
-                all_relationships.append(relationship)
-                
-        except Exception as e:
-            logger.error(f"Error processing {md_file}: {e}")
+        for relationship in file_relationships:
+            rel_key = (relationship.source_concept, relationship.target_concept, relationship.relation_type)
+            if rel_key in seen_relationships:
+                logger.warning(
+                    f"Duplicate relationship '{relationship.source_concept}->{relationship.target_concept}:{relationship.relation_type}' found in {rel_path}"
+                )
+            seen_relationships.add(rel_key)
+            all_relationships.append(relationship)
+    
+    if cache is not None:
+        cache.prune(rel_paths)
+        try:
+            cache.save()
+        except OSError as e:
+            logger.warning(f"Could not write KG extraction cache to {cache.cache_file}: {e}")
+        logger.info(
+            f"KG extraction ({'cold' if cache.cold else 'warm'} cache) took "
+            f"{time.perf_counter() - started:.3f}s: {cache.hits} cached, "
+            f"{parsed} parsed, {cache.evicted} evicted"
+        )
     
     logger.info(f"Extracted {len(all_concepts)} concepts, {len(all_rules)} rules, and {len(all_relationships)} relationships")
     return all_concepts, all_rules, all_relationships
 
 
+def _entry_sort_key(entry: Union[KGEntry, RelationshipEntry]) -> Tuple[Any, ...]:
+    """Canonical ordering of entries: by source location, then by content."""
+    if isinstance(entry, RelationshipEntry):
+        return (
+            entry.source_file, entry.line_number, entry.source_concept,
+            entry.target_concept, entry.relation_type, entry.description
+        )
+    return (entry.source_file, entry.line_number, entry.name, entry.description)
+
+
+def _json_value(value: Any) -> str:
+    return str(value) if type(value) is int else json.dumps(value)
+
+
+def _entry_json(entry: Union[KGEntry, RelationshipEntry]) -> str:
+    """
+    Serialize an entry as it appears in a KG file, without building its dict.
+    
+    The result is identical to the entry's to_dict() form as written by
+    json.dumps(..., indent=2) at the nesting depth of the entry list.
+    """
+    if isinstance(entry, RelationshipEntry):
+        fields = (
+            '    {\n      "source_concept": ' + _json_string(entry.source_concept)
+            + ',\n      "target_concept": ' + _json_string(entry.target_concept)
+            + ',\n      "relation_type": ' + _json_string(entry.relation_type)
+        )
+    else:
+        fields = '    {\n      "name": ' + _json_string(entry.name)
+    return (
+        fields
+        + ',\n      "description": ' + _json_string(entry.description)
+        + ',\n      "source": {\n        "file": ' + _json_string(entry.source_file)
+        + ',\n        "line": ' + _json_value(entry.line_number)
+        + "\n      }\n    }"
+    )
+
+
+def _entry_canonical_json(entry: Union[KGEntry, RelationshipEntry]) -> str:
+    """
+    Serialize an entry in the canonical form used for fingerprints.
+    
+    Equivalent to json.dumps(entry.to_dict(), sort_keys=True,
+    separators=(",", ":"), ensure_ascii=False).
+    """
+    source = (
+        '"source":{"file":' + _json_string_unicode(entry.source_file)
+        + ',"line":' + _json_value(entry.line_number) + "}"
+    )
+    if isinstance(entry, RelationshipEntry):
+        return (
+            '{"description":' + _json_string_unicode(entry.description)
+            + ',"relation_type":' + _json_string_unicode(entry.relation_type)
+            + "," + source
+            + ',"source_concept":' + _json_string_unicode(entry.source_concept)
+            + ',"target_concept":' + _json_string_unicode(entry.target_concept) + "}"
+        )
+    return (
+        '{"description":' + _json_string_unicode(entry.description)
+        + ',"name":' + _json_string_unicode(entry.name)
+        + "," + source + "}"
+    )
+
+
+def kg_fingerprint(key: str, entries: Iterable[Union[KGEntry, RelationshipEntry]]) -> str:
+    """
+    Compute the content fingerprint stored in the header of a KG file.
+    
+    The entries are hashed one at a time in their canonical JSON form, so no
+    serialized copy of the whole file is built.
+    
+    Args:
+        key: The list key of the file ("concepts", "rules" or "relationships").
+        entries: The entries in the order they are written.
+        
+    Returns:
+        A hex SHA-256 digest of the canonical JSON form of the file's content,
+        i.e. of json.dumps({"version": ..., key: [to_dict() ...]}, sort_keys=True,
+        separators=(",", ":"), ensure_ascii=False).
+    """
+    return _fingerprint_blocks(key, (_entry_canonical_json(entry).encode("utf-8") for entry in entries))
+
+
+def _fingerprint_blocks(key: str, blocks: Iterable[bytes]) -> str:
+    """Compute kg_fingerprint from runs of canonical entries, each joined by ","."""
+    digest = hashlib.sha256()
+    # The list key sorts before "version"
+    digest.update(f'{{"{key}":['.encode("utf-8"))
+    separator = b""
+    for block in blocks:
+        digest.update(separator)
+        digest.update(block)
+        separator = b","
+    digest.update(f'],"version":{_json_string_unicode(KG_FORMAT_VERSION)}}}'.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_kg_fingerprint(path: Path) -> Optional[str]:
+    """
+    Read the fingerprint from the header of a KG file without parsing all of it.
+    
+    Args:
+        path: Path to a concepts.json, rules.json or relationships.json file.
+        
+    Returns:
+        The stored fingerprint, or None if the file is missing or has none.
+    """
+    header = _read_kg_header(path)
+    match = FINGERPRINT_PATTERN.search(header) if header is not None else None
+    return match.group(1) if match else None
+
+
+def kg_file_fingerprints(project_dir: Path) -> Dict[str, Optional[str]]:
+    """
+    Read the header fingerprints of all KG files a project may have.
+    
+    Derived artifacts (the SQLite index, the binary snapshot) record these to
+    tell when they are stale. Appending to a JSON Lines log keeps its header,
+    so a log's size is made part of its fingerprint.
+    
+    Args:
+        project_dir: The root directory of the project.
+        
+    Returns:
+        The fingerprint of each KG file name, None for missing files.
+    """
+    kg_dir = project_dir / "kg"
+    fingerprints = {}
+    for file_format in KG_FILE_FORMATS:
+        for _, key in KG_FILE_KEYS:
+            path = kg_dir / f"{key}.{file_format}"
+            fingerprint = read_kg_fingerprint(path)
+            if fingerprint and file_format == "jsonl":
+                try:
+                    fingerprint = f"{fingerprint}:{path.stat().st_size}"
+                except OSError:
+                    fingerprint = None
+            fingerprints[path.name] = fingerprint
+    return fingerprints
+
+
+def _read_kg_header(path: Path) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read(KG_HEADER_SIZE)
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def write_kg_file(
+    path: Path, key: str, entries: List[Union[KGEntry, RelationshipEntry]]
+) -> bool:
+    """
+    Write one KG file unless its content fingerprint is unchanged.
+    
+    Entries are written in canonical order, so the same set of entries always
+    produces the same content regardless of the order it was extracted in.
+    
+    Args:
+        path: Destination JSON file.
+        key: The list key of the file ("concepts", "rules" or "relationships").
+        entries: The entries to write.
+        
+    Returns:
+        True if the file was written, False if it was already up to date.
+    """
+    ordered = sorted(entries, key=_entry_sort_key)
+    fingerprint = kg_fingerprint(key, ordered)
+    
+    if read_kg_fingerprint(path) == fingerprint:
+        return False
+    
+    _write_kg_document(path, key, fingerprint, (_entry_json(entry) for entry in ordered))
+    return True
+
+
+def serialize_kg_block(
+    entries: Iterable[Union[KGEntry, RelationshipEntry]]
+) -> Tuple[str, bytes]:
+    """
+    Serialize a run of entries, e.g. those of one source file, for write_kg_file_blocks.
+    
+    Args:
+        entries: The entries, all with the same source file.
+        
+    Returns:
+        The entries as written to a KG file, and their canonical form as hashed
+        for its fingerprint; both are in canonical order.
+    """
+    ordered = sorted(entries, key=_entry_sort_key)
+    return (
+        ",\n".join(_entry_json(entry) for entry in ordered),
+        ",".join(_entry_canonical_json(entry) for entry in ordered).encode("utf-8"),
+    )
+
+
+def write_kg_file_blocks(path: Path, key: str, blocks: List[Tuple[str, bytes]]) -> bool:
+    """
+    Write one KG file from serialized runs of entries unless its fingerprint is unchanged.
+    
+    Callers that keep the serialized entries of each source file (see
+    serialize_kg_block) only re-serialize the files that changed.
+    
+    Args:
+        path: Destination JSON file.
+        key: The list key of the file ("concepts", "rules" or "relationships").
+        blocks: Non-empty serialized runs of entries, ordered by source file.
+        
+    Returns:
+        True if the file was written, False if it was already up to date.
+    """
+    fingerprint = _fingerprint_blocks(key, (canonical for _, canonical in blocks))
+    
+    if read_kg_fingerprint(path) == fingerprint:
+        return False
+    
+    _write_kg_document(path, key, fingerprint, (written for written, _ in blocks))
+    return True
+
+
+def _write_kg_document(path: Path, key: str, fingerprint: str, blocks: Iterable[str]) -> None:
+    """Write a KG file from serialized entries, or runs of them joined by ",\n"."""
+    # Same layout as json.dumps(data, indent=2), streamed entry by entry. The
+    # fingerprint is kept ahead of the entries so it can be read from the header.
+    header = (
+        "{\n"
+        f'  "version": {_json_string(KG_FORMAT_VERSION)},\n'
+        f'  "generated_at": {_json_string(datetime.now().isoformat())},\n'
+        f'  "fingerprint": {_json_string(fingerprint)},\n'
+        f'  {_json_string(key)}: ['
+    )
+    
+    def chunks() -> Iterator[str]:
+        yield header
+        separator = "\n"
+        for block in blocks:
+            yield separator
+            yield block
+            separator = ",\n"
+        yield "]\n}" if separator == "\n" else "\n  ]\n}"
+    
+    atomic_write_text(path, chunks())
+
+
 def generate_kg_files(
     project_dir: Path, 
     concepts: List[KGEntry], 
     rules: List[KGEntry],
-    relationships: List[RelationshipEntry]
+    relationships: List[RelationshipEntry],
+    file_format: str = "json",
 ) -> Tuple[Path, Path, Path]:
     """
     Generate concepts.json, rules.json, and relationships.json files.
     
+    Each file carries a fingerprint of its content in its header and is only
+    rewritten when that fingerprint changes, so regenerating an unchanged KG
+    leaves the files (and their generated_at timestamps) untouched.
+    
     Args:
         project_dir: The root directory of the project.
         concepts: List of extracted concept entries.
         rules: List of extracted rule entries.
         relationships: List of extracted relationship entries.
+        file_format: "json" for JSON documents, or "jsonl" for compacted JSON
+            Lines logs. Files of the other format are removed.
         
     Returns:
         A tuple containing the paths to the generated files.
     """
+    if file_format not in KG_FILE_FORMATS:
+        raise ValueError(f"Unknown KG file format: {file_format}")
+    
     # Create kg directory if it doesn't exist
     kg_dir = project_dir / "kg"
     kg_dir.mkdir(exist_ok=True)
     
-    concepts_file = kg_dir / "concepts.json"
-    rules_file = kg_dir / "rules.json"
-    relationships_file = kg_dir / "relationships.json"
+    concepts_file = kg_dir / f"concepts.{file_format}"
+    rules_file = kg_dir / f"rules.{file_format}"
+    relationships_file = kg_dir / f"relationships.{file_format}"
     
-    # Create concepts.json
-    concepts_data = {
-        "version": "0.1.0",
-        "generated_at": datetime.now().isoformat(),
-        "concepts": [concept.to_dict() for concept in concepts]
-    }
+    if file_format == "jsonl":
+        from .jsonl import kg_log_record, write_kg_log as write_file, written_kg_log_state
+    else:
+        write_file = write_kg_file
+    
+    previous = read_kg_manifest(project_dir)
+    previous_files = previous.get("files", {}) if previous else {}
+    manifest_files = {}
+    
+    for path, key, entries in (
+        (concepts_file, "concepts", concepts),
+        (rules_file, "rules", rules),
+        (relationships_file, "relationships", relationships),
+    ):
+        # Readers prefer a log over a JSON document, so drop the other format
+        for other_format in KG_FILE_FORMATS:
+            stale = kg_dir / f"{key}.{other_format}"
+            if other_format != file_format and stale.exists():
+                logger.info(f"Removing {stale}, the KG is now stored as {file_format}")
+                stale.unlink()
+        
+        written = write_file(path, key, entries)
+        if written:
+            logger.info(f"Generated {path} with {len(entries)} {key}")
+        else:
+            logger.info(f"{path} is up to date ({len(entries)} {key})")
+        
+        record = previous_files.get(path.name)
+        if written or not _manifest_record_is_current(path, record):
+            if file_format == "jsonl":
+                record = kg_log_record(path, key, written_kg_log_state(path, entries))
+            else:
+                record = _written_kg_file_record(path, key, entries)
+        manifest_files[path.name] = record
+    
+    write_kg_manifest(project_dir, manifest_files)
+    
+    return concepts_file, rules_file, relationships_file
+
+
+def kg_source_digest(entries: Iterable[Union[KGEntry, RelationshipEntry]]) -> str:
+    """
+    Hash the entries of one source file for kg_content_hash.
     
-    with open(concepts_file, "w", encoding="utf-8") as f:
-        json.dump(concepts_data, f, indent=2)
+    Returns:
+        A hex SHA-256 digest of the entries' canonical JSON forms in canonical
+        order, each followed by a newline (the lines a compacted log holds).
+    """
+    digest = hashlib.sha256()
+    for entry in sorted(entries, key=_entry_sort_key):
+        digest.update(_entry_canonical_json(entry).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def kg_content_hash(source_digests: Mapping[str, str]) -> str:
+    """
+    Compute the content hash of a KG list, reported in the context.yaml summary.
+    
+    The hash depends only on the entries, not on the storage format, the order
+    of a log's records or when a file was written. It is built from one digest
+    per source file, so an update can recompute it from the digests of the
+    changed files.
+    
+    Args:
+        source_digests: kg_source_digest of each source file's entries.
+        
+    Returns:
+        A hex SHA-256 digest of the sorted (source file, digest) pairs.
+    """
+    digest = hashlib.sha256()
+    for source in sorted(source_digests):
+        digest.update(f"{_json_string_unicode(source)}:{source_digests[source]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def kg_entries_hash(entries: Iterable[Union[KGEntry, RelationshipEntry]]) -> str:
+    """Compute kg_content_hash from a KG list's entries."""
+    by_source: Dict[str, List[Union[KGEntry, RelationshipEntry]]] = {}
+    for entry in entries:
+        by_source.setdefault(entry.source_file, []).append(entry)
+    return kg_content_hash({source: kg_source_digest(group) for source, group in by_source.items()})
+
+
+def _kg_file_record(path: Path, key: str) -> Dict[str, Any]:
+    """
+    Build the manifest record of a KG file by reading it.
+    
+    Args:
+        path: Path to a concepts, rules or relationships file (.json or .jsonl).
+        key: The list key of the file.
+        
+    Returns:
+        The record: entry count, hashes, size, timestamp and (for relationships)
+        the sorted relation types.
+        
+    Raises:
+        ValueError: If the file is not valid JSON.
+        OSError: If the file cannot be read.
+    """
+    if path.suffix == ".jsonl":
+        from .jsonl import kg_log_record
         
-    # Create rules.json
-    rules_data = {
-        "version": "0.1.0",
-        "generated_at": datetime.now().isoformat(),
-        "rules": [rule.to_dict() for rule in rules]
+        return kg_log_record(path, key)
+    
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get(key, [])
+    entry_class = RelationshipEntry if key == "relationships" else KGEntry
+    record: Dict[str, Any] = {
+        "count": len(items),
+        "content_hash": kg_entries_hash(entry_class.from_dict(item) for item in items),
+        "fingerprint": data.get("fingerprint"),
+        "size": path.stat().st_size,
+        "generated_at": data.get("generated_at"),
+    }
+    if key == "relationships":
+        record["relation_types"] = sorted({
+            item["relation_type"] for item in items if "relation_type" in item
+        })
+    return record
+
+
+def _written_kg_file_record(
+    path: Path,
+    key: str,
+    entries: List[Union[KGEntry, RelationshipEntry]],
+    source_digests: Optional[Mapping[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Build the manifest record of a KG file that holds exactly the given entries.
+    
+    Callers that keep the kg_source_digest of each source file pass them as
+    source_digests, so the content hash is not recomputed from every entry.
+    """
+    header = _read_kg_header(path) or ""
+    match = GENERATED_AT_PATTERN.search(header)
+    record: Dict[str, Any] = {
+        "count": len(entries),
+        "content_hash": kg_content_hash(source_digests) if source_digests is not None else kg_entries_hash(entries),
+        "fingerprint": read_kg_fingerprint(path),
+        "size": path.stat().st_size,
+        "generated_at": match.group(1) if match else None,
     }
+    if key == "relationships":
+        record["relation_types"] = sorted({entry.relation_type for entry in entries})
+    return record
+
+
+def _manifest_record_is_current(path: Path, record: Optional[Dict[str, Any]]) -> bool:
+    """Check a manifest record against the file's size and header fingerprint."""
+    if not record or not record.get("fingerprint") or not record.get("content_hash"):
+        return False
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return False
+    return size == record.get("size") and read_kg_fingerprint(path) == record["fingerprint"]
+
+
+def read_kg_manifest(project_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read kg/manifest.json.
+    
+    Args:
+        project_dir: The root directory of the project.
+        
+    Returns:
+        The manifest data, or None if it is missing, unreadable or of another version.
+    """
+    path = project_dir / "kg" / KG_MANIFEST_FILENAME
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != KG_FORMAT_VERSION:
+        return None
+    return data
+
+
+def write_kg_manifest(project_dir: Path, files: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Write kg/manifest.json unless its content is unchanged.
+    
+    Args:
+        project_dir: The root directory of the project.
+        files: Manifest records keyed by KG file name (see _kg_file_record).
+        
+    Returns:
+        True if the manifest was written.
+    """
+    data = {"version": KG_FORMAT_VERSION, "files": files}
+    if read_kg_manifest(project_dir) == data:
+        return False
+    atomic_write_text(project_dir / "kg" / KG_MANIFEST_FILENAME, _dump_kg_manifest(data))
+    return True
+
+
+def _dump_kg_manifest(data: Dict[str, Any]) -> str:
+    """Serialize kg/manifest.json like json.dumps(data, indent=2), but with each source of a log on one line."""
+    # The indenting encoder is pure Python, which is slow for the per-source
+    # records of a large KG; those are dumped by the C encoder instead
+    def dump_object(items: Dict[str, Any], indent: str, flat: bool) -> str:
+        lines = []
+        for key, value in items.items():
+            if isinstance(value, dict) and value and not flat:
+                text = dump_object(value, indent + "  ", key == "sources")
+            else:
+                text = json.dumps(value)
+            lines.append(f"{indent}  {json.dumps(key)}: {text}")
+        return "{\n" + ",\n".join(lines) + f"\n{indent}}}"
+    
+    return dump_object(data, "", False)
+
+
+def summarize_kg_files(project_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Summarize the KG files for the knowledge_graph_summary in context.yaml.
+    
+    Counts, hashes and relation types come from kg/manifest.json, which costs a
+    stat and a header read per file. A file whose manifest record is missing or
+    stale (e.g. edited by hand) is parsed and hashed instead. The hashes are
+    content hashes (see kg_content_hash), the same for a JSON document and a log.
     
-    with open(rules_file, "w", encoding="utf-8") as f:
-        json.dump(rules_data, f, indent=2)
+    Args:
+        project_dir: The root directory of the project.
         
-    # Create relationships.json
-    relationships_data = {
-        "version": "0.1.0",
-        "generated_at": datetime.now().isoformat(),
-        "relationships": [relationship.to_dict() for relationship in relationships]
+    Returns:
+        The summary fields (hashes, counts, relationship types, source directory
+        and last update time), or None if there are no KG files.
+        
+    Raises:
+        ValueError: If a KG file that has to be read is not valid JSON.
+        OSError: If a KG file cannot be read.
+    """
+    manifest = read_kg_manifest(project_dir)
+    records = manifest.get("files", {}) if manifest else {}
+    
+    summary: Dict[str, Any] = {
+        "concepts_hash": None,
+        "rules_hash": None,
+        "relationships_hash": None,
+        "concept_count": 0,
+        "rule_count": 0,
+        "relationship_count": 0,
+        "relationship_types": [],
+        "source_dir": "kg",
+        "last_updated": None,
     }
+    found = False
+    for _, key in KG_FILE_KEYS:
+        path = kg_file_path(project_dir, key)
+        if path is None:
+            continue
+        found = True
+        
+        record = records.get(path.name)
+        if not _manifest_record_is_current(path, record):
+            logger.debug(f"KG manifest has no current record for {path.name}, reading the file")
+            record = _kg_file_record(path, key)
+        
+        summary[f"{key}_hash"] = record["content_hash"]
+        summary[f"{key[:-1]}_count"] = record["count"]
+        if key == "relationships":
+            summary["relationship_types"] = record.get("relation_types", [])
+        
+        updated = record.get("generated_at")
+        if updated and (not summary["last_updated"] or updated > summary["last_updated"]):
+            summary["last_updated"] = updated
     
-    with open(relationships_file, "w", encoding="utf-8") as f:
-        json.dump(relationships_data, f, indent=2)
+    return summary if found else None
+
+
+def kg_file_path(project_dir: Path, key: str) -> Optional[Path]:
+    """
+    Find the file a KG list is stored in.
+    
+    Args:
+        project_dir: The root directory of the project.
+        key: The list key ("concepts", "rules" or "relationships").
         
-    logger.info(f"Generated {concepts_file} with {len(concepts)} concepts")
-    logger.info(f"Generated {rules_file} with {len(rules)} rules")
-    logger.info(f"Generated {relationships_file} with {len(relationships)} relationships")
+    Returns:
+        The JSON Lines log if there is one, else the JSON document, or None if
+        neither exists.
+    """
+    for file_format in reversed(KG_FILE_FORMATS):
+        path = project_dir / "kg" / f"{key}.{file_format}"
+        if path.exists():
+            return path
+    return None
+
+
+def iter_kg_entries(project_dir: Path, key: str) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the entries of one KG list in to_dict() form.
     
-    return concepts_file, rules_file, relationships_file
+    Entries of a JSON Lines log are streamed without loading the whole file;
+    a JSON document is parsed as a whole. A missing file yields nothing.
+    
+    Args:
+        project_dir: The root directory of the project.
+        key: The list key ("concepts", "rules" or "relationships").
+        
+    Raises:
+        ValueError: If the file is malformed.
+        OSError: If the file cannot be read.
+    """
+    path = kg_file_path(project_dir, key)
+    if path is None:
+        return
+    if path.suffix == ".jsonl":
+        from .jsonl import iter_kg_log
+        
+        yield from iter_kg_log(path)
+    else:
+        yield from json.loads(path.read_text(encoding="utf-8")).get(key, [])
+
+
+def load_kg_files(
+    project_dir: Path
+) -> Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]:
+    """
+    Load the previously generated concepts, rules, and relationships.
+    
+    Missing files are treated as empty. The entries are read from kg/kg.bin if
+    that snapshot is current; otherwise each list is read from its JSON Lines
+    log if there is one, else from its JSON document.
+    
+    Args:
+        project_dir: The root directory of the project.
+        
+    Returns:
+        A tuple containing lists of concept, rule, and relationship entries.
+        
+    Raises:
+        ValueError: If one of the files exists but is malformed.
+        OSError: If one of the files exists but cannot be read.
+    """
+    # A current binary snapshot is cheaper to read than the files it mirrors
+    from .snapshot import open_kg_snapshot
+    
+    snapshot = open_kg_snapshot(project_dir)
+    if snapshot is not None:
+        with snapshot:
+            return list(snapshot.concepts), list(snapshot.rules), list(snapshot.relationships)
+    
+    concepts = [KGEntry.from_dict(c) for c in iter_kg_entries(project_dir, "concepts")]
+    rules = [KGEntry.from_dict(r) for r in iter_kg_entries(project_dir, "rules")]
+    relationships = [
+        RelationshipEntry.from_dict(r) for r in iter_kg_entries(project_dir, "relationships")
+    ]
+    return concepts, rules, relationships
+
+
+def refresh_snapshot(
+    project_dir: Path,
+    entries: Optional[Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]] = None,
+) -> None:
+    """Rebuild kg/kg.bin if the project keeps one, so its readers need not fall back to the KG files."""
+    from .snapshot import ensure_kg_snapshot, snapshot_path
+    
+    if not snapshot_path(project_dir).exists():
+        return
+    try:
+        ensure_kg_snapshot(project_dir, entries)
+    except Exception as e:
+        logger.error(f"Error updating KG snapshot: {e}")
+
+
+def refresh_reachability_index(
+    project_dir: Path,
+    entries: Optional[Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]] = None,
+) -> None:
+    """Rebuild kg/reachability.npz if the project keeps one; only relation types whose edges changed are recomputed."""
+    from .reachability import ensure_reachability_index, reachability_path
+    
+    if not reachability_path(project_dir).exists():
+        return
+    try:
+        ensure_reachability_index(project_dir, (), entries[2] if entries is not None else None)
+    except Exception as e:
+        logger.error(f"Error updating KG reachability index: {e}")
+
+
+def refresh_similarity_index(
+    project_dir: Path,
+    entries: Optional[Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]] = None,
+) -> None:
+    """Rebuild kg/similarity.npz if the project keeps one; only changed source files are re-tokenized."""
+    from .similarity import ensure_similarity_index, similarity_path
+    
+    if not similarity_path(project_dir).exists():
+        return
+    try:
+        ensure_similarity_index(project_dir, entries)
+    except Exception as e:
+        logger.error(f"Error updating KG similarity index: {e}")
+
+
+def refresh_modules(
+    project_dir: Path,
+    entries: Optional[Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]] = None,
+) -> None:
+    """Recompute kg/modules.json if the project keeps one and its relationships changed."""
+    from .communities import ensure_modules, modules_path
+    
+    if not modules_path(project_dir).exists():
+        return
+    try:
+        ensure_modules(project_dir, entries[2] if entries is not None else None)
+    except Exception as e:
+        logger.error(f"Error updating KG modules: {e}")
+
+
+def update_context_summary(
+    project_dir: Path,
+    entries: Optional[Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]] = None,
+) -> None:
+    """
+    Refresh the knowledge_graph_summary in .khora/context.yaml, if that file exists.
+    
+    Args:
+        project_dir: The root directory of the project.
+        entries: The (concepts, rules, relationships) the KG files were just
+            written from; only used if the key concepts have to be re-ranked.
+    """
+    try:
+        import yaml
+        from .centrality import summarize_key_concepts
+        from .communities import read_modules, summarize_modules
+        
+        context_file = project_dir / ".khora" / "context.yaml"
+        if not context_file.exists():
+            return
+        
+        context_data = yaml.safe_load(context_file.read_text(encoding="utf-8"))
+        
+        # Create or update knowledge_graph_summary section from the
+        # manifest written alongside the KG files
+        summary = summarize_kg_files(project_dir)
+        if summary is not None:
+            key_concepts = summarize_key_concepts(project_dir, summary, entries)
+            if key_concepts is not None:
+                summary["key_concepts"] = key_concepts
+            modules = read_modules(project_dir)
+            if modules is not None:
+                summary["modules"] = summarize_modules(modules)
+        context_data["knowledge_graph_summary"] = summary
+        
+        # Readers never see a partially written context.yaml
+        atomic_write_text(context_file, yaml.dump(context_data, sort_keys=False, indent=2))
+        
+        logger.info(f"Updated knowledge graph summary in {context_file}")
+    except Exception as e:
+        logger.error(f"Error updating context.yaml: {e}")
 
 
 class ValidationResult(NamedTuple):
@@ -424,34 +1560,114 @@ class ValidationResult(NamedTuple):
     error_count: int
 
 
+class SourceFileChecker:
+    """
+    Checks whether project files exist using cached directory listings.
+    
+    Each directory is listed at most once, so checking many entries that point
+    at a few thousand files costs one listing per directory instead of one stat
+    call per entry. Share an instance between validations of the same project to
+    reuse its listings; create a new one to observe later file system changes.
+    """
+    
+    def __init__(self, project_dir: Path, file_index: Optional[ProjectFileIndex] = None):
+        self.project_dir = project_dir
+        self.file_index = file_index if file_index is not None else ProjectFileIndex(project_dir)
+    
+    def exists(self, source_file: str) -> bool:
+        """
+        Check whether a project-relative path exists.
+        
+        Args:
+            source_file: Path relative to the project root
+            
+        Returns:
+            True if the file (or directory) exists
+        """
+        normalized = os.path.normpath(source_file)
+        if os.path.isabs(normalized) or normalized.startswith(".."):
+            # Outside the project: not covered by the listings
+            return (self.project_dir / source_file).exists()
+        return self.file_index.exists(normalized)
+
+
+def _entry_label(entry: Union[KGEntry, RelationshipEntry]) -> str:
+    if isinstance(entry, RelationshipEntry):
+        return f"relationship '{entry.source_concept}->{entry.target_concept}:{entry.relation_type}'"
+    return f"entry '{entry.name}'"
+
+
+def _entry_tags(entry: Union[KGEntry, RelationshipEntry]) -> Tuple[str, ...]:
+    if isinstance(entry, RelationshipEntry):
+        return (f"[rel:{entry.source_concept}->{entry.target_concept}:{entry.relation_type}]",)
+    return (f"[concept:{entry.name}]", f"[rule:{entry.name}]")
+
+
 def validate_source_links(
-    entries: List[KGEntry], project_dir: Path
+    entries: List[Union[KGEntry, RelationshipEntry]],
+    project_dir: Path,
+    check_tags: bool = False,
+    checker: Optional[SourceFileChecker] = None,
 ) -> ValidationResult:
     """
     Validate that source links in KG entries point to existing files.
     
+    Entries are grouped by source file so that each distinct file is checked
+    once, through the directory listings cached by the checker.
+    
     Args:
-        entries: List of KG entries to validate
+        entries: List of KG entries (concepts, rules or relationships) to validate
         project_dir: Root directory of the project
+        check_tags: Also check that each entry's source line still contains its
+            tag; each source file is read once
+        checker: Directory listing cache to use, e.g. one shared between the
+            validation of concepts, rules and relationships
         
     Returns:
         ValidationResult with validation status and warnings
     """
     warnings = []
     error_count = 0
+    if checker is None:
+        checker = SourceFileChecker(project_dir)
     
+    by_file: Dict[str, List[Union[KGEntry, RelationshipEntry]]] = {}
     for entry in entries:
         if not entry.source_file:
             continue  # Skip entries without source info
-            
-        # Resolve the source file path relative to the project root
-        source_path = project_dir / entry.source_file
+        by_file.setdefault(entry.source_file, []).append(entry)
+    
+    for source_file, file_entries in by_file.items():
+        if not checker.exists(source_file):
+            for entry in file_entries:
+                warnings.append(f"Source file '{source_file}' for {_entry_label(entry)} does not exist")
+            error_count += len(file_entries)
+            continue
         
-        if not source_path.exists():
-            warning_msg = f"Source file '{entry.source_file}' for {entry.__class__.__name__[2:].lower()} '{entry.name}' does not exist"
-            warnings.append(warning_msg)
-            logger.warning(warning_msg)
-            error_count += 1
+        if not check_tags:
+            continue
+        
+        try:
+            lines = (project_dir / source_file).read_text(encoding="utf-8", errors="replace").split("\n")
+        except OSError as e:
+            for entry in file_entries:
+                warnings.append(f"Source file '{source_file}' for {_entry_label(entry)} could not be read: {e}")
+            error_count += len(file_entries)
+            continue
+        
+        for entry in file_entries:
+            line_number = entry.line_number
+            if not line_number:
+                continue
+            line = lines[line_number - 1] if 0 < line_number <= len(lines) else ""
+            if not any(tag in line for tag in _entry_tags(entry)):
+                warnings.append(
+                    f"Tag for {_entry_label(entry)} not found at {source_file}:{line_number}"
+                )
+                error_count += 1
+    
+    for warning in warnings:
+        logger.warning(warning)
     
     return ValidationResult(
         valid=(error_count == 0),
@@ -489,14 +1705,28 @@ def extract_and_generate_kg_files(
     # Create the docs directory if it doesn't exist
     docs_dir.mkdir(exist_ok=True, parents=True)
     
+    # [tool.khora.plugins_config.kg]; the CLI flag takes precedence for jobs
+    kg_config = getattr(getattr(khora_config, "plugins_config", None), "kg", None)
+    jobs = opts.get("khora_kg_jobs")
+    if jobs is None:
+        jobs = getattr(kg_config, "jobs", None)
+    
+    # One walk of the project serves both the scan and the source link checks
+    file_index = ProjectFileIndex(project_dir)
+    
     # Scan markdown files for concepts, rules, and relationships
-    concepts, rules, relationships = scan_markdown_files(docs_dir)
+    concepts, rules, relationships = scan_markdown_files(
+        docs_dir, cache_dir=default_cache_dir(project_dir), jobs=jobs, file_index=file_index,
+        source_dirs=getattr(kg_config, "source_dirs", ()),
+        extractors=getattr(kg_config, "extractors", None),
+    )
     
     # Validate source links
     logger.info("Validating source links for KG entries...")
-    concept_validation = validate_source_links(concepts, project_dir)
-    rule_validation = validate_source_links(rules, project_dir)
-    relationship_validation = validate_source_links(relationships, project_dir)
+    checker = SourceFileChecker(project_dir, file_index=file_index)
+    concept_validation = validate_source_links(concepts, project_dir, checker=checker)
+    rule_validation = validate_source_links(rules, project_dir, checker=checker)
+    relationship_validation = validate_source_links(relationships, project_dir, checker=checker)
     
     # Store validation results in opts for health command or other extensions
     opts["kg_validation"] = {
@@ -515,12 +1745,63 @@ def extract_and_generate_kg_files(
         )
     }
     
+    # Check that relationships refer to defined concepts and nothing is defined twice
+    from .integrity import check_kg_integrity
+    
+    integrity = check_kg_integrity(concepts, rules, relationships)
+    # The scan has already warned about each duplicate definition
+    for message in integrity.messages(duplicates=False):
+        logger.warning(message)
+    opts["kg_integrity"] = integrity.to_dict()
+    
     # Generate JSON files
     if concepts or rules or relationships:
         concepts_file, rules_file, relationships_file = generate_kg_files(
-            project_dir, concepts, rules, relationships
+            project_dir, concepts, rules, relationships,
+            file_format=getattr(kg_config, "format", None) or "json",
         )
         
+        if getattr(kg_config, "sqlite_index", False) is True:
+            from .index import ensure_sqlite_index
+            
+            try:
+                ensure_sqlite_index(project_dir, (concepts, rules, relationships))
+            except Exception as e:
+                logger.error(f"Error building KG SQLite index: {e}")
+        
+        if getattr(kg_config, "snapshot", False) is True:
+            from .snapshot import ensure_kg_snapshot
+            
+            try:
+                ensure_kg_snapshot(project_dir, (concepts, rules, relationships))
+            except Exception as e:
+                logger.error(f"Error writing KG snapshot: {e}")
+        
+        if getattr(kg_config, "similarity_index", False) is True:
+            from .similarity import ensure_similarity_index
+            
+            try:
+                ensure_similarity_index(project_dir, (concepts, rules, relationships))
+            except Exception as e:
+                logger.error(f"Error building KG similarity index: {e}")
+        
+        if getattr(kg_config, "modules", False) is True:
+            from .communities import ensure_modules
+            
+            try:
+                ensure_modules(project_dir, relationships)
+            except Exception as e:
+                logger.error(f"Error detecting KG modules: {e}")
+        
+        reachability_types = getattr(kg_config, "reachability_types", None)
+        if reachability_types and isinstance(reachability_types, list):
+            from .reachability import ensure_reachability_index
+            
+            try:
+                ensure_reachability_index(project_dir, reachability_types, relationships)
+            except Exception as e:
+                logger.error(f"Error building KG reachability index: {e}")
+        
         # Add kg schema file to structure
         kg_schema = {
             "version": "0.1.0",
@@ -592,21 +1873,35 @@ def extract_and_generate_kg_files(
 
 
 # Hook for running KG extraction during pre-commit
-def precommit_kg_hook(project_dir: Union[str, Path]) -> Dict[str, Any]:
+def precommit_kg_hook(
+    project_dir: Union[str, Path], extractors: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
     """
     Define a pre-commit hook configuration for KG extraction.
     
     Args:
         project_dir: The root directory of the project.
+        extractors: Names of the enabled extractors; None to read them from the
+            project's [tool.khora.plugins_config.kg] (markdown if unset).
         
     Returns:
-        A dictionary with the hook configuration.
+        A dictionary with the hook configuration; the hook only runs on the
+        file types of the enabled extractors.
     """
+    from .extractors import files_pattern
+    
+    if extractors is None:
+        from ..core.manifest import KhoraManifestConfig, KhoraManifestError
+        
+        try:
+            extractors = KhoraManifestConfig.from_project_toml(project_dir).plugins_config.kg.extractors
+        except KhoraManifestError:
+            pass
     return {
         "id": "khora-knowledge-graph",
         "name": "Khora Knowledge Graph Extractor",
         "entry": "python -m khora_kernel_vnext.extensions.kg.kg_precommit",
         "language": "python",
-        "files": r"\.md$",
+        "files": files_pattern(extractors),
         "pass_filenames": True,
     }
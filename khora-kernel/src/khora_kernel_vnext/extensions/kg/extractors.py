@@ -0,0 +1,209 @@
+"""
+Registry of KG tag extractors, keyed by file type.
+
+An extractor finds the KG tags of one kind of source file and reports them as
+KGTokens whose offsets and line numbers refer to the file itself, so entries,
+the extraction cache and the tag spans used by ``khora kg rename`` work the same
+for every file type. Built in are:
+
+- ``markdown`` (``.md``) and ``rst`` (``.rst``): the tags are written in the
+  text, and the whole file is tokenized
+- ``python`` (``.py``): the tags are written in module, class and function
+  docstrings, which are found with ``ast`` without importing the module. Each
+  docstring is dedented before tokenizing, so tags and descriptions behave as
+  they do in markdown.
+
+Only markdown is extracted by default (DEFAULT_EXTRACTORS); the others are
+enabled with ``extractors`` in ``[tool.khora.plugins_config.kg]``.
+
+Scans (scan_markdown_files), the watcher, the pre-commit hook and history
+all pick the extractor by file suffix and share one file walk and one
+extraction cache. Extraction runs in worker processes for large scans, so an
+extractor registered at runtime is only seen by the workers if they are forked.
+"""
+import ast
+import logging
+import os
+import re
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .extension import KGToken, tokenize_kg_tags
+
+logger = logging.getLogger(__name__)
+
+# Extractors used when none are configured
+DEFAULT_EXTRACTORS = ("markdown",)
+
+_LINE_START_PATTERN = re.compile(r"\n")
+_STRING_PREFIX_CHARS = "rRuUbBfF"
+
+
+class KGExtractor(NamedTuple):
+    """A named tag extractor for the files ending in one of its suffixes."""
+    name: str
+    suffixes: Tuple[str, ...]
+    tokenize: Callable[[str], Iterator[KGToken]]
+
+
+_EXTRACTORS: Dict[str, KGExtractor] = {}
+
+
+def register_extractor(extractor: KGExtractor) -> None:
+    """
+    Register an extractor, replacing any registered under the same name.
+
+    Raises:
+        ValueError: If one of its suffixes belongs to another extractor.
+    """
+    for other in _EXTRACTORS.values():
+        shared = set(other.suffixes) & set(extractor.suffixes)
+        if other.name != extractor.name and shared:
+            raise ValueError(f"{', '.join(sorted(shared))} already handled by the {other.name} extractor")
+    _EXTRACTORS[extractor.name] = extractor
+
+
+def registered_extractors() -> List[str]:
+    """Return the names of the registered extractors."""
+    return sorted(_EXTRACTORS)
+
+
+def get_extractor(name: str) -> Optional[KGExtractor]:
+    """Return the extractor registered under a name, or None."""
+    return _EXTRACTORS.get(name)
+
+
+def extractor_suffixes(names: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+    """
+    Return the file suffixes handled by some extractors.
+
+    Args:
+        names: Extractor names; None for DEFAULT_EXTRACTORS. Unknown names are
+            skipped with a warning.
+    """
+    if names is None:
+        names = DEFAULT_EXTRACTORS
+    suffixes: List[str] = []
+    for name in names:
+        extractor = _EXTRACTORS.get(name)
+        if extractor is None:
+            logger.warning(f"Unknown KG extractor '{name}'; known: {', '.join(registered_extractors())}")
+            continue
+        suffixes.extend(extractor.suffixes)
+    return tuple(sorted(set(suffixes)))
+
+
+def files_pattern(names: Optional[Iterable[str]] = None) -> str:
+    """
+    Return a regular expression matching the files some extractors read.
+
+    Used as the ``files`` pattern of the pre-commit hook, so it only runs on
+    the file types that are extracted.
+
+    Args:
+        names: Extractor names; None for DEFAULT_EXTRACTORS.
+    """
+    alternatives = [re.escape(suffix) for suffix in extractor_suffixes(names)]
+    if len(alternatives) == 1:
+        return f"{alternatives[0]}$"
+    return f"(?:{'|'.join(alternatives)})$"
+
+
+def extractor_for(path: str) -> Optional[KGExtractor]:
+    """Return the extractor for a file path, by suffix, or None."""
+    suffix = os.path.splitext(path)[1]
+    for extractor in _EXTRACTORS.values():
+        if suffix in extractor.suffixes:
+            return extractor
+    return None
+
+
+def _char_column(source: str, line_start: int, byte_column: int) -> int:
+    """Convert an ast column, a UTF-8 byte offset within a line, to a character offset."""
+    line = source[line_start:line_start + byte_column]
+    if line.isascii():
+        return byte_column
+    return len(line.encode("utf-8")[:byte_column].decode("utf-8", "ignore"))
+
+
+def _docstring_tokens(source: str, line_starts: List[int], literal: ast.Constant) -> Iterator[KGToken]:
+    """Tokenize one docstring, mapping its tags back to offsets and lines in source."""
+    value: str = literal.value
+    start = line_starts[literal.lineno - 1]
+    start += _char_column(source, start, literal.col_offset)
+    end = line_starts[literal.end_lineno - 1]
+    end += _char_column(source, end, literal.end_col_offset)
+    segment = source[start:end]
+    prefix = len(segment) - len(segment.lstrip(_STRING_PREFIX_CHARS))
+    quote = 3 if segment.startswith(('"""', "'''"), prefix) else 1
+    body_start = start + prefix + quote
+    # With escapes or implicit concatenation the value is not a copy of the
+    # source, so offsets are unknown (-1) and line numbers approximate
+    exact = source[body_start:end - quote] == value
+
+    lines = value.split("\n")
+    indents = [len(line) - len(line.lstrip()) for line in lines[1:] if line.strip()]
+    margin = min(indents) if indents else 0
+    # Where each dedented line starts in the dedented text and in the source
+    text_lines: List[str] = []
+    text_starts: List[int] = []
+    source_starts: List[int] = []
+    text_offset, source_offset = 0, body_start
+    for number, line in enumerate(lines):
+        cut = len(line) - len(line.lstrip()) if number == 0 else min(margin, len(line))
+        dedented = line[cut:] if line.strip() else ""
+        text_lines.append(dedented)
+        text_starts.append(text_offset)
+        source_starts.append(source_offset + cut)
+        text_offset += len(dedented) + 1
+        source_offset += len(line) + 1
+    text = "\n".join(text_lines)
+
+    def position(offset: int) -> Tuple[int, int]:
+        number = bisect_right(text_starts, offset) - 1
+        source_position = source_starts[number] + offset - text_starts[number] if exact else -1
+        return source_position, number
+
+    for token in tokenize_kg_tags(text):
+        token_start, number = position(token.start)
+        token_end, _ = position(token.end)
+        yield token._replace(start=token_start, end=token_end, line_number=literal.lineno + number)
+
+
+def tokenize_docstrings(source: str) -> Iterator[KGToken]:
+    """
+    Find the KG tags in the module, class and function docstrings of Python source.
+
+    Args:
+        source: The content of a Python file.
+
+    Yields:
+        KGToken for each tag, in order of appearance, with offsets into source
+        (-1 if a docstring's value differs from its source text, e.g. because
+        of escape sequences) and source line numbers.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        logger.warning(f"Cannot parse Python source for docstrings: {e}")
+        return
+    line_starts = [0]
+    line_starts.extend(m.end() for m in _LINE_START_PATTERN.finditer(source))
+
+    tokens: List[KGToken] = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if not node.body or not isinstance(node.body[0], ast.Expr):
+            continue
+        literal = node.body[0].value
+        if isinstance(literal, ast.Constant) and isinstance(literal.value, str):
+            tokens.extend(_docstring_tokens(source, line_starts, literal))
+    # ast.walk is breadth first; order the tags as they appear in the file
+    tokens.sort(key=lambda token: token.line_number)
+    yield from tokens
+
+
+register_extractor(KGExtractor("markdown", (".md",), tokenize_kg_tags))
+register_extractor(KGExtractor("rst", (".rst",), tokenize_kg_tags))
+register_extractor(KGExtractor("python", (".py",), tokenize_docstrings))
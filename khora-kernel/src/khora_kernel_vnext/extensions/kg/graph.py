@@ -0,0 +1,516 @@
+"""
+In-memory graph index over Knowledge Graph relationships.
+
+Concept names are interned to dense integer IDs and edges are stored in
+compressed sparse row (CSR) form: for every node ``i`` its neighbours are
+``targets[offsets[i]:offsets[i + 1]]``. Forward and reverse CSR arrays are built
+for the whole graph and, on demand, for each relation type, so neighbour lookups
+cost O(degree) and traversals never rescan the relationship list.
+"""
+import logging
+from array import array
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .extension import RelationshipEntry
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("out", "in", "both")
+
+
+def _build_csr(node_count: int, sources: array, targets: array) -> Tuple[array, array]:
+    """
+    Build CSR arrays from parallel edge arrays with a counting sort.
+
+    Edges keep their input order within each node's neighbour slice.
+
+    Args:
+        node_count: Number of nodes
+        sources: Source node ID of each edge
+        targets: Target node ID of each edge
+
+    Returns:
+        A tuple (offsets, adjacency) where offsets has node_count + 1 entries
+    """
+    offsets = array("q", [0]) * (node_count + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    total = 0
+    for i in range(1, node_count + 1):
+        total += offsets[i]
+        offsets[i] = total
+
+    cursor = array("q", offsets)
+    adjacency = array("l", [0]) * len(sources)
+    for source, target in zip(sources, targets):
+        adjacency[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, adjacency
+
+
+class KGGraph:
+    """
+    Directed multigraph of concepts connected by typed relationships.
+
+    Node lookups take concept names; all traversal is done on integer IDs
+    internally and mapped back to names on output.
+    """
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.relation_types: List[str] = []
+        self._type_ids: Dict[str, int] = {}
+        self._sources = array("l")
+        self._targets = array("l")
+        self._types = array("l")
+        # (relation type ID or None, reverse) -> (offsets, adjacency)
+        self._csr: Dict[Tuple[Optional[int], bool], Tuple[array, array]] = {}
+
+    @classmethod
+    def from_relationships(
+        cls,
+        relationships: Iterable[RelationshipEntry],
+        concepts: Iterable[str] = (),
+    ) -> "KGGraph":
+        """
+        Build a graph from extracted relationships.
+
+        Args:
+            relationships: Relationship entries; each becomes one directed edge
+            concepts: Additional concept names to include as (possibly isolated) nodes
+
+        Returns:
+            A KGGraph instance
+        """
+        graph = cls()
+        for name in concepts:
+            graph._intern(name)
+
+        # Inlined add_edge: interning dominates the build time on large graphs
+        ids, type_ids = graph.ids, graph._type_ids
+        intern = graph._intern
+        add_source, add_target, add_type = (
+            graph._sources.append, graph._targets.append, graph._types.append
+        )
+        for rel in relationships:
+            source = ids.get(rel.source_concept)
+            if source is None:
+                source = intern(rel.source_concept)
+            target = ids.get(rel.target_concept)
+            if target is None:
+                target = intern(rel.target_concept)
+            type_id = type_ids.get(rel.relation_type)
+            if type_id is None:
+                type_id = type_ids[rel.relation_type] = len(graph.relation_types)
+                graph.relation_types.append(rel.relation_type)
+            add_source(source)
+            add_target(target)
+            add_type(type_id)
+        return graph
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Any) -> "KGGraph":
+        """
+        Build a graph from the edge arrays of a KG snapshot.
+
+        Endpoints and types are string IDs in the snapshot, so only distinct
+        names and relation types are decoded; no entry objects are built.
+
+        Args:
+            snapshot: An open KGSnapshot
+
+        Returns:
+            A KGGraph instance with the snapshot's concepts and relationships
+        """
+        graph = cls()
+        string = snapshot.string
+        nodes: Dict[int, int] = {}
+        types: Dict[int, int] = {}
+
+        def node(string_id: int) -> int:
+            node_id = nodes.get(string_id)
+            if node_id is None:
+                node_id = nodes[string_id] = graph._intern(string(string_id))
+            return node_id
+
+        for string_id in snapshot.concepts.column("name"):
+            node(string_id)
+
+        relationships = snapshot.relationships
+        add_source, add_target, add_type = (
+            graph._sources.append, graph._targets.append, graph._types.append
+        )
+        for source, target, type_string_id in zip(
+            relationships.column("source"), relationships.column("target"), relationships.column("type")
+        ):
+            type_id = types.get(type_string_id)
+            if type_id is None:
+                relation_type = string(type_string_id)
+                type_id = types[type_string_id] = graph._type_ids[relation_type] = len(graph.relation_types)
+                graph.relation_types.append(relation_type)
+            add_source(nodes[source] if source in nodes else node(source))
+            add_target(nodes[target] if target in nodes else node(target))
+            add_type(type_id)
+        return graph
+
+    def _intern(self, name: str) -> int:
+        node = self.ids.get(name)
+        if node is None:
+            node = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return node
+
+    def add_edge(self, source: str, target: str, relation_type: str) -> None:
+        """Add a directed edge, creating its endpoints if needed."""
+        type_id = self._type_ids.get(relation_type)
+        if type_id is None:
+            type_id = self._type_ids[relation_type] = len(self.relation_types)
+            self.relation_types.append(relation_type)
+        self._sources.append(self._intern(source))
+        self._targets.append(self._intern(target))
+        self._types.append(type_id)
+        # Adjacency arrays are rebuilt lazily on the next query
+        self._csr.clear()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._sources)
+
+    def edge_arrays(self) -> Tuple[array, array, array]:
+        """
+        Return the parallel edge arrays for bulk (e.g. NumPy) processing.
+
+        The arrays are the graph's own storage; callers must not modify them.
+
+        Returns:
+            A tuple (sources, targets, types) of node and relation type IDs, in
+            insertion order
+        """
+        return self._sources, self._targets, self._types
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def node_id(self, name: str) -> int:
+        """
+        Return the integer ID of a concept.
+
+        Raises:
+            KeyError: If the concept is not part of the graph.
+        """
+        try:
+            return self.ids[name]
+        except KeyError:
+            raise KeyError(f"Unknown concept: {name}") from None
+
+    def _adjacency(self, relation_type: Optional[str], reverse: bool) -> Tuple[array, array]:
+        if relation_type is None:
+            type_id = None
+        else:
+            type_id = self._type_ids.get(relation_type, -1)
+        key = (type_id, reverse)
+        csr = self._csr.get(key)
+        if csr is None:
+            sources, targets = (self._targets, self._sources) if reverse else (self._sources, self._targets)
+            if type_id is not None:
+                types = self._types
+                keep = [i for i in range(len(types)) if types[i] == type_id]
+                sources = array("l", (sources[i] for i in keep))
+                targets = array("l", (targets[i] for i in keep))
+            csr = self._csr[key] = _build_csr(self.node_count, sources, targets)
+        return csr
+
+    def _tables(self, direction: str, relation_type: Optional[str]) -> List[Tuple[array, array]]:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}, got {direction!r}")
+        tables = []
+        if direction in ("out", "both"):
+            tables.append(self._adjacency(relation_type, False))
+        if direction in ("in", "both"):
+            tables.append(self._adjacency(relation_type, True))
+        return tables
+
+    @staticmethod
+    def _adjacent(node: int, tables: Sequence[Tuple[array, array]]) -> Iterator[int]:
+        for offsets, adjacency in tables:
+            yield from adjacency[offsets[node]:offsets[node + 1]]
+
+    def neighbors(
+        self, name: str, direction: str = "out", relation_type: Optional[str] = None
+    ) -> List[str]:
+        """
+        Return the direct neighbours of a concept.
+
+        Args:
+            name: Concept name
+            direction: "out" for targets, "in" for sources, "both" for either
+            relation_type: Only follow edges of this type
+
+        Returns:
+            Neighbour names without duplicates, in edge order
+        """
+        node = self.node_id(name)
+        seen = set()
+        result = []
+        for neighbor in self._adjacent(node, self._tables(direction, relation_type)):
+            if neighbor not in seen:
+                seen.add(neighbor)
+                result.append(self.names[neighbor])
+        return result
+
+    def bfs(
+        self,
+        name: str,
+        direction: str = "out",
+        relation_type: Optional[str] = None,
+        max_depth: Optional[int] = None,
+    ) -> Iterator[Tuple[str, int]]:
+        """
+        Breadth-first traversal from a concept.
+
+        Args:
+            name: Start concept
+            direction: "out", "in" or "both"
+            relation_type: Only follow edges of this type
+            max_depth: Stop expanding beyond this depth
+
+        Yields:
+            (concept name, depth) pairs, excluding the start concept
+        """
+        tables = self._tables(direction, relation_type)
+        start = self.node_id(name)
+        depths = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            depth = depths[node]
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for neighbor in self._adjacent(node, tables):
+                if neighbor not in depths:
+                    depths[neighbor] = depth + 1
+                    queue.append(neighbor)
+                    yield self.names[neighbor], depth + 1
+
+    def dfs(
+        self, name: str, direction: str = "out", relation_type: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Depth-first (pre-order) traversal from a concept.
+
+        Args:
+            name: Start concept
+            direction: "out", "in" or "both"
+            relation_type: Only follow edges of this type
+
+        Yields:
+            Concept names in visiting order, excluding the start concept
+        """
+        tables = self._tables(direction, relation_type)
+        start = self.node_id(name)
+        visited = {start}
+        stack = [iter(self._adjacent(start, tables))]
+        while stack:
+            for neighbor in stack[-1]:
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    yield self.names[neighbor]
+                    stack.append(iter(self._adjacent(neighbor, tables)))
+                    break
+            else:
+                stack.pop()
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        direction: str = "out",
+        relation_type: Optional[str] = None,
+    ) -> Optional[List[str]]:
+        """
+        Find a shortest (fewest edges) path between two concepts.
+
+        Args:
+            source: Start concept
+            target: End concept
+            direction: "out" follows edges forwards, "both" ignores edge direction
+            relation_type: Only follow edges of this type
+
+        Returns:
+            The concept names along the path including both ends, or None if the
+            target is unreachable
+        """
+        forward = self._tables(direction, relation_type)
+        backward = forward if direction == "both" else self._tables(
+            "in" if direction == "out" else "out", relation_type
+        )
+        start = self.node_id(source)
+        goal = self.node_id(target)
+        if start == goal:
+            return [source]
+
+        # Bidirectional BFS: always expand the smaller frontier by one full level,
+        # which visits far fewer nodes than a one-sided search on large graphs.
+        # Each side maps visited nodes to (parent, depth).
+        forward_seen = {start: (start, 0)}
+        backward_seen = {goal: (goal, 0)}
+        front, back = [start], [goal]
+        meeting = None
+        while front and back and meeting is None:
+            if len(front) <= len(back):
+                front, meeting = self._expand(front, forward, forward_seen, backward_seen)
+            else:
+                back, meeting = self._expand(back, backward, backward_seen, forward_seen)
+        if meeting is None:
+            return None
+
+        path = [meeting]
+        while path[-1] != start:
+            path.append(forward_seen[path[-1]][0])
+        path.reverse()
+        while path[-1] != goal:
+            path.append(backward_seen[path[-1]][0])
+        return [self.names[n] for n in path]
+
+    def _expand(
+        self,
+        frontier: List[int],
+        tables: Sequence[Tuple[array, array]],
+        seen: Dict[int, Tuple[int, int]],
+        other: Dict[int, Tuple[int, int]],
+    ) -> Tuple[List[int], Optional[int]]:
+        """
+        Expand a BFS frontier by one level.
+
+        Returns the next frontier and, if the level reaches nodes already seen by
+        the other search, the one closest to the other search's origin (stopping at
+        the first such node could miss a path that is one edge shorter).
+        """
+        next_frontier = []
+        meeting = None
+        meeting_depth = 0
+        for node in frontier:
+            depth = seen[node][1] + 1
+            for neighbor in self._adjacent(node, tables):
+                if neighbor in seen:
+                    continue
+                seen[neighbor] = (node, depth)
+                next_frontier.append(neighbor)
+                reached = other.get(neighbor)
+                if reached is not None and (meeting is None or reached[1] < meeting_depth):
+                    meeting, meeting_depth = neighbor, reached[1]
+        return next_frontier, meeting
+
+    def strongly_connected_components(self, relation_type: Optional[str] = None) -> List[List[int]]:
+        """
+        Compute strongly connected components with an iterative Tarjan's algorithm.
+
+        Args:
+            relation_type: Only consider edges of this type
+
+        Returns:
+            Components as lists of node IDs, in reverse topological order
+        """
+        offsets, adjacency = self._adjacency(relation_type, False)
+        node_count = self.node_count
+        index = array("l", [-1]) * node_count
+        lowlink = array("l", [0]) * node_count
+        on_stack = bytearray(node_count)
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for root in range(node_count):
+            if index[root] != -1:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            # Each frame is (node, position of the next edge to visit)
+            work = [(root, offsets[root])]
+            while work:
+                node, edge = work[-1]
+                end = offsets[node + 1]
+                while edge < end:
+                    neighbor = adjacency[edge]
+                    edge += 1
+                    if index[neighbor] == -1:
+                        work[-1] = (node, edge)
+                        index[neighbor] = lowlink[neighbor] = counter
+                        counter += 1
+                        stack.append(neighbor)
+                        on_stack[neighbor] = 1
+                        work.append((neighbor, offsets[neighbor]))
+                        break
+                    if on_stack[neighbor] and index[neighbor] < lowlink[node]:
+                        lowlink[node] = index[neighbor]
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if lowlink[node] < lowlink[parent]:
+                            lowlink[parent] = lowlink[node]
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        return components
+
+    def find_cycles(self, relation_type: Optional[str] = None) -> List[List[str]]:
+        """
+        Find one representative cycle in every cyclic part of the graph.
+
+        Every strongly connected component with more than one node (or a node
+        with a self-loop) contains at least one cycle; a shortest cycle through
+        its smallest-named node is reported for each.
+
+        Args:
+            relation_type: Only consider edges of this type
+
+        Returns:
+            Cycles as lists of concept names (the first node is not repeated at
+            the end), sorted by their first name
+        """
+        offsets, adjacency = self._adjacency(relation_type, False)
+        cycles = []
+        for component in self.strongly_connected_components(relation_type):
+            if len(component) == 1:
+                node = component[0]
+                if node in adjacency[offsets[node]:offsets[node + 1]]:
+                    cycles.append([self.names[node]])
+                continue
+
+            members = set(component)
+            start = min(component, key=lambda n: self.names[n])
+            parents = {start: start}
+            queue = deque([start])
+            closing = None
+            while queue and closing is None:
+                node = queue.popleft()
+                for neighbor in adjacency[offsets[node]:offsets[node + 1]]:
+                    if neighbor == start:
+                        closing = node
+                        break
+                    if neighbor in members and neighbor not in parents:
+                        parents[neighbor] = node
+                        queue.append(neighbor)
+
+            path = [closing]
+            while path[-1] != start:
+                path.append(parents[path[-1]])
+            cycles.append([self.names[n] for n in reversed(path)])
+
+        cycles.sort(key=lambda cycle: cycle[0])
+        return cycles
@@ -0,0 +1,430 @@
+"""
+Knowledge Graph of past revisions, read straight from the git object store.
+
+KGHistory lists the tagged blobs of a revision (every file type with a
+registered extractor, see extractors) with ``git ls-tree``, or the blobs each
+commit changed with ``git log --raw``, and streams their contents
+through a single ``git cat-file --batch`` process. No worktree is checked out.
+Extraction results are cached by blob SHA (see BlobCache), so a file content is
+parsed once no matter how many revisions contain it, and building the history
+of many commits costs one parse per changed blob.
+
+Paths excluded by the project's ignore rules (see ProjectFileIndex; the
+.gitignore and .khoraignore files of the working tree) are skipped, as in a
+scan of a checkout.
+"""
+import logging
+import os
+import posixpath
+import subprocess
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from ...sdk.file_index import ProjectFileIndex
+from .cache import BlobCache, decode_text, default_cache_dir
+from .extension import (
+    KGEntry,
+    RelationshipEntry,
+    _extraction_from_payload,
+    _extraction_to_payload,
+    extract_concepts_and_rules,
+)
+from .extractors import extractor_for, extractor_suffixes, get_extractor
+
+logger = logging.getLogger(__name__)
+
+KG_KEYS = ("concepts", "rules", "relationships")
+
+# Object ID of a file that does not exist on one side of a diff
+_NULL_SHA = "0" * 40
+_RECORD_SEPARATOR = b"\x1e"
+_EMPTY_PAYLOAD: Dict[str, List[List[Any]]] = {key: [] for key in KG_KEYS}
+
+
+class KGCommitDelta(NamedTuple):
+    """The KG entries one commit added and removed."""
+    commit: str
+    timestamp: int
+    subject: str
+    files: List[str]
+    added: Dict[str, List[Union[KGEntry, RelationshipEntry]]]
+    removed: Dict[str, List[Union[KGEntry, RelationshipEntry]]]
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(self.added.values()) and not any(self.removed.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary for JSON serialization."""
+        return {
+            "commit": self.commit,
+            "timestamp": self.timestamp,
+            "subject": self.subject,
+            "files": self.files,
+            "added": {key: [entry.to_dict() for entry in entries] for key, entries in self.added.items()},
+            "removed": {key: [entry.to_dict() for entry in entries] for key, entries in self.removed.items()},
+        }
+
+
+def _run_git(cwd: Path, *args: str) -> bytes:
+    """
+    Run a git command and return its output.
+
+    Raises:
+        ValueError: If git fails, e.g. for an unknown revision or outside a repository.
+        OSError: If git cannot be run.
+    """
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True)
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip()
+        raise ValueError(message or f"git {args[0]} failed with exit code {result.returncode}")
+    return result.stdout
+
+
+class GitBlobReader:
+    """
+    Streams blob contents from one long-running ``git cat-file --batch`` process.
+
+    Requests are written by a background thread while the contents are read, so
+    the pipes never fill up and blobs arrive without a round trip each.
+    """
+
+    def __init__(self, cwd: Path):
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def read(self, shas: Sequence[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Read blobs.
+
+        Args:
+            shas: Blob object IDs.
+
+        Yields:
+            (sha, content) in request order; content is None for a missing object.
+
+        Raises:
+            OSError: If the git process exits early.
+        """
+        def write_requests() -> None:
+            try:
+                for sha in shas:
+                    self._process.stdin.write(sha.encode("ascii") + b"\n")
+                self._process.stdin.flush()
+            except (BrokenPipeError, ValueError):
+                pass
+
+        writer = threading.Thread(target=write_requests, daemon=True)
+        writer.start()
+        stdout = self._process.stdout
+        try:
+            for sha in shas:
+                header = stdout.readline()
+                if not header:
+                    raise OSError("git cat-file exited unexpectedly")
+                fields = header.split()
+                if len(fields) < 3 or fields[1] == b"missing":
+                    yield sha, None
+                    continue
+                size = int(fields[2])
+                content = stdout.read(size)
+                stdout.read(1)  # Trailing newline
+                yield sha, content
+        finally:
+            writer.join()
+
+    def close(self) -> None:
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+        self._process.stdout.close()
+
+
+class KGHistory:
+    """
+    Builds the KG of past revisions from git objects.
+
+    Args:
+        project_dir: The root directory of the project (inside a git repository).
+        docs_dir: The docs directory, relative to project_dir, at every revision.
+        cache_dir: Directory of the blob cache; defaults to the KG cache directory.
+        source_dirs: Further directories with tagged files, relative to the parent
+            of docs_dir, as in scan_markdown_files.
+        extractors: Names of the extractors to use; None for DEFAULT_EXTRACTORS.
+
+    Raises:
+        ValueError: If project_dir is not inside a git repository.
+    """
+
+    def __init__(
+        self,
+        project_dir: Union[str, Path],
+        docs_dir: Union[str, Path] = "docs",
+        cache_dir: Optional[Path] = None,
+        source_dirs: Sequence[Union[str, Path]] = (),
+        extractors: Optional[Sequence[str]] = None,
+    ):
+        self.project_dir = Path(project_dir)
+        self.docs_rel = Path(os.path.normpath(docs_dir)).as_posix()
+        self.suffixes = extractor_suffixes(extractors)
+        self.cache = BlobCache.load(cache_dir if cache_dir is not None else default_cache_dir(self.project_dir))
+        self.parsed = 0
+        self._reader: Optional[GitBlobReader] = None
+
+        # Git reports paths from the repository root; entries record them relative
+        # to the parent of docs_dir, as in scan_markdown_files
+        prefix = _run_git(self.project_dir, "rev-parse", "--show-prefix").decode("utf-8").strip()
+        base_rel = posixpath.dirname(self.docs_rel)
+        self._prefix = prefix
+        self._strip = prefix + (base_rel + "/" if base_rel else "")
+        self._index = ProjectFileIndex(self.project_dir)
+        # Pathspecs of the scanned directories
+        self.pathspecs = [self.docs_rel] + [
+            posixpath.normpath(posixpath.join(base_rel, Path(source_dir).as_posix()))
+            for source_dir in source_dirs
+        ]
+
+    def __enter__(self) -> "KGHistory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the git process and save the blob cache."""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        try:
+            self.cache.save()
+        except OSError as e:
+            logger.warning(f"Could not write KG blob cache to {self.cache.cache_file}: {e}")
+
+    def resolve(self, rev: str) -> str:
+        """
+        Resolve a revision to a commit ID.
+
+        Raises:
+            ValueError: If the revision does not name a commit.
+        """
+        try:
+            output = _run_git(self.project_dir, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}")
+        except ValueError:
+            raise ValueError(f"Unknown revision: {rev}") from None
+        return output.decode("ascii").strip()
+
+    def _source_file(self, git_path: str) -> Optional[str]:
+        """Map a repository path to the source file its entries record, if it is tagged."""
+        if not git_path.endswith(self.suffixes) or not git_path.startswith(self._strip):
+            return None
+        if self._index.is_ignored(git_path[len(self._prefix):], is_dir=False):
+            return None
+        return git_path[len(self._strip):].replace("/", os.sep)
+
+    @staticmethod
+    def _blob_key(source: str, sha: str) -> str:
+        """
+        Key of a blob's payload, which depends on the extractor reading it.
+
+        Markdown blobs are keyed by their plain SHA, other types by
+        "<extractor>:<sha>".
+        """
+        name = extractor_for(source).name
+        return sha if name == "markdown" else f"{name}:{sha}"
+
+    def _payloads(self, keys: Set[str]) -> Dict[str, Any]:
+        """Return the extraction payload of each blob key, parsing only the uncached ones."""
+        payloads = {}
+        missing: Dict[str, List[str]] = {}  # Keys by blob SHA
+        for key in sorted(keys):
+            payload = self.cache.get(key)
+            if payload is None:
+                missing.setdefault(key.rpartition(":")[2], []).append(key)
+            else:
+                payloads[key] = payload
+
+        if missing:
+            if self._reader is None:
+                self._reader = GitBlobReader(self.project_dir)
+            for sha, content in self._reader.read(list(missing)):
+                if content is None:
+                    logger.warning(f"Blob {sha} is missing from the object store")
+                    continue
+                text = decode_text(content, "replace")
+                for key in missing[sha]:
+                    extractor = get_extractor(key.rpartition(":")[0] or "markdown")
+                    # The source file is not part of the payload, so one parse serves every path
+                    payload = _extraction_to_payload(
+                        extract_concepts_and_rules(text, "", extractor.tokenize(text))
+                    )
+                    self.cache.store(key, payload)
+                    payloads[key] = payload
+            self.parsed += sum(len(keys) for keys in missing.values())
+        return payloads
+
+    def tree_files(self, rev: str) -> Dict[str, str]:
+        """
+        List the tagged files below the scanned directories at a revision.
+
+        Returns:
+            Blob IDs keyed by the source file recorded in the entries.
+        """
+        output = _run_git(
+            self.project_dir, "ls-tree", "-r", "-z", "--full-name", rev, "--", *self.pathspecs
+        )
+        files = {}
+        for record in output.split(b"\0"):
+            if not record:
+                continue
+            meta, _, path = record.partition(b"\t")
+            mode, object_type, sha = meta.decode("ascii").split()
+            source = self._source_file(os.fsdecode(path))
+            if object_type == "blob" and mode.startswith("100") and source is not None:
+                files[source] = sha
+        return files
+
+    def entries_at(self, rev: str) -> Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]:
+        """
+        Extract the KG as it was at a revision.
+
+        Args:
+            rev: Any revision git understands (commit, tag, branch, HEAD~3, ...).
+
+        Returns:
+            Lists of concept, rule and relationship entries, grouped by source file
+            in sorted order as a scan of a checkout would produce.
+
+        Raises:
+            ValueError: If the revision is unknown.
+        """
+        files = self.tree_files(self.resolve(rev))
+        keys = {source: self._blob_key(source, sha) for source, sha in files.items()}
+        payloads = self._payloads(set(keys.values()))
+
+        concepts: List[KGEntry] = []
+        rules: List[KGEntry] = []
+        relationships: List[RelationshipEntry] = []
+        for source in sorted(files):
+            payload = payloads.get(keys[source])
+            if payload is None:
+                continue
+            file_concepts, file_rules, file_relationships = _extraction_from_payload(payload, source)
+            concepts.extend(file_concepts)
+            rules.extend(file_rules)
+            relationships.extend(file_relationships)
+        return concepts, rules, relationships
+
+    def _changed_blobs(
+        self, revision_range: Optional[str], max_count: Optional[int]
+    ) -> List[Tuple[str, int, str, List[Tuple[str, str, str]]]]:
+        """
+        List the commits that changed docs, oldest first, with their changed blobs.
+
+        Merge commits are compared with their first parent.
+
+        Returns:
+            (commit, timestamp, subject, [(source file, old blob, new blob)]) per commit.
+        """
+        args = [
+            "log", "--first-parent", "--reverse", "--raw", "-z", "--no-abbrev", "--no-renames",
+            "--diff-merges=first-parent", "--format=%x1e%H%x1f%ct%x1f%s",
+        ]
+        if max_count is not None:
+            args.append(f"--max-count={max_count}")
+        args.extend([revision_range or "HEAD", "--", *self.pathspecs])
+
+        commits = []
+        for record in _run_git(self.project_dir, *args).split(_RECORD_SEPARATOR):
+            if not record:
+                continue
+            header, _, raw = record.partition(b"\0")
+            commit, timestamp, subject = header.decode("utf-8", "replace").split("\x1f", 2)
+            fields = raw.lstrip(b"\n").split(b"\0")
+            changes = []
+            # ":<old mode> <new mode> <old sha> <new sha> <status>" followed by the path
+            for meta, path in zip(fields[0::2], fields[1::2]):
+                old_mode, new_mode, old_sha, new_sha, _ = meta.decode("ascii").lstrip(":").split()
+                source = self._source_file(os.fsdecode(path))
+                if source is None:
+                    continue
+                if not old_mode.startswith("100"):
+                    old_sha = _NULL_SHA
+                if not new_mode.startswith("100"):
+                    new_sha = _NULL_SHA
+                changes.append((source, old_sha, new_sha))
+            commits.append((commit, int(timestamp), subject, changes))
+        return commits
+
+    def log(
+        self, revision_range: Optional[str] = None, max_count: Optional[int] = None
+    ) -> List[KGCommitDelta]:
+        """
+        Compute the KG entries each commit added and removed.
+
+        Only the blobs the commits changed are read (and only those not cached
+        are parsed), regardless of how many files the docs directory holds.
+
+        Args:
+            revision_range: A revision or range as accepted by git log (default HEAD).
+            max_count: Only the most recent this many commits that changed docs.
+
+        Returns:
+            One delta per commit that changed a tagged file, oldest first.
+            Entries whose text is unchanged but moved to another line are not
+            reported.
+
+        Raises:
+            ValueError: If the revision range is invalid.
+        """
+        commits = self._changed_blobs(revision_range, max_count)
+        payloads = self._payloads({
+            self._blob_key(source, sha)
+            for *_, changes in commits for source, old, new in changes for sha in (old, new)
+            if sha != _NULL_SHA
+        })
+
+        deltas = []
+        for commit, timestamp, subject, changes in commits:
+            added: Dict[str, List[Union[KGEntry, RelationshipEntry]]] = {key: [] for key in KG_KEYS}
+            removed: Dict[str, List[Union[KGEntry, RelationshipEntry]]] = {key: [] for key in KG_KEYS}
+            for source, old_sha, new_sha in changes:
+                old = payloads.get(self._blob_key(source, old_sha)) or _EMPTY_PAYLOAD
+                new = payloads.get(self._blob_key(source, new_sha)) or _EMPTY_PAYLOAD
+                old = _extraction_from_payload(old, source)
+                new = _extraction_from_payload(new, source)
+                for key, old_entries, new_entries in zip(KG_KEYS, old, new):
+                    added[key].extend(_subtract(new_entries, old_entries))
+                    removed[key].extend(_subtract(old_entries, new_entries))
+            deltas.append(KGCommitDelta(
+                commit, timestamp, subject, sorted(source for source, _, _ in changes), added, removed
+            ))
+        return deltas
+
+
+def _identity(entry: Union[KGEntry, RelationshipEntry]) -> Tuple[str, ...]:
+    """What makes two entries of a file the same, ignoring their line numbers."""
+    if isinstance(entry, RelationshipEntry):
+        return (entry.source_concept, entry.target_concept, entry.relation_type, entry.description)
+    return (entry.name, entry.description)
+
+
+def _subtract(
+    entries: List[Union[KGEntry, RelationshipEntry]], other: List[Union[KGEntry, RelationshipEntry]]
+) -> List[Union[KGEntry, RelationshipEntry]]:
+    """Return the entries that have no counterpart in other (as a multiset)."""
+    remaining = Counter(_identity(entry) for entry in other)
+    result = []
+    for entry in entries:
+        identity = _identity(entry)
+        if remaining[identity]:
+            remaining[identity] -= 1
+        else:
+            result.append(entry)
+    return result
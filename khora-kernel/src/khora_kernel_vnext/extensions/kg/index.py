@@ -0,0 +1,345 @@
+"""
+SQLite index over the Knowledge Graph.
+
+The index (``kg/index.sqlite``) is built from the same entries as the JSON files
+and answers lookups by name, name prefix, source file, relation type and full-text
+search over descriptions without loading the whole graph into memory.
+
+It records the fingerprints of the JSON files it was built from, so readers can
+tell when it is stale and rebuild it (see ``ensure_sqlite_index``).
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .extension import (
+    KGEntry,
+    RelationshipEntry,
+    kg_file_fingerprints,
+    load_kg_files,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.sqlite"
+# Bump whenever the schema changes
+INDEX_SCHEMA_VERSION = "1"
+
+ENTRY_COLUMNS = "name, description, source_file, line"
+RELATIONSHIP_COLUMNS = (
+    "source_concept, target_concept, relation_type, description, source_file, line"
+)
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE concepts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE TABLE rules (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE TABLE relationships (
+    id INTEGER PRIMARY KEY,
+    source_concept TEXT NOT NULL,
+    target_concept TEXT NOT NULL,
+    relation_type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+"""
+
+# Created after the bulk insert, which is considerably faster than maintaining
+# the indexes row by row
+INDEXES = """
+CREATE INDEX concepts_name ON concepts (name);
+CREATE INDEX concepts_source_file ON concepts (source_file);
+CREATE INDEX rules_name ON rules (name);
+CREATE INDEX rules_source_file ON rules (source_file);
+CREATE INDEX relationships_source ON relationships (source_concept);
+CREATE INDEX relationships_target ON relationships (target_concept);
+CREATE INDEX relationships_type ON relationships (relation_type);
+CREATE INDEX relationships_source_file ON relationships (source_file);
+"""
+
+
+def index_path(project_dir: Path) -> Path:
+    """Return the location of the SQLite index for a project."""
+    return project_dir / "kg" / INDEX_FILENAME
+
+
+def _fts5_available(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def build_sqlite_index(
+    project_dir: Path,
+    concepts: Sequence[KGEntry],
+    rules: Sequence[KGEntry],
+    relationships: Sequence[RelationshipEntry],
+) -> Path:
+    """
+    Build kg/index.sqlite from KG entries.
+
+    The index is written to a temporary file and moved into place, so concurrent
+    readers never see a partially built index.
+
+    Args:
+        project_dir: The root directory of the project.
+        concepts: Concept entries.
+        rules: Rule entries.
+        relationships: Relationship entries.
+
+    Returns:
+        Path to the index file.
+    """
+    target = index_path(project_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{INDEX_FILENAME}.", suffix=".tmp")
+    os.close(fd)
+
+    try:
+        conn = sqlite3.connect(tmp_name)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.executescript(SCHEMA)
+            has_fts = _fts5_available(conn)
+
+            with conn:
+                conn.executemany(
+                    "INSERT INTO concepts (name, description, source_file, line) VALUES (?, ?, ?, ?)",
+                    ((c.name, c.description, c.source_file, c.line_number) for c in concepts),
+                )
+                conn.executemany(
+                    "INSERT INTO rules (name, description, source_file, line) VALUES (?, ?, ?, ?)",
+                    ((r.name, r.description, r.source_file, r.line_number) for r in rules),
+                )
+                conn.executemany(
+                    f"INSERT INTO relationships ({RELATIONSHIP_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (r.source_concept, r.target_concept, r.relation_type,
+                         r.description, r.source_file, r.line_number)
+                        for r in relationships
+                    ),
+                )
+                conn.executescript(INDEXES)
+
+                if has_fts:
+                    conn.execute(
+                        "CREATE VIRTUAL TABLE descriptions USING "
+                        "fts5(kind UNINDEXED, entry_id UNINDEXED, name, description)"
+                    )
+                    for kind, table, name_expr in (
+                        ("concept", "concepts", "name"),
+                        ("rule", "rules", "name"),
+                        ("relationship", "relationships",
+                         "source_concept || ' ' || target_concept || ' ' || relation_type"),
+                    ):
+                        conn.execute(
+                            "INSERT INTO descriptions (kind, entry_id, name, description) "
+                            f"SELECT '{kind}', id, {name_expr}, description FROM {table}"
+                        )
+
+                meta = {"schema_version": INDEX_SCHEMA_VERSION, "fts5": "1" if has_fts else "0"}
+                for filename, fingerprint in kg_file_fingerprints(project_dir).items():
+                    meta[f"fingerprint:{filename}"] = fingerprint or ""
+                conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+        finally:
+            conn.close()
+
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    logger.info(
+        f"Built KG index {target} ({len(concepts)} concepts, {len(rules)} rules, "
+        f"{len(relationships)} relationships)"
+    )
+    return target
+
+
+class KGIndex:
+    """Read-only query interface over kg/index.sqlite."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        # Open read-only so queries never create or modify the index
+        self._conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        self._conn.row_factory = sqlite3.Row
+        self.meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "KGIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def is_current(self, project_dir: Path) -> bool:
+        """Check whether the index was built from the current KG JSON files."""
+        if self.meta.get("schema_version") != INDEX_SCHEMA_VERSION:
+            return False
+        return all(
+            self.meta.get(f"fingerprint:{filename}", "") == (fingerprint or "")
+            for filename, fingerprint in kg_file_fingerprints(project_dir).items()
+        )
+
+    @staticmethod
+    def _entry(kind: str, row: sqlite3.Row) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"kind": kind}
+        for key in row.keys():
+            if key not in ("source_file", "line"):
+                result[key] = row[key]
+        result["source"] = {"file": row["source_file"], "line": row["line"]}
+        return result
+
+    def _entries(
+        self, kinds: Sequence[str], where: str, params: Tuple[Any, ...], limit: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        for kind in kinds:
+            table = "concepts" if kind == "concept" else "rules"
+            sql = f"SELECT {ENTRY_COLUMNS} FROM {table} WHERE {where} ORDER BY name, source_file, line"
+            if limit is not None:
+                sql += f" LIMIT {int(limit)}"
+            results.extend(self._entry(kind, row) for row in self._conn.execute(sql, params))
+        return results[:limit] if limit is not None else results
+
+    def find_by_name(
+        self, name: str, kinds: Sequence[str] = ("concept", "rule"), limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Find concepts and/or rules with exactly the given name."""
+        return self._entries(kinds, "name = ?", (name,), limit)
+
+    def find_by_prefix(
+        self, prefix: str, kinds: Sequence[str] = ("concept", "rule"), limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Find concepts and/or rules whose name starts with the given prefix."""
+        # A range condition lets SQLite use the name index
+        return self._entries(kinds, "name >= ? AND name < ?", (prefix, prefix + "\U0010ffff"), limit)
+
+    def find_by_source_file(
+        self, source_file: str, kinds: Sequence[str] = ("concept", "rule"), limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Find concepts and/or rules defined in the given source file."""
+        return self._entries(kinds, "source_file = ?", (source_file,), limit)
+
+    def relationships_touching(
+        self, name: str, relation_type: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Find relationships whose source or target is the given concept."""
+        type_filter = " AND relation_type = ?" if relation_type else ""
+        params: Tuple[Any, ...] = (name, relation_type) if relation_type else (name,)
+        # A UNION of two indexed lookups instead of an OR, which would scan the table
+        sql = (
+            f"SELECT {RELATIONSHIP_COLUMNS} FROM relationships WHERE source_concept = ?{type_filter} "
+            f"UNION SELECT {RELATIONSHIP_COLUMNS} FROM relationships WHERE target_concept = ?{type_filter} "
+            "ORDER BY source_concept, target_concept, relation_type"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [self._entry("relationship", row) for row in self._conn.execute(sql, params + params)]
+
+    def relationships_of_type(self, relation_type: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Find all relationships of the given type."""
+        sql = (
+            f"SELECT {RELATIONSHIP_COLUMNS} FROM relationships WHERE relation_type = ? "
+            "ORDER BY source_concept, target_concept"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [self._entry("relationship", row) for row in self._conn.execute(sql, (relation_type,))]
+
+    def search(self, term: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """
+        Full-text search over names and descriptions of all entries.
+
+        Uses the FTS5 table when SQLite supports it (results ranked by relevance),
+        otherwise a substring match.
+        """
+        if self.meta.get("fts5") == "1":
+            # Quote as a phrase so user input is never parsed as FTS5 query syntax
+            phrase = '"' + term.replace('"', '""') + '"'
+            sql = "SELECT kind, entry_id FROM descriptions WHERE descriptions MATCH ? ORDER BY rank"
+            params: Tuple[Any, ...] = (phrase,)
+            if limit is not None:
+                sql += f" LIMIT {int(limit)}"
+            hits = self._conn.execute(sql, params).fetchall()
+        else:
+            pattern = f"%{term}%"
+            hits = []
+            for kind, table in (("concept", "concepts"), ("rule", "rules"), ("relationship", "relationships")):
+                hits.extend(
+                    (kind, row[0]) for row in self._conn.execute(
+                        f"SELECT id FROM {table} WHERE description LIKE ?", (pattern,)
+                    )
+                )
+            hits = hits[:limit] if limit is not None else hits
+
+        results = []
+        for kind, entry_id in hits:
+            if kind == "relationship":
+                row = self._conn.execute(
+                    f"SELECT {RELATIONSHIP_COLUMNS} FROM relationships WHERE id = ?", (entry_id,)
+                ).fetchone()
+            else:
+                table = "concepts" if kind == "concept" else "rules"
+                row = self._conn.execute(
+                    f"SELECT {ENTRY_COLUMNS} FROM {table} WHERE id = ?", (entry_id,)
+                ).fetchone()
+            results.append(self._entry(kind, row))
+        return results
+
+
+def ensure_sqlite_index(
+    project_dir: Path,
+    entries: Optional[Tuple[Sequence[KGEntry], Sequence[KGEntry], Sequence[RelationshipEntry]]] = None,
+) -> Path:
+    """
+    Return the path to an up-to-date SQLite index, rebuilding it if it is
+    missing or stale.
+
+    Args:
+        project_dir: The root directory of the project.
+        entries: The (concepts, rules, relationships) the KG JSON files were just
+            written from; loaded from the JSON files when not given.
+
+    Returns:
+        Path to the index file.
+    """
+    path = index_path(project_dir)
+    if path.exists():
+        try:
+            with KGIndex(path) as index:
+                if index.is_current(project_dir):
+                    return path
+        except sqlite3.Error as e:
+            logger.warning(f"Rebuilding unreadable KG index {path}: {e}")
+
+    if entries is None:
+        logger.info(f"Building KG index {path} from JSON files")
+        entries = load_kg_files(project_dir)
+    return build_sqlite_index(project_dir, *entries)
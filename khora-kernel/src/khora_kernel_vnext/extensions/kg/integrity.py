@@ -0,0 +1,156 @@
+"""
+Referential-integrity checks for the Knowledge Graph.
+
+The check builds hash indexes of concept names, rule names and relationship
+keys in one pass over the entries and then reports, in linear time:
+
+- dangling endpoints: relationships whose source or target concept is not
+  defined by any ``[concept:...]`` tag
+- duplicate definitions: concepts, rules or relationships defined more than
+  once, with every location
+- self-loops: relationships from a concept to itself
+"""
+import logging
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Sequence, Tuple
+
+from .extension import KGEntry, RelationshipEntry
+
+logger = logging.getLogger(__name__)
+
+
+class IntegrityReport(NamedTuple):
+    """Result of a KG integrity check."""
+    dangling_endpoints: List[Dict[str, Any]]
+    duplicates: List[Dict[str, Any]]
+    self_loops: List[Dict[str, Any]]
+
+    @property
+    def issue_count(self) -> int:
+        return len(self.dangling_endpoints) + len(self.duplicates) + len(self.self_loops)
+
+    @property
+    def valid(self) -> bool:
+        return self.issue_count == 0
+
+    def messages(self, duplicates: bool = True) -> List[str]:
+        """
+        Describe each issue in one line.
+
+        Args:
+            duplicates: Include the duplicate definitions, which a scan has
+                already warned about (see scan_markdown_files).
+        """
+        messages = []
+        for issue in self.dangling_endpoints:
+            noun = "concepts" if len(issue["missing"]) > 1 else "concept"
+            missing = "', '".join(issue["missing"])
+            messages.append(
+                f"Relationship '{issue['relationship']}' at {issue['location']} "
+                f"refers to undefined {noun} '{missing}'"
+            )
+        for issue in self.duplicates if duplicates else ():
+            messages.append(
+                f"{issue['kind'].capitalize()} '{issue['name']}' is defined "
+                f"{len(issue['locations'])} times: {', '.join(issue['locations'])}"
+            )
+        for issue in self.self_loops:
+            messages.append(f"Relationship '{issue['relationship']}' at {issue['location']} is a self-loop")
+        return messages
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dictionary for JSON output."""
+        return {
+            "valid": self.valid,
+            "issue_count": self.issue_count,
+            "dangling_endpoints": self.dangling_endpoints,
+            "duplicates": self.duplicates,
+            "self_loops": self.self_loops,
+        }
+
+
+def _location(entry: Any) -> str:
+    return f"{entry.source_file}:{entry.line_number}"
+
+
+def _relationship_label(key: Tuple[str, str, str]) -> str:
+    return f"{key[0]}->{key[1]}:{key[2]}"
+
+
+def _index_entries(
+    keyed: Iterable[Tuple[Hashable, Any]]
+) -> Tuple[Dict[Hashable, Any], Dict[Hashable, List[Any]]]:
+    """
+    Index entries by key.
+
+    Returns:
+        (first entry per key, all entries of each key that occurs more than once)
+    """
+    first: Dict[Hashable, Any] = {}
+    repeated: Dict[Hashable, List[Any]] = {}
+    for key, entry in keyed:
+        seen = first.setdefault(key, entry)
+        if seen is not entry:
+            group = repeated.get(key)
+            if group is None:
+                repeated[key] = [seen, entry]
+            else:
+                group.append(entry)
+    return first, repeated
+
+
+def check_kg_integrity(
+    concepts: Sequence[KGEntry],
+    rules: Sequence[KGEntry],
+    relationships: Sequence[RelationshipEntry],
+) -> IntegrityReport:
+    """
+    Check the referential integrity of a Knowledge Graph.
+
+    Args:
+        concepts: Concept entries
+        rules: Rule entries
+        relationships: Relationship entries
+
+    Returns:
+        IntegrityReport listing dangling endpoints, duplicate definitions and
+        self-loops, each in input order
+    """
+    concept_index, repeated_concepts = _index_entries((c.name, c) for c in concepts)
+    _, repeated_rules = _index_entries((r.name, r) for r in rules)
+    relationship_index, repeated_relationships = _index_entries(
+        ((r.source_concept, r.target_concept, r.relation_type), r) for r in relationships
+    )
+
+    # Issues of a repeated relationship are reported once (at its first
+    # definition), and the repetition itself as a duplicate
+    dangling = []
+    self_loops = []
+    for key, relationship in relationship_index.items():
+        source, target = key[0], key[1]
+        if source not in concept_index or target not in concept_index:
+            missing = [name for name in dict.fromkeys((source, target)) if name not in concept_index]
+            dangling.append({
+                "relationship": _relationship_label(key),
+                "missing": missing,
+                "location": _location(relationship),
+            })
+        if source == target:
+            self_loops.append({"relationship": _relationship_label(key), "location": _location(relationship)})
+
+    duplicates = [
+        {"kind": kind, "name": label(key), "locations": [_location(entry) for entry in group]}
+        for kind, repeated, label in (
+            ("concept", repeated_concepts, str),
+            ("rule", repeated_rules, str),
+            ("relationship", repeated_relationships, _relationship_label),
+        )
+        for key, group in repeated.items()
+    ]
+
+    report = IntegrityReport(dangling, duplicates, self_loops)
+    if not report.valid:
+        logger.warning(
+            f"KG integrity check found {len(dangling)} dangling endpoints, "
+            f"{len(duplicates)} duplicate definitions and {len(self_loops)} self-loops"
+        )
+    return report
@@ -0,0 +1,506 @@
+"""
+JSON Lines storage for the Knowledge Graph.
+
+With ``[tool.khora.plugins_config.kg] format = "jsonl"`` the KG is stored as
+append-only logs (``kg/concepts.jsonl``, ``kg/rules.jsonl`` and
+``kg/relationships.jsonl``) instead of single JSON documents. Each log starts
+with a header line (format, version, entry count, timestamp and fingerprint of
+the entries it was written with) followed by one record per line:
+
+- an entry, in the canonical JSON form of its to_dict() output
+- a tombstone, ``{"tombstone": "<source file>"}``, which deletes every entry of
+  that source file that appears before it
+
+Updates such as the pre-commit hook's append a tombstone and the new entries for
+each changed source file, so they cost time proportional to the change rather
+than to the size of the KG. Superseded entries and tombstones stay in the log as
+dead records until it is compacted, which rewrites it with only its live entries
+in canonical order.
+
+The kg/manifest.json record of a log keeps its record count and the live entry
+count, relation types and content digest of each source file, so an update
+reads those instead of replaying the log. A log whose record is missing or
+stale (e.g. edited by hand) is replayed, as it is for compaction.
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Union
+
+from .cache import atomic_write_text
+from .extension import (
+    GENERATED_AT_PATTERN,
+    KG_FORMAT_VERSION,
+    KGEntry,
+    RelationshipEntry,
+    _entry_canonical_json,
+    _entry_sort_key,
+    _json_string_unicode,
+    _manifest_record_is_current,
+    _read_kg_header,
+    kg_content_hash,
+    kg_fingerprint,
+    kg_source_digest,
+    read_kg_fingerprint,
+    read_kg_manifest,
+    write_kg_manifest,
+)
+
+logger = logging.getLogger(__name__)
+
+KG_LOG_FORMAT = "khora-kg-jsonl"
+KG_LOG_FILE_KEYS = (
+    ("concepts.jsonl", "concepts"),
+    ("rules.jsonl", "rules"),
+    ("relationships.jsonl", "relationships"),
+)
+# Compact a log once more than this fraction of its records is dead
+DEFAULT_COMPACT_THRESHOLD = 0.5
+
+_TOMBSTONE_PREFIX = b'{"tombstone":'
+
+
+class KGLogState:
+    """
+    The live content of a KG log, per source file.
+
+    Found by replaying the log, or read from its kg/manifest.json record.
+    """
+
+    __slots__ = ("records", "file_counts", "file_relation_types", "file_digests", "size")
+
+    def __init__(self) -> None:
+        self.records = 0  # Record lines, excluding the header
+        self.file_counts: Dict[str, int] = {}
+        self.file_relation_types: Dict[str, Set[str]] = {}
+        # kg_source_digest of each file's live entries
+        self.file_digests: Dict[str, str] = {}
+        self.size = 0
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> Optional["KGLogState"]:
+        """Restore the state kept in a manifest record, or None if it has none."""
+        sources = record.get("sources")
+        if not isinstance(sources, dict) or "records" not in record:
+            return None
+        state = cls()
+        state.records = record["records"]
+        state.size = record["size"]
+        for source, counts in sources.items():
+            state.file_counts[source] = counts["count"]
+            state.file_digests[source] = counts["digest"]
+            if "relation_types" in counts:
+                state.file_relation_types[source] = set(counts["relation_types"])
+        return state
+
+    @property
+    def live(self) -> int:
+        return sum(self.file_counts.values())
+
+    @property
+    def dead(self) -> int:
+        return self.records - self.live
+
+    @property
+    def dead_ratio(self) -> float:
+        return self.dead / self.records if self.records else 0.0
+
+    @property
+    def sources(self) -> Set[str]:
+        return {source for source, count in self.file_counts.items() if count}
+
+    def relation_types(self) -> List[str]:
+        return sorted(set().union(*self.file_relation_types.values()))
+
+    def content_hash(self) -> str:
+        """The kg_content_hash of the live entries."""
+        return kg_content_hash({
+            source: digest for source, digest in self.file_digests.items() if self.file_counts.get(source)
+        })
+
+    def source_records(self) -> Dict[str, Dict[str, Any]]:
+        """The per-source-file part of the log's manifest record."""
+        sources: Dict[str, Dict[str, Any]] = {}
+        for source in sorted(self.sources):
+            counts: Dict[str, Any] = {"count": self.file_counts[source], "digest": self.file_digests[source]}
+            if source in self.file_relation_types:
+                counts["relation_types"] = sorted(self.file_relation_types[source])
+            sources[source] = counts
+        return sources
+
+
+def _entry_class(key: str) -> type:
+    return RelationshipEntry if key == "relationships" else KGEntry
+
+
+def _record_source(record: Dict[str, Any]) -> str:
+    source = record.get("source")
+    return source.get("file", "") if isinstance(source, dict) else ""
+
+
+def _tombstone_line(source_file: str) -> str:
+    return '{"tombstone":' + _json_string_unicode(source_file) + "}"
+
+
+def _iter_lines(path: Path, state: Optional[KGLogState] = None) -> Iterator[bytes]:
+    """Yield the non-empty record lines of a log, counting every byte in state."""
+    with open(path, "rb") as f:
+        header = f.readline()
+        if state is not None:
+            state.size += len(header)
+        if not header.startswith(b"{") or KG_LOG_FORMAT.encode("ascii") not in header:
+            raise ValueError(f"{path} is not a KG log")
+        for line in f:
+            if state is not None:
+                state.size += len(line)
+            if line.strip():
+                yield line
+
+
+def iter_kg_log(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the live entries of a KG log.
+
+    The log is read twice: once for the positions of its tombstones (parsing
+    only tombstone lines) and once to yield every entry that no later tombstone
+    deletes. Memory use is proportional to the number of source files, not
+    entries.
+
+    Args:
+        path: Path to a .jsonl KG log.
+
+    Yields:
+        Entries in to_dict() form, in log order.
+
+    Raises:
+        ValueError: If the file is not a KG log or has a malformed line.
+        OSError: If the file cannot be read.
+    """
+    last_tombstone: Dict[str, int] = {}
+    for position, line in enumerate(_iter_lines(path)):
+        if line.startswith(_TOMBSTONE_PREFIX):
+            last_tombstone[json.loads(line)["tombstone"]] = position
+
+    for position, line in enumerate(_iter_lines(path)):
+        if line.startswith(_TOMBSTONE_PREFIX):
+            continue
+        record = json.loads(line)
+        if last_tombstone.get(_record_source(record), -1) < position:
+            yield record
+
+
+def replay_kg_log(path: Path) -> KGLogState:
+    """
+    Replay a KG log in one pass.
+
+    Args:
+        path: Path to a .jsonl KG log.
+
+    Returns:
+        The state of the log: live entry counts, relation types and content
+        digests per source file, record count and size.
+
+    Raises:
+        ValueError: If the file is not a KG log or has a malformed line.
+        OSError: If the file cannot be read.
+    """
+    state = KGLogState()
+    digests: Dict[str, Any] = {}
+    for line in _iter_lines(path, state):
+        state.records += 1
+        record = json.loads(line)
+        tombstone = record.get("tombstone")
+        if tombstone is not None:
+            state.file_counts.pop(tombstone, None)
+            state.file_relation_types.pop(tombstone, None)
+            digests.pop(tombstone, None)
+            continue
+        source = _record_source(record)
+        state.file_counts[source] = state.file_counts.get(source, 0) + 1
+        # Records are written in canonical order, so this is kg_source_digest
+        digest = digests.get(source)
+        if digest is None:
+            digest = digests[source] = hashlib.sha256()
+        digest.update(line.rstrip(b"\r\n") + b"\n")
+        relation_type = record.get("relation_type")
+        if relation_type is not None:
+            state.file_relation_types.setdefault(source, set()).add(relation_type)
+    state.file_digests = {source: digest.hexdigest() for source, digest in digests.items()}
+    return state
+
+
+def written_kg_log_state(path: Path, entries: Sequence[Union[KGEntry, RelationshipEntry]]) -> KGLogState:
+    """Build the state of a compacted KG log that holds exactly the given entries."""
+    by_source: Dict[str, List[Union[KGEntry, RelationshipEntry]]] = {}
+    for entry in entries:
+        by_source.setdefault(entry.source_file, []).append(entry)
+    state = KGLogState()
+    state.records = len(entries)
+    state.size = path.stat().st_size
+    for source, group in by_source.items():
+        state.file_counts[source] = len(group)
+        state.file_digests[source] = kg_source_digest(group)
+        if isinstance(group[0], RelationshipEntry):
+            state.file_relation_types[source] = {entry.relation_type for entry in group}
+    return state
+
+
+def read_kg_log_state(
+    project_dir: Path, path: Path, manifest: Optional[Dict[str, Any]] = None
+) -> KGLogState:
+    """
+    Get the state of a KG log from kg/manifest.json, replaying the log only if needed.
+
+    Args:
+        project_dir: The root directory of the project.
+        path: Path to a .jsonl KG log.
+        manifest: kg/manifest.json, if already read.
+
+    Returns:
+        The state kept in the log's manifest record if that record is current,
+        otherwise the state found by replaying the log.
+
+    Raises:
+        ValueError: If the log has to be replayed and is malformed.
+        OSError: If the log has to be replayed and cannot be read.
+    """
+    if manifest is None:
+        manifest = read_kg_manifest(project_dir)
+    record = (manifest or {}).get("files", {}).get(path.name)
+    if _manifest_record_is_current(path, record):
+        state = KGLogState.from_record(record)
+        if state is not None:
+            return state
+    logger.debug(f"KG manifest has no current state for {path.name}, replaying the log")
+    return replay_kg_log(path)
+
+
+def _is_pristine(path: Path, count: int) -> bool:
+    """Check that a log holds only its header and the entries written with it."""
+    lines = 0
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                lines += chunk.count(b"\n")
+    except OSError:
+        return False
+    return lines == count + 1
+
+
+def write_kg_log(
+    path: Path, key: str, entries: Sequence[Union[KGEntry, RelationshipEntry]]
+) -> bool:
+    """
+    Write a compacted KG log unless it already holds exactly these entries.
+
+    Args:
+        path: Destination .jsonl file.
+        key: The list key of the file ("concepts", "rules" or "relationships").
+        entries: The entries to write.
+
+    Returns:
+        True if the file was written, False if it was already up to date.
+    """
+    ordered = sorted(entries, key=_entry_sort_key)
+    fingerprint = kg_fingerprint(key, ordered)
+
+    if read_kg_fingerprint(path) == fingerprint and _is_pristine(path, len(ordered)):
+        return False
+
+    header = json.dumps({
+        "format": KG_LOG_FORMAT,
+        "version": KG_FORMAT_VERSION,
+        "key": key,
+        "count": len(ordered),
+        "generated_at": datetime.now().isoformat(),
+        "fingerprint": fingerprint,
+    })
+
+    def chunks() -> Iterator[str]:
+        yield header + "\n"
+        for entry in ordered:
+            yield _entry_canonical_json(entry) + "\n"
+
+    atomic_write_text(path, chunks())
+    return True
+
+
+def append_kg_log(
+    path: Path,
+    key: str,
+    entries: Sequence[Union[KGEntry, RelationshipEntry]],
+    replaced_files: Iterable[str],
+    state: Optional[KGLogState] = None,
+) -> Optional[KGLogState]:
+    """
+    Replace the entries of some source files by appending to a KG log.
+
+    For each replaced source file whose live entries differ from the new ones,
+    a tombstone (if it had entries) and its new entries are appended.
+
+    Args:
+        path: Path to a .jsonl KG log; created if missing.
+        key: The list key of the file.
+        entries: The new entries of the replaced files.
+        replaced_files: Source files whose entries are superseded; files that
+            have no new entries are deleted from the log.
+        state: The current state of the log (see read_kg_log_state), to use
+            instead of replaying it. It is updated in place.
+
+    Returns:
+        The state of the log after the append, or None if nothing changed.
+
+    Raises:
+        ValueError: If the existing file is not a KG log or has a malformed line.
+        OSError: If the file cannot be read or written.
+    """
+    fresh: Dict[str, List[Union[KGEntry, RelationshipEntry]]] = {}
+    for entry in sorted(entries, key=_entry_sort_key):
+        fresh.setdefault(entry.source_file, []).append(entry)
+    replaced = set(replaced_files) | set(fresh)
+
+    if not path.exists():
+        write_kg_log(path, key, entries)
+        return written_kg_log_state(path, entries)
+
+    if state is None:
+        state = replay_kg_log(path)
+    lines: List[str] = []
+    for source in sorted(replaced):
+        new_entries = fresh.get(source, [])
+        new_lines = [_entry_canonical_json(entry) for entry in new_entries]
+        # The same digest as kg_source_digest, as new_entries are in canonical order
+        new_digest = hashlib.sha256("".join(line + "\n" for line in new_lines).encode("utf-8")).hexdigest()
+        if state.file_counts.get(source):
+            if state.file_digests.get(source) == new_digest:
+                continue
+            lines.append(_tombstone_line(source))
+        elif not new_entries:
+            continue
+        lines.extend(new_lines)
+
+        state.file_counts.pop(source, None)
+        state.file_relation_types.pop(source, None)
+        state.file_digests.pop(source, None)
+        if new_entries:
+            state.file_counts[source] = len(new_entries)
+            state.file_digests[source] = new_digest
+            if key == "relationships":
+                state.file_relation_types[source] = {entry.relation_type for entry in new_entries}
+
+    if not lines:
+        return None
+
+    data = ("\n".join(lines) + "\n").encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    state.records += len(lines)
+    state.size += len(data)
+    return state
+
+
+def kg_log_record(
+    path: Path, key: str, state: Optional[KGLogState] = None, appended: bool = False
+) -> Dict[str, Any]:
+    """
+    Build the kg/manifest.json record of a KG log.
+
+    Args:
+        path: Path to a .jsonl KG log.
+        key: The list key of the file.
+        state: The log's state, if already replayed.
+        appended: Whether the log was just appended to; its update time is then
+            now rather than the time in its header.
+
+    Returns:
+        The record, in the same form as for JSON documents, plus the record
+        count and the per-source-file state (see read_kg_log_state).
+    """
+    if state is None:
+        state = replay_kg_log(path)
+    header = _read_kg_header(path) or ""
+    match = GENERATED_AT_PATTERN.search(header)
+    record: Dict[str, Any] = {
+        "count": state.live,
+        "content_hash": state.content_hash(),
+        "fingerprint": read_kg_fingerprint(path),
+        "size": state.size,
+        "generated_at": datetime.now().isoformat() if appended else (match.group(1) if match else None),
+    }
+    if key == "relationships":
+        record["relation_types"] = state.relation_types()
+    record["records"] = state.records
+    record["sources"] = state.source_records()
+    return record
+
+
+def update_kg_manifest_records(project_dir: Path, records: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Replace some records of kg/manifest.json, keeping the others.
+
+    Args:
+        project_dir: The root directory of the project.
+        records: Manifest records keyed by KG file name.
+
+    Returns:
+        True if the manifest was written.
+    """
+    manifest = read_kg_manifest(project_dir)
+    files = dict(manifest.get("files", {})) if manifest else {}
+    files.update(records)
+    return write_kg_manifest(project_dir, files)
+
+
+def compact_kg_logs(
+    project_dir: Path, threshold: float = DEFAULT_COMPACT_THRESHOLD, force: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Compact the KG logs whose dead-record ratio exceeds a threshold.
+
+    Args:
+        project_dir: The root directory of the project.
+        threshold: Compact a log once more than this fraction of its records is dead.
+        force: Compact every log that has dead records, regardless of the threshold.
+
+    Returns:
+        One result per existing log: file name, live and dead record counts and
+        ratio before compaction, and whether the log was compacted.
+
+    Raises:
+        ValueError: If a log is malformed.
+        OSError: If a log cannot be read or written.
+    """
+    kg_dir = project_dir / "kg"
+    results = []
+    records = {}
+    for filename, key in KG_LOG_FILE_KEYS:
+        path = kg_dir / filename
+        if not path.exists():
+            continue
+        state = replay_kg_log(path)
+        compacted = False
+        if state.dead and (force or state.dead_ratio > threshold):
+            entry_class = _entry_class(key)
+            entries = [entry_class.from_dict(record) for record in iter_kg_log(path)]
+            compacted = write_kg_log(path, key, entries)
+            if compacted:
+                logger.info(
+                    f"Compacted {path}: dropped {state.dead} dead records, kept {len(entries)} entries"
+                )
+                records[filename] = kg_log_record(path, key, written_kg_log_state(path, entries))
+        results.append({
+            "file": filename,
+            "live": state.live,
+            "dead": state.dead,
+            "dead_ratio": round(state.dead_ratio, 4),
+            "compacted": compacted,
+        })
+    if records:
+        update_kg_manifest_records(project_dir, records)
+    return results
+
@@ -2,135 +2,344 @@
 """
 Pre-commit hook for Knowledge Graph extraction.
 
-This script is called by pre-commit when markdown files are modified,
-and it updates the concepts.json and rules.json files.
+This script is called by pre-commit when tagged files (markdown, reST or
+Python; see extractors.py) are modified, and it updates the concepts.json,
+rules.json, and relationships.json files. Files count only inside the docs
+directory and the configured source directories, as in a full extraction.
+
+Only the files passed by pre-commit are parsed. Their entries replace the
+entries previously recorded for the same source files, entries whose source
+file no longer exists are dropped, and all other entries are kept as they are.
+
+A KG stored as JSON Lines logs (see jsonl.py) is updated by appending to the
+logs instead of rewriting them.
 """
-import json
 import logging
+import os
 import sys
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Sequence, Set, Tuple, TypeVar, Union
 
-from .extension import extract_concepts_and_rules, generate_kg_files
+from .extension import (
+    KG_FILE_KEYS,
+    KGEntry,
+    RelationshipEntry,
+    _entry_sort_key,
+    extract_concepts_and_rules,
+    generate_kg_files,
+    load_kg_files,
+    refresh_modules,
+    refresh_reachability_index,
+    refresh_similarity_index,
+    refresh_snapshot,
+    update_context_summary,
+)
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format="%(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("khora-kg-precommit")
 
+Entry = TypeVar("Entry", KGEntry, RelationshipEntry)
 
-def main(md_files: List[str]) -> int:
+
+def merge_entries(
+    existing: Sequence[Entry], fresh: Sequence[Entry], replaced_files: Set[str]
+) -> List[Entry]:
+    """
+    Merge freshly extracted entries into an existing entry list.
+
+    Entries whose source file is in replaced_files are dropped from the existing
+    list and the fresh entries are added. The result is grouped by source file in
+    sorted order (keeping in-file order), which is the order a full scan produces.
+
+    Args:
+        existing: Entries loaded from the current KG files.
+        fresh: Entries extracted from the changed files.
+        replaced_files: Source files whose existing entries are superseded.
+
+    Returns:
+        The merged list of entries.
     """
-    Run KG extraction on the provided Markdown files.
+    kept = [entry for entry in existing if entry.source_file not in replaced_files]
+    return sorted(kept + list(fresh), key=lambda entry: entry.source_file)
+
+
+def _as_dicts(entries: Sequence[Union[KGEntry, RelationshipEntry]]) -> list:
+    return [entry.to_dict() for entry in entries]
+
+
+def _deleted_sources(source_root: Path, sources: Set[str], changed_files: Set[str]) -> Set[str]:
+    """Find the recorded source files (other than the changed ones) that no longer exist."""
+    return {source for source in sources - changed_files if not (source_root / source).exists()}
+
+
+def append_to_kg_logs(
+    project_root: Path,
+    fresh: Dict[str, Sequence[Union[KGEntry, RelationshipEntry]]],
+    changed_files: Set[str],
+    source_root: Optional[Path] = None,
+) -> bool:
+    """
+    Update a KG stored as JSON Lines logs by appending the changed entries.
     
     Args:
-        md_files: List of Markdown file paths passed by pre-commit.
+        project_root: The root directory of the project.
+        fresh: Entries extracted from the changed files, by list key.
+        changed_files: Source files whose existing entries are superseded.
+        source_root: The directory source files are recorded relative to (the
+            parent of docs_dir); defaults to project_root.
         
+    Returns:
+        True if any log was appended to.
+    """
+    from .jsonl import (
+        DEFAULT_COMPACT_THRESHOLD,
+        KG_LOG_FILE_KEYS,
+        append_kg_log,
+        kg_log_record,
+        read_kg_log_state,
+        update_kg_manifest_records,
+    )
+    from .extension import read_kg_manifest
+    
+    kg_dir = project_root / "kg"
+    
+    # The per-source state of each log comes from kg/manifest.json, so the logs
+    # are only replayed if their manifest records are stale
+    manifest = read_kg_manifest(project_root)
+    states = {}
+    existing_sources: Set[str] = set()
+    for filename, _ in KG_LOG_FILE_KEYS:
+        if (kg_dir / filename).exists():
+            states[filename] = read_kg_log_state(project_root, kg_dir / filename, manifest)
+            existing_sources |= states[filename].sources
+    
+    # Entries whose source file was deleted since the KG was generated are stale
+    deleted_files = _deleted_sources(source_root or project_root, existing_sources, changed_files)
+    if deleted_files:
+        logger.info(f"Dropping entries from {len(deleted_files)} deleted files")
+    replaced_files = changed_files | deleted_files
+    
+    records = {}
+    for filename, key in KG_LOG_FILE_KEYS:
+        path = kg_dir / filename
+        state = append_kg_log(path, key, fresh[key], replaced_files, states.get(filename))
+        if state is None:
+            continue
+        records[filename] = kg_log_record(path, key, state, appended=True)
+        logger.info(f"Updated {path}: {state.live} live and {state.dead} dead records")
+        if state.dead_ratio > DEFAULT_COMPACT_THRESHOLD:
+            logger.info(
+                f"{state.dead_ratio:.0%} of the records in {path} are dead; "
+                "run `khora kg compact` to rewrite it"
+            )
+    
+    if records:
+        update_kg_manifest_records(project_root, records)
+    return bool(records)
+
+
+def apply_kg_changes(
+    project_root: Path,
+    fresh: Dict[str, Sequence[Union[KGEntry, RelationshipEntry]]],
+    changed_files: Set[str],
+    source_root: Optional[Path] = None,
+) -> bool:
+    """
+    Replace the KG entries of changed source files and refresh the derived files.
+    
+    Entries of changed_files (and of recorded source files that no longer exist)
+    are replaced by the fresh ones; all other entries are kept. Snapshots,
+    indexes and the context summary are refreshed if the KG changed.
+    
+    Args:
+        project_root: The root directory of the project.
+        fresh: Entries extracted from the changed files, by list key.
+        changed_files: Source files whose existing entries are superseded.
+        source_root: The directory source files are recorded relative to (the
+            parent of docs_dir); defaults to project_root.
+        
+    Returns:
+        True if the KG changed.
+        
+    Raises:
+        OSError, ValueError: If the existing KG cannot be read or updated.
+    """
+    # A KG stored as JSON Lines logs is updated by appending to them
+    if any((project_root / "kg" / f"{key}.jsonl").exists() for _, key in KG_FILE_KEYS):
+        if not append_to_kg_logs(project_root, fresh, changed_files, source_root):
+            return False
+        refresh_snapshot(project_root)
+        refresh_similarity_index(project_root)
+        refresh_modules(project_root)
+        refresh_reachability_index(project_root)
+        update_context_summary(project_root)
+        return True
+    
+    # Load the existing KG so that entries from other files are preserved
+    existing_concepts, existing_rules, existing_relationships = load_kg_files(project_root)
+    logger.info(
+        f"Loaded {len(existing_concepts)} existing concepts, {len(existing_rules)} rules, "
+        f"and {len(existing_relationships)} relationships"
+    )
+
+    # Entries whose source file was deleted since the KG was generated are stale
+    existing_sources = {
+        entry.source_file
+        for entries in (existing_concepts, existing_rules, existing_relationships)
+        for entry in entries
+        if entry.source_file
+    }
+    deleted_files = _deleted_sources(source_root or project_root, existing_sources, changed_files)
+    if deleted_files:
+        logger.info(f"Dropping entries from {len(deleted_files)} deleted files")
+    replaced_files = changed_files | deleted_files
+
+    # Only update files if the entries of the replaced files changed
+    existing = (existing_concepts, existing_rules, existing_relationships)
+    if all(
+        _as_dicts(sorted((e for e in entries if e.source_file in replaced_files), key=_entry_sort_key))
+        == _as_dicts(sorted(fresh[key], key=_entry_sort_key))
+        for (_, key), entries in zip(KG_FILE_KEYS, existing)
+    ):
+        return False
+
+    all_concepts = merge_entries(existing_concepts, fresh["concepts"], replaced_files)
+    all_rules = merge_entries(existing_rules, fresh["rules"], replaced_files)
+    all_relationships = merge_entries(existing_relationships, fresh["relationships"], replaced_files)
+    entries = (all_concepts, all_rules, all_relationships)
+    generate_kg_files(project_root, all_concepts, all_rules, all_relationships)
+    refresh_snapshot(project_root, entries)
+    refresh_similarity_index(project_root, entries)
+    refresh_modules(project_root, entries)
+    refresh_reachability_index(project_root, entries)
+
+    # Also update context.yaml with KG summary information
+    update_context_summary(project_root, entries)
+    return True
+
+
+def _extraction_settings(project_root: Path) -> Tuple[Path, Tuple[str, ...], Optional[List[str]]]:
+    """
+    Return the scanned directories and the enabled extractors from the manifest.
+
+    Returns:
+        A tuple (base, directories, extractors): the project-relative directory
+        source files are recorded relative to (the parent of docs_dir, as in a
+        full extraction), project-relative directory prefixes (with a trailing
+        separator) and extractor names, or their defaults if the manifest
+        cannot be read.
+    """
+    from ..core.manifest import (
+        KhoraKGPluginConfig,
+        KhoraManifestConfig,
+        KhoraManifestError,
+        KhoraPathsConfig,
+    )
+
+    try:
+        config = KhoraManifestConfig.from_project_toml(project_root)
+        docs_dir, kg_config = config.paths.docs_dir or KhoraPathsConfig().docs_dir, config.plugins_config.kg
+    except KhoraManifestError:
+        docs_dir, kg_config = KhoraPathsConfig().docs_dir, KhoraKGPluginConfig()
+    # Source directories are relative to the parent of the docs directory
+    base = Path(os.path.normpath(docs_dir)).parent
+    directories = [Path(os.path.normpath(docs_dir))]
+    directories.extend(Path(os.path.normpath(base / source_dir)) for source_dir in kg_config.source_dirs)
+    return base, tuple(str(directory) + os.sep for directory in directories), kg_config.extractors
+
+
+def main(md_files: List[str]) -> int:
+    """
+    Run KG extraction on the provided files.
+
+    Args:
+        md_files: List of file paths passed by pre-commit.
+
     Returns:
         Exit code (0 for success, non-zero for failure).
     """
     try:
         project_root = Path.cwd()
-        logger.info(f"Processing {len(md_files)} Markdown files in {project_root}")
-        
-        # We'll collect all concepts, rules, and relationships from all files
-        all_concepts = []
-        all_rules = []
-        all_relationships = []
-        
+        logger.info(f"Processing {len(md_files)} files in {project_root}")
+        from .extractors import extractor_for, extractor_suffixes
+
+        base, directories, extractors = _extraction_settings(project_root)
+        source_root = project_root / base
+        suffixes = extractor_suffixes(extractors)
+
+        # Collect fresh entries from the changed files, and remember which
+        # source files they supersede
+        fresh_concepts = []
+        fresh_rules = []
+        fresh_relationships = []
+        changed_files: Set[str] = set()
+
         for md_file in md_files:
             file_path = Path(md_file)
-            if not file_path.exists() or not file_path.is_file():
+            if not file_path.is_absolute():
+                file_path = project_root / file_path
+
+            try:
+                rel_path = str(file_path.relative_to(project_root))
+            except ValueError:
+                logger.warning(f"File is outside the project: {md_file}")
+                continue
+            if not rel_path.endswith(suffixes):
+                logger.debug(f"No enabled KG extractor for {rel_path}")
+                continue
+            if not rel_path.startswith(directories):
+                logger.debug(f"Not in a scanned directory: {rel_path}")
+                continue
+            # Entries record paths relative to the parent of docs_dir
+            rel_path = os.path.relpath(file_path, source_root)
+
+            if not file_path.exists():
+                # Deleted (or renamed away): its entries are dropped below
+                logger.info(f"File no longer exists, dropping its entries: {rel_path}")
+                changed_files.add(rel_path)
+                continue
+
+            if not file_path.is_file():
                 logger.warning(f"File not found or not a file: {md_file}")
                 continue
-                
+
             try:
                 content = file_path.read_text(encoding="utf-8")
-                rel_path = file_path.relative_to(project_root)
-                
-                file_concepts, file_rules, file_relationships = extract_concepts_and_rules(content, str(rel_path))
-                
-                all_concepts.extend(file_concepts)
-                all_rules.extend(file_rules)
-                all_relationships.extend(file_relationships)
-                
+
+                tokens = extractor_for(rel_path).tokenize(content)
+                file_concepts, file_rules, file_relationships = extract_concepts_and_rules(
+                    content, rel_path, tokens
+                )
+
+                fresh_concepts.extend(file_concepts)
+                fresh_rules.extend(file_rules)
+                fresh_relationships.extend(file_relationships)
+                changed_files.add(rel_path)
+
                 if file_concepts or file_rules or file_relationships:
                     logger.info(
                         f"Extracted {len(file_concepts)} concepts, {len(file_rules)} rules, "
                         f"and {len(file_relationships)} relationships from {rel_path}"
                     )
             except Exception as e:
+                # Keep the file's existing entries rather than dropping them
                 logger.error(f"Error processing {md_file}: {e}")
                 continue
-        
-        # Now, load existing KG files (if any) to merge with new entries
+
+        fresh = {
+            "concepts": fresh_concepts,
+            "rules": fresh_rules,
+            "relationships": fresh_relationships,
+        }
         try:
-            kg_dir = project_root / "kg"
-            if kg_dir.exists():
-                concepts_file = kg_dir / "concepts.json"
-                rules_file = kg_dir / "rules.json"
-                
-                if concepts_file.exists():
-                    try:
-                        concepts_data = json.loads(concepts_file.read_text(encoding="utf-8"))
-                        existing_concepts = concepts_data.get("concepts", [])
-                        logger.info(f"Loaded {len(existing_concepts)} existing concepts")
-                        
-                        # Merge with existing concepts (more sophisticated merging could be implemented)
-                        # For now, just overwrite
-                    except Exception as e:
-                        logger.error(f"Error loading existing concepts.json: {e}")
-                
-                if rules_file.exists():
-                    try:
-                        rules_data = json.loads(rules_file.read_text(encoding="utf-8"))
-                        existing_rules = rules_data.get("rules", [])
-                        logger.info(f"Loaded {len(existing_rules)} existing rules")
-                        
-                        # Merge with existing rules (more sophisticated merging could be implemented)
-                        # For now, just overwrite
-                    except Exception as e:
-                        logger.error(f"Error loading existing rules.json: {e}")
-        except Exception as e:
-            logger.error(f"Error loading existing KG files: {e}")
-        
-        # Only update files if we found concepts, rules or relationships
-        if all_concepts or all_rules or all_relationships:
-            _, _, _ = generate_kg_files(project_root, all_concepts, all_rules, all_relationships)
-            
-            # Also update context.yaml with KG summary information
-            try:
-                from hashlib import sha1
-                import yaml
-                from datetime import datetime, timezone
-                
-                khora_dir = project_root / ".khora"
-                context_file = khora_dir / "context.yaml"
-                
-                if khora_dir.exists() and context_file.exists():
-                    context_data = yaml.safe_load(context_file.read_text(encoding="utf-8"))
-                    
-                    # Create or update knowledge_graph_summary section
-                    kg_summary = {
-                        "concepts_hash": sha1(json.dumps(all_concepts, sort_keys=True).encode()).hexdigest() if all_concepts else None,
-                        "rules_hash": sha1(json.dumps(all_rules, sort_keys=True).encode()).hexdigest() if all_rules else None,
-                        "relationships_hash": sha1(json.dumps(all_relationships, sort_keys=True).encode()).hexdigest() if all_relationships else None,
-                        "concept_count": len(all_concepts),
-                        "rule_count": len(all_rules),
-                        "relationship_count": len(all_relationships),
-                        "source_dir": "kg",
-                        "last_updated": datetime.now(timezone.utc).isoformat(timespec="seconds")
-                    }
-                    
-                    context_data["knowledge_graph_summary"] = kg_summary
-                    
-                    # Write updated context.yaml
-                    with open(context_file, "w", encoding="utf-8") as f:
-                        yaml.dump(context_data, f, sort_keys=False, indent=2)
-                    
-                    logger.info(f"Updated knowledge graph summary in {context_file}")
-            except Exception as e:
-                logger.error(f"Error updating context.yaml: {e}")
-        
+            if not apply_kg_changes(project_root, fresh, changed_files, source_root):
+                logger.info("Knowledge graph is unchanged")
+        except (OSError, ValueError) as e:
+            logger.error(
+                f"Error updating the KG: {e}. Not updating the KG to avoid losing "
+                "entries; regenerate it with a full extraction."
+            )
+            return 1
         return 0
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
@@ -138,6 +347,7 @@ def main(md_files: List[str]) -> int:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(name)s - %(levelname)s - %(message)s")
     # Files are passed as arguments by pre-commit
     exit_code = main(sys.argv[1:])
     sys.exit(exit_code)
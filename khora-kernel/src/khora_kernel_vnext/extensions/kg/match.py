@@ -0,0 +1,534 @@
+"""
+Pattern matching over the KG relationship graph (``khora kg match``).
+
+A pattern is one or more chains of concept variables joined by typed
+relationships, optionally followed by conditions::
+
+    (a)-[DependsOn]->(b)-[Extends]->(c) where c = "BaseService"
+
+- ``(name)`` is a concept variable; a variable used twice is the same concept
+- ``-[T]->`` follows a relationship of type T forwards, ``<-[T]-`` backwards
+  and ``-[T]-`` in either direction; ``[A|B]`` accepts several types and
+  ``[]`` any type
+- chains separated by commas must all match
+- ``where`` takes conditions joined by ``and``: ``v = "Name"``,
+  ``v != "Name"``, ``v in ("A", "B")``, ``v =~ "regex"`` (searched anywhere
+  in the name), ``v = w`` and ``v != w``
+
+Every relationship in the pattern is joined against an edge index of its
+relation type(s): the distinct (source, target) pairs plus hash tables from
+sources to targets and from targets to sources, each built on first use.
+Joins are planned greedily from cardinalities. The next step is always the one
+with the smallest estimated output: binding constants from ``=`` and ``in``
+conditions, checking a relationship between two bound variables, expanding a
+bound variable through a hash table (average fan-out of the index), or
+scanning an index. Conditions run as soon as their variables are bound.
+
+Matches are produced depth-first, one at a time, so results stream without
+materializing intermediate joins and a limit stops the search early.
+"""
+import logging
+import re
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .graph import KGGraph
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<out_end>\]->)
+    | (?P<in_start><-\[)
+    | (?P<start>-\[)
+    | (?P<end>\]-)
+    | (?P<op>!=|=~|=)
+    | (?P<punct>[(),|])
+    | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    """,
+    re.VERBOSE,
+)
+_ESCAPE = re.compile(r"\\(.)")
+
+UNBOUND = -1
+
+
+class PatternError(ValueError):
+    """Raised for a pattern that cannot be parsed."""
+
+
+class PatternEdge(NamedTuple):
+    """A relationship between two pattern variables."""
+    source: str
+    types: Optional[Tuple[str, ...]]  # None for any type
+    target: str
+    directed: bool
+
+    def describe(self) -> str:
+        types = "|".join(self.types) if self.types else ""
+        return f"({self.source})-[{types}]-{'>' if self.directed else ''}({self.target})"
+
+
+class Condition(NamedTuple):
+    """A where condition; value is a name, a tuple of names, a pattern, or a variable."""
+    variable: str
+    operator: str  # "=", "!=", "in" or "=~"
+    value: Any
+    value_is_variable: bool = False
+
+
+class Pattern(NamedTuple):
+    """A parsed pattern."""
+    variables: List[str]
+    edges: List[PatternEdge]
+    conditions: List[Condition]
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens: List[Tuple[str, str, int]] = []
+        offset = 0
+        while offset < len(text):
+            match = _TOKEN.match(text, offset)
+            if match is None:
+                raise PatternError(f"unexpected {text[offset]!r} at offset {offset}")
+            if match.lastgroup != "space":
+                self.tokens.append((match.lastgroup, match.group(), offset))
+            offset = match.end()
+        self.position = 0
+        self.variables: List[str] = []
+        self.edges: List[PatternEdge] = []
+        self.conditions: List[Condition] = []
+
+    def _peek(self, kind: str, value: Optional[str] = None) -> bool:
+        if self.position >= len(self.tokens):
+            return False
+        token_kind, token_value, _ = self.tokens[self.position]
+        if token_kind != kind:
+            return False
+        return value is None or token_value.lower() == value
+
+    def _take(self, kind: str, value: Optional[str] = None, expected: Optional[str] = None) -> str:
+        if not self._peek(kind, value):
+            what = expected or value or kind
+            if self.position >= len(self.tokens):
+                raise PatternError(f"expected {what} at the end of the pattern")
+            _, token, offset = self.tokens[self.position]
+            raise PatternError(f"expected {what} at offset {offset}, found {token!r}")
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def _variable(self) -> str:
+        self._take("punct", "(", "'('")
+        name = self._take("name", expected="a variable name")
+        self._take("punct", ")", "')'")
+        if name not in self.variables:
+            self.variables.append(name)
+        return name
+
+    def _types(self) -> Optional[Tuple[str, ...]]:
+        if not self._peek("name"):
+            return None
+        types = [self._take("name")]
+        while self._peek("punct", "|"):
+            self._take("punct")
+            types.append(self._take("name", expected="a relation type"))
+        return tuple(types)
+
+    def _chain(self) -> None:
+        left = self._variable()
+        while self._peek("start") or self._peek("in_start"):
+            if self._peek("start"):
+                self._take("start")
+                types = self._types()
+                if self._peek("out_end"):
+                    self._take("out_end")
+                    directed, backwards = True, False
+                else:
+                    self._take("end", expected="']->' or ']-'")
+                    directed, backwards = False, False
+            else:
+                self._take("in_start")
+                types = self._types()
+                self._take("end", expected="']-'")
+                directed, backwards = True, True
+            right = self._variable()
+            source, target = (right, left) if backwards else (left, right)
+            self.edges.append(PatternEdge(source, types, target, directed))
+            left = right
+
+    def _string(self) -> str:
+        return _ESCAPE.sub(r"\1", self._take("string", expected="a quoted name")[1:-1])
+
+    def _condition(self) -> None:
+        variable = self._take("name", expected="a variable name")
+        if variable not in self.variables:
+            raise PatternError(f"unknown variable {variable!r} in where clause")
+        if self._peek("name", "in"):
+            self._take("name")
+            self._take("punct", "(", "'('")
+            values = [self._string()]
+            while self._peek("punct", ","):
+                self._take("punct")
+                values.append(self._string())
+            self._take("punct", ")", "')'")
+            self.conditions.append(Condition(variable, "in", tuple(values)))
+            return
+        operator = self._take("op", expected="'=', '!=', '=~' or 'in'")
+        if operator != "=~" and self._peek("name"):
+            other = self._take("name")
+            if other not in self.variables:
+                raise PatternError(f"unknown variable {other!r} in where clause")
+            self.conditions.append(Condition(variable, operator, other, True))
+            return
+        value = self._string()
+        if operator == "=~":
+            try:
+                value = re.compile(value)
+            except re.error as e:
+                raise PatternError(f"invalid regular expression {value!r}: {e}") from None
+        self.conditions.append(Condition(variable, operator, value))
+
+    def parse(self) -> Pattern:
+        self._chain()
+        while self._peek("punct", ","):
+            self._take("punct")
+            self._chain()
+        if self._peek("name", "where"):
+            self._take("name")
+            self._condition()
+            while self._peek("name", "and"):
+                self._take("name")
+                self._condition()
+        if self.position < len(self.tokens):
+            _, token, offset = self.tokens[self.position]
+            raise PatternError(f"unexpected {token!r} at offset {offset}")
+        return Pattern(self.variables, self.edges, self.conditions)
+
+
+def parse_pattern(text: str) -> Pattern:
+    """
+    Parse a pattern (see the module documentation for the syntax).
+
+    Raises:
+        PatternError: If the pattern is malformed
+    """
+    return _Parser(text).parse()
+
+
+class _EdgeIndex:
+    """Distinct edges of a set of relation types, with hash tables built on demand."""
+
+    def __init__(self, pairs: Set[Tuple[int, int]]):
+        self.pairs = pairs
+        self._forward: Optional[Dict[int, List[int]]] = None
+        self._backward: Optional[Dict[int, List[int]]] = None
+        self._either: Optional[Dict[int, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    @property
+    def forward(self) -> Dict[int, List[int]]:
+        if self._forward is None:
+            self._forward = {}
+            for source, target in self.pairs:
+                self._forward.setdefault(source, []).append(target)
+        return self._forward
+
+    @property
+    def backward(self) -> Dict[int, List[int]]:
+        if self._backward is None:
+            self._backward = {}
+            for source, target in self.pairs:
+                self._backward.setdefault(target, []).append(source)
+        return self._backward
+
+    @property
+    def either(self) -> Dict[int, List[int]]:
+        if self._either is None:
+            either: Dict[int, Set[int]] = {}
+            for source, target in self.pairs:
+                either.setdefault(source, set()).add(target)
+                either.setdefault(target, set()).add(source)
+            self._either = {node: sorted(neighbors) for node, neighbors in either.items()}
+        return self._either
+
+    def table(self, reverse: bool, directed: bool) -> Dict[int, List[int]]:
+        if not directed:
+            return self.either
+        return self.backward if reverse else self.forward
+
+
+class _Step(NamedTuple):
+    """One join step; run() yields once per extension of the row."""
+    description: str
+    estimate: float
+    run: Callable[[List[int]], Iterator[None]]
+
+
+class PatternMatcher:
+    """
+    Matches patterns against a KGGraph.
+
+    Edge indexes are built on first use and kept, so one matcher answers many
+    queries over the same graph cheaply.
+    """
+
+    def __init__(self, graph: KGGraph):
+        self.graph = graph
+        self._by_type: Optional[Dict[int, Set[Tuple[int, int]]]] = None
+        self._indexes: Dict[Optional[FrozenSet[int]], _EdgeIndex] = {}
+
+    def _index(self, types: Optional[Tuple[str, ...]]) -> _EdgeIndex:
+        type_ids = self.graph._type_ids
+        key = None if types is None else frozenset(type_ids[t] for t in types if t in type_ids)
+        index = self._indexes.get(key)
+        if index is None:
+            if self._by_type is None:
+                # One pass groups every edge by type; unions are built from these
+                self._by_type = {}
+                sources, targets, edge_types = self.graph.edge_arrays()
+                for source, target, type_id in zip(sources, targets, edge_types):
+                    pairs = self._by_type.get(type_id)
+                    if pairs is None:
+                        pairs = self._by_type[type_id] = set()
+                    pairs.add((source, target))
+            if key is not None and len(key) == 1:
+                pairs = self._by_type.get(next(iter(key)), set())
+            else:
+                pairs = set()
+                for type_id, type_pairs in self._by_type.items():
+                    if key is None or type_id in key:
+                        pairs |= type_pairs
+            index = self._indexes[key] = _EdgeIndex(pairs)
+        return index
+
+    def _filter(self, condition: Condition, slots: Dict[str, int]) -> Callable[[List[int]], bool]:
+        slot = slots[condition.variable]
+        ids = self.graph.ids
+        if condition.value_is_variable:
+            other = slots[condition.value]
+            if condition.operator == "=":
+                return lambda row: row[slot] == row[other]
+            return lambda row: row[slot] != row[other]
+        if condition.operator == "!=":
+            excluded = ids.get(condition.value, UNBOUND)
+            return lambda row: row[slot] != excluded
+        if condition.operator == "=~":
+            names, search, cache = self.graph.names, condition.value.search, {}
+
+            def matches(row: List[int]) -> bool:
+                node = row[slot]
+                result = cache.get(node)
+                if result is None:
+                    result = cache[node] = search(names[node]) is not None
+                return result
+            return matches
+        values = (condition.value,) if condition.operator == "=" else condition.value
+        allowed = {ids[value] for value in values if value in ids}
+        return lambda row: row[slot] in allowed
+
+    def plan(self, pattern: Pattern) -> List[_Step]:
+        """
+        Choose the join order for a pattern.
+
+        Returns:
+            The steps in execution order, with their descriptions and estimated
+            output row counts
+        """
+        slots = {name: i for i, name in enumerate(pattern.variables)}
+        node_count = max(self.graph.node_count, 1)
+        ids = self.graph.ids
+
+        # Candidates: ("seed", condition), ("edge", edge), ("scan", variable)
+        pending: List[Tuple[str, Any]] = [
+            ("seed", c) for c in pattern.conditions if c.operator in ("=", "in") and not c.value_is_variable
+        ]
+        pending += [("edge", edge) for edge in pattern.edges]
+        connected = {edge.source for edge in pattern.edges} | {edge.target for edge in pattern.edges}
+        pending += [("scan", name) for name in pattern.variables if name not in connected]
+        filters = [c for c in pattern.conditions if not (c.operator in ("=", "in") and not c.value_is_variable)]
+
+        bound: Set[str] = set()
+        rows = 1.0
+        steps: List[_Step] = []
+        while pending:
+            # A lone variable already bound by a condition needs no scan
+            pending = [(kind, item) for kind, item in pending if not (kind == "scan" and item in bound)]
+            if not pending:
+                break
+            best = None
+            for position, (kind, item) in enumerate(pending):
+                estimate = self._estimate(kind, item, bound, rows, node_count)
+                if best is None or estimate < best[0]:
+                    best = (estimate, position)
+            estimate, position = best
+            kind, item = pending.pop(position)
+            newly_bound = self._binds(kind, item) - bound
+            bound |= newly_bound
+            ready = [c for c in filters if c.variable in bound and (not c.value_is_variable or c.value in bound)]
+            filters = [c for c in filters if c not in ready]
+            checks = [self._filter(c, slots) for c in ready]
+            rows = estimate
+            steps.append(self._step(kind, item, slots, bound, newly_bound, checks, estimate, ids))
+        return steps
+
+    @staticmethod
+    def _binds(kind: str, item: Any) -> Set[str]:
+        if kind == "edge":
+            return {item.source, item.target}
+        return {item.variable if kind == "seed" else item}
+
+    def _estimate(self, kind: str, item: Any, bound: Set[str], rows: float, node_count: int) -> float:
+        if kind == "scan":
+            return rows * node_count
+        if kind == "seed":
+            values = (item.value,) if item.operator == "=" else item.value
+            count = sum(1 for value in set(values) if value in self.graph.ids)
+            return rows * (count / node_count if item.variable in bound else count)
+        index = self._index(item.types)
+        edges = len(index)
+        if not edges:
+            return 0.0
+        source_bound, target_bound = item.source in bound, item.target in bound
+        sources, targets = len(index.forward), len(index.backward)
+        if source_bound and target_bound:
+            return rows * min(1.0, edges / (sources * targets) * (1 if item.directed else 2))
+        if source_bound or target_bound:
+            if not item.directed:
+                return rows * 2 * edges / (sources + targets)
+            return rows * edges / (sources if source_bound else targets)
+        return rows * edges * (1 if item.directed else 2)
+
+    def _step(
+        self,
+        kind: str,
+        item: Any,
+        slots: Dict[str, int],
+        bound: Set[str],
+        newly_bound: Set[str],
+        checks: List[Callable[[List[int]], bool]],
+        estimate: float,
+        ids: Dict[str, int],
+    ) -> _Step:
+        def accept(row: List[int]) -> bool:
+            for check in checks:
+                if not check(row):
+                    return False
+            return True
+
+        if kind == "scan":
+            slot = slots[item]
+            node_count = self.graph.node_count
+
+            def run(row: List[int]) -> Iterator[None]:
+                for node in range(node_count):
+                    row[slot] = node
+                    if accept(row):
+                        yield None
+                row[slot] = UNBOUND
+            return _Step(f"scan all concepts as {item}", estimate, run)
+
+        if kind == "seed":
+            slot = slots[item.variable]
+            values = (item.value,) if item.operator == "=" else item.value
+            candidates = sorted({ids[value] for value in values if value in ids})
+            if item.variable not in newly_bound:
+                allowed = set(candidates)
+
+                def run(row: List[int]) -> Iterator[None]:
+                    if row[slot] in allowed and accept(row):
+                        yield None
+                return _Step(f"check {item.variable} {item.operator} {values}", estimate, run)
+
+            def run(row: List[int]) -> Iterator[None]:
+                for node in candidates:
+                    row[slot] = node
+                    if accept(row):
+                        yield None
+                row[slot] = UNBOUND
+            return _Step(f"bind {item.variable} to {len(candidates)} concept(s)", estimate, run)
+
+        edge: PatternEdge = item
+        index = self._index(edge.types)
+        source, target = slots[edge.source], slots[edge.target]
+        description = edge.describe()
+
+        if not newly_bound:
+            pairs = index.pairs
+
+            def run(row: List[int]) -> Iterator[None]:
+                pair = (row[source], row[target])
+                if (pair in pairs or not edge.directed and pair[::-1] in pairs) and accept(row):
+                    yield None
+            return _Step(f"check {description}", estimate, run)
+
+        if len(newly_bound) == 1 and edge.source != edge.target:
+            reverse = edge.source in newly_bound
+            table = index.table(reverse, edge.directed)
+            start, end = (target, source) if reverse else (source, target)
+            arrow = f"from {edge.target}" if reverse else f"from {edge.source}"
+
+            def run(row: List[int]) -> Iterator[None]:
+                for node in table.get(row[start], ()):
+                    row[end] = node
+                    if accept(row):
+                        yield None
+                row[end] = UNBOUND
+            return _Step(f"expand {description} {arrow}", estimate, run)
+
+        # Neither end bound (or a self-loop pattern): scan the index
+        pairs = sorted(index.pairs)
+        if not edge.directed:
+            pairs = sorted(set(pairs) | {(b, a) for a, b in pairs})
+        if edge.source == edge.target:
+            pairs = [(a, b) for a, b in pairs if a == b]
+
+        def run(row: List[int]) -> Iterator[None]:
+            for a, b in pairs:
+                row[source], row[target] = a, b
+                if accept(row):
+                    yield None
+            row[source] = row[target] = UNBOUND
+        return _Step(f"scan {description}", estimate, run)
+
+    def match(self, pattern: Pattern, limit: Optional[int] = None) -> Iterator[Dict[str, str]]:
+        """
+        Find the variable bindings that satisfy a pattern.
+
+        Args:
+            pattern: A parsed pattern
+            limit: Stop after this many matches
+
+        Yields:
+            One dictionary per match from variable to concept name, in the order
+            the variables first appear in the pattern
+        """
+        steps = self.plan(pattern)
+        names = self.graph.names
+        variables = pattern.variables
+        row = [UNBOUND] * len(variables)
+        produced = 0
+
+        def search(depth: int) -> Iterator[None]:
+            last = depth == len(steps) - 1
+            for _ in steps[depth].run(row):
+                if last:
+                    yield None
+                else:
+                    yield from search(depth + 1)
+
+        if not steps or limit == 0:
+            return
+        for _ in search(0):
+            yield {name: names[row[i]] for i, name in enumerate(variables)}
+            produced += 1
+            if limit is not None and produced >= limit:
+                return
+
+    def explain(self, pattern: Pattern) -> List[str]:
+        """Describe the plan of a pattern, one line per step with its estimated rows."""
+        return [f"{step.description} (~{step.estimate:.3g} rows)" for step in self.plan(pattern)]
@@ -0,0 +1,409 @@
+"""
+Transitive-closure index for reachability queries over KG relationships.
+
+``kg/reachability.npz`` answers "does A eventually <relation> B" and "what is
+downstream (or upstream) of X" for chosen relation types without traversing
+the relationship list. For each indexed type:
+
+- the concepts with edges of that type, sorted by name and joined by newlines
+- the strongly connected component of every concept; concepts in one
+  component reach each other, so the closure is computed on the condensed DAG
+- one bitset row per component, packed into ``uint64`` words, with the bits of
+  every component it reaches (its own included)
+- whether each component is cyclic, i.e. reaches itself through at least one
+  edge
+
+Components come from ``KGGraph.strongly_connected_components``, which lists
+them in reverse topological order, so a single pass ORs every component's
+successor rows into its own. A reachability check is then one bit test and a
+downstream set is one row; an upstream set is one column. The bitsets take
+components² / 8 bytes, so types whose closure would exceed a size limit are
+not indexed.
+
+Every type records a digest of its edges. When the relationships change, only
+types whose edges changed are recomputed; the arrays of the others are copied.
+
+NumPy is an optional dependency (``pip install khora-kernel[analysis]``).
+"""
+import hashlib
+import io
+import json
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .cache import atomic_write_bytes
+from .dedupe import require_numpy
+from .extension import RelationshipEntry, iter_kg_entries, kg_file_fingerprints
+from .graph import KGGraph
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+REACHABILITY_FILENAME = "reachability.npz"
+# Bump whenever the layout changes; older indexes are rebuilt
+REACHABILITY_VERSION = 1
+
+# Largest bitset matrix built for one relation type
+DEFAULT_MAX_BITSET_BYTES = 256 << 20
+
+
+def reachability_path(project_dir: Path) -> Path:
+    """Return the path of a project's reachability index."""
+    return project_dir / "kg" / REACHABILITY_FILENAME
+
+
+def _relationship_fingerprints(project_dir: Path) -> Dict[str, Optional[str]]:
+    # Only the relationships feed the index
+    return {
+        name: fingerprint
+        for name, fingerprint in kg_file_fingerprints(project_dir).items()
+        if name.startswith("relationships.")
+    }
+
+
+def _edges_by_type(
+    relationships: Iterable[RelationshipEntry], relation_types: Iterable[str]
+) -> Dict[str, List[RelationshipEntry]]:
+    wanted = set(relation_types)
+    edges: Dict[str, List[RelationshipEntry]] = defaultdict(list)
+    for rel in relationships:
+        if rel.relation_type in wanted:
+            edges[rel.relation_type].append(rel)
+    return edges
+
+
+def _edge_digest(edges: Sequence[RelationshipEntry]) -> str:
+    """Digest the (source, target) pairs of one relation type, in KG file order."""
+    hasher = hashlib.blake2b(digest_size=16)
+    for rel in edges:
+        hasher.update(f"{rel.source_concept}\0{rel.target_concept}\n".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def build_closure(edges: Sequence[RelationshipEntry], max_bytes: int = DEFAULT_MAX_BITSET_BYTES) -> Dict[str, Any]:
+    """
+    Compute the reachability arrays of one relation type.
+
+    Args:
+        edges: Relationship entries of the type
+        max_bytes: Largest bitset matrix to build
+
+    Returns:
+        Arrays "names" (sorted concept names joined by newlines, UTF-8),
+        "components" (component of each name), "bits" (components x words
+        uint64 reachability rows) and "cyclic" (per component)
+
+    Raises:
+        ValueError: If the bitset matrix would exceed max_bytes
+    """
+    require_numpy()
+    graph = KGGraph.from_relationships(edges)
+    components = graph.strongly_connected_components()
+    count = len(components)
+    words = (count + 63) // 64
+    if count * words * 8 > max_bytes:
+        raise ValueError(
+            f"{count} components need a {count * words * 8 >> 20} MiB closure "
+            f"(limit {max_bytes >> 20} MiB)"
+        )
+
+    node_count = graph.node_count
+    component_of = np.empty(node_count, dtype=np.int64)
+    for component, members in enumerate(components):
+        component_of[members] = component
+    sources, targets, _ = graph.edge_arrays()
+    sources = component_of[np.frombuffer(sources, dtype=np.dtype(sources.typecode))]
+    targets = component_of[np.frombuffer(targets, dtype=np.dtype(targets.typecode))]
+
+    cyclic = np.array([len(members) > 1 for members in components], dtype=bool)
+    cyclic[sources[sources == targets]] = True
+
+    # Distinct condensed edges, grouped by source component
+    between = sources != targets
+    condensed = np.unique(sources[between] * count + targets[between])
+    successor_sources, successors = np.divmod(condensed, count)
+    offsets = np.searchsorted(successor_sources, np.arange(count + 1))
+
+    bits = np.zeros((count, words), dtype=np.uint64)
+    own = np.arange(count)
+    bits[own, own >> 6] = np.left_shift(np.uint64(1), (own & 63).astype(np.uint64))
+    # Successors precede their sources in Tarjan's order, so their rows are final
+    for component in np.flatnonzero(np.diff(offsets)).tolist():
+        rows = successors[offsets[component]:offsets[component + 1]]
+        bits[component] |= np.bitwise_or.reduce(bits[rows], axis=0)
+
+    order = sorted(range(node_count), key=graph.names.__getitem__)
+    names = "\n".join(graph.names[node] for node in order).encode("utf-8")
+    return {
+        "names": np.frombuffer(names, dtype=np.uint8),
+        "components": component_of[order].astype(np.int32),
+        "bits": bits,
+        "cyclic": cyclic,
+    }
+
+
+class _TypeClosure(NamedTuple):
+    names: List[str]
+    components: Any
+    bits: Any
+    cyclic: Any
+
+
+class ReachabilityIndex:
+    """
+    A loaded reachability index.
+
+    The arrays of a relation type are read from the file on first use.
+    """
+
+    def __init__(self, path: Path):
+        require_numpy()
+        self.path = path
+        with np.load(path, allow_pickle=False) as npz:
+            try:
+                metadata = json.loads(npz["metadata"].item())
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"{path} is not a KG reachability index") from e
+        if metadata.get("version") != REACHABILITY_VERSION:
+            raise ValueError(
+                f"{path} has index version {metadata.get('version')}, expected {REACHABILITY_VERSION}"
+            )
+        self.fingerprints: Dict[str, Optional[str]] = metadata.get("fingerprints", {})
+        # relation type -> {"key", "digest", "concepts", "components"}
+        self.types: Dict[str, Dict[str, Any]] = metadata.get("types", {})
+        # relation type -> {"digest", "reason"} for types too large to index
+        self.skipped: Dict[str, Dict[str, str]] = metadata.get("skipped", {})
+        self._closures: Dict[str, _TypeClosure] = {}
+
+    @property
+    def relation_types(self) -> List[str]:
+        return sorted(self.types)
+
+    def arrays(self, relation_type: str) -> Dict[str, Any]:
+        """Return the stored arrays of a relation type (see ``build_closure``)."""
+        key = self.types[relation_type]["key"]
+        with np.load(self.path, allow_pickle=False) as npz:
+            return {field: npz[f"{key}.{field}"] for field in ("names", "components", "bits", "cyclic")}
+
+    def _closure(self, relation_type: str) -> _TypeClosure:
+        closure = self._closures.get(relation_type)
+        if closure is None:
+            if relation_type not in self.types:
+                raise KeyError(f"Relation type {relation_type!r} is not indexed")
+            arrays = self.arrays(relation_type)
+            names = arrays["names"].tobytes().decode("utf-8").split("\n") if len(arrays["components"]) else []
+            closure = self._closures[relation_type] = _TypeClosure(
+                names, arrays["components"], arrays["bits"], arrays["cyclic"]
+            )
+        return closure
+
+    @staticmethod
+    def _component(closure: _TypeClosure, name: str) -> Optional[int]:
+        position = bisect_left(closure.names, name)
+        if position < len(closure.names) and closure.names[position] == name:
+            return int(closure.components[position])
+        return None
+
+    def reaches(self, source: str, target: str, relation_type: str) -> bool:
+        """
+        Return whether a chain of relation_type relationships leads from source to target.
+
+        A concept reaches itself only through a cycle.
+
+        Raises:
+            KeyError: If relation_type is not indexed
+        """
+        closure = self._closure(relation_type)
+        a, b = self._component(closure, source), self._component(closure, target)
+        if a is None or b is None:
+            return False
+        if a == b:
+            return bool(closure.cyclic[a])
+        return bool((int(closure.bits[a, b >> 6]) >> (b & 63)) & 1)
+
+    def _members(self, closure: _TypeClosure, components: Any, exclude: int) -> List[str]:
+        if not closure.cyclic[exclude]:
+            components[exclude] = False
+        return [closure.names[i] for i in np.flatnonzero(components[closure.components]).tolist()]
+
+    def downstream(self, name: str, relation_type: str) -> List[str]:
+        """
+        Return every concept reachable from name, sorted.
+
+        Raises:
+            KeyError: If relation_type is not indexed
+        """
+        closure = self._closure(relation_type)
+        component = self._component(closure, name)
+        if component is None:
+            return []
+        row = closure.bits[component].astype("<u8").view(np.uint8)
+        reached = np.unpackbits(row, bitorder="little")[:len(closure.cyclic)].astype(bool)
+        return self._members(closure, reached, component)
+
+    def upstream(self, name: str, relation_type: str) -> List[str]:
+        """
+        Return every concept name is reachable from, sorted.
+
+        Raises:
+            KeyError: If relation_type is not indexed
+        """
+        closure = self._closure(relation_type)
+        component = self._component(closure, name)
+        if component is None:
+            return []
+        column = closure.bits[:, component >> 6] >> np.uint64(component & 63)
+        return self._members(closure, (column & np.uint64(1)).astype(bool), component)
+
+
+def write_reachability_index(
+    project_dir: Path,
+    relationships: Sequence[RelationshipEntry],
+    relation_types: Iterable[str],
+    max_bytes: int = DEFAULT_MAX_BITSET_BYTES,
+) -> Path:
+    """
+    Write kg/reachability.npz for relationships that were just written to the KG files.
+
+    The closure of a type whose edges are unchanged since the previous index is
+    copied from it. Types that would exceed max_bytes are recorded as skipped.
+    The file is replaced atomically.
+
+    Args:
+        project_dir: The root directory of the project.
+        relationships: Relationship entries
+        relation_types: The relation types to index
+        max_bytes: Largest bitset matrix to build for one type
+
+    Returns:
+        Path to the index
+    """
+    require_numpy()
+    path = reachability_path(project_dir)
+    previous = None
+    if path.exists():
+        try:
+            previous = ReachabilityIndex(path)
+        except (OSError, ValueError) as e:
+            logger.info(f"Not reusing KG reachability index {path}: {e}")
+
+    relation_types = sorted(set(relation_types))
+    edges = _edges_by_type(relationships, relation_types)
+    arrays: Dict[str, Any] = {}
+    types: Dict[str, Dict[str, Any]] = {}
+    skipped: Dict[str, Dict[str, str]] = {}
+    reused = 0
+    for key, relation_type in enumerate(relation_types):
+        type_edges = edges.get(relation_type, [])
+        digest = _edge_digest(type_edges)
+        old = previous.types.get(relation_type) if previous is not None else None
+        if old is not None and old["digest"] == digest:
+            closure = previous.arrays(relation_type)
+            reused += 1
+        elif previous is not None and previous.skipped.get(relation_type, {}).get("digest") == digest:
+            skipped[relation_type] = previous.skipped[relation_type]
+            continue
+        else:
+            try:
+                closure = build_closure(type_edges, max_bytes)
+            except ValueError as e:
+                logger.warning(f"Not indexing reachability of {relation_type}: {e}")
+                skipped[relation_type] = {"digest": digest, "reason": str(e)}
+                continue
+        types[relation_type] = {
+            "key": key,
+            "digest": digest,
+            "concepts": len(closure["components"]),
+            "components": len(closure["cyclic"]),
+        }
+        arrays.update({f"{key}.{field}": value for field, value in closure.items()})
+
+    metadata = {
+        "version": REACHABILITY_VERSION,
+        "fingerprints": _relationship_fingerprints(project_dir),
+        "types": types,
+        "skipped": skipped,
+    }
+    buffer = io.BytesIO()
+    np.savez(buffer, metadata=np.array(json.dumps(metadata)), **arrays)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_bytes(path, buffer.getvalue())
+    logger.info(
+        f"Wrote KG reachability index {path} ({len(types)} relation types, {reused} reused)"
+    )
+    return path
+
+
+def open_reachability_index(project_dir: Path) -> Optional[ReachabilityIndex]:
+    """
+    Open a project's reachability index if it is current.
+
+    Args:
+        project_dir: The root directory of the project.
+
+    Returns:
+        The index, or None if it is missing, unreadable, of another version, or
+        older than the relationships file.
+    """
+    path = reachability_path(project_dir)
+    if not path.exists():
+        return None
+    try:
+        index = ReachabilityIndex(path)
+    except (OSError, ValueError) as e:
+        logger.info(f"Ignoring KG reachability index: {e}")
+        return None
+    if index.fingerprints != _relationship_fingerprints(project_dir):
+        logger.info(f"Ignoring stale KG reachability index {path}")
+        return None
+    return index
+
+
+def ensure_reachability_index(
+    project_dir: Path,
+    relation_types: Iterable[str] = (),
+    relationships: Optional[Sequence[RelationshipEntry]] = None,
+) -> ReachabilityIndex:
+    """
+    Return an up-to-date reachability index covering the given relation types.
+
+    Types already in the index stay indexed. Only types whose edges changed
+    (or that are new) are computed.
+
+    Args:
+        project_dir: The root directory of the project.
+        relation_types: Relation types that must be indexed
+        relationships: The relationships the KG files were just written from;
+            loaded from the relationships file when not given.
+
+    Returns:
+        The index
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    wanted = set(relation_types)
+    index = open_reachability_index(project_dir)
+    if index is not None and wanted <= set(index.types) | set(index.skipped):
+        return index
+
+    path = reachability_path(project_dir)
+    if path.exists():
+        try:
+            existing = ReachabilityIndex(path)
+            wanted |= set(existing.types) | set(existing.skipped)
+        except (OSError, ValueError):
+            pass
+    if relationships is None:
+        relationships = [
+            RelationshipEntry.from_dict(r) for r in iter_kg_entries(project_dir, "relationships")
+        ]
+    return ReachabilityIndex(write_reachability_index(project_dir, relationships, wanted))
@@ -0,0 +1,159 @@
+"""
+Renaming a concept across the docs tree (``khora kg rename``).
+
+The extraction cache records, for every tagged file, the byte offset of each
+concept name written in a tag: the name of a ``[concept:Name]`` tag and both
+ends of a ``[rel:Source->Target:Type]`` tag (see concept_name_spans). A rename
+looks the old name up in those spans, so only files that mention it are read.
+Names in running text are left alone.
+
+Each affected file is spliced at the recorded offsets, after checking that the
+old name is still there, and replaced atomically. The new content is
+re-extracted into the cache, and the KG entries of the rewritten files are
+replaced without rescanning the rest of the tree (see
+kg_precommit.apply_kg_changes). Files whose cache record is stale are
+re-parsed first, as in any extraction.
+"""
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from ...sdk.file_index import ProjectFileIndex
+from .cache import ExtractionCache, atomic_write_bytes, default_cache_dir, file_digest
+from .extension import (
+    CAMEL_CASE_PATTERN,
+    _extraction_from_payload,
+    extract_payload,
+    scan_payloads,
+)
+
+logger = logging.getLogger(__name__)
+
+# Characters a tag name may consist of (see TAG_HEADER_PATTERN)
+TAG_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9]+$")
+
+
+class RenameResult(NamedTuple):
+    """Outcome of a concept rename."""
+    files: List[str]  # Rewritten (or, for a dry run, affected) source files
+    occurrences: int
+    kg_updated: bool
+    elapsed: float
+
+
+def _splice(raw: bytes, offsets: List[int], old: bytes, new: bytes) -> bytes:
+    """Replace old by new at each of the (sorted) offsets."""
+    parts = []
+    position = 0
+    for offset in offsets:
+        parts.append(raw[position:offset])
+        parts.append(new)
+        position = offset + len(old)
+    parts.append(raw[position:])
+    return b"".join(parts)
+
+
+def _save_cache(cache: ExtractionCache) -> None:
+    try:
+        cache.save()
+    except OSError as e:
+        logger.warning(f"Could not write KG extraction cache to {cache.cache_file}: {e}")
+
+
+def rename_concept(
+    project_dir: Path,
+    old: str,
+    new: str,
+    docs_dir: Union[str, Path] = "docs",
+    jobs: Optional[int] = 1,
+    dry_run: bool = False,
+    source_dirs: Iterable[Union[str, Path]] = (),
+    extractors: Optional[Iterable[str]] = None,
+) -> RenameResult:
+    """
+    Rename a concept in every tag that names it, and update the KG.
+
+    Args:
+        project_dir: The project root
+        old: The concept's current name
+        new: The new name
+        docs_dir: The docs directory, relative to project_dir
+        jobs: Worker processes for files that must be re-parsed (see scan_markdown_files)
+        dry_run: Only report the files that would be rewritten
+        source_dirs: Further directories with tagged files, relative to the
+            parent of docs_dir (see scan_markdown_files)
+        extractors: Names of the extractors to use; None for DEFAULT_EXTRACTORS
+
+    Returns:
+        A RenameResult; files is empty if no tag names the concept
+
+    Raises:
+        ValueError: If new is not a valid tag name, is already defined as a
+            concept, or a file changed while it was being renamed
+        OSError: If a file cannot be read or written
+    """
+    started = time.perf_counter()
+    if not TAG_NAME_PATTERN.match(new):
+        raise ValueError(f"'{new}' is not a valid concept name (letters and digits only)")
+    if old == new:
+        raise ValueError("The old and new names are the same")
+    if not CAMEL_CASE_PATTERN.match(new):
+        logger.warning(f"Concept name '{new}' should be CamelCase")
+
+    cache = ExtractionCache.load(default_cache_dir(project_dir))
+    docs_path = project_dir / docs_dir
+    rel_paths, payloads, _ = scan_payloads(
+        docs_path, cache, jobs, ProjectFileIndex(project_dir),
+        source_dirs=source_dirs, extractors=extractors,
+    )
+
+    affected: List[Tuple[str, List[int]]] = []
+    for rel_path in rel_paths:
+        payload = payloads.get(rel_path)
+        if payload is None:
+            continue
+        if any(name == new for name, _, _ in payload["concepts"]):
+            raise ValueError(f"Concept '{new}' is already defined in {rel_path}")
+        offsets = [offset for offset, name in payload.get("spans", ()) if name == old]
+        if offsets:
+            affected.append((rel_path, offsets))
+
+    occurrences = sum(len(offsets) for _, offsets in affected)
+    if dry_run or not affected:
+        _save_cache(cache)
+        return RenameResult([rel_path for rel_path, _ in affected], occurrences, False,
+                            time.perf_counter() - started)
+
+    # Check every file before writing any, so a rename is not left half done
+    old_bytes, new_bytes = old.encode("ascii"), new.encode("ascii")
+    base = docs_path.parent
+    rewritten: Dict[str, bytes] = {}
+    for rel_path, offsets in affected:
+        raw = (base / rel_path).read_bytes()
+        if any(raw[offset:offset + len(old_bytes)] != old_bytes for offset in offsets):
+            raise ValueError(f"{rel_path} changed during the rename; run it again")
+        rewritten[rel_path] = _splice(raw, offsets, old_bytes, new_bytes)
+
+    fresh: Dict[str, list] = {"concepts": [], "rules": [], "relationships": []}
+    for rel_path, content in rewritten.items():
+        path = base / rel_path
+        mode = path.stat().st_mode
+        atomic_write_bytes(path, content)
+        os.chmod(path, mode & 0o7777)
+        stat = path.stat()
+        payload = extract_payload(content, rel_path)
+        cache.store(rel_path, stat.st_size, stat.st_mtime_ns, file_digest(content), payload)
+        for key, entries in zip(fresh, _extraction_from_payload(payload, rel_path)):
+            fresh[key].extend(entries)
+    _save_cache(cache)
+    logger.info(f"Renamed {occurrences} occurrences of '{old}' to '{new}' in {len(rewritten)} files")
+
+    kg_updated = False
+    if (project_dir / "kg").is_dir():
+        from .kg_precommit import apply_kg_changes
+
+        kg_updated = apply_kg_changes(project_dir, fresh, set(rewritten), base)
+    return RenameResult(sorted(rewritten), occurrences, kg_updated, time.perf_counter() - started)
@@ -0,0 +1,461 @@
+"""
+TF-IDF similarity index over KG concept and rule descriptions.
+
+``kg/similarity.npz`` holds one sparse document vector per concept and rule
+(its name split into words plus its description), weighted by sublinear term
+frequency times smoothed inverse document frequency and L2-normalized:
+
+- the vocabulary, sorted, and the IDF of every term
+- the document vectors in CSR form (row offsets, term IDs, weights) together
+  with the raw term counts they were computed from
+- the same weights transposed into per-term posting lists (CSC form), so the
+  cosine similarity of one document against all others only touches the
+  documents that share a term with it
+- kind, name, description, source file and line of every document, with the
+  strings stored as UTF-8 data plus offsets and the names also in sorted order
+  for lookups
+- a digest of every source file's entries and the fingerprints of the KG files
+  the index was built from
+
+Rebuilding reuses the term counts of every source file whose entries did not
+change, so only edited files are tokenized again; the IDF and the weights are
+recomputed for the whole corpus with array operations. Everything is computed
+locally; no embedding service is involved.
+
+NumPy is an optional dependency (``pip install khora-kernel[analysis]``).
+"""
+import hashlib
+import io
+import json
+import logging
+import re
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .cache import atomic_write_bytes
+from .dedupe import require_numpy
+from .extension import KGEntry, RelationshipEntry, kg_file_fingerprints, load_kg_files
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_FILENAME = "similarity.npz"
+# Bump whenever the layout or the weighting changes; older indexes are rebuilt
+SIMILARITY_VERSION = 1
+
+KINDS = ("concept", "rule")
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the "
+    "this to was were will with which when where who not no can may must should all "
+    "any each into than then there these those such also used uses use".split()
+)
+
+
+def similarity_path(project_dir: Path) -> Path:
+    """Return the location of the similarity index for a project."""
+    return project_dir / "kg" / SIMILARITY_FILENAME
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for the TF-IDF index.
+
+    CamelCase and snake_case names are split into their words; stop words and
+    single letters are dropped.
+    """
+    return [
+        term for term in (word.lower() for word in _WORD.findall(text))
+        if len(term) > 1 and term not in STOP_WORDS
+    ]
+
+
+def _entry_terms(entry: KGEntry) -> Counter:
+    return Counter(tokenize(entry.name) + tokenize(entry.description))
+
+
+def _kg_fingerprints(project_dir: Path) -> Dict[str, Optional[str]]:
+    # Relationship files do not feed the index
+    return {
+        name: fingerprint
+        for name, fingerprint in kg_file_fingerprints(project_dir).items()
+        if not name.startswith("relationships.")
+    }
+
+
+def _file_digests(documents: Sequence[Tuple[int, KGEntry]]) -> Dict[str, str]:
+    """Digest the entries of every source file, in document order."""
+    hashers: Dict[str, Any] = {}
+    for kind, entry in documents:
+        hasher = hashers.get(entry.source_file)
+        if hasher is None:
+            hasher = hashers[entry.source_file] = hashlib.blake2b(digest_size=16)
+        hasher.update(f"{kind}\0{entry.name}\0{entry.description}\0".encode("utf-8"))
+    return {source: hasher.hexdigest() for source, hasher in hashers.items()}
+
+
+def _pack_strings(values: Sequence[str]) -> Tuple[Any, Any]:
+    """Encode strings as one UTF-8 byte array plus offsets (string i is data[offsets[i]:offsets[i + 1]])."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _gather(offsets: Any, rows: Any) -> Tuple[Any, Any]:
+    """
+    Return the positions of the CSR slices of rows, concatenated, and their lengths.
+    """
+    lengths = offsets[rows + 1] - offsets[rows]
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), lengths
+    # Position k of the output belongs to row i: offsets[rows[i]] + (k - start of i)
+    starts = np.cumsum(lengths) - lengths
+    positions = np.arange(total, dtype=np.int64) + np.repeat(offsets[rows] - starts, lengths)
+    return positions, lengths
+
+
+def build_similarity_index(
+    concepts: Sequence[KGEntry],
+    rules: Sequence[KGEntry],
+    fingerprints: Dict[str, Optional[str]],
+    previous: Optional["SimilarityIndex"] = None,
+) -> Dict[str, Any]:
+    """
+    Compute the arrays of a similarity index.
+
+    Args:
+        concepts: Concept entries
+        rules: Rule entries
+        fingerprints: Fingerprints of the KG files the entries come from
+        previous: An earlier index (current or not) whose term counts are
+            reused for source files with unchanged entries
+
+    Returns:
+        The named arrays to store (see write_similarity_index)
+    """
+    require_numpy()
+    documents = [(0, entry) for entry in concepts] + [(1, entry) for entry in rules]
+    digests = _file_digests(documents)
+    count = len(documents)
+
+    # Rows of the previous index, by source file, for the files that are unchanged
+    reusable: Dict[str, List[int]] = {}
+    if previous is not None:
+        for source, digest in digests.items():
+            if previous.file_digests.get(source) == digest:
+                reusable[source] = []
+        if reusable:
+            for row, source in enumerate(previous.source_files()):
+                rows = reusable.get(source)
+                if rows is not None:
+                    rows.append(row)
+
+    reused_rows: List[int] = []
+    reused_from: List[int] = []
+    fresh_rows: List[int] = []
+    fresh_counts: List[Counter] = []
+    taken: Dict[str, int] = {}
+    for row, (_, entry) in enumerate(documents):
+        rows = reusable.get(entry.source_file)
+        if rows is not None:
+            position = taken.get(entry.source_file, 0)
+            taken[entry.source_file] = position + 1
+            reused_rows.append(row)
+            reused_from.append(rows[position])
+        else:
+            fresh_rows.append(row)
+            fresh_counts.append(_entry_terms(entry))
+
+    # Vocabulary: terms of the fresh documents and of the reused rows
+    previous_positions = np.empty(0, dtype=np.int64)
+    previous_lengths = np.zeros(len(reused_rows), dtype=np.int64)
+    if reused_rows:
+        previous_positions, previous_lengths = _gather(
+            previous.indptr, np.asarray(reused_from, dtype=np.int64)
+        )
+        previous_terms = previous.term_ids[previous_positions]
+        vocabulary_set = set(previous.vocabulary[np.unique(previous_terms)].tolist())
+    else:
+        previous_terms = np.empty(0, dtype=np.int32)
+        vocabulary_set = set()
+    for counts in fresh_counts:
+        vocabulary_set.update(counts)
+    vocabulary = np.array(sorted(vocabulary_set), dtype=str)
+    term_ids = {term: i for i, term in enumerate(vocabulary.tolist())}
+
+    # Row lengths, then fill the reused and the fresh rows in place
+    lengths = np.zeros(count, dtype=np.int64)
+    lengths[np.asarray(reused_rows, dtype=np.int64)] = previous_lengths
+    lengths[np.asarray(fresh_rows, dtype=np.int64)] = [len(counts) for counts in fresh_counts]
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.empty(int(indptr[-1]), dtype=np.int32)
+    raw_counts = np.empty(int(indptr[-1]), dtype=np.int32)
+
+    if reused_rows:
+        targets, _ = _gather(indptr, np.asarray(reused_rows, dtype=np.int64))
+        remap = np.searchsorted(vocabulary, previous.vocabulary).astype(np.int32)
+        indices[targets] = remap[previous_terms]
+        raw_counts[targets] = previous.counts[previous_positions]
+    for row, counts in zip(fresh_rows, fresh_counts):
+        start = indptr[row]
+        indices[start:start + len(counts)] = [term_ids[term] for term in counts]
+        raw_counts[start:start + len(counts)] = list(counts.values())
+
+    # Sublinear TF times smoothed IDF, L2-normalized per row
+    document_frequency = np.bincount(indices, minlength=len(vocabulary))
+    idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+    row_of = np.repeat(np.arange(count, dtype=np.int32), lengths)
+    weights = ((1 + np.log(raw_counts, dtype=np.float32)) * idf[indices]).astype(np.float32)
+    norms = np.sqrt(np.bincount(row_of, weights * weights, minlength=count))
+    norms[norms == 0] = 1
+    weights /= norms[row_of].astype(np.float32)
+
+    # Posting lists: the weights grouped by term
+    order = np.argsort(indices, kind="stable")
+    postings_indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    np.cumsum(document_frequency, out=postings_indptr[1:])
+
+    names = [entry.name for _, entry in documents]
+    names_data, names_offsets = _pack_strings(names)
+    name_order = sorted(range(count), key=lambda row: names[row].encode("utf-8"))
+    descriptions_data, descriptions_offsets = _pack_strings([entry.description for _, entry in documents])
+    file_table = sorted(digests)
+    file_ids = {source: i for i, source in enumerate(file_table)}
+    file_table_data, file_table_offsets = _pack_strings(file_table)
+
+    metadata = {
+        "version": SIMILARITY_VERSION,
+        "fingerprints": fingerprints,
+        "file_digests": digests,
+        "reused_documents": len(reused_rows),
+    }
+    return {
+        "metadata": np.array(json.dumps(metadata, sort_keys=True)),
+        "vocabulary": vocabulary,
+        "idf": idf,
+        "indptr": indptr,
+        "term_ids": indices,
+        "counts": raw_counts,
+        "weights": weights,
+        "postings_indptr": postings_indptr,
+        "postings_docs": row_of[order],
+        "postings_weights": weights[order],
+        "kinds": np.array([kind for kind, _ in documents], dtype=np.int8),
+        "names_data": names_data,
+        "names_offsets": names_offsets,
+        "name_order": np.array(name_order, dtype=np.int64),
+        "descriptions_data": descriptions_data,
+        "descriptions_offsets": descriptions_offsets,
+        "file_table_data": file_table_data,
+        "file_table_offsets": file_table_offsets,
+        "file_ids": np.array([file_ids[entry.source_file] for _, entry in documents], dtype=np.int32),
+        "lines": np.array([entry.line_number for _, entry in documents], dtype=np.int64),
+    }
+
+
+def write_similarity_index(
+    project_dir: Path,
+    concepts: Sequence[KGEntry],
+    rules: Sequence[KGEntry],
+) -> Path:
+    """
+    Write kg/similarity.npz for entries that were just written to the KG files.
+
+    Term counts of source files whose entries are unchanged since the previous
+    index are reused. The file is replaced atomically.
+
+    Args:
+        project_dir: The root directory of the project.
+        concepts: Concept entries
+        rules: Rule entries
+
+    Returns:
+        Path to the index
+    """
+    path = similarity_path(project_dir)
+    previous = None
+    if path.exists():
+        try:
+            previous = SimilarityIndex(path)
+        except (OSError, ValueError) as e:
+            logger.info(f"Not reusing KG similarity index {path}: {e}")
+
+    arrays = build_similarity_index(concepts, rules, _kg_fingerprints(project_dir), previous)
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    atomic_write_bytes(path, buffer.getvalue())
+    reused = json.loads(arrays["metadata"].item())["reused_documents"]
+    logger.info(f"Wrote KG similarity index {path} ({reused} of {len(arrays['kinds'])} documents reused)")
+    return path
+
+
+class SimilarityIndex:
+    """
+    A loaded similarity index.
+
+    Arrays are read from the file when first accessed.
+    """
+
+    def __init__(self, path: Path):
+        require_numpy()
+        self.path = path
+        with np.load(path, allow_pickle=False) as npz:
+            try:
+                metadata = json.loads(npz["metadata"].item())
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"{path} is not a KG similarity index") from e
+            if metadata.get("version") != SIMILARITY_VERSION:
+                raise ValueError(f"{path} has index version {metadata.get('version')}, expected {SIMILARITY_VERSION}")
+            self._arrays = {name: npz[name] for name in npz.files if name != "metadata"}
+        self.fingerprints: Dict[str, Optional[str]] = metadata.get("fingerprints", {})
+        self.file_digests: Dict[str, str] = metadata.get("file_digests", {})
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.__dict__["_arrays"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def _string(self, field: str, index: int) -> bytes:
+        offsets = self._arrays[f"{field}_offsets"]
+        return self._arrays[f"{field}_data"][offsets[index]:offsets[index + 1]].tobytes()
+
+    def name(self, row: int) -> str:
+        return self._string("names", row).decode("utf-8")
+
+    def source_files(self) -> List[str]:
+        """Return the source file of every document."""
+        table = [
+            self._string("file_table", i).decode("utf-8")
+            for i in range(len(self.file_table_offsets) - 1)
+        ]
+        return [table[i] for i in self.file_ids.tolist()]
+
+    def find(self, name: str, kind: Optional[str] = None) -> List[int]:
+        """
+        Return the rows of the documents with a name, concepts first.
+
+        Args:
+            name: Concept or rule name
+            kind: Only look for "concept" or "rule" documents
+        """
+        target = name.encode("utf-8")
+        order = self.name_order
+        position = bisect_left(range(len(order)), target, key=lambda i: self._string("names", order[i]))
+        rows = []
+        while position < len(order) and self._string("names", order[position]) == target:
+            row = int(order[position])
+            if kind is None or KINDS[self.kinds[row]] == kind:
+                rows.append(row)
+            position += 1
+        return sorted(rows, key=lambda row: (self.kinds[row], row))
+
+    def entry(self, row: int) -> Dict[str, Any]:
+        """Describe the document in a row."""
+        return {
+            "kind": KINDS[int(self.kinds[row])],
+            "name": self.name(row),
+            "description": self._string("descriptions", row).decode("utf-8"),
+            "source": {
+                "file": self._string("file_table", int(self.file_ids[row])).decode("utf-8"),
+                "line": int(self.lines[row]),
+            },
+        }
+
+    def scores(self, row: int) -> Any:
+        """
+        Compute the cosine similarity of one document to every document.
+
+        Only the posting lists of the document's own terms are read.
+        """
+        start, end = self.indptr[row], self.indptr[row + 1]
+        terms = self.term_ids[start:end].astype(np.int64)
+        positions, lengths = _gather(self.postings_indptr, terms)
+        contributions = self.postings_weights[positions] * np.repeat(self.weights[start:end], lengths)
+        return np.bincount(self.postings_docs[positions], contributions, minlength=len(self))
+
+    def similar(self, row: int, top: int = 10) -> List[Tuple[int, float]]:
+        """
+        Return the documents most similar to the one in a row.
+
+        Args:
+            row: Row of the query document
+            top: Maximum number of results
+
+        Returns:
+            (row, cosine similarity) pairs, most similar first, excluding the
+            document itself and documents that share no term with it
+        """
+        scores = self.scores(row)
+        scores[row] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top:
+            candidates = candidates[np.argpartition(-scores[candidates], top - 1)[:top]]
+        ranked = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(int(r), float(scores[r])) for r in ranked]
+
+
+def open_similarity_index(project_dir: Path) -> Optional[SimilarityIndex]:
+    """
+    Open a project's similarity index if it is current.
+
+    Args:
+        project_dir: The root directory of the project.
+
+    Returns:
+        The index, or None if it is missing, unreadable, of another version, or
+        older than the KG files.
+    """
+    path = similarity_path(project_dir)
+    if not path.exists():
+        return None
+    try:
+        index = SimilarityIndex(path)
+    except (OSError, ValueError) as e:
+        logger.info(f"Ignoring KG similarity index: {e}")
+        return None
+    if index.fingerprints != _kg_fingerprints(project_dir):
+        logger.info(f"Ignoring stale KG similarity index {path}")
+        return None
+    return index
+
+
+def ensure_similarity_index(
+    project_dir: Path,
+    entries: Optional[Tuple[Sequence[KGEntry], Sequence[KGEntry], Sequence[RelationshipEntry]]] = None,
+) -> SimilarityIndex:
+    """
+    Return an up-to-date similarity index, rebuilding it if it is missing or stale.
+
+    Args:
+        project_dir: The root directory of the project.
+        entries: The (concepts, rules, relationships) the KG files were just
+            written from; loaded from the KG files when not given.
+
+    Returns:
+        The index
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    index = open_similarity_index(project_dir)
+    if index is not None:
+        return index
+
+    if entries is None:
+        entries = load_kg_files(project_dir)
+    return SimilarityIndex(write_similarity_index(project_dir, entries[0], entries[1]))
@@ -0,0 +1,444 @@
+"""
+Memory-mapped columnar snapshot of the Knowledge Graph.
+
+``kg/kg.bin`` holds the same entries as the KG files in a binary, columnar
+layout that readers map into memory instead of parsing:
+
+- a string table: every distinct string (names, descriptions, file paths,
+  relation types) once, in sorted order, as UTF-8 data plus an offset array
+- for concepts and rules, arrays of string IDs for names, descriptions and
+  source files, an array of line numbers, and a permutation ordering the
+  entries by name
+- for relationships, parallel source, target and type arrays (the edges) plus
+  description, source file and line arrays, and a permutation ordering the
+  edges by source
+
+Fields are decoded only when accessed. Because the file is read through mmap,
+processes that read it at the same time share its pages in the OS page cache.
+The snapshot records the fingerprints of the KG files it was built from, and
+``open_kg_snapshot`` returns None when it is missing, stale, unreadable or of
+another version, so callers fall back to the JSON (or JSON Lines) files.
+
+Layout, in native byte order (recorded in the metadata)::
+
+    header    magic (8 bytes), format version, metadata length, section count,
+              reserved (u32 each)
+    metadata  JSON object: byte order, fingerprints, counts, generated_at
+    sections  table of (name (32 bytes), offset (u64), length (u64)),
+              followed by the section data, each aligned to 8 bytes
+"""
+import json
+import logging
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .cache import atomic_write_bytes
+from .extension import (
+    KGEntry,
+    RelationshipEntry,
+    _entry_sort_key,
+    kg_file_fingerprints,
+    load_kg_files,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILENAME = "kg.bin"
+# Bump whenever the layout changes; readers ignore snapshots of other versions
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAGIC = b"KHKGSNAP"
+
+_HEADER = struct.Struct("<8sIIII")
+_SECTION = struct.Struct("<32sQQ")
+_ALIGNMENT = 8
+
+# Text fields stored as string IDs, per list
+_ENTRY_FIELDS = ("name", "description", "file")
+_RELATIONSHIP_FIELDS = ("source", "target", "type", "description", "file")
+
+
+def snapshot_path(project_dir: Path) -> Path:
+    """Return the location of the binary snapshot for a project."""
+    return project_dir / "kg" / SNAPSHOT_FILENAME
+
+
+def _id_array(values: Iterator[int]) -> array:
+    ids = array("I", values)
+    if ids.itemsize != 4:  # pragma: no cover - "I" is 4 bytes on all supported platforms
+        raise RuntimeError("KG snapshots need 4-byte unsigned ints")
+    return ids
+
+
+def build_kg_snapshot(
+    concepts: Sequence[KGEntry],
+    rules: Sequence[KGEntry],
+    relationships: Sequence[RelationshipEntry],
+    fingerprints: Optional[Dict[str, Optional[str]]] = None,
+) -> List[bytes]:
+    """
+    Serialize entries into the snapshot format.
+
+    Entries are stored in canonical order, the order of the KG files.
+
+    Args:
+        concepts: Concept entries
+        rules: Rule entries
+        relationships: Relationship entries
+        fingerprints: Fingerprints of the KG files the entries come from
+
+    Returns:
+        The file content as a list of chunks
+    """
+    concepts = sorted(concepts, key=_entry_sort_key)
+    rules = sorted(rules, key=_entry_sort_key)
+    relationships = sorted(relationships, key=_entry_sort_key)
+
+    strings = set()
+    for entries in (concepts, rules):
+        for entry in entries:
+            strings.update((entry.name, entry.description, entry.source_file))
+    for rel in relationships:
+        strings.update((rel.source_concept, rel.target_concept, rel.relation_type, rel.description, rel.source_file))
+    # Code point order is UTF-8 byte order, so readers can binary search the raw data
+    table = sorted(strings)
+    ids = {value: i for i, value in enumerate(table)}
+
+    encoded = [value.encode("utf-8") for value in table]
+    offsets = array("Q", [0])
+    total = 0
+    for data in encoded:
+        total += len(data)
+        offsets.append(total)
+
+    sections: List[Tuple[str, bytes]] = [
+        ("strings.offsets", offsets.tobytes()),
+        ("strings.data", b"".join(encoded)),
+    ]
+    for kind, entries in (("concepts", concepts), ("rules", rules)):
+        names = _id_array(ids[entry.name] for entry in entries)
+        sections += [
+            (f"{kind}.name", names.tobytes()),
+            (f"{kind}.description", _id_array(ids[entry.description] for entry in entries).tobytes()),
+            (f"{kind}.file", _id_array(ids[entry.source_file] for entry in entries).tobytes()),
+            (f"{kind}.line", _id_array(entry.line_number for entry in entries).tobytes()),
+            (f"{kind}.by_name", _id_array(sorted(range(len(names)), key=names.__getitem__)).tobytes()),
+        ]
+    sources = _id_array(ids[rel.source_concept] for rel in relationships)
+    sections += [
+        ("relationships.source", sources.tobytes()),
+        ("relationships.target", _id_array(ids[rel.target_concept] for rel in relationships).tobytes()),
+        ("relationships.type", _id_array(ids[rel.relation_type] for rel in relationships).tobytes()),
+        ("relationships.description", _id_array(ids[rel.description] for rel in relationships).tobytes()),
+        ("relationships.file", _id_array(ids[rel.source_file] for rel in relationships).tobytes()),
+        ("relationships.line", _id_array(rel.line_number for rel in relationships).tobytes()),
+        ("relationships.by_source", _id_array(sorted(range(len(sources)), key=sources.__getitem__)).tobytes()),
+    ]
+
+    metadata = json.dumps({
+        "byteorder": sys.byteorder,
+        "generated_at": datetime.now().isoformat(),
+        "fingerprints": fingerprints or {},
+        "counts": {
+            "strings": len(table),
+            "concepts": len(concepts),
+            "rules": len(rules),
+            "relationships": len(relationships),
+        },
+    }).encode("utf-8")
+
+    position = _HEADER.size + len(metadata) + _SECTION.size * len(sections)
+    chunks = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(metadata), len(sections), 0), metadata]
+    data_chunks = []
+    for name, data in sections:
+        padding = -position % _ALIGNMENT
+        position += padding
+        chunks.append(_SECTION.pack(name.encode("ascii"), position, len(data)))
+        data_chunks += [b"\0" * padding, data]
+        position += len(data)
+    return chunks + data_chunks
+
+
+def write_kg_snapshot(
+    project_dir: Path,
+    concepts: Sequence[KGEntry],
+    rules: Sequence[KGEntry],
+    relationships: Sequence[RelationshipEntry],
+) -> Path:
+    """
+    Write kg/kg.bin for entries that were just written to the KG files.
+
+    The file is replaced atomically; processes that have the previous snapshot
+    mapped keep reading it.
+
+    Args:
+        project_dir: The root directory of the project.
+        concepts: Concept entries
+        rules: Rule entries
+        relationships: Relationship entries
+
+    Returns:
+        Path to the snapshot
+    """
+    path = snapshot_path(project_dir)
+    atomic_write_bytes(
+        path, build_kg_snapshot(concepts, rules, relationships, kg_file_fingerprints(project_dir))
+    )
+    logger.info(f"Wrote KG snapshot {path}")
+    return path
+
+
+class SnapshotTable(Sequence):
+    """
+    One list of a snapshot (concepts, rules or relationships).
+
+    Indexing and iteration build entry objects; ``field`` and ``column`` give
+    access to single fields without building entries.
+    """
+
+    def __init__(self, snapshot: "KGSnapshot", kind: str):
+        self._snapshot = snapshot
+        self.kind = kind
+        fields = _RELATIONSHIP_FIELDS if kind == "relationships" else _ENTRY_FIELDS
+        self._columns = {name: snapshot._section(f"{kind}.{name}", "I") for name in fields + ("line",)}
+        self._order = snapshot._section(f"{kind}.{'by_source' if kind == 'relationships' else 'by_name'}", "I")
+
+    def __len__(self) -> int:
+        return len(self._columns["line"])
+
+    def column(self, name: str) -> memoryview:
+        """Return a field's raw column: string IDs, or line numbers for "line"."""
+        return self._columns[name]
+
+    def field(self, index: int, name: str) -> Union[str, int]:
+        """Decode one field of one entry."""
+        value = self._columns[name][index]
+        return value if name == "line" else self._snapshot.string(value)
+
+    def _entry(self, index: int, string: Any) -> Union[KGEntry, RelationshipEntry]:
+        columns = self._columns
+        if self.kind == "relationships":
+            return RelationshipEntry(
+                string(columns["source"][index]),
+                string(columns["target"][index]),
+                string(columns["type"][index]),
+                string(columns["description"][index]),
+                string(columns["file"][index]),
+                columns["line"][index],
+            )
+        return KGEntry(
+            string(columns["name"][index]),
+            string(columns["description"][index]),
+            string(columns["file"][index]),
+            columns["line"][index],
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("snapshot table index out of range")
+        return self._entry(index, self._snapshot.string)
+
+    def __iter__(self) -> Iterator[Union[KGEntry, RelationshipEntry]]:
+        # Names, types and files repeat across entries: decode each once
+        decoded: Dict[int, str] = {}
+        string = self._snapshot.string
+
+        def cached(string_id: int) -> str:
+            value = decoded.get(string_id)
+            if value is None:
+                value = decoded[string_id] = string(string_id)
+            return value
+
+        columns = self._columns
+        if self.kind == "relationships":
+            for source, target, relation_type, description, source_file, line in zip(
+                columns["source"], columns["target"], columns["type"],
+                columns["description"], columns["file"], columns["line"],
+            ):
+                yield RelationshipEntry(
+                    cached(source), cached(target), cached(relation_type),
+                    string(description), cached(source_file), line,
+                )
+        else:
+            for name, description, source_file, line in zip(
+                columns["name"], columns["description"], columns["file"], columns["line"]
+            ):
+                yield KGEntry(cached(name), string(description), cached(source_file), line)
+
+    def _key_range(self, value: str) -> range:
+        """Positions in the sort permutation whose key field equals value."""
+        string_id = self._snapshot.string_id(value)
+        if string_id is None:
+            return range(0)
+        key = self._columns["source" if self.kind == "relationships" else "name"]
+        order = self._order
+        start = bisect_left(order, string_id, key=key.__getitem__)
+        return range(start, bisect_right(order, string_id, lo=start, key=key.__getitem__))
+
+    def find(self, value: str) -> List[Union[KGEntry, RelationshipEntry]]:
+        """
+        Find entries by name (concepts, rules) or source concept (relationships).
+
+        Costs O(log n) string comparisons plus the matches.
+        """
+        return [self[self._order[position]] for position in self._key_range(value)]
+
+
+class KGSnapshot:
+    """
+    Read-only, memory-mapped view of kg/kg.bin.
+
+    Use as a context manager, or call close() when done.
+
+    Raises:
+        ValueError: If the file is not a snapshot of this version and byte order.
+        OSError: If the file cannot be opened.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._views: List[memoryview] = []
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self) -> None:
+        buffer = self._mmap
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f"{self.path} is too short to be a KG snapshot")
+        magic, version, metadata_length, section_count, _ = _HEADER.unpack_from(buffer)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{self.path} is not a KG snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"{self.path} has snapshot version {version}, expected {SNAPSHOT_VERSION}")
+        self.metadata: Dict[str, Any] = json.loads(buffer[_HEADER.size:_HEADER.size + metadata_length])
+        if self.metadata.get("byteorder") != sys.byteorder:
+            raise ValueError(f"{self.path} was written on a {self.metadata.get('byteorder')}-endian system")
+
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        position = _HEADER.size + metadata_length
+        for _ in range(section_count):
+            name, offset, length = _SECTION.unpack_from(buffer, position)
+            if offset + length > len(buffer):
+                raise ValueError(f"{self.path} is truncated")
+            self._sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+            position += _SECTION.size
+
+        self._string_offsets = self._section("strings.offsets", "Q")
+        self._strings_start = self._sections["strings.data"][0]
+        self.concepts = SnapshotTable(self, "concepts")
+        self.rules = SnapshotTable(self, "rules")
+        self.relationships = SnapshotTable(self, "relationships")
+
+    def _section(self, name: str, typecode: str) -> memoryview:
+        try:
+            offset, length = self._sections[name]
+        except KeyError:
+            raise ValueError(f"{self.path} has no {name} section") from None
+        raw = memoryview(self._mmap)[offset:offset + length]
+        view = raw.cast(typecode)
+        self._views += [raw, view]
+        return view
+
+    @property
+    def fingerprints(self) -> Dict[str, Optional[str]]:
+        return self.metadata.get("fingerprints", {})
+
+    @property
+    def string_count(self) -> int:
+        return len(self._string_offsets) - 1
+
+    def string(self, string_id: int) -> str:
+        """Decode one string of the string table."""
+        return self._raw_string(string_id).decode("utf-8")
+
+    def _raw_string(self, string_id: int) -> bytes:
+        offsets = self._string_offsets
+        start = self._strings_start
+        return self._mmap[start + offsets[string_id]:start + offsets[string_id + 1]]
+
+    def string_id(self, value: str) -> Optional[int]:
+        """Find the ID of a string by binary search, or None if it is not in the table."""
+        encoded = value.encode("utf-8")
+        string_id = bisect_left(range(self.string_count), encoded, key=self._raw_string)
+        if string_id < self.string_count and self._raw_string(string_id) == encoded:
+            return string_id
+        return None
+
+    def close(self) -> None:
+        """Release the memory map."""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        if not self._mmap.closed:
+            self._mmap.close()
+
+    def __enter__(self) -> "KGSnapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def open_kg_snapshot(project_dir: Path) -> Optional[KGSnapshot]:
+    """
+    Open a project's snapshot if it is current.
+
+    Args:
+        project_dir: The root directory of the project.
+
+    Returns:
+        The open snapshot, or None if it is missing, unreadable, of another
+        version, or older than the KG files; read the KG files instead then.
+    """
+    path = snapshot_path(project_dir)
+    if not path.exists():
+        return None
+    try:
+        snapshot = KGSnapshot(path)
+    except (OSError, ValueError) as e:
+        logger.info(f"Ignoring KG snapshot: {e}")
+        return None
+    if snapshot.fingerprints != kg_file_fingerprints(project_dir):
+        logger.info(f"Ignoring stale KG snapshot {path}")
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def ensure_kg_snapshot(
+    project_dir: Path,
+    entries: Optional[Tuple[Sequence[KGEntry], Sequence[KGEntry], Sequence[RelationshipEntry]]] = None,
+) -> Path:
+    """
+    Return the path to an up-to-date snapshot, rebuilding it if it is missing or stale.
+
+    Args:
+        project_dir: The root directory of the project.
+        entries: The (concepts, rules, relationships) the KG files were just
+            written from; loaded from the KG files when not given.
+
+    Returns:
+        Path to the snapshot.
+    """
+    snapshot = open_kg_snapshot(project_dir)
+    if snapshot is not None:
+        snapshot.close()
+        return snapshot_path(project_dir)
+
+    if entries is None:
+        entries = load_kg_files(project_dir)
+    return write_kg_snapshot(project_dir, *entries)
@@ -0,0 +1,647 @@
+"""
+Continuous Knowledge Graph extraction for ``khora kg watch``.
+
+KGWatcher keeps the KG in memory, grouped by source file, and watches the docs
+directory (and any source directories) for changes. On Linux changes are
+reported by inotify; elsewhere (or when inotify is unavailable) the tagged
+files are polled for mtime and size changes. A burst of changes is debounced
+into one batch, only the touched files are re-extracted, and only the KG files
+whose entries changed are rewritten (or appended to, for JSON Lines logs). The
+derived artifacts (the snapshot, similarity index, modules, reachability index
+and the knowledge_graph_summary in .khora/context.yaml) are rebuilt from the
+whole KG, so they are refreshed once the changes have settled rather than on
+every save; until then their readers see them as stale and fall back to the KG
+files. KG files, kg/manifest.json and .khora/context.yaml are all replaced
+atomically.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import posixpath
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from ...sdk.file_index import ProjectFileIndex
+from .cache import default_cache_dir
+from .extension import (
+    KG_FILE_FORMATS,
+    KGEntry,
+    RelationshipEntry,
+    _written_kg_file_record,
+    extract_file_entries,
+    generate_kg_files,
+    kg_source_digest,
+    refresh_modules,
+    refresh_reachability_index,
+    refresh_similarity_index,
+    refresh_snapshot,
+    scan_markdown_files,
+    serialize_kg_block,
+    update_context_summary,
+    write_kg_file_blocks,
+)
+from .extractors import extractor_suffixes
+
+logger = logging.getLogger(__name__)
+
+# Quiet period that ends a burst of changes, in seconds
+DEFAULT_DEBOUNCE = 0.05
+# Interval between scans of the polling backend, in seconds
+DEFAULT_POLL_INTERVAL = 0.5
+# Quiet period after which the derived artifacts are refreshed, in seconds
+DEFAULT_REFRESH_DELAY = 0.5
+
+# Derived artifacts kept current while watching, by their refresh function
+DERIVED_ARTIFACTS = {
+    "snapshot": refresh_snapshot,
+    "similarity_index": refresh_similarity_index,
+    "modules": refresh_modules,
+    "reachability": refresh_reachability_index,
+}
+
+KG_KEYS = ("concepts", "rules", "relationships")
+
+FileEntries = Tuple[List[KGEntry], List[KGEntry], List[RelationshipEntry]]
+_NO_ENTRIES: FileEntries = ([], [], [])
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+)
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class WatchUpdate(NamedTuple):
+    """Result of applying one batch of changes."""
+    files: List[str]
+    written: List[str]
+    elapsed: float
+
+
+class PollingBackend:
+    """
+    Detects changed tagged files by comparing their mtime and size between scans.
+
+    Paths are relative to the project root and use forward slashes.
+
+    Args:
+        project_dir: The root directory of the project.
+        docs_rel: The docs directory, relative to project_dir.
+        interval: Seconds between scans.
+        source_rels: Further directories to watch, relative to project_dir.
+        suffixes: Suffixes of the files to watch.
+    """
+
+    def __init__(
+        self,
+        project_dir: Path,
+        docs_rel: str,
+        interval: float = DEFAULT_POLL_INTERVAL,
+        source_rels: Sequence[str] = (),
+        suffixes: Sequence[str] = (".md",),
+    ):
+        self.project_dir = project_dir
+        self.docs_rel = docs_rel
+        self.interval = interval
+        self.roots = [docs_rel, *source_rels]
+        self.suffixes = tuple(suffixes)
+        self._stats = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        # A fresh index per scan, since its listings are cached
+        index = ProjectFileIndex(self.project_dir)
+        stats = {}
+        for root in self.roots:
+            for path in index.files(root, suffixes=self.suffixes):
+                stat = index.stat(path)
+                if stat is not None:
+                    stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def read(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout: Maximum time to wait in seconds; None waits until a change.
+
+        Returns:
+            The changed paths, or an empty set if the timeout expired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic()))
+            time.sleep(delay)
+            stats = self._scan()
+            changed = {path for path in stats.keys() | self._stats.keys() if stats.get(path) != self._stats.get(path)}
+            self._stats = stats
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+def _load_libc() -> ctypes.CDLL:
+    """Load the C library and check that it has inotify."""
+    if not sys.platform.startswith("linux"):
+        raise OSError("inotify is only available on Linux")
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    for name in ("inotify_init1", "inotify_add_watch", "inotify_rm_watch"):
+        if not hasattr(libc, name):
+            raise OSError(f"C library has no {name}")
+    return libc
+
+
+class InotifyBackend:
+    """
+    Reports changes below the docs directory (and source_rels) through inotify.
+
+    Each non-ignored directory gets a watch; directories created or moved in
+    are watched as they appear. If the kernel's event queue overflows, every
+    watched directory is reported as changed.
+
+    Raises:
+        OSError: If inotify is unavailable or the docs directory cannot be watched.
+    """
+
+    def __init__(self, project_dir: Path, docs_rel: str, source_rels: Sequence[str] = ()):
+        self.project_dir = project_dir
+        self.docs_rel = docs_rel
+        self.roots = [docs_rel, *source_rels]
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1 failed: {os.strerror(error)}")
+        self._watches: Dict[int, str] = {}
+        try:
+            index = ProjectFileIndex(project_dir)
+            for root in self.roots:
+                self._add_tree(root, index)
+            if not self._watches:
+                raise OSError(f"Could not watch {project_dir / docs_rel}")
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, rel_dir: str, index: ProjectFileIndex) -> None:
+        """Watch a directory and its non-ignored subdirectories."""
+        stack = [rel_dir]
+        while stack:
+            directory = stack.pop()
+            path = os.fsencode(os.path.join(self.project_dir, directory))
+            wd = self._libc.inotify_add_watch(self._fd, path, _WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                logger.warning(f"Cannot watch {directory}: {os.strerror(error)}")
+                continue
+            self._watches[wd] = directory
+            for name, is_dir in index.listing(directory).items():
+                child = f"{directory}/{name}" if directory else name
+                if is_dir and not index.is_ignored(child, is_dir=True):
+                    stack.append(child)
+
+    def _remove_tree(self, rel_dir: str) -> None:
+        """Stop watching a directory that was moved away, and its subdirectories."""
+        prefix = rel_dir + "/"
+        for wd, directory in list(self._watches.items()):
+            if directory == rel_dir or directory.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def read(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout: Maximum time to wait in seconds; None waits until a change.
+
+        Returns:
+            The changed paths (a directory stands for everything below it), or
+            an empty set if the timeout expired.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+
+        changed: Set[str] = set()
+        index: Optional[ProjectFileIndex] = None
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify event queue overflowed, rescanning the watched directories")
+                changed.update(self.roots)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                changed.add(directory)
+                continue
+            path = f"{directory}/{name}" if directory else name
+
+            if mask & IN_ISDIR:
+                if mask & IN_MOVED_FROM:
+                    self._remove_tree(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    if index is None:
+                        index = ProjectFileIndex(self.project_dir)
+                    if not index.is_ignored(path, is_dir=True):
+                        self._add_tree(path, index)
+                changed.add(path)
+            elif not mask & IN_CREATE:
+                # A created file is reported again once it is closed after writing
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches.clear()
+
+
+class KGWatcher:
+    """
+    Keeps a project's KG files current while its docs change.
+
+    Args:
+        project_dir: The root directory of the project.
+        docs_dir: The directory holding the markdown files.
+        file_format: "json" or "jsonl", as in [tool.khora.plugins_config.kg].
+        debounce: Seconds without further changes that end a batch.
+        use_inotify: Use inotify if available; otherwise poll.
+        poll_interval: Seconds between scans when polling.
+        jobs: Worker processes for the initial full extraction.
+        source_dirs: Further directories with tagged files, relative to the
+            parent of docs_dir, as in scan_markdown_files.
+        extractors: Names of the extractors to use; None for DEFAULT_EXTRACTORS.
+        artifacts: Names of the derived artifacts to refresh (keys of
+            DERIVED_ARTIFACTS); None for every one the project keeps.
+        refresh_delay: Seconds without further changes after which run()
+            refreshes the derived artifacts and the context summary.
+    """
+
+    def __init__(
+        self,
+        project_dir: Union[str, Path],
+        docs_dir: Union[str, Path],
+        file_format: str = "json",
+        debounce: float = DEFAULT_DEBOUNCE,
+        use_inotify: bool = True,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        jobs: Optional[int] = 1,
+        source_dirs: Iterable[Union[str, Path]] = (),
+        extractors: Optional[Iterable[str]] = None,
+        artifacts: Optional[Iterable[str]] = None,
+        refresh_delay: float = DEFAULT_REFRESH_DELAY,
+    ):
+        if file_format not in KG_FILE_FORMATS:
+            raise ValueError(f"Unknown KG file format: {file_format}")
+        artifacts = list(DERIVED_ARTIFACTS) if artifacts is None else list(artifacts)
+        unknown = sorted(set(artifacts) - set(DERIVED_ARTIFACTS))
+        if unknown:
+            raise ValueError(f"Unknown derived artifacts: {', '.join(unknown)}")
+        self.project_dir = Path(project_dir)
+        self.docs_dir = self.project_dir / docs_dir
+        self.file_format = file_format
+        self.debounce = debounce
+        self.use_inotify = use_inotify
+        self.poll_interval = poll_interval
+        self.jobs = jobs
+        self.source_dirs = list(source_dirs)
+        self.extractors = None if extractors is None else list(extractors)
+        self.suffixes = extractor_suffixes(self.extractors)
+        self.artifacts = [name for name in DERIVED_ARTIFACTS if name in artifacts]
+        self.refresh_delay = refresh_delay
+        self.backend: Optional[Union[InotifyBackend, PollingBackend]] = None
+        # Source file (as recorded in the entries) -> that file's entries
+        self._entries: Dict[str, FileEntries] = {}
+        # List key -> source file -> that file's serialized entries (JSON documents only)
+        self._blocks: Dict[str, Dict[str, Tuple[str, bytes]]] = {key: {} for key in KG_KEYS}
+        # List key -> source file -> kg_source_digest of that file's entries (JSON documents only)
+        self._digests: Dict[str, Dict[str, str]] = {key: {} for key in KG_KEYS}
+        # List key -> replayed state of its JSON Lines log, with every file's lines kept
+        self._log_states: Dict[str, Any] = {}
+        # Whether the KG changed since the derived artifacts were last refreshed
+        self._stale = False
+
+        index = ProjectFileIndex(self.project_dir)
+        self.docs_rel = index.relative(os.path.relpath(self.docs_dir, self.project_dir))
+        # Entries record paths relative to the parent of docs_dir, as in scan_markdown_files
+        self._base_rel = os.path.dirname(self.docs_rel)
+        self.source_rels = [
+            index.relative(os.path.relpath(self.docs_dir.parent / source_dir, self.project_dir))
+            for source_dir in self.source_dirs
+        ]
+
+    @property
+    def backend_name(self) -> Optional[str]:
+        """"inotify" or "polling" once started."""
+        if self.backend is None:
+            return None
+        return "inotify" if isinstance(self.backend, InotifyBackend) else "polling"
+
+    def _source_file(self, index_path: str) -> str:
+        """Map a project-relative path to the source file its entries record."""
+        path = posixpath.relpath(index_path, self._base_rel) if self._base_rel else index_path
+        return path.replace("/", os.sep)
+
+    def _index_path(self, source_file: str) -> str:
+        """Map a recorded source file back to its project-relative path."""
+        path = source_file.replace(os.sep, "/")
+        return posixpath.normpath(f"{self._base_rel}/{path}") if self._base_rel else path
+
+    def _all_entries(self, position: int) -> list:
+        # Sorted by source file, which is nearly the order write_kg_file sorts into
+        return [entry for source in sorted(self._entries) for entry in self._entries[source][position]]
+
+    def _all(self) -> FileEntries:
+        return self._all_entries(0), self._all_entries(1), self._all_entries(2)
+
+    def start(self) -> None:
+        """
+        Extract the whole KG once, write it, and start watching.
+
+        The extraction cache makes this cheap when little changed since the
+        previous extraction.
+        """
+        self.docs_dir.mkdir(parents=True, exist_ok=True)
+        concepts, rules, relationships = scan_markdown_files(
+            self.docs_dir, cache_dir=default_cache_dir(self.project_dir), jobs=self.jobs,
+            file_index=ProjectFileIndex(self.project_dir),
+            source_dirs=self.source_dirs, extractors=self.extractors,
+        )
+        self._entries = {}
+        for position, entries in enumerate((concepts, rules, relationships)):
+            for entry in entries:
+                self._entries.setdefault(entry.source_file, ([], [], []))[position].append(entry)
+
+        generate_kg_files(self.project_dir, concepts, rules, relationships, file_format=self.file_format)
+        if self.file_format == "json":
+            # Serialize each file's entries once, so an update only re-serializes what changed
+            for position, key in enumerate(KG_KEYS):
+                self._blocks[key] = {
+                    source: serialize_kg_block(entries[position])
+                    for source, entries in self._entries.items()
+                    if entries[position]
+                }
+                self._digests[key] = {
+                    source: kg_source_digest(self._entries[source][position]) for source in self._blocks[key]
+                }
+        else:
+            from .jsonl import read_kg_log_state
+
+            self._log_states = {
+                key: read_kg_log_state(self.project_dir, self.project_dir / "kg" / f"{key}.jsonl")
+                for key in KG_KEYS
+            }
+        self._stale = True
+        self.refresh((concepts, rules, relationships))
+
+        index = ProjectFileIndex(self.project_dir)
+        source_rels = [rel for rel in self.source_rels if index.is_dir(rel)]
+        if self.use_inotify:
+            try:
+                self.backend = InotifyBackend(self.project_dir, self.docs_rel, source_rels)
+            except OSError as e:
+                logger.info(f"inotify unavailable ({e}), polling for changes instead")
+        if self.backend is None:
+            self.backend = PollingBackend(
+                self.project_dir, self.docs_rel, self.poll_interval, source_rels, self.suffixes
+            )
+
+    def refresh(self, entries: Optional[FileEntries] = None) -> bool:
+        """
+        Refresh the derived artifacts and the context summary if the KG changed since they were.
+
+        Only the artifacts named in ``artifacts`` that the project keeps are
+        rebuilt; an artifact that is missing is not created.
+
+        Args:
+            entries: The whole KG, if the caller has it at hand.
+
+        Returns:
+            True if the KG had changed and the artifacts were refreshed.
+        """
+        if not self._stale:
+            return False
+        self._stale = False
+        if entries is None:
+            entries = self._all()
+        for name in self.artifacts:
+            DERIVED_ARTIFACTS[name](self.project_dir, entries)
+        update_context_summary(self.project_dir, entries)
+        return True
+
+    def close(self) -> None:
+        """Refresh what the last changes left stale, and stop watching."""
+        self.refresh()
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
+    def __enter__(self) -> "KGWatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def next_batch(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for a change, then collect changes until none arrive for the debounce period.
+
+        Args:
+            timeout: Maximum time to wait for the first change; None waits forever.
+
+        Returns:
+            The changed project-relative paths, or an empty set on timeout.
+        """
+        if self.backend is None:
+            raise RuntimeError("KGWatcher.start() has not been called")
+        changed = self.backend.read(timeout)
+        while changed:
+            more = self.backend.read(self.debounce)
+            if not more:
+                break
+            changed |= more
+        return changed
+
+    def apply(self, paths: Set[str]) -> Optional[WatchUpdate]:
+        """
+        Re-extract the given paths and write the KG files whose entries changed.
+
+        The derived artifacts are left for refresh(), which run() calls once
+        the changes have settled.
+
+        Args:
+            paths: Changed project-relative paths; a directory stands for every
+                file below it.
+
+        Returns:
+            What was updated, or None if the KG did not change.
+        """
+        started = time.perf_counter()
+        index = ProjectFileIndex(self.project_dir)
+        prefixes = tuple(root + "/" if root else "" for root in [self.docs_rel, *self.source_rels])
+
+        touched: Set[str] = set()
+        for path in paths:
+            prefix = path + "/"
+            for source in self._entries:
+                known = self._index_path(source)
+                if known == path or known.startswith(prefix):
+                    touched.add(known)
+            if index.is_dir(path):
+                touched.update(index.files(path, suffixes=self.suffixes))
+            elif path.endswith(self.suffixes):
+                touched.add(path)
+
+        fresh: Dict[str, FileEntries] = {}
+        for path in sorted(touched):
+            if not path.startswith(prefixes):
+                continue
+            source = self._source_file(path)
+            if not index.is_file(path) or index.is_ignored(path, is_dir=False):
+                fresh[source] = _NO_ENTRIES
+                continue
+            try:
+                content = (self.project_dir / path).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                # Keep the file's existing entries rather than dropping them
+                logger.error(f"Error processing {path}: {e}")
+                continue
+            fresh[source] = extract_file_entries(content, source)
+
+        changed_keys = set()
+        changed_files = []
+        for source, entries in fresh.items():
+            old = self._entries.get(source, _NO_ENTRIES)
+            file_changed = False
+            for key, old_entries, new_entries in zip(KG_KEYS, old, entries):
+                if [e.to_dict() for e in old_entries] != [e.to_dict() for e in new_entries]:
+                    changed_keys.add(key)
+                    file_changed = True
+            if file_changed:
+                changed_files.append(source)
+                for blocks in self._blocks.values():
+                    blocks.pop(source, None)
+                for digests in self._digests.values():
+                    digests.pop(source, None)
+            if any(entries):
+                self._entries[source] = entries
+            else:
+                self._entries.pop(source, None)
+
+        if not changed_keys:
+            return None
+
+        written = self._write(changed_keys, fresh)
+        self._stale = True
+        return WatchUpdate(sorted(changed_files), written, time.perf_counter() - started)
+
+    @staticmethod
+    def _file_size(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return None
+
+    def _write(self, changed_keys: Set[str], fresh: Dict[str, FileEntries]) -> List[str]:
+        """Write the changed KG lists and their kg/manifest.json records."""
+        from .jsonl import append_kg_log, kg_log_record, read_kg_log_state, update_kg_manifest_records
+
+        kg_dir = self.project_dir / "kg"
+        kg_dir.mkdir(exist_ok=True)
+        records = {}
+        for position, key in enumerate(KG_KEYS):
+            if key not in changed_keys:
+                continue
+            path = kg_dir / f"{key}.{self.file_format}"
+            if self.file_format == "jsonl":
+                # The log's state is kept between updates; for a log changed by
+                # someone else it is read again (replaying the log if need be)
+                state = self._log_states.get(key)
+                if state is None or state.size != self._file_size(path):
+                    state = read_kg_log_state(self.project_dir, path) if path.exists() else None
+                new_entries = [entry for source in sorted(fresh) for entry in fresh[source][position]]
+                appended = append_kg_log(path, key, new_entries, set(fresh), state=state)
+                self._log_states[key] = state if appended is state else None
+                if appended is not None:
+                    records[path.name] = kg_log_record(path, key, appended, appended=True)
+            else:
+                blocks = self._blocks[key]
+                digests = self._digests[key]
+                for source in self._entries:
+                    if source not in blocks and self._entries[source][position]:
+                        blocks[source] = serialize_kg_block(self._entries[source][position])
+                        digests[source] = kg_source_digest(self._entries[source][position])
+                if write_kg_file_blocks(path, key, [blocks[source] for source in sorted(blocks)]):
+                    records[path.name] = _written_kg_file_record(path, key, self._all_entries(position), digests)
+        if records:
+            update_kg_manifest_records(self.project_dir, records)
+        return sorted(records)
+
+    def run(
+        self,
+        stop: Optional[threading.Event] = None,
+        on_update: Optional[Callable[[WatchUpdate], None]] = None,
+    ) -> None:
+        """
+        Apply batches of changes until stopped.
+
+        The derived artifacts are refreshed once no change has arrived for
+        refresh_delay seconds after an update.
+
+        Args:
+            stop: Event that ends the loop once set (checked at least every second).
+            on_update: Called after each batch that changed the KG.
+        """
+        while stop is None or not stop.is_set():
+            paths = self.next_batch(timeout=min(self.refresh_delay, 1.0) if self._stale else 1.0)
+            if not paths:
+                self.refresh()
+                continue
+            try:
+                update = self.apply(paths)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error updating the KG: {e}")
+                continue
+            if update is not None and on_update is not None:
+                on_update(update)
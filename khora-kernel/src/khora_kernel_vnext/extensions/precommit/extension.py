@@ -144,6 +144,11 @@ def add_precommit_config(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
         if not project_name:
             project_name = "khora_project"  # Default fallback
         
+        from ..kg.extractors import files_pattern
+        
+        # Only run on the file types the KG extractors read
+        kg_config = getattr(getattr(khora_config, "plugins_config", None), "kg", None)
+        kg_extractors = getattr(kg_config, "extractors", None)
         precommit_config["repos"].append({
             "repo": "local",
             "hooks": [
@@ -152,7 +157,7 @@ def add_precommit_config(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
                     "name": "Khora Knowledge Graph Extractor",
                     "entry": "python -m khora_kernel_vnext.extensions.kg.kg_precommit",
                     "language": "python",
-                    "files": r"\.md$",
+                    "files": files_pattern(kg_extractors),
                     "pass_filenames": True
                 }
             ]
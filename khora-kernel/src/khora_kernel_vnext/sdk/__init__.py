@@ -21,6 +21,7 @@ from .context import (
 )
 from .templates import TemplateManager, get_extension_template
 from .config import KhoraConfigAccessor, get_config_accessor
+from .file_index import DEFAULT_IGNORED_DIRS, ProjectFileIndex, parse_ignore_file
 from .utils import (
     ensure_directory,
     copy_directory_structure,
@@ -56,6 +57,11 @@ __all__ = [
     "KhoraConfigAccessor",
     "get_config_accessor",
     
+    # File index module
+    "DEFAULT_IGNORED_DIRS",
+    "ProjectFileIndex",
+    "parse_ignore_file",
+    
     # Utils module
     "ensure_directory",
     "copy_directory_structure",
@@ -0,0 +1,346 @@
+"""
+Project file index shared by Khora commands and extensions.
+
+The index lists each directory of a project at most once per run and prunes
+ignored directories before descending into them, so trees such as
+``node_modules`` or ``.venv`` are never walked. Ignore rules come from the
+built-in DEFAULT_IGNORED_DIRS and from ``.gitignore`` and ``.khoraignore``
+files (at the project root and in any subdirectory), using the gitignore
+pattern syntax.
+
+Directory listings and stat results are cached for the lifetime of the index;
+create a new index to observe later file system changes.
+"""
+
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Directories that are never part of the project, ignore files or not
+DEFAULT_IGNORED_DIRS = frozenset({
+    ".git", ".hg", ".svn",
+    ".venv", "venv", "node_modules",
+    "__pycache__", ".pytest_cache", ".mypy_cache", ".ruff_cache", ".tox", ".nox",
+})
+IGNORE_FILES = (".gitignore", ".khoraignore")
+
+
+class IgnoreRule(NamedTuple):
+    """A single pattern from an ignore file."""
+    base: str  # Project-relative directory of the ignore file ("" for the root)
+    regex: Pattern[str]
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression (without anchors)."""
+    parts = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                parts.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i) and i + 2 == n:
+                parts.append(".*")
+                i += 2
+                continue
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) or pattern.startswith("[]", i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
+
+
+def parse_ignore_file(text: str, base: str = "") -> List[IgnoreRule]:
+    """
+    Parse the content of a .gitignore-style file.
+
+    Args:
+        text: Content of the ignore file
+        base: Project-relative directory containing the file ("" for the root)
+
+    Returns:
+        The rules in file order
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A slash anywhere but at the end anchors the pattern to the file's directory
+        anchored = "/" in line
+        line = line.lstrip("/")
+        try:
+            regex = re.compile(_translate_glob(line) + r"\Z")
+        except re.error:
+            logger.debug(f"Ignoring invalid ignore pattern {line!r}")
+            continue
+        rules.append(IgnoreRule(base, regex, negate, dir_only, anchored))
+    return rules
+
+
+def _join(directory: str, name: str) -> str:
+    return f"{directory}/{name}" if directory else name
+
+
+class ProjectFileIndex:
+    """
+    Cached, ignore-aware view of the files in a project.
+
+    Paths passed to and returned by the index are relative to its root and use
+    forward slashes.
+    """
+
+    def __init__(self, root: Union[str, Path], use_ignore_files: bool = True):
+        self.root = Path(root)
+        self.use_ignore_files = use_ignore_files
+        # Directory -> {name: is_dir}; a missing directory maps to an empty listing
+        self._listings: Dict[str, Dict[str, bool]] = {}
+        self._rules: Dict[str, List[IgnoreRule]] = {}
+        self._stats: Dict[str, Optional[os.stat_result]] = {}
+        self._walked: Dict[str, List[str]] = {}
+        # Project-relative paths of listed symbolic links to directories
+        self._dir_links: Set[str] = set()
+
+    @staticmethod
+    def _normalize(path: Union[str, Path]) -> str:
+        normalized = os.path.normpath(str(path)).replace(os.sep, "/")
+        return "" if normalized == "." else normalized
+
+    def relative(self, path: Union[str, Path]) -> str:
+        """Return a path relative to the index root (absolute paths must lie inside it)."""
+        path = Path(path)
+        if path.is_absolute():
+            path = path.relative_to(self.root)
+        return self._normalize(path)
+
+    def listing(self, directory: str = "") -> Dict[str, bool]:
+        """
+        List a directory once and cache the result.
+
+        Args:
+            directory: Project-relative directory ("" for the root)
+
+        Returns:
+            Mapping of entry names to whether the entry is a directory (following
+            symbolic links); empty if the directory does not exist
+        """
+        entries = self._listings.get(directory)
+        if entries is None:
+            entries = {}
+            try:
+                with os.scandir(os.path.join(self.root, directory)) as it:
+                    for entry in it:
+                        try:
+                            entries[entry.name] = entry.is_dir()
+                            if entries[entry.name] and entry.is_symlink():
+                                self._dir_links.add(_join(directory, entry.name))
+                        except OSError:
+                            entries[entry.name] = False
+            except OSError:
+                pass
+            self._listings[directory] = entries
+        return entries
+
+    def exists(self, path: Union[str, Path]) -> bool:
+        """
+        Check whether a file or directory exists, regardless of ignore rules.
+
+        Args:
+            path: Project-relative path (or absolute path inside the root)
+
+        Returns:
+            True if the path exists
+        """
+        rel_path = self.relative(path)
+        if not rel_path:
+            return self.root.is_dir()
+        if rel_path.startswith("../"):
+            # Outside the project: not covered by the listings
+            return (self.root / rel_path).exists()
+        directory, _, name = rel_path.rpartition("/")
+        return name in self.listing(directory)
+
+    def is_dir(self, path: Union[str, Path]) -> bool:
+        """Check whether a path is an existing directory."""
+        rel_path = self.relative(path)
+        if not rel_path:
+            return self.root.is_dir()
+        directory, _, name = rel_path.rpartition("/")
+        return self.listing(directory).get(name, False)
+
+    def is_file(self, path: Union[str, Path]) -> bool:
+        """Check whether a path is an existing non-directory entry."""
+        rel_path = self.relative(path)
+        directory, _, name = rel_path.rpartition("/")
+        return self.listing(directory).get(name) is False
+
+    def stat(self, path: Union[str, Path]) -> Optional[os.stat_result]:
+        """
+        Return the (cached) stat result of a path.
+
+        Returns:
+            The stat result, or None if the path does not exist
+        """
+        rel_path = self.relative(path)
+        if rel_path not in self._stats:
+            try:
+                self._stats[rel_path] = os.stat(os.path.join(self.root, rel_path))
+            except OSError:
+                self._stats[rel_path] = None
+        return self._stats[rel_path]
+
+    def _ignore_rules(self, directory: str) -> List[IgnoreRule]:
+        rules = self._rules.get(directory)
+        if rules is None:
+            rules = []
+            listing = self.listing(directory)
+            for name in IGNORE_FILES:
+                if listing.get(name) is False:
+                    try:
+                        text = (self.root / directory / name).read_text(encoding="utf-8", errors="replace")
+                    except OSError:
+                        continue
+                    rules.extend(parse_ignore_file(text, directory))
+            self._rules[directory] = rules
+        return rules
+
+    def _active_rules(self, directory: str) -> List[IgnoreRule]:
+        """Collect the rules that apply inside a directory, from the root down."""
+        rules: List[IgnoreRule] = []
+        if not self.use_ignore_files:
+            return rules
+        parts = directory.split("/") if directory else []
+        for depth in range(len(parts) + 1):
+            rules.extend(self._ignore_rules("/".join(parts[:depth])))
+        return rules
+
+    @staticmethod
+    def _matches(rules: Iterable[IgnoreRule], rel_path: str, name: str, is_dir: bool) -> bool:
+        ignored = False
+        for rule in rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.anchored:
+                if rule.base:
+                    if not rel_path.startswith(rule.base + "/"):
+                        continue
+                    subject = rel_path[len(rule.base) + 1:]
+                else:
+                    subject = rel_path
+            else:
+                subject = name
+            if rule.regex.match(subject):
+                ignored = not rule.negate
+        return ignored
+
+    def is_ignored(self, path: Union[str, Path], is_dir: Optional[bool] = None) -> bool:
+        """
+        Check whether a path is excluded by the default or ignore-file rules.
+
+        A path inside an ignored directory is ignored too.
+
+        Args:
+            path: Project-relative path
+            is_dir: Whether the path is a directory (looked up if not given)
+
+        Returns:
+            True if the path is ignored
+        """
+        rel_path = self.relative(path)
+        parts = rel_path.split("/")
+        for depth in range(1, len(parts) + 1):
+            sub_path = "/".join(parts[:depth])
+            sub_is_dir = True if depth < len(parts) else (self.is_dir(sub_path) if is_dir is None else is_dir)
+            if sub_is_dir and parts[depth - 1] in DEFAULT_IGNORED_DIRS:
+                return True
+            if self._matches(self._active_rules("/".join(parts[:depth - 1])), sub_path, parts[depth - 1], sub_is_dir):
+                return True
+        return False
+
+    def _walk(self, under: str) -> List[str]:
+        """
+        Collect all non-ignored files below a directory, pruning ignored directories.
+
+        Symbolic links to directories are not followed (as with os.walk), so a
+        link cycle cannot repeat files or make the walk explode.
+        """
+        files = self._walked.get(under)
+        if files is not None:
+            return files
+
+        files = []
+        stack: List[Tuple[str, List[IgnoreRule]]] = [(under, self._active_rules(under))]
+        while stack:
+            directory, rules = stack.pop()
+            for name, is_dir in sorted(self.listing(directory).items()):
+                rel_path = _join(directory, name)
+                if is_dir:
+                    if rel_path in self._dir_links:
+                        continue
+                    if name in DEFAULT_IGNORED_DIRS or self._matches(rules, rel_path, name, True):
+                        continue
+                    child_rules = rules + self._ignore_rules(rel_path) if self.use_ignore_files else rules
+                    stack.append((rel_path, child_rules))
+                elif not self._matches(rules, rel_path, name, False):
+                    files.append(rel_path)
+
+        files.sort()
+        self._walked[under] = files
+        return files
+
+    def files(
+        self, under: Union[str, Path] = "", suffixes: Optional[Iterable[str]] = None
+    ) -> List[str]:
+        """
+        Return the non-ignored files below a directory.
+
+        Args:
+            under: Project-relative directory to search ("" for the whole project)
+            suffixes: Only return files ending in one of these (e.g. ".md")
+
+        Returns:
+            Sorted project-relative file paths
+        """
+        rel_dir = self.relative(under)
+        if rel_dir and (not self.is_dir(rel_dir) or self.is_ignored(rel_dir, is_dir=True)):
+            return []
+        files = self._walk(rel_dir)
+        if suffixes is None:
+            return list(files)
+        suffixes = tuple(suffixes)
+        return [path for path in files if path.endswith(suffixes)]
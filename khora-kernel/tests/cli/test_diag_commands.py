@@ -124,6 +124,66 @@ description = "Test project"
     assert "[tool.khora] section not found" in result.output
 
 
+def test_health_command_validates_kg(mock_project_root):
+    """Test that health validates the source links and integrity of the KG."""
+    import json
+    
+    pyproject_path = mock_project_root / "pyproject.toml"
+    pyproject_path.write_text(
+        pyproject_path.read_text().replace("docker = true", "docker = true, kg = true")
+    )
+    (mock_project_root / "docs").mkdir()
+    (mock_project_root / "docs" / "a.md").write_text("[concept:Alpha] - Alpha.\n[rule:Beta] - Beta.\n")
+    kg_dir = mock_project_root / "kg"
+    kg_dir.mkdir()
+    source = {"file": "docs/a.md", "line": 1}
+    (kg_dir / "concepts.json").write_text(json.dumps(
+        {"concepts": [{"name": "Alpha", "description": "Alpha.", "source": source}]}
+    ))
+    (kg_dir / "rules.json").write_text(json.dumps(
+        {"rules": [{"name": "Beta", "description": "Beta.", "source": source}]}
+    ))
+    (kg_dir / "relationships.json").write_text(json.dumps({"relationships": [{
+        "source_concept": "Alpha", "target_concept": "Beta", "relation_type": "Uses",
+        "description": "", "source": {"file": "docs/missing.md", "line": 1},
+    }]}))
+    
+    runner = CliRunner()
+    with mock.patch(
+        'khora_kernel_vnext.cli.commands.find_project_root',
+        return_value=mock_project_root
+    ):
+        # Beta is a rule, not a concept
+        integrity_message = (
+            "Integrity issue: Relationship 'Alpha->Beta:Uses' at docs/missing.md:1 "
+            "refers to undefined concept 'Beta'"
+        )
+        result = runner.invoke(main_cli, ["health", "--json-output"])
+        output = json.loads(result.output)
+        assert output["checks"]["kg"]["issues"] == [
+            "Relationship source link issue: Source file 'docs/missing.md' for "
+            "relationship 'Alpha->Beta:Uses' does not exist",
+        ]
+        assert output["warnings"] == [integrity_message]
+        assert output["checks"]["kg"]["integrity"] is False
+        assert output["kg_integrity"]["dangling_endpoints"][0]["missing"] == ["Beta"]
+        
+        result = runner.invoke(main_cli, ["health", "--json-output", "--check-tags"])
+        issues = json.loads(result.output)["checks"]["kg"]["issues"]
+        assert len(issues) == 2
+        assert issues[0] == "Rule source link issue: Tag for entry 'Beta' not found at docs/a.md:1"
+        
+        # Integrity findings alone only fail the check with --strict-integrity
+        (mock_project_root / "docs" / "missing.md").write_text("[rel:Alpha->Beta:Uses] - x\n")
+        result = runner.invoke(main_cli, ["health"])
+        assert result.exit_code == 0
+        assert integrity_message in result.output
+        
+        result = runner.invoke(main_cli, ["health", "--json-output", "--strict-integrity"])
+        assert result.exit_code == 1
+        assert json.loads(result.output)["checks"]["kg"]["issues"] == [integrity_message]
+
+
 def test_inspect_command(mock_project_root):
     """Test that inspect command generates a report."""
     runner = CliRunner()
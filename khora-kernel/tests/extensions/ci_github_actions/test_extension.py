@@ -116,6 +116,12 @@ def test_ci_extension_creates_workflow_when_feature_enabled(tmp_project_ci: Path
     assert "uv ruff format --check ." in ci_yml_content_str
     assert "uv pytest" in ci_yml_content_str
 
+    # The context delta diffs the KG with the kernel's CLI, and a failed diff fails the job
+    context_delta = final_struct[".github"]["workflows"]["context-delta.yml"][0]
+    assert "uv pip install --system pyyaml khora-kernel" in context_delta
+    assert "khora kg diff origin/$BASE_REF HEAD --json-output" in context_delta
+    assert "Could not diff" not in context_delta
+
 
 def test_ci_extension_skips_when_feature_disabled(tmp_project_ci: Path):
     """
@@ -162,6 +162,13 @@ class TestCoreExtensionGenerateKGSummary:
             assert summary["concepts_hash"] is not None
             assert summary["rules_hash"] is not None
             assert summary["last_updated"] is not None
+            
+            # Once the KG files are written, the summary read from them hashes the same
+            from khora_kernel_vnext.extensions.kg.extension import generate_kg_files
+            generate_kg_files(project_path, concepts, rules, [])
+            file_summary = core_extension_instance._generate_kg_summary(project_path)
+            assert file_summary["concepts_hash"] == summary["concepts_hash"]
+            assert file_summary["rules_hash"] == summary["rules_hash"]
     
     def test_generate_kg_summary_error_handling(self, core_extension_instance):
         """Test error handling in KG summary generation."""
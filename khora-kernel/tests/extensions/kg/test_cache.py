@@ -0,0 +1,139 @@
+"""
+Tests for the KG extraction cache.
+"""
+
+import json
+import os
+import tempfile
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+from khora_kernel_vnext.extensions.kg.cache import (
+    CACHE_FILENAME,
+    CACHE_VERSION,
+    BlobCache,
+    ExtractionCache,
+    default_cache_dir,
+)
+from khora_kernel_vnext.extensions.kg.extension import scan_markdown_files
+
+
+@pytest.fixture
+def project_dir():
+    """Create a temporary project with a docs directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Path(tmpdir)
+        docs = project / "docs"
+        docs.mkdir()
+        (docs / "a.md").write_text("[concept:Alpha] - First concept.\n")
+        (docs / "b.md").write_text("[rule:Beta] - First rule.\n[rel:Alpha->Gamma:Uses] - Alpha uses Gamma.\n")
+        yield project
+
+
+def test_fetch_miss_then_hit(project_dir):
+    """Test that a second fetch of an unchanged file does not recompute."""
+    cache = ExtractionCache.load(default_cache_dir(project_dir))
+    calls = []
+
+    def compute(text):
+        calls.append(text)
+        return {"length": len(text)}
+
+    path = project_dir / "docs" / "a.md"
+    assert cache.fetch(path, "docs/a.md", compute) == {"length": len(path.read_text())}
+    assert cache.fetch(path, "docs/a.md", compute) == {"length": len(path.read_text())}
+
+    assert len(calls) == 1
+    assert cache.misses == 1
+    assert cache.hits == 1
+
+
+def test_fetch_touched_file_uses_hash(project_dir):
+    """Test that a changed mtime with identical content is still a cache hit."""
+    cache = ExtractionCache.load(default_cache_dir(project_dir))
+    path = project_dir / "docs" / "a.md"
+    cache.fetch(path, "docs/a.md", lambda text: "payload")
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+    assert cache.fetch(path, "docs/a.md", lambda text: pytest.fail("should not recompute")) == "payload"
+    assert cache.hits == 1
+
+
+def test_fetch_modified_file_recomputes(project_dir):
+    """Test that modified content invalidates the cached payload."""
+    cache = ExtractionCache.load(default_cache_dir(project_dir))
+    path = project_dir / "docs" / "a.md"
+    cache.fetch(path, "docs/a.md", lambda text: "old")
+
+    path.write_text("[concept:Alpha] - Changed and longer description.\n")
+
+    assert cache.fetch(path, "docs/a.md", lambda text: "new") == "new"
+    assert cache.misses == 2
+
+
+def test_save_load_and_prune(project_dir):
+    """Test persisting the cache and evicting records for deleted files."""
+    cache_dir = default_cache_dir(project_dir)
+    cache = ExtractionCache.load(cache_dir)
+    assert cache.cold
+    cache.fetch(project_dir / "docs" / "a.md", "docs/a.md", lambda text: 1)
+    cache.fetch(project_dir / "docs" / "b.md", "docs/b.md", lambda text: 2)
+    assert cache.save() is True
+    assert cache.save() is False  # Nothing changed since the last save
+    assert (cache_dir.parent / ".gitignore").exists()
+
+    reloaded = ExtractionCache.load(cache_dir)
+    assert not reloaded.cold
+    assert len(reloaded) == 2
+    assert reloaded.prune(["docs/a.md"]) == 1
+    assert "docs/b.md" not in reloaded
+
+
+def test_load_incompatible_version(project_dir):
+    """Test that a cache written by another version is discarded."""
+    cache_dir = default_cache_dir(project_dir)
+    cache_dir.mkdir(parents=True)
+    (cache_dir / CACHE_FILENAME).write_text(json.dumps({"version": CACHE_VERSION + 1, "files": {"x": {}}}))
+
+    cache = ExtractionCache.load(cache_dir)
+
+    assert len(cache) == 0
+
+
+def test_scan_markdown_files_with_cache(project_dir):
+    """Test that a warm scan returns identical results without re-parsing."""
+    docs_dir = project_dir / "docs"
+    cache_dir = default_cache_dir(project_dir)
+
+    cold = scan_markdown_files(docs_dir, cache_dir=cache_dir)
+
+    with patch("khora_kernel_vnext.extensions.kg.extension.extract_concepts_and_rules") as mock_extract:
+        warm = scan_markdown_files(docs_dir, cache_dir=cache_dir)
+        mock_extract.assert_not_called()
+
+    for cold_entries, warm_entries in zip(cold, warm):
+        assert [e.to_dict() for e in cold_entries] == [e.to_dict() for e in warm_entries]
+
+    # Deleting a file evicts its record on the next scan
+    (docs_dir / "b.md").unlink()
+    concepts, rules, relationships = scan_markdown_files(docs_dir, cache_dir=cache_dir)
+    assert len(rules) == 0
+    assert "docs/b.md" not in ExtractionCache.load(cache_dir)
+
+
+def test_blob_cache_evicts_least_recently_used(tmp_path):
+    """Test that the blob cache stays within max_entries, keeping recently used payloads."""
+    cache = BlobCache(tmp_path, max_entries=2)
+    cache.store("a", {"concepts": []})
+    cache.store("b", {"concepts": []})
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.store("c", {"concepts": []})
+    assert "a" in cache and "c" in cache and "b" not in cache
+    cache.save()
+
+    # The recency order survives a reload, and a smaller bound trims on load
+    reloaded = BlobCache.load(tmp_path, max_entries=1)
+    assert len(reloaded) == 1 and "c" in reloaded
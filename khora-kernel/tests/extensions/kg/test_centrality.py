@@ -0,0 +1,108 @@
+"""
+Tests for the centrality ranking of key concepts.
+"""
+
+import yaml
+import pytest
+
+from khora_kernel_vnext.extensions.kg.extension import (
+    KGEntry,
+    RelationshipEntry,
+    generate_kg_files,
+    update_context_summary,
+)
+
+np = pytest.importorskip("numpy")
+
+from khora_kernel_vnext.extensions.kg.centrality import (  # noqa: E402
+    pagerank,
+    rank_key_concepts,
+    truncate_utf8,
+)
+
+
+def _relationship(source, target, relation_type="DependsOn"):
+    return RelationshipEntry(source, target, relation_type, "", "docs/rels.md", 1)
+
+
+def test_pagerank_matches_dense_power_iteration():
+    """Test scores against the dense Google matrix, with a dangling node and a parallel edge."""
+    sources = [0, 0, 1, 2, 2, 3]
+    targets = [1, 2, 2, 0, 0, 2]  # node 4 is isolated, nodes 3 and 4 are never targeted
+    n, damping = 5, 0.85
+    scores = pagerank(sources, targets, n, damping=damping, tolerance=1e-12, max_iterations=1000)
+
+    transition = np.zeros((n, n))
+    for source, target in zip(sources, targets):
+        transition[target, source] += 1
+    out_degree = transition.sum(axis=0)
+    transition[:, out_degree == 0] = 1.0 / n
+    transition[:, out_degree > 0] /= out_degree[out_degree > 0]
+    google = damping * transition + (1 - damping) / n
+    values, vectors = np.linalg.eig(google)
+    expected = np.real(vectors[:, np.argmax(np.real(values))])
+    expected /= expected.sum()
+
+    assert np.allclose(scores, expected, atol=1e-9)
+    assert scores.sum() == pytest.approx(1.0)
+    assert len(pagerank([], [], 0)) == 0
+
+
+def test_truncate_utf8():
+    """Test that truncation collapses whitespace and never splits a character."""
+    assert truncate_utf8("short\n  text", 20) == "short text"
+    assert truncate_utf8("é" * 10, 10) == "ééé..."
+    assert len(truncate_utf8("日本語のテキスト", 11).encode("utf-8")) <= 11
+
+
+def test_rank_key_concepts():
+    """Test ranking, tie-breaking, filtering and the summary fields."""
+    concepts = [
+        KGEntry("Leaf", "A leaf.", "docs/a.md", 1),
+        KGEntry("Hub", "Everything depends on the hub. " * 20, "docs/a.md", 3),
+        KGEntry("Isolated", "No relationships.", "docs/b.md", 1),
+        KGEntry("Hub", "Second definition.", "docs/b.md", 3),
+        KGEntry("Middle", "In between.", "docs/b.md", 5),
+    ]
+    relationships = [
+        _relationship("Leaf", "Hub"),
+        _relationship("Middle", "Hub"),
+        _relationship("Undefined", "Hub"),
+        _relationship("Hub", "Middle", "Uses"),
+    ]
+    ranked = rank_key_concepts(concepts, relationships, top=10, description_bytes=40)
+
+    assert [c["name"] for c in ranked] == ["Hub", "Middle", "Leaf"]
+    hub = ranked[0]
+    assert (hub["in_degree"], hub["out_degree"]) == (3, 1)
+    assert hub["source"] == {"file": "docs/a.md", "line": 3}
+    assert hub["description"].startswith("Everything depends") and hub["description"].endswith("...")
+    assert len(hub["description"].encode("utf-8")) <= 40
+    assert ranked[0]["pagerank"] > ranked[1]["pagerank"] > ranked[2]["pagerank"]
+
+    assert [c["name"] for c in rank_key_concepts(concepts, relationships, top=1)] == ["Hub"]
+    assert rank_key_concepts(concepts, []) == []
+
+
+def test_context_summary_lists_key_concepts(tmp_path):
+    """Test that update_context_summary writes key concepts and reuses them while the KG is unchanged."""
+    concepts = [KGEntry("Hub", "The hub.", "docs/a.md", 1), KGEntry("Spoke", "A spoke.", "docs/a.md", 3)]
+    generate_kg_files(tmp_path, concepts, [], [_relationship("Spoke", "Hub")])
+    context_file = tmp_path / ".khora" / "context.yaml"
+    context_file.parent.mkdir()
+    context_file.write_text(yaml.dump({"project": {"name": "test"}}))
+
+    update_context_summary(tmp_path)
+    summary = yaml.safe_load(context_file.read_text())["knowledge_graph_summary"]
+    assert summary["concept_count"] == 2
+    assert [c["name"] for c in summary["key_concepts"]] == ["Hub", "Spoke"]
+
+    # Cached by the KG file hashes: the entries are not consulted again
+    update_context_summary(tmp_path, ([], [], []))
+    summary = yaml.safe_load(context_file.read_text())["knowledge_graph_summary"]
+    assert [c["name"] for c in summary["key_concepts"]] == ["Hub", "Spoke"]
+
+    generate_kg_files(tmp_path, concepts, [], [_relationship("Hub", "Spoke"), _relationship("Hub", "Spoke")])
+    update_context_summary(tmp_path)
+    summary = yaml.safe_load(context_file.read_text())["knowledge_graph_summary"]
+    assert [c["name"] for c in summary["key_concepts"]] == ["Spoke", "Hub"]
@@ -0,0 +1,125 @@
+"""
+Tests for community detection over the KG relationship graph.
+"""
+
+import json
+import os
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import (
+    KGEntry,
+    RelationshipEntry,
+    generate_kg_files,
+    update_context_summary,
+)
+
+np = pytest.importorskip("numpy")
+
+from khora_kernel_vnext.extensions.kg.communities import (  # noqa: E402
+    detect_modules,
+    ensure_modules,
+    label_propagation,
+    modules_path,
+    read_modules,
+)
+
+
+def _clique(names, relation_type="Uses"):
+    return [
+        RelationshipEntry(a, b, relation_type, "", "docs/rels.md", 1)
+        for i, a in enumerate(names) for b in names[i + 1:]
+    ]
+
+
+def _two_modules():
+    # Two dense groups joined by a single edge
+    return (
+        _clique(["Parser", "Lexer", "Token", "Grammar"])
+        + _clique(["Cache", "Blob", "Digest"])
+        + [RelationshipEntry("Parser", "Cache", "DependsOn", "", "docs/rels.md", 2)]
+    )
+
+
+def test_label_propagation_finds_planted_groups():
+    """Test that a ring of cliques is split into one community per clique."""
+    groups, size = 12, 8
+    sources, targets = [], []
+    for group in range(groups):
+        first = group * size
+        for a in range(first, first + size):
+            for b in range(a + 1, first + size):
+                sources.append(a)
+                targets.append(b)
+        # One edge to the next clique
+        sources.append(first)
+        targets.append((first + size + 1) % (groups * size))
+    node_count = groups * size + 1
+    communities = label_propagation(sources, targets, node_count)
+
+    truth = np.arange(groups * size) // size
+    assert len(np.unique(communities[:-1])) == groups
+    for group in range(groups):
+        assert len(np.unique(communities[:-1][truth == group])) == 1
+    # The node without edges keeps a community of its own, numbered last
+    assert communities[-1] == groups
+    # Deterministic for a fixed seed
+    assert np.array_equal(communities, label_propagation(sources, targets, node_count))
+
+
+def test_detect_modules():
+    """Test module naming, member order and numbering by size."""
+    modules = detect_modules(_two_modules())
+    assert [(m.id, m.name, m.size) for m in modules] == [(0, "Parser", 4), (1, "Cache", 3)]
+    assert modules[0].members == ["Parser", "Grammar", "Lexer", "Token"]
+    assert detect_modules([]) == []
+
+
+def test_modules_are_cached_until_relationships_change(tmp_path):
+    """Test that kg/modules.json is reused, ignored once stale, and summarized in context.yaml."""
+    concepts = [KGEntry("Parser", "Parses.", "docs/a.md", 1)]
+    generate_kg_files(tmp_path, concepts, [], _two_modules())
+    document = ensure_modules(tmp_path)
+    assert document["module_count"] == 2
+    assert read_modules(tmp_path) == document
+
+    # Concept edits keep the modules; relationship edits make them stale
+    generate_kg_files(tmp_path, concepts + [KGEntry("Lexer", "Lexes.", "docs/a.md", 3)], [], _two_modules())
+    assert read_modules(tmp_path) == document
+    generate_kg_files(tmp_path, concepts, [], _clique(["Parser", "Lexer"]))
+    assert read_modules(tmp_path) is None
+
+    context_file = tmp_path / ".khora" / "context.yaml"
+    context_file.parent.mkdir()
+    context_file.write_text(yaml.dump({"project": {"name": "test"}}))
+    ensure_modules(tmp_path)
+    update_context_summary(tmp_path)
+    summary = yaml.safe_load(context_file.read_text())["knowledge_graph_summary"]
+    assert summary["modules"] == {"module_count": 1, "largest_modules": [{"name": "Lexer", "size": 2}]}
+
+
+def test_kg_communities_command(tmp_path):
+    """Test the kg communities CLI command."""
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    generate_kg_files(tmp_path, [], [], _two_modules())
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        result = runner.invoke(main_cli, ["kg", "communities", "--members", "2", "--json-output"])
+        assert result.exit_code == 0, result.output
+        data = json.loads(result.output)
+        assert data["module_count"] == 2 and data["cached"] is False
+        assert data["modules"][0]["members"] == ["Parser", "Grammar"]
+        assert modules_path(tmp_path).exists()
+
+        result = runner.invoke(main_cli, ["kg", "communities", "--members", "2"])
+        assert result.exit_code == 0, result.output
+        assert "Module 0: Parser (4 concepts)\n  Parser, Grammar, ... (+2)" in result.output
+        assert "2 module(s) over 7 concepts, read from kg/modules.json" in result.output
+    finally:
+        os.chdir(original_dir)
@@ -0,0 +1,104 @@
+"""
+Tests for near-duplicate KG entry detection.
+"""
+
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import KGEntry, generate_kg_files
+
+np = pytest.importorskip("numpy")
+
+from khora_kernel_vnext.extensions.kg.dedupe import (  # noqa: E402
+    find_near_duplicates,
+    lsh_bands,
+    lsh_candidate_pairs,
+    minhash_signatures,
+    normalize_text,
+)
+
+CACHE = "The extraction cache stores the results for every markdown file, keyed by its path."
+RENDER = "Templates are rendered with the project settings before they are written to disk."
+
+
+def test_minhash_estimates_jaccard_similarity():
+    """Test that signature agreement approximates the Jaccard similarity of shingle sets."""
+    texts = [normalize_text(CACHE), normalize_text(CACHE.replace("every", "each")), normalize_text(RENDER), "ab"]
+    signatures = minhash_signatures(texts, num_perm=256, shingle_size=5)
+    assert signatures.shape == (4, 256)
+    assert signatures.dtype == np.uint32
+
+    def jaccard(a, b):
+        shingles_a = {a[i:i + 5] for i in range(len(a) - 4)}
+        shingles_b = {b[i:i + 5] for i in range(len(b) - 4)}
+        return len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+
+    estimate = (signatures[0] == signatures[1]).mean()
+    assert abs(estimate - jaccard(texts[0], texts[1])) < 0.1
+    assert (signatures[0] == signatures[2]).mean() < 0.1
+    # Signatures do not depend on the other texts in the batch
+    assert (minhash_signatures(texts[1:2], num_perm=256) == signatures[1]).all()
+
+
+def test_lsh_candidates():
+    """Test that only rows agreeing on a whole band become candidates."""
+    signatures = np.array([[1, 2, 3, 4], [1, 2, 9, 9], [7, 7, 3, 4], [5, 6, 7, 8]], dtype=np.uint32)
+    assert lsh_candidate_pairs(signatures, bands=2).tolist() == [[0, 1], [0, 2]]
+    assert lsh_bands(128, 0.8) == (16, 8)
+    assert lsh_bands(128, 0.5) == (32, 4)
+
+
+def test_find_near_duplicates():
+    """Test clustering of copied and edited descriptions under different names."""
+    concepts = [
+        KGEntry("ExtractionCache", CACHE, "docs/a.md", 1),
+        KGEntry("Renderer", RENDER, "docs/a.md", 3),
+        KGEntry("FileCache", CACHE.replace("every", "each").upper(), "docs/b.md", 1),
+        KGEntry("Empty", "", "docs/b.md", 3),
+        KGEntry("AlsoEmpty", "", "docs/b.md", 5),
+    ]
+    rules = [KGEntry("CacheRule", CACHE, "docs/c.md", 1)]
+
+    clusters = find_near_duplicates(concepts, rules)
+    assert len(clusters) == 1
+    cluster = clusters[0]
+    assert [(kind, entry.name) for kind, entry in cluster.entries] == [
+        ("concept", "ExtractionCache"), ("concept", "FileCache"), ("rule", "CacheRule"),
+    ]
+    assert cluster.max_similarity == 1.0
+    assert 0.7 <= cluster.min_similarity < 1.0
+    assert cluster.to_dict()["pairs"][0]["a"] == "ExtractionCache"
+
+    assert find_near_duplicates(concepts, rules, threshold=0.99)[0].min_similarity == 1.0
+    assert find_near_duplicates([], []) == []
+
+
+def test_kg_dedupe_command(tmp_path):
+    """Test the kg dedupe CLI command."""
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    generate_kg_files(tmp_path, [
+        KGEntry("ExtractionCache", CACHE, "docs/a.md", 1),
+        KGEntry("FileCache", CACHE + " Always.", "docs/b.md", 1),
+        KGEntry("Renderer", RENDER, "docs/a.md", 3),
+    ], [], [])
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        result = runner.invoke(main_cli, ["kg", "dedupe", "--json-output"])
+        assert result.exit_code == 0, result.output
+        data = json.loads(result.output)
+        assert data["cluster_count"] == 1
+        assert [e["name"] for e in data["clusters"][0]["entries"]] == ["ExtractionCache", "FileCache"]
+
+        result = runner.invoke(main_cli, ["kg", "dedupe"])
+        assert result.exit_code == 0, result.output
+        assert "  concept  FileCache (docs/b.md:1)" in result.output
+        assert "1 near-duplicate cluster(s) among 3 entries" in result.output
+    finally:
+        os.chdir(original_dir)
@@ -0,0 +1,153 @@
+"""
+Tests for the entry-level KG diff.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.diff import diff_kg, entry_content_hash, load_kg_source
+from khora_kernel_vnext.extensions.kg.extension import KGEntry, RelationshipEntry, generate_kg_files
+
+
+def _kg(concepts=(), rules=(), relationships=()):
+    return (
+        [KGEntry(*c) for c in concepts],
+        [KGEntry(*r) for r in rules],
+        [RelationshipEntry(*r) for r in relationships],
+    )
+
+
+def test_diff_kg():
+    """Test added, removed and modified entries, matched by stable ID."""
+    old = _kg(
+        concepts=[("Alpha", "First", "a.md", 1), ("Beta", "Second", "a.md", 3), ("Gamma", "Third", "b.md", 1)],
+        rules=[("R1", "Rule", "a.md", 5)],
+        relationships=[("Alpha", "Beta", "Uses", "Old", "a.md", 7)],
+    )
+    new = _kg(
+        concepts=[
+            ("Gamma", "Third", "c.md", 1),   # moved to another file
+            ("Alpha", "First", "a.md", 10),  # only moved within its file
+            ("Beta", "Second, revised", "a.md", 3),
+            ("Delta", "Fourth", "a.md", 12),
+        ],
+        rules=[],
+        relationships=[("Alpha", "Beta", "Uses", "New", "a.md", 7), ("Beta", "Alpha", "Uses", "", "a.md", 8)],
+    )
+
+    result = diff_kg(old, new)
+    assert [entry_id for entry_id, _ in result.added["concepts"]] == ["concept:Delta"]
+    assert [entry_id for entry_id, _, _ in result.modified["concepts"]] == ["concept:Gamma", "concept:Beta"]
+    assert [entry_id for entry_id, _ in result.removed["rules"]] == ["rule:R1"]
+    assert [entry_id for entry_id, _ in result.added["relationships"]] == ["rel:Beta->Alpha:Uses"]
+    assert [entry_id for entry_id, _, _ in result.modified["relationships"]] == ["rel:Alpha->Beta:Uses"]
+    assert result.counts()["concepts"] == {"added": 1, "removed": 0, "modified": 2}
+
+    data = result.to_dict()
+    assert data["changed"] is True
+    gamma, beta = data["concepts"]["modified"]
+    assert gamma["changed"] == ["source_file"]
+    assert beta["changed"] == ["description"]
+    assert beta["old"]["description"] == "Second"
+
+    assert diff_kg(old, old).is_empty
+
+
+def test_diff_numbers_duplicate_definitions():
+    """Test that repeated definitions get their own IDs."""
+    old = _kg(concepts=[("Alpha", "One", "a.md", 1)])
+    new = _kg(concepts=[("Alpha", "One", "a.md", 1), ("Alpha", "Two", "b.md", 1)])
+
+    result = diff_kg(old, new)
+    assert [entry_id for entry_id, _ in result.added["concepts"]] == ["concept:Alpha#2"]
+    assert result.modified["concepts"] == []
+
+
+def test_entry_content_hash_is_stable_across_processes():
+    """Test that content hashes are SHA-256 digests that do not depend on the process."""
+    entry = KGEntry("Alpha", "Café", "docs/a.md", 1)
+    expected = hashlib.sha256('["Café","docs/a.md"]'.encode("utf-8")).hexdigest()
+    assert entry_content_hash(entry) == expected
+    assert entry_content_hash(KGEntry("Alpha", "Café", "docs/a.md", 9)) == expected
+
+    script = (
+        "from khora_kernel_vnext.extensions.kg.diff import entry_content_hash;"
+        "from khora_kernel_vnext.extensions.kg.extension import KGEntry;"
+        "print(entry_content_hash(KGEntry('Alpha', 'Café', 'docs/a.md', 1)))"
+    )
+    env = dict(os.environ, PYTHONHASHSEED="123", PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True)
+    assert output.stdout.strip() == expected
+
+
+def test_load_kg_source_directories(tmp_path):
+    """Test loading a KG from a project directory and from its kg directory."""
+    generate_kg_files(tmp_path, *_kg(concepts=[("Alpha", "First", "a.md", 1)]))
+
+    for source in (tmp_path, tmp_path / "kg"):
+        concepts, rules, relationships = load_kg_source(str(source))
+        assert [c.name for c in concepts] == ["Alpha"]
+
+    (tmp_path / "empty").mkdir()
+    with pytest.raises(ValueError, match="No kg directory"):
+        load_kg_source(str(tmp_path / "empty"))
+    with pytest.raises(ValueError, match="no git history"):
+        load_kg_source("HEAD")
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_kg_diff_command(tmp_path):
+    """Test kg diff between two revisions and between a revision and KG files."""
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="Test", GIT_AUTHOR_EMAIL="test@example.com",
+        GIT_COMMITTER_NAME="Test", GIT_COMMITTER_EMAIL="test@example.com",
+    )
+
+    def commit(message, files):
+        for path, content in files.items():
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).write_text(content)
+        subprocess.run(["git", "add", "-A"], cwd=tmp_path, env=env, check=True)
+        subprocess.run(["git", "commit", "-q", "-m", message], cwd=tmp_path, env=env, check=True)
+
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    commit("Add docs", {
+        "pyproject.toml": '[project]\nname = "test-project"\n',
+        "docs/a.md": "[concept:Alpha] - First\n\n[rule:R1] - Rule\n",
+    })
+    commit("Revise docs", {"docs/a.md": "[concept:Alpha] - Revised\n\n[concept:Beta] - Second\n"})
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        result = runner.invoke(main_cli, ["kg", "diff", "HEAD~1", "HEAD", "--json-output"])
+        assert result.exit_code == 0, result.output
+        data = json.loads(result.output)
+        assert data["counts"]["concepts"] == {"added": 1, "removed": 0, "modified": 1}
+        assert data["rules"]["removed"][0]["id"] == "rule:R1"
+
+        result = runner.invoke(main_cli, ["kg", "diff", "HEAD~1", "HEAD", "--exit-code"])
+        assert result.exit_code == 1
+        assert "  + concept:Beta (docs/a.md)" in result.output
+        assert "  ~ concept:Alpha (docs/a.md)" in result.output
+
+        # The current KG files against the revision they were generated from
+        runner.invoke(main_cli, ["kg", "at", "HEAD", "--out", "."])
+        result = runner.invoke(main_cli, ["kg", "diff", "HEAD", "--exit-code"])
+        assert result.exit_code == 0, result.output
+
+        result = runner.invoke(main_cli, ["kg", "diff", "no-such-rev"])
+        assert result.exit_code == 1
+        assert "Unknown revision: no-such-rev" in result.output
+    finally:
+        os.chdir(original_dir)
@@ -16,10 +16,16 @@ from khora_kernel_vnext.extensions.kg.extension import (
     RelationshipEntry,
     ValidationResult,
     extract_concepts_and_rules,
+    extract_payload,
     scan_markdown_files,
     generate_kg_files,
     extract_and_generate_kg_files,
-    validate_source_links
+    validate_source_links,
+    tokenize_kg_tags,
+    summarize_kg_files,
+    kg_entries_hash,
+    SourceFileChecker,
+    LineIndex,
 )
 
 
@@ -215,6 +221,62 @@ def test_extract_concepts_and_rules_empty_values():
         assert len(relationships) == 0  # All relationships have issues and should be skipped
 
 
+def test_extract_concepts_and_rules_line_numbers():
+    """Test that line numbers point at the line containing each tag."""
+    markdown = "# Title\n\n[concept:First] - One.\n\nText\n[rule:Second] - Two.\n\n\n[rel:First->Second:Uses] - Three."
+    
+    concepts, rules, relationships = extract_concepts_and_rules(markdown, "test.md")
+    
+    assert concepts[0].line_number == 3
+    assert rules[0].line_number == 6
+    assert relationships[0].line_number == 9
+
+
+def test_tokenize_kg_tags_single_pass_semantics():
+    """Test that same-kind tags never overlap while different kinds may."""
+    markdown = (
+        "[concept:Outer] - Outer description\n"
+        "  [concept:Inner] - swallowed by Outer\n"
+        "  [rule:Nested] - still found as a rule\n"
+        "\n"
+        "[concept:After] - After the blank line."
+    )
+    
+    tokens = list(tokenize_kg_tags(markdown))
+    
+    assert [(t.kind, t.name) for t in tokens] == [
+        ("concept", "Outer"),
+        ("rule", "Nested"),
+        ("concept", "After"),
+    ]
+    assert "[concept:Inner]" in tokens[0].description
+    assert tokens[1].description == "still found as a rule"
+    assert [t.line_number for t in tokens] == [1, 3, 5]
+
+
+def test_tokenize_kg_tags_pathological_input():
+    """Test that unterminated tag prefixes do not cause backtracking blowups."""
+    markdown = ("[concept:" + "A" * 5000 + " ") * 200 + "\n[concept:Real] - Found."
+    
+    tokens = list(tokenize_kg_tags(markdown))
+    
+    assert len(tokens) == 1
+    assert tokens[0].name == "Real"
+    assert tokens[0].line_number == 2
+
+
+def test_line_index():
+    """Test mapping offsets to line numbers."""
+    text = "a\nbc\n\nd"
+    index = LineIndex(text)
+    
+    assert index.line_of(0) == 1
+    assert index.line_of(1) == 1  # The newline itself belongs to line 1
+    assert index.line_of(2) == 2
+    assert index.line_of(5) == 3
+    assert index.line_of(6) == 4
+
+
 @pytest.fixture
 def sample_docs_dir():
     """Create a temporary docs directory with markdown files."""
@@ -315,6 +377,61 @@ def test_scan_markdown_files_duplicates(sample_docs_dir):
         assert len(relationships) == 4
 
 
+def test_scan_markdown_files_parallel_matches_serial(sample_docs_dir, caplog):
+    """Test that parallel extraction yields byte-identical output and warnings."""
+    dup_file = sample_docs_dir / "duplicate.md"
+    dup_file.write_text("[concept:ConceptOne] - Duplicate concept.\n")
+    
+    def run(jobs):
+        caplog.clear()
+        with caplog.at_level("WARNING", logger="khora_kernel_vnext.extensions.kg.extension"):
+            result = scan_markdown_files(sample_docs_dir, jobs=jobs)
+        warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+        dumped = json.dumps([[e.to_dict() for e in entries] for entries in result])
+        return dumped, warnings
+    
+    serial = run(1)
+    with patch("khora_kernel_vnext.extensions.kg.extension.PARALLEL_MIN_FILES", 0):
+        parallel = run(2)
+    
+    assert parallel == serial
+    assert serial[1] == ["Duplicate concept 'ConceptOne' found in docs/file1.md"]
+
+
+def test_scan_markdown_files_small_tree_stays_serial(sample_docs_dir):
+    """Test that small trees do not start a process pool."""
+    with patch("khora_kernel_vnext.extensions.kg.extension.ProcessPoolExecutor") as mock_pool:
+        concepts, _, _ = scan_markdown_files(sample_docs_dir, jobs=8)
+    
+    mock_pool.assert_not_called()
+    assert len(concepts) == 3
+
+
+def test_scan_markdown_files_crlf_matches_read_text(sample_docs_dir):
+    """Test that CRLF files extract as read_text sees them, in serial and parallel scans."""
+    crlf = sample_docs_dir / "crlf.md"
+    crlf.write_bytes(
+        "[concept:Crlf] - First concept.\r\n\r\nSome unrelated paragraph.\r\n\r\n"
+        "Café [rel:Crlf->ConceptOne:Uses] - Uses one.\r\n".encode("utf-8")
+    )
+    expected = extract_concepts_and_rules(crlf.read_text(encoding="utf-8"), os.path.join("docs", "crlf.md"))
+
+    for jobs in (1, 2):
+        with patch("khora_kernel_vnext.extensions.kg.extension.PARALLEL_MIN_FILES", 0):
+            result = scan_markdown_files(sample_docs_dir, jobs=jobs)
+        for entries, expected_entries in zip(result, expected):
+            crlf_entries = [e.to_dict() for e in entries if e.source_file.endswith("crlf.md")]
+            assert crlf_entries == [e.to_dict() for e in expected_entries]
+    assert expected[0][0].description == "First concept."
+
+    # Tag spans point into the file's bytes, past the dropped carriage returns
+    raw = crlf.read_bytes()
+    spans = extract_payload(raw, "docs/crlf.md")["spans"]
+    assert [name for _, name in spans] == ["Crlf", "Crlf", "ConceptOne"]
+    for offset, name in spans:
+        assert raw[offset:offset + len(name)] == name.encode()
+
+
 @pytest.fixture
 def temp_project_dir():
     """Create a temporary project directory."""
@@ -396,6 +513,148 @@ def test_generate_kg_files(temp_project_dir):
         assert rel2["description"] == "Second extends first"
 
 
+def test_generate_kg_files_skips_unchanged(temp_project_dir):
+    """Test that regenerating an unchanged KG performs no writes."""
+    concepts = [KGEntry("ConceptOne", "First concept", "file1.md", 10)]
+    rules = [KGEntry("RuleOne", "First rule", "file1.md", 15)]
+    relationships = [RelationshipEntry("ConceptOne", "ConceptTwo", "Contains", "Contains", "file1.md", 12)]
+    
+    files = generate_kg_files(temp_project_dir, concepts, rules, relationships)
+    contents = [f.read_text() for f in files]
+    
+    with patch("khora_kernel_vnext.extensions.kg.extension.atomic_write_text") as mock_write:
+        generate_kg_files(temp_project_dir, concepts, rules, relationships)
+        mock_write.assert_not_called()
+    assert [f.read_text() for f in files] == contents
+    
+    # Changing one file's content rewrites only that file (and the manifest)
+    rules.append(KGEntry("RuleTwo", "Second rule", "file2.md", 3))
+    with patch("khora_kernel_vnext.extensions.kg.extension.atomic_write_text") as mock_write:
+        generate_kg_files(temp_project_dir, concepts, rules, relationships)
+        written = [call[0][0] for call in mock_write.call_args_list]
+        assert written == [files[1], temp_project_dir / "kg" / "manifest.json"]
+
+
+def test_generate_kg_files_canonical_order(temp_project_dir):
+    """Test that entry order does not affect the written content."""
+    concepts = [
+        KGEntry("ConceptTwo", "Second concept", "b.md", 1),
+        KGEntry("ConceptOne", "First concept", "a.md", 5),
+    ]
+    
+    concepts_file, _, _ = generate_kg_files(temp_project_dir, concepts, [], [])
+    data = json.loads(concepts_file.read_text())
+    
+    assert [c["name"] for c in data["concepts"]] == ["ConceptOne", "ConceptTwo"]
+    assert len(data["fingerprint"]) == 64
+    
+    # The reversed input yields the same fingerprint, so the file is left alone
+    with patch("khora_kernel_vnext.extensions.kg.extension.atomic_write_text") as mock_write:
+        generate_kg_files(temp_project_dir, list(reversed(concepts)), [], [])
+        assert all(call[0][0] != concepts_file for call in mock_write.call_args_list)
+
+
+def test_generate_kg_files_matches_json_dumps(temp_project_dir):
+    """Test that the streamed KG files are identical to json.dumps output."""
+    concepts = [KGEntry("Caf\u00e9", 'Quoted "text"\nwith\ttabs \u2013 and unicode', "docs/a.md", 3)]
+    relationships = [RelationshipEntry("A", "B", "Uses", "", "docs/b.md", 7)]
+    
+    concepts_file, rules_file, relationships_file = generate_kg_files(
+        temp_project_dir, concepts, [], relationships
+    )
+    
+    for path, key, entries in (
+        (concepts_file, "concepts", concepts),
+        (rules_file, "rules", []),
+        (relationships_file, "relationships", relationships),
+    ):
+        text = path.read_text()
+        data = json.loads(text)
+        expected = {
+            "version": data["version"],
+            "generated_at": data["generated_at"],
+            "fingerprint": data["fingerprint"],
+            key: [entry.to_dict() for entry in entries],
+        }
+        assert text == json.dumps(expected, indent=2)
+
+
+def test_entries_are_slotted_and_interned():
+    """Test that entries have no instance dict and share repeated strings."""
+    file_a = "".join(["docs/", "shared.md"])
+    file_b = "".join(["docs/", "shared", ".md"])
+    assert file_a is not file_b
+    
+    first = KGEntry("Concept", "First", file_a, 1)
+    second = RelationshipEntry("Concept", "Other", "Uses", "Second", file_b, 2)
+    
+    assert not hasattr(first, "__dict__")
+    assert not hasattr(second, "__dict__")
+    assert first.source_file is second.source_file
+    assert first.name is second.source_concept
+    assert hash(first) == hash(KGEntry("Concept", "First", "other.md", 9))
+
+
+def test_summarize_kg_files_uses_manifest(temp_project_dir):
+    """Test that the KG summary comes from the manifest and survives its loss."""
+    concepts = [KGEntry("ConceptOne", "First concept", "file1.md", 10)]
+    relationships = [
+        RelationshipEntry("ConceptOne", "ConceptTwo", "Uses", "", "file1.md", 12),
+        RelationshipEntry("ConceptTwo", "ConceptOne", "Contains", "", "file1.md", 13),
+    ]
+    files = generate_kg_files(temp_project_dir, concepts, [], relationships)
+    concepts_file = files[0]
+    manifest = json.loads((temp_project_dir / "kg" / "manifest.json").read_text())
+    assert manifest["files"]["concepts.json"]["count"] == 1
+    
+    with patch("khora_kernel_vnext.extensions.kg.extension._kg_file_record") as mock_read:
+        summary = summarize_kg_files(temp_project_dir)
+        mock_read.assert_not_called()
+    
+    assert summary["concept_count"] == 1
+    assert summary["rule_count"] == 0
+    assert summary["relationship_count"] == 2
+    assert summary["relationship_types"] == ["Contains", "Uses"]
+    assert summary["last_updated"] == max(json.loads(f.read_text())["generated_at"] for f in files)
+    
+    # Without the manifest the files are hashed and parsed, with the same result
+    (temp_project_dir / "kg" / "manifest.json").unlink()
+    assert summarize_kg_files(temp_project_dir) == summary
+    
+    # A hand-edited file no longer matches its manifest record
+    generate_kg_files(temp_project_dir, concepts, [], relationships)
+    data = json.loads(concepts_file.read_text())
+    data["concepts"].append({"name": "Extra", "description": "", "source": {"file": "x.md", "line": 1}})
+    concepts_file.write_text(json.dumps(data, indent=2))
+    edited = summarize_kg_files(temp_project_dir)
+    assert edited["concept_count"] == 2
+    assert edited["concepts_hash"] != summary["concepts_hash"]
+    
+    assert summarize_kg_files(temp_project_dir / "missing") is None
+
+
+def test_summary_hashes_do_not_depend_on_storage(temp_project_dir):
+    """Test that JSON documents, appended logs and extraction results hash alike."""
+    from khora_kernel_vnext.extensions.kg.jsonl import append_kg_log, kg_log_record
+    
+    concepts = [
+        KGEntry("Beta", "Second", "b.md", 1),
+        KGEntry("Alpha", "First", "a.md", 1),
+        KGEntry("Gamma", "Third", "a.md", 3),
+    ]
+    generate_kg_files(temp_project_dir, concepts, [], [])
+    summary = summarize_kg_files(temp_project_dir)
+    assert summary["concepts_hash"] == kg_entries_hash(concepts)
+    assert summary["concepts_hash"] != kg_entries_hash(concepts[:2])
+    
+    # A log that got to the same entries through an append hashes the same
+    generate_kg_files(temp_project_dir, [KGEntry("Alpha", "Old", "a.md", 1)], [], [], file_format="jsonl")
+    path = temp_project_dir / "kg" / "concepts.jsonl"
+    state = append_kg_log(path, "concepts", [concepts[2], concepts[1], concepts[0]], {"a.md", "b.md"})
+    assert kg_log_record(path, "concepts", state)["content_hash"] == summary["concepts_hash"]
+    assert kg_log_record(path, "concepts")["content_hash"] == summary["concepts_hash"]
+
+
 def test_kg_extension_augment_cli():
     """Test KGExtension augment_cli method."""
     extension = KGExtension()
@@ -404,11 +663,17 @@ def test_kg_extension_augment_cli():
     extension.augment_cli(parser)
     
     # Check that the flag was added to the parser
-    parser.add_argument.assert_called_once()
-    args, kwargs = parser.add_argument.call_args
+    assert parser.add_argument.call_count == 2
+    args, kwargs = parser.add_argument.call_args_list[0]
     assert args[0] == "--khora-kg"
     assert kwargs["dest"] == "khora_kg"
     assert kwargs["action"] == "store_true"
+    
+    # Check the worker count option
+    args, kwargs = parser.add_argument.call_args_list[1]
+    assert args[0] == "--khora-kg-jobs"
+    assert kwargs["dest"] == "khora_kg_jobs"
+    assert kwargs["type"] is int
 
 
 def test_kg_extension_activate_disabled():
@@ -514,6 +779,53 @@ def test_validate_source_links_invalid():
             assert "nonexistent.md" in result.warnings[0]
 
 
+def test_validate_source_links_batches_by_directory():
+    """Test that each directory is listed once and relationships are validated."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project_dir = Path(tmpdir)
+        (project_dir / "docs").mkdir()
+        (project_dir / "docs" / "file1.md").touch()
+        
+        entries = [KGEntry(f"Concept{i}", "Description", "docs/file1.md", i) for i in range(100)]
+        relationships = [RelationshipEntry("A", "B", "Uses", "", "docs/gone.md", 3)]
+        checker = SourceFileChecker(project_dir)
+        
+        with patch("khora_kernel_vnext.extensions.kg.extension.os.scandir", wraps=os.scandir) as mock_scandir:
+            assert validate_source_links(entries, project_dir, checker=checker).valid
+            result = validate_source_links(relationships, project_dir, checker=checker)
+            assert mock_scandir.call_count == 1
+        
+        assert result.error_count == 1
+        assert result.warnings == [
+            "Source file 'docs/gone.md' for relationship 'A->B:Uses' does not exist"
+        ]
+
+
+def test_validate_source_links_check_tags():
+    """Test that check_tags reports entries whose tag moved away from its line."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project_dir = Path(tmpdir)
+        (project_dir / "doc.md").write_text(
+            "# Title\n[concept:Moved] - Was on line 2.\n[rel:A->B:Uses] - A uses B.\n[rule:Kept] - Here.\n"
+        )
+        entries = [
+            KGEntry("Moved", "Was on line 2.", "doc.md", 1),
+            KGEntry("Kept", "Here.", "doc.md", 4),
+            KGEntry("PastEnd", "Gone.", "doc.md", 40),
+        ]
+        
+        assert validate_source_links(entries, project_dir).valid
+        
+        with patch.object(Path, "read_text", autospec=True, side_effect=Path.read_text) as mock_read:
+            result = validate_source_links(entries, project_dir, check_tags=True)
+            assert mock_read.call_count == 1
+        assert result.error_count == 2
+        assert "entry 'Moved' not found at doc.md:1" in result.warnings[0]
+        
+        relationships = [RelationshipEntry("A", "B", "Uses", "A uses B.", "doc.md", 3)]
+        assert validate_source_links(relationships, project_dir, check_tags=True).valid
+
+
 @patch("khora_kernel_vnext.extensions.kg.extension.scan_markdown_files")
 @patch("khora_kernel_vnext.extensions.kg.extension.generate_kg_files")
 @patch("khora_kernel_vnext.extensions.kg.extension.validate_source_links")
@@ -0,0 +1,179 @@
+"""
+Tests for the extractor registry and the reST and Python docstring extractors.
+"""
+
+import os
+import shutil
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from khora_kernel_vnext.extensions.kg.cache import ExtractionCache
+from khora_kernel_vnext.extensions.kg.extension import (
+    concept_name_spans,
+    load_kg_files,
+    precommit_kg_hook,
+    scan_markdown_files,
+    scan_payloads,
+)
+from khora_kernel_vnext.extensions.kg.extractors import (
+    extractor_for,
+    extractor_suffixes,
+    files_pattern,
+    tokenize_docstrings,
+)
+from khora_kernel_vnext.extensions.kg.history import KGHistory
+from khora_kernel_vnext.extensions.kg.kg_precommit import main as precommit_main
+from khora_kernel_vnext.extensions.kg.rename import rename_concept
+from khora_kernel_vnext.sdk.file_index import ProjectFileIndex
+
+ALL_EXTRACTORS = ["markdown", "rst", "python"]
+
+MODULE = '''# Billing ☕
+"""
+Billing.
+
+[concept:Invoice] - A bill sent to a customer.
+"""
+
+
+class Order:
+    """
+    An order.
+
+    [rel:Order->Invoice:BilledBy] - Orders are billed
+        once shipped.
+    """
+
+    def total(self):
+        "[rule:NoFreeLunch] - Totals are positive.\\n"
+        return "[concept:NotADocstring] - Plain string."
+'''
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project with markdown and reST docs and a tagged Python package."""
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "guide.md").write_text("[concept:Order] - A purchase.\n", encoding="utf-8")
+    (tmp_path / "docs" / "index.rst").write_text(
+        "Overview\n========\n\n[concept:Customer] - Places orders.\n", encoding="utf-8"
+    )
+    (tmp_path / "src" / "shop").mkdir(parents=True)
+    (tmp_path / "src" / "shop" / "billing.py").write_text(MODULE, encoding="utf-8")
+    (tmp_path / "src" / "shop" / "broken.py").write_text('"""[concept:Broken] - x"""\ndef (:\n')
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_shop.py").write_text('"""[concept:TestOnly] - Not scanned."""\n')
+    (tmp_path / "pyproject.toml").write_text(
+        '[tool.khora]\nproject_name = "shop"\npython_version = "3.11"\n\n'
+        '[tool.khora.plugins_config.kg]\nextractors = ["markdown", "rst", "python"]\nsource_dirs = ["src"]\n'
+    )
+    return tmp_path
+
+
+def test_docstring_tokens_point_into_the_source():
+    """Test that docstring tags get source line numbers and exact spans, and other strings are ignored."""
+    tokens = list(tokenize_docstrings(MODULE))
+    assert [(token.kind, token.line_number) for token in tokens] == [("concept", 5), ("rel", 13), ("rule", 18)]
+    assert tokens[1].description == "Orders are billed\n    once shipped."
+
+    raw = MODULE.encode("utf-8")
+    spans = concept_name_spans(tokens, MODULE)
+    # The rule's docstring has an escape, so it has no span (rules have none anyway)
+    assert [name for _, name in spans] == ["Invoice", "Order", "Invoice"]
+    for offset, name in spans:
+        assert raw[offset:offset + len(name)] == name.encode()
+    assert tokens[2].start == -1
+
+    assert list(tokenize_docstrings("def (:\n")) == []
+    assert extractor_for("a/b.py").name == "python"
+    assert extractor_for("a/b.txt") is None
+    assert extractor_suffixes(["markdown", "rst"]) == (".md", ".rst")
+    assert extractor_suffixes() == (".md",)
+
+
+def test_only_markdown_is_extracted_by_default(project, tmp_path_factory):
+    """Test that reST and Python files are skipped unless their extractors are enabled."""
+    concepts, rules, relationships = scan_markdown_files(project / "docs", source_dirs=["src"])
+    assert [c.name for c in concepts] == ["Order"]
+    assert rules == [] and relationships == []
+
+    assert files_pattern() == r"\.md$"
+    assert files_pattern(ALL_EXTRACTORS) == r"(?:\.md|\.py|\.rst)$"
+    assert precommit_kg_hook(project)["files"] == files_pattern(ALL_EXTRACTORS)
+    assert precommit_kg_hook(tmp_path_factory.mktemp("bare"))["files"] == r"\.md$"
+
+
+def test_scan_covers_every_type_in_one_walk_and_cache(project):
+    """Test that docs and source directories are scanned together, each walked once, with one cache."""
+    concepts, rules, relationships = scan_markdown_files(
+        project / "docs", source_dirs=["src"], extractors=ALL_EXTRACTORS
+    )
+    assert {(c.name, c.source_file) for c in concepts} == {
+        ("Order", os.path.join("docs", "guide.md")),
+        ("Customer", os.path.join("docs", "index.rst")),
+        ("Invoice", os.path.join("src", "shop", "billing.py")),
+    }
+    assert [(r.name, r.line_number) for r in rules] == [("NoFreeLunch", 18)]
+    assert [(r.source_concept, r.target_concept) for r in relationships] == [("Order", "Invoice")]
+
+    index = ProjectFileIndex(project)
+    cache = ExtractionCache.load(project / ".cache")
+    with patch.object(index, "_walk", wraps=index._walk) as walk:
+        rel_paths, _, parsed = scan_payloads(
+            project / "docs", cache, 1, index, source_dirs=["src"], extractors=ALL_EXTRACTORS
+        )
+    assert sorted(call.args[0] for call in walk.call_args_list) == ["docs", "src"]
+    assert parsed == 4
+    assert scan_payloads(
+        project / "docs", cache, 1, ProjectFileIndex(project), source_dirs=["src"], extractors=ALL_EXTRACTORS
+    )[2] == 0
+
+    only_markdown = scan_markdown_files(project / "docs", source_dirs=["src"], extractors=["markdown"])
+    assert [c.name for c in only_markdown[0]] == ["Order"]
+
+
+def test_rename_rewrites_docstrings(project):
+    """Test that a rename reaches tags in docstrings and reST."""
+    result = rename_concept(project, "Invoice", "Bill", source_dirs=["src"], extractors=ALL_EXTRACTORS)
+    assert result.files == [os.path.join("src", "shop", "billing.py")]
+    assert result.occurrences == 2
+    text = (project / "src" / "shop" / "billing.py").read_text(encoding="utf-8")
+    assert "[concept:Bill] - A bill" in text and "[rel:Order->Bill:BilledBy]" in text
+
+    result = rename_concept(project, "Customer", "Client", source_dirs=["src"], extractors=ALL_EXTRACTORS)
+    assert result.files == [os.path.join("docs", "index.rst")]
+
+
+def test_precommit_and_history_use_the_registry(project):
+    """Test that the pre-commit hook and the history read the same files as a full scan."""
+    (project / "kg").mkdir()
+    original_dir = os.getcwd()
+    os.chdir(project)
+    try:
+        assert precommit_main(["src/shop/billing.py", "tests/test_shop.py", "docs/index.rst", "setup.cfg"]) == 0
+    finally:
+        os.chdir(original_dir)
+    concepts, rules, _ = load_kg_files(project)
+    assert sorted(c.name for c in concepts) == ["Customer", "Invoice"]
+    assert [r.source_file for r in rules] == [os.path.join("src", "shop", "billing.py")]
+
+    if shutil.which("git") is None:
+        return
+    env = dict(os.environ, GIT_AUTHOR_NAME="T", GIT_AUTHOR_EMAIL="t@example.com",
+               GIT_COMMITTER_NAME="T", GIT_COMMITTER_EMAIL="t@example.com")
+    for args in (["init", "-q"], ["add", "docs", "src", "tests"], ["commit", "-q", "-m", "Docs"]):
+        subprocess.run(["git", *args], cwd=project, env=env, check=True, capture_output=True)
+    with KGHistory(project, "docs", cache_dir=project / ".cache", source_dirs=["src"],
+                   extractors=ALL_EXTRACTORS) as history:
+        past = history.entries_at("HEAD")
+        assert [c.to_dict() for c in past[0]] == [
+            c.to_dict() for c in scan_markdown_files(
+                project / "docs", source_dirs=["src"], extractors=ALL_EXTRACTORS
+            )[0]
+        ]
+        assert [delta.files for delta in history.log()] == [sorted([
+            os.path.join("docs", "guide.md"), os.path.join("docs", "index.rst"),
+            os.path.join("src", "shop", "billing.py"), os.path.join("src", "shop", "broken.py"),
+        ])]
@@ -0,0 +1,115 @@
+"""
+Tests for the KG relationship graph index and its CLI commands.
+"""
+
+import json
+import os
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import RelationshipEntry, generate_kg_files
+from khora_kernel_vnext.extensions.kg.graph import KGGraph
+
+
+def _graph(*edges, concepts=()):
+    return KGGraph.from_relationships(
+        [RelationshipEntry(source, target, relation_type, "") for source, target, relation_type in edges],
+        concepts,
+    )
+
+
+@pytest.fixture
+def graph():
+    """A small graph with a dependency chain, a cycle and an isolated concept."""
+    return _graph(
+        ("Api", "Service", "DependsOn"),
+        ("Service", "Repository", "DependsOn"),
+        ("Repository", "Database", "DependsOn"),
+        ("Service", "Cache", "Uses"),
+        ("Cache", "Service", "Invalidates"),
+        concepts=["Orphan"],
+    )
+
+
+def test_interning_and_counts(graph):
+    """Test that names map to dense IDs and isolated concepts are included."""
+    assert graph.node_count == 6
+    assert graph.edge_count == 5
+    assert graph.names[graph.node_id("Api")] == "Api"
+    assert "Orphan" in graph
+    with pytest.raises(KeyError):
+        graph.node_id("Missing")
+
+
+def test_neighbors(graph):
+    """Test neighbour lookups by direction and relation type."""
+    assert graph.neighbors("Service") == ["Repository", "Cache"]
+    assert graph.neighbors("Service", direction="in") == ["Api", "Cache"]
+    assert graph.neighbors("Service", relation_type="Uses") == ["Cache"]
+    assert graph.neighbors("Service", relation_type="Unknown") == []
+    assert graph.neighbors("Orphan", direction="both") == []
+    with pytest.raises(ValueError):
+        graph.neighbors("Service", direction="sideways")
+
+
+def test_traversals(graph):
+    """Test BFS depths, DFS order and depth limits."""
+    assert list(graph.bfs("Api")) == [
+        ("Service", 1), ("Repository", 2), ("Cache", 2), ("Database", 3),
+    ]
+    assert list(graph.bfs("Api", max_depth=1)) == [("Service", 1)]
+    assert list(graph.dfs("Api")) == ["Service", "Repository", "Database", "Cache"]
+    assert [name for name, _ in graph.bfs("Database", direction="in", relation_type="DependsOn")] == [
+        "Repository", "Service", "Api",
+    ]
+
+
+def test_shortest_path(graph):
+    """Test shortest paths, unreachable targets and undirected search."""
+    assert graph.shortest_path("Api", "Database") == ["Api", "Service", "Repository", "Database"]
+    assert graph.shortest_path("Database", "Api") is None
+    assert graph.shortest_path("Database", "Api", direction="both") == [
+        "Database", "Repository", "Service", "Api",
+    ]
+    assert graph.shortest_path("Api", "Api") == ["Api"]
+
+
+def test_find_cycles(graph):
+    """Test that each cyclic component is reported once."""
+    assert graph.find_cycles() == [["Cache", "Service"]]
+    assert graph.find_cycles(relation_type="DependsOn") == []
+
+    looped = _graph(("A", "A", "Self"), ("B", "C", "X"), ("C", "D", "X"), ("D", "B", "X"))
+    assert looped.find_cycles() == [["A"], ["B", "C", "D"]]
+
+
+def test_kg_graph_commands(tmp_path):
+    """Test the kg neighbors, path and cycles CLI commands."""
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    relationships = [
+        RelationshipEntry("Api", "Service", "DependsOn", "", "docs/a.md", 1),
+        RelationshipEntry("Service", "Api", "Calls", "", "docs/a.md", 2),
+    ]
+    generate_kg_files(tmp_path, [], [], relationships)
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        result = runner.invoke(main_cli, ["kg", "neighbors", "Api", "--json-output"])
+        assert result.exit_code == 0, result.output
+        assert json.loads(result.output)["neighbors"] == [{"name": "Service", "depth": 1}]
+
+        result = runner.invoke(main_cli, ["kg", "path", "Service", "Api"])
+        assert result.exit_code == 0, result.output
+        assert result.output.strip() == "Service -> Api"
+
+        result = runner.invoke(main_cli, ["kg", "cycles"])
+        assert result.exit_code == 1
+        assert "Api -> Service -> Api" in result.output
+
+        result = runner.invoke(main_cli, ["kg", "neighbors", "Nope"])
+        assert result.exit_code == 1
+    finally:
+        os.chdir(original_dir)
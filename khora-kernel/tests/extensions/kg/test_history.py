@@ -0,0 +1,156 @@
+"""
+Tests for reading the KG of past revisions from git objects.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import scan_markdown_files
+from khora_kernel_vnext.extensions.kg.history import KGHistory
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(repo, *args):
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="Test", GIT_AUTHOR_EMAIL="test@example.com",
+        GIT_COMMITTER_NAME="Test", GIT_COMMITTER_EMAIL="test@example.com",
+    )
+    return subprocess.run(["git", *args], cwd=repo, env=env, check=True, capture_output=True, text=True).stdout
+
+
+def _commit(repo, message, files):
+    for path, content in files.items():
+        target = repo / path
+        if content is None:
+            target.unlink()
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(content)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A git repository whose project lives in a subdirectory."""
+    _git(tmp_path, "init", "-q")
+    project = tmp_path / "project"
+    _commit(tmp_path, "Add docs", {
+        "project/pyproject.toml": '[project]\nname = "test-project"\n',
+        "project/docs/a.md": "[concept:Alpha] - First\n",
+        "project/docs/guide/b.md": "[concept:Beta] - Second\n\n[rel:Beta->Alpha:Uses] - Uses alpha.\n",
+        "project/docs/notes.txt": "[concept:Ignored] - Not markdown\n",
+    })
+    _commit(tmp_path, "Unrelated change", {"project/README.md": "readme\n"})
+    _commit(tmp_path, "Revise docs", {
+        "project/docs/a.md": "Intro\n\n[concept:Alpha] - First\n\n[rule:AlphaRule] - A rule.\n",
+        "project/docs/guide/b.md": None,
+        "project/docs/c.md": "[concept:Beta] - Second\n",
+    })
+    return project
+
+
+def test_entries_at_revision(repo):
+    """Test that the KG at a revision matches a scan of that revision's files."""
+    with KGHistory(repo, "docs") as history:
+        concepts, rules, relationships = history.entries_at("HEAD~2")
+        assert history.parsed == 2
+        assert [(c.name, c.source_file, c.line_number) for c in concepts] == [
+            ("Alpha", "docs/a.md", 1),
+            ("Beta", os.path.join("docs", "guide", "b.md"), 1),
+        ]
+        assert rules == []
+        assert [(r.source_concept, r.target_concept) for r in relationships] == [("Beta", "Alpha")]
+
+        # Only the two blobs that changed since are parsed
+        head = history.entries_at("HEAD")
+        assert history.parsed == 4
+
+    expected = scan_markdown_files(repo / "docs")
+    for entries, scanned in zip(head, expected):
+        assert [e.to_dict() for e in entries] == [e.to_dict() for e in scanned]
+
+    with KGHistory(repo, "docs") as history, pytest.raises(ValueError, match="Unknown revision"):
+        history.entries_at("no-such-rev")
+
+
+def test_ignored_paths_are_skipped(repo):
+    """Test that tree paths excluded by ignore files are skipped, as in a scan of the checkout."""
+    _commit(repo.parent, "Add drafts", {
+        "project/docs/.khoraignore": "drafts/\n",
+        "project/docs/drafts/wip.md": "[concept:Draft] - Not ready\n",
+    })
+    with KGHistory(repo, "docs") as history:
+        concepts, _, _ = history.entries_at("HEAD")
+        assert history.log(max_count=1)[0].is_empty
+
+    expected = scan_markdown_files(repo / "docs")[0]
+    assert [c.to_dict() for c in concepts] == [c.to_dict() for c in expected]
+    assert "Draft" not in {c.name for c in concepts}
+
+
+def test_blob_cache_is_reused(repo):
+    """Test that blobs parsed once are not parsed again in a later session."""
+    with KGHistory(repo, "docs") as history:
+        history.log()
+    with KGHistory(repo, "docs") as history:
+        history.entries_at("HEAD")
+        history.entries_at("HEAD~2")
+        assert history.parsed == 0
+        assert history.cache.hits == 4
+
+
+def test_log_deltas(repo):
+    """Test the per-commit deltas, oldest first, for commits that changed docs."""
+    with KGHistory(repo, "docs") as history:
+        deltas = history.log()
+
+    assert [delta.subject for delta in deltas] == ["Add docs", "Revise docs"]
+    first, second = deltas
+    assert sorted(c.name for c in first.added["concepts"]) == ["Alpha", "Beta"]
+    assert first.removed["concepts"] == []
+
+    # Alpha only moved to another line; Beta moved to another file
+    assert second.files == ["docs/a.md", "docs/c.md", os.path.join("docs", "guide", "b.md")]
+    assert [r.name for r in second.added["rules"]] == ["AlphaRule"]
+    assert [(c.name, c.source_file) for c in second.added["concepts"]] == [("Beta", "docs/c.md")]
+    assert [c.name for c in second.removed["concepts"]] == ["Beta"]
+    assert [r.relation_type for r in second.removed["relationships"]] == ["Uses"]
+
+    with KGHistory(repo, "docs") as history:
+        assert [delta.subject for delta in history.log(max_count=1)] == ["Revise docs"]
+
+
+def test_kg_at_and_log_commands(repo):
+    """Test the kg at and kg log CLI commands."""
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(repo)
+    try:
+        result = runner.invoke(main_cli, ["kg", "at", "HEAD~1", "--json-output"])
+        assert result.exit_code == 0, result.output
+        data = json.loads(result.output)
+        assert data["counts"] == {"concepts": 2, "rules": 0, "relationships": 1}
+
+        result = runner.invoke(main_cli, ["kg", "at", "HEAD", "--out", "old"])
+        assert result.exit_code == 0, result.output
+        assert (repo / "old" / "kg" / "rules.json").exists()
+
+        result = runner.invoke(main_cli, ["kg", "log", "--entries"])
+        assert result.exit_code == 0, result.output
+        assert "Revise docs: +1/-1 concepts, +1/-0 rules, +0/-1 relationships" in result.output
+        assert "    + rule         AlphaRule (docs/a.md)" in result.output
+
+        result = runner.invoke(main_cli, ["kg", "at", "nope"])
+        assert result.exit_code == 1
+        assert "Unknown revision: nope" in result.output
+    finally:
+        os.chdir(original_dir)
@@ -0,0 +1,121 @@
+"""
+Tests for the SQLite KG index and the `khora kg query` command.
+"""
+
+import json
+import os
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import (
+    extract_concepts_and_rules,
+    generate_kg_files,
+    load_kg_files,
+)
+from khora_kernel_vnext.extensions.kg.index import (
+    KGIndex,
+    build_sqlite_index,
+    ensure_sqlite_index,
+    index_path,
+)
+
+
+SAMPLE_DOC = """# Design
+
+[concept:Order] - A customer order with line items.
+
+[concept:OrderLine] - A single line of an order.
+
+[concept:Customer] - Someone who places orders.
+
+[rule:OrdersNeedCustomer] - Every order belongs to exactly one customer.
+
+[rel:Customer->Order:Places] - Customers place orders.
+
+[rel:Order->OrderLine:Contains] - Orders contain order lines.
+"""
+
+
+@pytest.fixture
+def kg_project(tmp_path):
+    """Create a project with generated KG files."""
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    concepts, rules, relationships = extract_concepts_and_rules(SAMPLE_DOC, "docs/design.md")
+    generate_kg_files(tmp_path, concepts, rules, relationships)
+    return tmp_path
+
+
+def test_build_and_lookup(kg_project):
+    """Test exact, prefix, file and relationship lookups."""
+    path = build_sqlite_index(kg_project, *load_kg_files(kg_project))
+
+    with KGIndex(path) as index:
+        assert index.is_current(kg_project)
+
+        order = index.find_by_name("Order")
+        assert [e["name"] for e in order] == ["Order"]
+        assert order[0]["kind"] == "concept"
+        assert order[0]["source"] == {"file": "docs/design.md", "line": 3}
+
+        assert [e["name"] for e in index.find_by_prefix("Order")] == [
+            "Order", "OrderLine", "OrdersNeedCustomer",
+        ]
+        assert [e["name"] for e in index.find_by_prefix("Order", kinds=("rule",))] == ["OrdersNeedCustomer"]
+        assert len(index.find_by_source_file("docs/design.md")) == 4
+
+        touching = index.relationships_touching("Order")
+        assert {(r["source_concept"], r["target_concept"]) for r in touching} == {
+            ("Customer", "Order"), ("Order", "OrderLine"),
+        }
+        assert len(index.relationships_touching("Order", relation_type="Places")) == 1
+        assert len(index.relationships_of_type("Contains")) == 1
+
+
+def test_search(kg_project):
+    """Test full-text search over descriptions, including quote characters."""
+    with KGIndex(build_sqlite_index(kg_project, *load_kg_files(kg_project))) as index:
+        hits = index.search("exactly one customer")
+        assert [h["name"] for h in hits] == ["OrdersNeedCustomer"]
+        assert index.search('"unbalanced') == []
+
+
+def test_ensure_rebuilds_stale_index(kg_project):
+    """Test that a changed KG invalidates the index."""
+    path = ensure_sqlite_index(kg_project)
+    mtime = path.stat().st_mtime_ns
+    assert ensure_sqlite_index(kg_project).stat().st_mtime_ns == mtime
+
+    concepts, rules, relationships = extract_concepts_and_rules(
+        SAMPLE_DOC + "\n[concept:Invoice] - A bill for an order.\n", "docs/design.md"
+    )
+    generate_kg_files(kg_project, concepts, rules, relationships)
+
+    with KGIndex(path) as index:
+        assert not index.is_current(kg_project)
+    with KGIndex(ensure_sqlite_index(kg_project)) as index:
+        assert index.find_by_name("Invoice")
+
+
+def test_kg_query_command(kg_project):
+    """Test the kg query CLI command in JSON and text mode."""
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(kg_project)
+    try:
+        result = runner.invoke(main_cli, ["kg", "query", "--touching", "Customer", "--json-output"])
+        assert result.exit_code == 0, result.output
+        data = json.loads(result.output)
+        assert data["count"] == 1
+        assert data["results"][0]["relation_type"] == "Places"
+        assert index_path(kg_project).exists()
+
+        result = runner.invoke(main_cli, ["kg", "query", "--prefix", "Ord", "--kind", "concept"])
+        assert result.exit_code == 0, result.output
+        assert "OrderLine" in result.output
+        assert "OrdersNeedCustomer" not in result.output
+
+        result = runner.invoke(main_cli, ["kg", "query"])
+        assert result.exit_code == 1
+    finally:
+        os.chdir(original_dir)
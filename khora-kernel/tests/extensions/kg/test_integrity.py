@@ -0,0 +1,68 @@
+"""
+Tests for the KG referential-integrity checker.
+"""
+
+import time
+
+from khora_kernel_vnext.extensions.kg.extension import KGEntry, RelationshipEntry
+from khora_kernel_vnext.extensions.kg.integrity import check_kg_integrity
+
+
+def test_clean_graph():
+    """Test that a consistent KG has no issues."""
+    concepts = [KGEntry("A", "", "a.md", 1), KGEntry("B", "", "a.md", 2)]
+    relationships = [RelationshipEntry("A", "B", "Uses", "", "a.md", 3)]
+
+    report = check_kg_integrity(concepts, [KGEntry("R", "", "a.md", 4)], relationships)
+
+    assert report.valid
+    assert report.messages() == []
+    assert report.to_dict()["issue_count"] == 0
+
+
+def test_reports_all_issue_kinds():
+    """Test dangling endpoints, duplicates with all locations, and self-loops."""
+    concepts = [
+        KGEntry("A", "First", "a.md", 1),
+        KGEntry("B", "", "a.md", 2),
+        KGEntry("A", "Second", "b.md", 7),
+    ]
+    rules = [KGEntry("R", "", "a.md", 3), KGEntry("R", "", "c.md", 1)]
+    relationships = [
+        RelationshipEntry("A", "Missing", "Uses", "", "a.md", 4),
+        RelationshipEntry("Ghost", "Ghost", "Is", "", "a.md", 5),
+        RelationshipEntry("B", "B", "Refines", "", "a.md", 6),
+        RelationshipEntry("A", "Missing", "Uses", "", "d.md", 2),
+    ]
+
+    report = check_kg_integrity(concepts, rules, relationships)
+
+    assert report.dangling_endpoints == [
+        {"relationship": "A->Missing:Uses", "missing": ["Missing"], "location": "a.md:4"},
+        {"relationship": "Ghost->Ghost:Is", "missing": ["Ghost"], "location": "a.md:5"},
+    ]
+    assert report.duplicates == [
+        {"kind": "concept", "name": "A", "locations": ["a.md:1", "b.md:7"]},
+        {"kind": "rule", "name": "R", "locations": ["a.md:3", "c.md:1"]},
+        {"kind": "relationship", "name": "A->Missing:Uses", "locations": ["a.md:4", "d.md:2"]},
+    ]
+    assert [issue["relationship"] for issue in report.self_loops] == ["Ghost->Ghost:Is", "B->B:Refines"]
+    assert report.issue_count == 7
+    assert "Concept 'A' is defined 2 times: a.md:1, b.md:7" in report.messages()
+    assert len(report.messages(duplicates=False)) == 4
+
+
+def test_large_graph_is_linear():
+    """Test that a large KG is checked in seconds."""
+    count = 50_000
+    concepts = [KGEntry(f"C{i}", "", f"docs/{i % 1000}.md", i) for i in range(count)]
+    relationships = [
+        RelationshipEntry(f"C{i}", f"C{(i * 7 + 1) % count}", "Uses", "", f"docs/{i % 1000}.md", i)
+        for i in range(count)
+    ]
+
+    started = time.perf_counter()
+    report = check_kg_integrity(concepts, [], relationships)
+
+    assert report.valid
+    assert time.perf_counter() - started < 5
@@ -0,0 +1,167 @@
+"""
+Tests for the JSON Lines KG storage.
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import (
+    KGEntry,
+    RelationshipEntry,
+    generate_kg_files,
+    load_kg_files,
+    summarize_kg_files,
+)
+from khora_kernel_vnext.extensions.kg.jsonl import (
+    append_kg_log,
+    compact_kg_logs,
+    iter_kg_log,
+    read_kg_log_state,
+    replay_kg_log,
+    write_kg_log,
+)
+from khora_kernel_vnext.extensions.kg.kg_precommit import main
+
+
+def _names(entries):
+    return [(entry.name, entry.description, entry.source_file) for entry in entries]
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project whose KG is stored as JSON Lines logs."""
+    concepts = [KGEntry("Alpha", "First", "docs/a.md", 1), KGEntry("Beta", "Second", "docs/b.md", 1)]
+    relationships = [RelationshipEntry("Beta", "Alpha", "Uses", "", "docs/b.md", 3)]
+    generate_kg_files(tmp_path, concepts, [], relationships, file_format="jsonl")
+    return tmp_path
+
+
+def test_write_and_stream(project):
+    """Test that logs are written in canonical order and streamed back."""
+    path = project / "kg" / "concepts.jsonl"
+    lines = path.read_text(encoding="utf-8").splitlines()
+
+    assert json.loads(lines[0])["count"] == 2
+    assert json.loads(lines[1]) == KGEntry("Alpha", "First", "docs/a.md", 1).to_dict()
+    assert [record["name"] for record in iter_kg_log(path)] == ["Alpha", "Beta"]
+    assert not (project / "kg" / "concepts.json").exists()
+    # Writing the same entries again leaves the log untouched
+    assert not write_kg_log(path, "concepts", [KGEntry("Beta", "Second", "docs/b.md", 1),
+                                                KGEntry("Alpha", "First", "docs/a.md", 1)])
+
+
+def test_append_with_tombstones(project):
+    """Test that replacing a file's entries appends a tombstone and the new entries."""
+    path = project / "kg" / "concepts.jsonl"
+    size = path.stat().st_size
+
+    state = append_kg_log(path, "concepts", [KGEntry("Gamma", "New", "docs/a.md", 2)], {"docs/a.md"})
+
+    appended = path.read_bytes()[size:].decode("utf-8").splitlines()
+    assert appended == [
+        '{"tombstone":"docs/a.md"}',
+        '{"description":"New","name":"Gamma","source":{"file":"docs/a.md","line":2}}',
+    ]
+    assert (state.live, state.dead) == (2, 2)
+    concepts, _, _ = load_kg_files(project)
+    assert _names(concepts) == [("Beta", "Second", "docs/b.md"), ("Gamma", "New", "docs/a.md")]
+
+    # Unchanged entries append nothing
+    assert append_kg_log(path, "concepts", [KGEntry("Gamma", "New", "docs/a.md", 2)], {"docs/a.md"}) is None
+    # A replaced file without new entries is deleted
+    state = append_kg_log(path, "concepts", [], {"docs/b.md"})
+    assert [record["name"] for record in iter_kg_log(path)] == ["Gamma"]
+    assert replay_kg_log(path).sources == {"docs/a.md"}
+
+
+def test_compact(project):
+    """Test that compaction drops dead records once past the threshold."""
+    path = project / "kg" / "concepts.jsonl"
+    append_kg_log(path, "concepts", [KGEntry("Alpha", "Revised", "docs/a.md", 1)], {"docs/a.md"})
+
+    results = compact_kg_logs(project, threshold=0.5)
+    assert results[0] == {"file": "concepts.jsonl", "live": 2, "dead": 2, "dead_ratio": 0.5, "compacted": False}
+
+    results = compact_kg_logs(project, threshold=0.25)
+    assert results[0]["compacted"]
+    assert replay_kg_log(path).dead == 0
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 3
+    assert summarize_kg_files(project)["concept_count"] == 2
+
+
+@patch("khora_kernel_vnext.extensions.kg.kg_precommit.Path.cwd")
+def test_precommit_appends_to_logs(mock_cwd, project):
+    """Test that the pre-commit hook appends to logs and keeps the summary current."""
+    mock_cwd.return_value = project
+    (project / "docs").mkdir()
+    (project / "docs" / "a.md").write_text("[concept:Alpha] - Revised\n\n[rel:Alpha->Beta:Calls] - Calls.\n")
+    log = project / "kg" / "concepts.jsonl"
+    before = log.read_text(encoding="utf-8")
+
+    # docs/b.md does not exist, so its entries are dropped as well
+    assert main(["docs/a.md"]) == 0
+
+    assert log.read_text(encoding="utf-8").startswith(before)
+    concepts, _, relationships = load_kg_files(project)
+    assert _names(concepts) == [("Alpha", "Revised", "docs/a.md")]
+    assert [(r.source_concept, r.relation_type) for r in relationships] == [("Alpha", "Calls")]
+
+    summary = summarize_kg_files(project)
+    assert summary["concept_count"] == 1
+    assert summary["relationship_types"] == ["Calls"]
+
+
+@patch("khora_kernel_vnext.extensions.kg.kg_precommit.Path.cwd")
+def test_precommit_reads_log_state_from_manifest(mock_cwd, project):
+    """Test that the hook appends without replaying logs whose manifest records are current."""
+    mock_cwd.return_value = project
+    (project / "docs").mkdir()
+    (project / "docs" / "b.md").write_text("[concept:Beta] - Second\n\n[rel:Beta->Alpha:Uses] - \n")
+    (project / "docs" / "a.md").write_text("[concept:Alpha] - Revised\n")
+
+    with patch("khora_kernel_vnext.extensions.kg.jsonl.replay_kg_log") as replay:
+        assert main(["docs/a.md"]) == 0
+        (project / "docs" / "a.md").write_text("[concept:Alpha] - Revised again\n")
+        assert main(["docs/a.md"]) == 0
+        replay.assert_not_called()
+
+    path = project / "kg" / "concepts.jsonl"
+    kept = read_kg_log_state(project, path)
+    replayed = replay_kg_log(path)
+    assert (kept.records, kept.size, kept.file_counts, kept.file_digests) == (
+        replayed.records, replayed.size, replayed.file_counts, replayed.file_digests
+    )
+    assert (kept.live, kept.dead) == (2, 4)
+
+    # Without a current manifest record the log is replayed instead
+    (project / "kg" / "manifest.json").unlink()
+    with patch("khora_kernel_vnext.extensions.kg.jsonl.replay_kg_log", wraps=replay_kg_log) as replay:
+        assert read_kg_log_state(project, path).file_counts == replayed.file_counts
+        replay.assert_called_once()
+
+
+def test_kg_compact_command(project):
+    """Test the kg compact CLI command."""
+    (project / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    append_kg_log(project / "kg" / "concepts.jsonl", "concepts", [], {"docs/a.md", "docs/b.md"})
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(project)
+    try:
+        result = runner.invoke(main_cli, ["kg", "compact", "--json-output"])
+        assert result.exit_code == 0, result.output
+        logs = {log["file"]: log for log in json.loads(result.output)["logs"]}
+        assert logs["concepts.jsonl"]["compacted"]
+        assert not logs["relationships.jsonl"]["compacted"]
+
+        result = runner.invoke(main_cli, ["kg", "compact"])
+        assert result.exit_code == 0, result.output
+        assert "concepts.jsonl: 0 live, 0 dead (0%) - kept" in result.output
+    finally:
+        os.chdir(original_dir)
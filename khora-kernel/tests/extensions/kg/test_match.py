@@ -0,0 +1,112 @@
+"""
+Tests for KG pattern matching.
+"""
+
+import json
+import os
+import random
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import RelationshipEntry, generate_kg_files
+from khora_kernel_vnext.extensions.kg.graph import KGGraph
+from khora_kernel_vnext.extensions.kg.match import PatternError, PatternMatcher, parse_pattern
+
+
+def _rel(source, target, relation_type="DependsOn"):
+    return RelationshipEntry(source, target, relation_type, "", "docs/rels.md", 1)
+
+
+def _matches(relationships, pattern, **kwargs):
+    return list(PatternMatcher(KGGraph.from_relationships(relationships)).match(parse_pattern(pattern), **kwargs))
+
+
+def test_parse_pattern():
+    """Test the pattern syntax, including backward edges and every kind of condition."""
+    pattern = parse_pattern(
+        "(a)-[DependsOn|Uses]->(b)<-[Extends]-(c), (c)-[]-(d) "
+        "where a = 'Api' and b != c and c in (\"X\", \"Y\") and d =~ \"^Base\""
+    )
+    assert pattern.variables == ["a", "b", "c", "d"]
+    assert [(e.source, e.types, e.target, e.directed) for e in pattern.edges] == [
+        ("a", ("DependsOn", "Uses"), "b", True),
+        ("c", ("Extends",), "b", True),
+        ("c", None, "d", False),
+    ]
+    assert [(c.variable, c.operator, c.value_is_variable) for c in pattern.conditions] == [
+        ("a", "=", False), ("b", "!=", True), ("c", "in", False), ("d", "=~", False),
+    ]
+    assert pattern.conditions[2].value == ("X", "Y")
+
+    for bad in ["(a", "(a)-[X]-(b) where", "(a) where b = 'x'", "(a) where a =~ '('", "(a) (b)"]:
+        with pytest.raises(PatternError):
+            parse_pattern(bad)
+
+
+def test_multi_hop_match():
+    """Test a chain with a constant end, an undirected edge and variable conditions."""
+    relationships = [
+        _rel("Api", "OrderService"), _rel("Cli", "OrderService"), _rel("Api", "UserService"),
+        _rel("OrderService", "BaseService", "Extends"), _rel("UserService", "BaseService", "Extends"),
+        _rel("Worker", "OrderService", "Uses"),
+    ]
+    found = _matches(relationships, '(a)-[DependsOn]->(b)-[Extends]->(c) where c = "BaseService"')
+    assert sorted((m["a"], m["b"]) for m in found) == [
+        ("Api", "OrderService"), ("Api", "UserService"), ("Cli", "OrderService"),
+    ]
+    assert list(found[0]) == ["a", "b", "c"]
+
+    found = _matches(relationships, "(a)-[DependsOn]->(b), (a)-[DependsOn]->(c) where b != c and b =~ 'Order'")
+    assert found == [{"a": "Api", "b": "OrderService", "c": "UserService"}]
+
+    found = _matches(relationships, '(s)-[]-(n) where s = "OrderService"')
+    assert sorted(m["n"] for m in found) == ["Api", "BaseService", "Cli", "Worker"]
+    assert len(_matches(relationships, "(a)-[DependsOn]->(b)", limit=2)) == 2
+    assert _matches(relationships, "(a)-[Missing]->(b)") == []
+
+
+def test_matches_agree_with_brute_force():
+    """Test a two-hop pattern with a cycle-closing edge against nested loops."""
+    rng = random.Random(5)
+    names = [f"C{i}" for i in range(40)]
+    relationships = [_rel(rng.choice(names), rng.choice(names), rng.choice(["A", "B"])) for _ in range(300)]
+    edges = {(r.source_concept, r.target_concept, r.relation_type) for r in relationships}
+
+    found = _matches(relationships, "(x)-[A]->(y)-[B]->(z), (x)<-[A|B]-(z)")
+    expected = {
+        (x, y, z)
+        for x, y, t1 in edges if t1 == "A"
+        for y2, z, t2 in edges if t2 == "B" and y2 == y
+        if (z, x, "A") in edges or (z, x, "B") in edges
+    }
+    assert len(found) == len(expected)
+    assert {(m["x"], m["y"], m["z"]) for m in found} == expected
+
+
+def test_kg_match_command(tmp_path):
+    """Test the kg match CLI command."""
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    generate_kg_files(tmp_path, [], [], [_rel("Api", "Service"), _rel("Service", "Base", "Extends")])
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        pattern = "(a)-[DependsOn]->(b)-[Extends]->(c) where c = 'Base'"
+        result = runner.invoke(main_cli, ["kg", "match", pattern])
+        assert result.exit_code == 0, result.output
+        assert [json.loads(line) for line in result.output.splitlines()] == [
+            {"a": "Api", "b": "Service", "c": "Base"},
+        ]
+
+        result = runner.invoke(main_cli, ["kg", "match", pattern, "--explain"])
+        assert result.exit_code == 0, result.output
+        assert result.output.startswith("1. bind c to 1 concept(s)")
+
+        result = runner.invoke(main_cli, ["kg", "match", "(a)-[X]>(b)"])
+        assert result.exit_code == 1
+        assert "invalid pattern" in result.output
+    finally:
+        os.chdir(original_dir)
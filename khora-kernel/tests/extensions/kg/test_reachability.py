@@ -0,0 +1,112 @@
+"""
+Tests for the transitive-closure reachability index.
+"""
+
+import json
+import os
+import random
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import RelationshipEntry, generate_kg_files
+from khora_kernel_vnext.extensions.kg.graph import KGGraph
+
+np = pytest.importorskip("numpy")
+
+from khora_kernel_vnext.extensions.kg import reachability  # noqa: E402
+from khora_kernel_vnext.extensions.kg.reachability import (  # noqa: E402
+    ensure_reachability_index,
+    open_reachability_index,
+    reachability_path,
+    write_reachability_index,
+)
+
+
+def _rel(source, target, relation_type="DependsOn"):
+    return RelationshipEntry(source, target, relation_type, "", "docs/rels.md", 1)
+
+
+def test_closure_matches_traversal(tmp_path):
+    """Test reaches, downstream and upstream against BFS on a random graph with cycles."""
+    rng = random.Random(4)
+    names = [f"C{i}" for i in range(150)]
+    relationships = [_rel(rng.choice(names), rng.choice(names)) for _ in range(220)]
+    relationships.append(_rel("C1", "C1"))
+    write_reachability_index(tmp_path, relationships, ["DependsOn"])
+    index = reachability.ReachabilityIndex(reachability_path(tmp_path))
+
+    graph = KGGraph.from_relationships(relationships)
+    for source in graph.names:
+        # Everything reachable from a direct successor; source itself only through a cycle
+        expected = set()
+        for successor in graph.neighbors(source):
+            expected.add(successor)
+            expected.update(name for name, _ in graph.bfs(successor))
+        assert set(index.downstream(source, "DependsOn")) == expected, source
+        for target in graph.names[:30]:
+            assert index.reaches(source, target, "DependsOn") == (target in expected)
+    assert set(index.upstream("C1", "DependsOn")) == {
+        name for name in graph.names if index.reaches(name, "C1", "DependsOn")
+    }
+    assert index.downstream("Unknown", "DependsOn") == []
+    with pytest.raises(KeyError):
+        index.reaches("C1", "C2", "Contains")
+
+
+def test_only_changed_relation_types_are_rebuilt(tmp_path, monkeypatch):
+    """Test that a type whose edges did not change is copied from the previous index."""
+    depends = [_rel("A", "B"), _rel("B", "C")]
+    generate_kg_files(tmp_path, [], [], depends + [_rel("A", "C", "Contains")])
+    index = ensure_reachability_index(tmp_path, ["DependsOn", "Contains"])
+    assert index.relation_types == ["Contains", "DependsOn"]
+    assert open_reachability_index(tmp_path) is not None
+
+    built = []
+    original = reachability.build_closure
+    monkeypatch.setattr(reachability, "build_closure", lambda edges, *a: built.append(edges) or original(edges, *a))
+
+    generate_kg_files(tmp_path, [], [], depends + [_rel("C", "A", "Contains")])
+    assert open_reachability_index(tmp_path) is None  # stale
+    index = ensure_reachability_index(tmp_path)
+    assert [[e.relation_type for e in edges] for edges in built] == [["Contains"]]
+    assert index.reaches("C", "A", "Contains") and not index.reaches("A", "C", "Contains")
+    assert index.reaches("A", "C", "DependsOn")
+
+
+def test_types_over_the_size_limit_are_skipped(tmp_path):
+    """Test that a closure over the size limit is recorded as skipped and not retried."""
+    relationships = [_rel(f"C{i}", f"C{i + 1}") for i in range(100)] + [_rel("A", "B", "Contains")]
+    write_reachability_index(tmp_path, relationships, ["DependsOn", "Contains"], max_bytes=1024)
+    index = reachability.ReachabilityIndex(reachability_path(tmp_path))
+    assert index.relation_types == ["Contains"]
+    assert "101 components" in index.skipped["DependsOn"]["reason"]
+
+    write_reachability_index(tmp_path, relationships, ["DependsOn", "Contains"])
+    assert "DependsOn" in reachability.ReachabilityIndex(reachability_path(tmp_path)).skipped
+
+
+def test_kg_reach_command(tmp_path):
+    """Test the kg reach CLI command."""
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    generate_kg_files(tmp_path, [], [], [_rel("Api", "Service"), _rel("Service", "Store"), _rel("Api", "Store", "Uses")])
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        result = runner.invoke(main_cli, ["kg", "reach", "Api", "Store", "--relation-type", "DependsOn"])
+        assert result.exit_code == 0, result.output
+        assert "'Api' reaches 'Store' via DependsOn." in result.output
+        assert reachability_path(tmp_path).exists()
+
+        result = runner.invoke(main_cli, ["kg", "reach", "Store", "Api", "--relation-type", "DependsOn"])
+        assert result.exit_code == 1
+
+        result = runner.invoke(main_cli, ["kg", "reach", "Store", "--relation-type", "DependsOn",
+                                          "--upstream", "--json-output"])
+        assert result.exit_code == 0, result.output
+        assert json.loads(result.output)["concepts"] == ["Api", "Service"]
+    finally:
+        os.chdir(original_dir)
@@ -0,0 +1,125 @@
+"""
+Tests for tag spans and concept renames.
+"""
+
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import (
+    concept_name_spans,
+    generate_kg_files,
+    load_kg_files,
+    scan_markdown_files,
+    tokenize_kg_tags,
+)
+from khora_kernel_vnext.extensions.kg.rename import rename_concept
+
+DOCS = {
+    "a.md": "# Orders\n\n[concept:Order] - An order.\n\n[rel:Order->Customer:BelongsTo] - Orders have a customer.\n",
+    "b.md": "# Café ☕\n\n[rel:Invoice->Order:References] - An Order is invoiced.\n\n"
+            "[rel:Order->Order:Replaces] - A changed order replaces another.\n",
+    "c.md": "[concept:Customer] - Places orders.\n",
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project with docs and a KG generated from them."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name, content in DOCS.items():
+        (docs / name).write_text(content, encoding="utf-8")
+    generate_kg_files(tmp_path, *scan_markdown_files(docs))
+    return tmp_path
+
+
+def test_concept_name_spans_are_byte_offsets():
+    """Test that spans cover concept tags and both relationship ends, in UTF-8 bytes."""
+    text = DOCS["b.md"] + "[rule:Order] - Not a concept.\n"
+    raw = text.encode("utf-8")
+    spans = concept_name_spans(list(tokenize_kg_tags(text)), text)
+    assert [name for _, name in spans] == ["Invoice", "Order", "Order", "Order"]
+    for offset, name in spans:
+        assert raw[offset:offset + len(name)] == name.encode()
+
+
+def test_rename_rewrites_tags_and_updates_kg(project):
+    """Test that only files naming the concept are rewritten and the KG follows."""
+    untouched = project / "docs" / "c.md"
+    before = untouched.stat().st_mtime_ns
+
+    result = rename_concept(project, "Order", "PurchaseOrder")
+    assert result.files == [os.path.join("docs", "a.md"), os.path.join("docs", "b.md")]
+    assert result.occurrences == 5
+    assert result.kg_updated
+    assert untouched.stat().st_mtime_ns == before
+
+    text = (project / "docs" / "b.md").read_text(encoding="utf-8")
+    assert "[rel:Invoice->PurchaseOrder:References] - An Order is invoiced." in text
+    assert "[rel:PurchaseOrder->PurchaseOrder:Replaces]" in text
+
+    concepts, _, relationships = load_kg_files(project)
+    assert sorted(c.name for c in concepts) == ["Customer", "PurchaseOrder"]
+    assert "Order" not in {name for r in relationships for name in (r.source_concept, r.target_concept)}
+    # Same result as a full extraction of the renamed docs
+    full = scan_markdown_files(project / "docs")
+    assert [e.to_dict() for e in relationships] == [e.to_dict() for e in full[2]]
+
+
+def test_rename_with_nested_docs_dir(tmp_path):
+    """Test that a rename keeps the KG entries of untouched files when docs_dir is nested."""
+    docs = tmp_path / "documentation" / "docs"
+    docs.mkdir(parents=True)
+    for name, content in DOCS.items():
+        (docs / name).write_text(content, encoding="utf-8")
+    generate_kg_files(tmp_path, *scan_markdown_files(docs))
+
+    result = rename_concept(tmp_path, "Order", "PurchaseOrder", docs_dir=os.path.join("documentation", "docs"))
+    assert result.kg_updated
+    concepts, _, relationships = load_kg_files(tmp_path)
+    assert sorted(c.name for c in concepts) == ["Customer", "PurchaseOrder"]
+    full = scan_markdown_files(docs)
+    assert [e.to_dict() for e in concepts] == [e.to_dict() for e in full[0]]
+    assert [e.to_dict() for e in relationships] == [e.to_dict() for e in full[2]]
+
+
+def test_rename_uses_fresh_spans_and_refuses_conflicts(project):
+    """Test that a file edited after the last scan is re-parsed, and existing names are refused."""
+    rename_concept(project, "Order", "Ticket", dry_run=True)  # fills the cache
+    (project / "docs" / "c.md").write_text("Intro\n\n[rel:Customer->Order:Places] - x\n", encoding="utf-8")
+
+    result = rename_concept(project, "Order", "Ticket", dry_run=True)
+    assert result.files == [os.path.join("docs", name) for name in ("a.md", "b.md", "c.md")]
+    assert not result.kg_updated
+    assert "[concept:Order]" in (project / "docs" / "a.md").read_text(encoding="utf-8")
+
+    with pytest.raises(ValueError, match="already defined"):
+        rename_concept(project, "Customer", "Order")
+    with pytest.raises(ValueError, match="not a valid concept name"):
+        rename_concept(project, "Order", "Bad-Name")
+    assert rename_concept(project, "Missing", "Other").files == []
+
+
+def test_kg_rename_command(project):
+    """Test the kg rename CLI command."""
+    (project / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(project)
+    try:
+        result = runner.invoke(main_cli, ["kg", "rename", "Customer", "Client", "--json-output"])
+        assert result.exit_code == 0, result.output
+        output = json.loads(result.output)
+        assert output["occurrences"] == 2 and output["kg_updated"]
+        assert "[concept:Client]" in (project / "docs" / "c.md").read_text(encoding="utf-8")
+
+        result = runner.invoke(main_cli, ["kg", "rename", "Customer", "Buyer"])
+        assert result.exit_code == 1
+        assert "No tags name 'Customer'." in result.output
+    finally:
+        os.chdir(original_dir)
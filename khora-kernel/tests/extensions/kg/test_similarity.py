@@ -0,0 +1,109 @@
+"""
+Tests for the TF-IDF similarity index.
+"""
+
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import KGEntry, generate_kg_files
+
+np = pytest.importorskip("numpy")
+
+from khora_kernel_vnext.extensions.kg.similarity import (  # noqa: E402
+    SimilarityIndex,
+    ensure_similarity_index,
+    open_similarity_index,
+    similarity_path,
+    tokenize,
+    write_similarity_index,
+)
+
+
+def _entries():
+    concepts = [
+        KGEntry("ExtractionCache", "Caches extraction results for every markdown file.", "docs/a.md", 1),
+        KGEntry("BlobCache", "Caches extraction results by git blob.", "docs/b.md", 1),
+        KGEntry("TemplateRenderer", "Renders the project templates.", "docs/c.md", 1),
+    ]
+    rules = [KGEntry("AtomicWrites", "Every cache file is written atomically.", "docs/a.md", 5)]
+    return concepts, rules
+
+
+def test_tokenize():
+    """Test that names are split into words and stop words are dropped."""
+    assert tokenize("KGEntry parses_the HTTPServer v2") == ["kg", "entry", "parses", "http", "server"]
+
+
+def test_similar_ranks_by_cosine(tmp_path):
+    """Test cosine ranking, and that documents sharing no term are left out."""
+    concepts, rules = _entries()
+    generate_kg_files(tmp_path, concepts, rules, [])
+    index = ensure_similarity_index(tmp_path, (concepts, rules, []))
+
+    row = index.find("ExtractionCache")[0]
+    matches = index.similar(row, top=5)
+    assert [index.entry(r)["name"] for r, _ in matches] == ["BlobCache", "AtomicWrites"]
+    assert 0 < matches[1][1] < matches[0][1] < 1
+
+    # Scores equal a dense cosine similarity
+    dense = np.zeros((len(index), len(index.vocabulary)))
+    rows = np.repeat(np.arange(len(index)), np.diff(index.indptr))
+    dense[rows, index.term_ids] = index.weights
+    assert np.allclose(index.scores(row), dense @ dense[row], atol=1e-6)
+
+    assert index.find("AtomicWrites", kind="concept") == []
+    assert open_similarity_index(tmp_path) is not None
+
+
+def test_rebuild_reuses_unchanged_files(tmp_path):
+    """Test that a rebuild only tokenizes the files whose entries changed."""
+    concepts, rules = _entries()
+    generate_kg_files(tmp_path, concepts, rules, [])
+    write_similarity_index(tmp_path, concepts, rules)
+    before = SimilarityIndex(similarity_path(tmp_path))
+
+    concepts[2] = KGEntry("TemplateRenderer", "Renders jinja templates.", "docs/c.md", 1)
+    generate_kg_files(tmp_path, concepts, rules, [])
+    assert open_similarity_index(tmp_path) is None  # stale
+
+    arrays_before = {name: before.entry(before.find(name)[0]) for name in ("BlobCache", "AtomicWrites")}
+    write_similarity_index(tmp_path, concepts, rules)
+    index = open_similarity_index(tmp_path)
+    assert index is not None
+    assert "jinja" in index.vocabulary.tolist()
+    for name, entry in arrays_before.items():
+        assert index.entry(index.find(name)[0]) == entry
+
+    # Same result as a build from scratch
+    similarity_path(tmp_path).unlink()
+    write_similarity_index(tmp_path, concepts, rules)
+    fresh = SimilarityIndex(similarity_path(tmp_path))
+    for name in ("vocabulary", "indptr", "term_ids", "counts", "weights", "postings_docs"):
+        assert np.array_equal(getattr(index, name), getattr(fresh, name)), name
+
+
+def test_kg_similar_command(tmp_path):
+    """Test the kg similar CLI command."""
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    generate_kg_files(tmp_path, *_entries(), [])
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        result = runner.invoke(main_cli, ["kg", "similar", "BlobCache", "--top", "1", "--json-output"])
+        assert result.exit_code == 0, result.output
+        data = json.loads(result.output)
+        assert data["query"]["name"] == "BlobCache"
+        assert [r["name"] for r in data["results"]] == ["ExtractionCache"]
+        assert similarity_path(tmp_path).exists()
+
+        result = runner.invoke(main_cli, ["kg", "similar", "Nope"])
+        assert result.exit_code == 1
+        assert "unknown concept or rule 'Nope'" in result.output
+    finally:
+        os.chdir(original_dir)
@@ -0,0 +1,136 @@
+"""
+Tests for the memory-mapped KG snapshot.
+"""
+
+import json
+import os
+import struct
+
+import pytest
+from click.testing import CliRunner
+
+from khora_kernel_vnext.cli.commands import main_cli
+from khora_kernel_vnext.extensions.kg.extension import (
+    KGEntry,
+    RelationshipEntry,
+    generate_kg_files,
+    load_kg_files,
+)
+from khora_kernel_vnext.extensions.kg.graph import KGGraph
+from khora_kernel_vnext.extensions.kg.snapshot import (
+    KGSnapshot,
+    ensure_kg_snapshot,
+    open_kg_snapshot,
+    snapshot_path,
+    write_kg_snapshot,
+)
+
+
+@pytest.fixture
+def entries():
+    concepts = [
+        KGEntry("Order", "A purchase – with ünïcode", "docs/a.md", 1),
+        KGEntry("Customer", "Places orders", "docs/a.md", 3),
+        KGEntry("Order", "Duplicate definition", "docs/b.md", 9),
+    ]
+    rules = [KGEntry("OrderHasCustomer", "Every order has a customer", "docs/b.md", 1)]
+    relationships = [
+        RelationshipEntry("Customer", "Order", "Places", "", "docs/a.md", 5),
+        RelationshipEntry("Order", "Customer", "BelongsTo", "", "docs/b.md", 2),
+        RelationshipEntry("Customer", "Invoice", "Receives", "", "docs/b.md", 4),
+    ]
+    return concepts, rules, relationships
+
+
+@pytest.fixture
+def project(tmp_path, entries):
+    generate_kg_files(tmp_path, *entries)
+    write_kg_snapshot(tmp_path, *entries)
+    return tmp_path
+
+
+def _dicts(entries):
+    return sorted(json.dumps(entry.to_dict(), sort_keys=True) for entry in entries)
+
+
+def test_round_trip(project, entries):
+    """Test that a snapshot holds the same entries as the KG files."""
+    with open_kg_snapshot(project) as snapshot:
+        assert snapshot.metadata["counts"]["relationships"] == 3
+        for table, expected in zip((snapshot.concepts, snapshot.rules, snapshot.relationships), entries):
+            assert len(table) == len(expected)
+            assert _dicts(table) == _dicts(expected)
+        assert snapshot.concepts[-1].to_dict() == list(snapshot.concepts)[-1].to_dict()
+        assert snapshot.relationships.field(0, "type") == "Places"
+
+
+def test_lookups(project):
+    """Test name and source lookups through the sorted permutations."""
+    with open_kg_snapshot(project) as snapshot:
+        assert [c.description for c in snapshot.concepts.find("Order")] == [
+            "A purchase – with ünïcode", "Duplicate definition"
+        ]
+        assert snapshot.concepts.find("Invoice") == []
+        assert snapshot.concepts.find("Nope") == []
+        assert sorted(r.target_concept for r in snapshot.relationships.find("Customer")) == ["Invoice", "Order"]
+        assert snapshot.string_id("Places") is not None
+        assert snapshot.string_id("Plac") is None
+
+
+def test_graph_from_snapshot(project, entries):
+    """Test that a graph built from the edge arrays matches one built from entries."""
+    concepts, _, relationships = entries
+    expected = KGGraph.from_relationships(relationships, (c.name for c in concepts))
+    with open_kg_snapshot(project) as snapshot:
+        graph = KGGraph.from_snapshot(snapshot)
+
+    assert graph.node_count == expected.node_count
+    assert graph.edge_count == expected.edge_count
+    assert sorted(graph.neighbors("Customer")) == ["Invoice", "Order"]
+    assert graph.shortest_path("Order", "Invoice") == ["Order", "Customer", "Invoice"]
+
+
+def test_fallback_when_stale_or_invalid(project, entries):
+    """Test that readers fall back to the KG files when the snapshot cannot be used."""
+    concepts, rules, relationships = entries
+    generate_kg_files(project, concepts[:1], rules, relationships)
+    assert open_kg_snapshot(project) is None
+    assert [c.name for c in load_kg_files(project)[0]] == ["Order"]
+
+    ensure_kg_snapshot(project)
+    with open_kg_snapshot(project) as snapshot:
+        assert len(snapshot.concepts) == 1
+
+    # Another format version is ignored
+    path = snapshot_path(project)
+    data = bytearray(path.read_bytes())
+    struct.pack_into("<I", data, 8, 999)
+    path.write_bytes(bytes(data))
+    assert open_kg_snapshot(project) is None
+    with pytest.raises(ValueError, match="version"):
+        KGSnapshot(path)
+
+    path.write_bytes(b"not a snapshot")
+    assert open_kg_snapshot(project) is None
+    assert len(load_kg_files(project)[2]) == 3
+
+
+def test_kg_snapshot_command(tmp_path, entries):
+    """Test the kg snapshot CLI command."""
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "test-project"\n')
+    generate_kg_files(tmp_path, *entries)
+
+    runner = CliRunner()
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        result = runner.invoke(main_cli, ["kg", "snapshot", "--json-output"])
+        assert result.exit_code == 0, result.output
+        assert json.loads(result.output)["counts"]["concepts"] == 3
+        assert snapshot_path(tmp_path).exists()
+
+        result = runner.invoke(main_cli, ["kg", "neighbors", "Customer"])
+        assert result.exit_code == 0, result.output
+        assert sorted(result.output.split()) == ["Invoice", "Order"]
+    finally:
+        os.chdir(original_dir)
@@ -0,0 +1,196 @@
+"""
+Tests for continuous KG extraction (khora kg watch).
+"""
+
+import threading
+import time
+
+import pytest
+import yaml
+
+from khora_kernel_vnext.extensions.kg.extension import load_kg_files, write_kg_file
+from khora_kernel_vnext.extensions.kg.jsonl import replay_kg_log
+from khora_kernel_vnext.extensions.kg.snapshot import ensure_kg_snapshot, open_kg_snapshot
+from khora_kernel_vnext.extensions.kg.watch import KGWatcher, PollingBackend, _load_libc
+
+
+def _inotify_available():
+    try:
+        _load_libc()
+    except OSError:
+        return False
+    return True
+
+
+@pytest.fixture
+def project(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("[concept:Alpha] - First\n\n[rel:Alpha->Beta:Uses] - Uses beta.\n")
+    (docs / "b.md").write_text("[concept:Beta] - Second\n")
+    (tmp_path / ".khora").mkdir()
+    (tmp_path / ".khora" / "context.yaml").write_text(yaml.dump({"kernel_version": "test"}))
+    return tmp_path
+
+
+def _wait_for_update(watcher, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        paths = watcher.next_batch(timeout=0.2)
+        if paths:
+            update = watcher.apply(paths)
+            if update is not None:
+                return update
+    raise AssertionError("No KG update")
+
+
+def _concept_names(project):
+    return sorted(c.name for c in load_kg_files(project)[0])
+
+
+@pytest.mark.skipif(not _inotify_available(), reason="inotify is not available")
+def test_inotify_incremental_updates(project):
+    """Test that edits, new directories and deletions update only what changed."""
+    with KGWatcher(project, "docs") as watcher:
+        assert watcher.backend_name == "inotify"
+        assert _concept_names(project) == ["Alpha", "Beta"]
+        rules_mtime = (project / "kg" / "rules.json").stat().st_mtime_ns
+
+        (project / "docs" / "a.md").write_text("[concept:Alpha] - Revised\n")
+        update = _wait_for_update(watcher)
+        assert update.files == ["docs/a.md"]
+        assert update.written == ["concepts.json", "relationships.json"]
+        assert (project / "kg" / "rules.json").stat().st_mtime_ns == rules_mtime
+        concepts, _, relationships = load_kg_files(project)
+        assert [c.description for c in concepts if c.name == "Alpha"] == ["Revised"]
+        assert relationships == []
+
+        (project / "docs" / "sub").mkdir()
+        (project / "docs" / "sub" / "c.md").write_text("[concept:Gamma] - Third\n")
+        _wait_for_update(watcher)
+        assert _concept_names(project) == ["Alpha", "Beta", "Gamma"]
+
+        (project / "docs" / "b.md").unlink()
+        _wait_for_update(watcher)
+        assert _concept_names(project) == ["Alpha", "Gamma"]
+
+    summary = yaml.safe_load((project / ".khora" / "context.yaml").read_text())["knowledge_graph_summary"]
+    assert summary["concept_count"] == 2
+    assert summary["relationship_count"] == 0
+
+
+def test_update_matches_full_write(project, tmp_path_factory):
+    """Test that a KG file written from per-file blocks equals one written in full."""
+    with KGWatcher(project, "docs", use_inotify=False) as watcher:
+        (project / "docs" / "c.md").write_text("[concept:Gamma] - Third, \"quoted\" ünïcode\n")
+        assert watcher.apply({"docs/c.md"}).written == ["concepts.json"]
+
+    expected = tmp_path_factory.mktemp("full") / "concepts.json"
+    write_kg_file(expected, "concepts", load_kg_files(project)[0])
+
+    def without_timestamp(path):
+        return [line for line in path.read_text().splitlines() if '"generated_at"' not in line]
+
+    assert without_timestamp(project / "kg" / "concepts.json") == without_timestamp(expected)
+
+
+def test_polling_backend(project):
+    """Test that the polling backend reports changed, new and deleted files."""
+    backend = PollingBackend(project, "docs", interval=0.01)
+    assert backend.read(timeout=0.05) == set()
+
+    (project / "docs" / "a.md").write_text("[concept:Alpha] - Changed size\n")
+    (project / "docs" / "b.md").unlink()
+    (project / "docs" / "c.md").write_text("[concept:Gamma] - Third\n")
+    assert backend.read(timeout=1.0) == {"docs/a.md", "docs/b.md", "docs/c.md"}
+
+
+def test_jsonl_logs_are_appended(project):
+    """Test that a KG stored as JSON Lines logs is appended to, not rewritten."""
+    with KGWatcher(project, "docs", file_format="jsonl", use_inotify=False, poll_interval=0.01) as watcher:
+        log = project / "kg" / "concepts.jsonl"
+        before = log.read_bytes()
+
+        (project / "docs" / "b.md").write_text("[concept:Beta] - Revised\n")
+        update = watcher.apply({"docs/b.md"})
+
+        assert update.written == ["concepts.jsonl"]
+        assert log.read_bytes().startswith(before)
+        assert replay_kg_log(log).dead == 2  # the old record and its tombstone
+        assert watcher.apply({"docs/b.md"}) is None
+
+
+def _large_document(n, files, revision=0):
+    return "\n\n".join(
+        f"[concept:C{n}x{i}] - Concept {i} of file {n}, revision {revision}.\n\n"
+        f"[rel:C{n}x{i}->C{(n + 1) % files}x{i}:Uses] - Links the next file."
+        for i in range(10)
+    ) + "\n"
+
+
+@pytest.mark.parametrize("file_format", ["json", "jsonl"])
+def test_update_time_on_large_kg(project, file_format):
+    """Test that a save on a large KG updates it within 200 ms, leaving the derived artifacts for later."""
+    files = 5000
+    for n in range(files):
+        directory = project / "docs" / f"section{n % 20}"
+        directory.mkdir(exist_ok=True)
+        (directory / f"page{n}.md").write_text(_large_document(n, files))
+
+    with KGWatcher(project, "docs", file_format=file_format, use_inotify=False) as watcher:
+        ensure_kg_snapshot(project)
+        summary_before = (project / ".khora" / "context.yaml").read_text()
+
+        elapsed = []
+        for revision in range(1, 4):
+            (project / "docs" / "section3" / "page3.md").write_text(_large_document(3, files, revision))
+            update = watcher.apply({"docs/section3/page3.md"})
+            assert update.written == [f"concepts.{file_format}"]
+            elapsed.append(update.elapsed)
+        assert sorted(elapsed)[1] < 0.2
+
+        # Until the changes settle the snapshot is stale and the summary unchanged
+        assert open_kg_snapshot(project) is None
+        assert (project / ".khora" / "context.yaml").read_text() == summary_before
+        assert watcher.refresh()
+        assert not watcher.refresh()
+        snapshot = open_kg_snapshot(project)
+        assert snapshot is not None
+        snapshot.close()
+        assert (project / ".khora" / "context.yaml").read_text() != summary_before
+
+
+def test_refresh_skips_disabled_artifacts(project):
+    """Test that only the derived artifacts the watcher was given are refreshed."""
+    with KGWatcher(project, "docs", use_inotify=False, artifacts=[]) as watcher:
+        ensure_kg_snapshot(project)
+        (project / "docs" / "b.md").write_text("[concept:Beta] - Revised\n")
+        watcher.apply({"docs/b.md"})
+        assert watcher.refresh()
+        assert open_kg_snapshot(project) is None
+
+    with pytest.raises(ValueError):
+        KGWatcher(project, "docs", artifacts=["sqlite"])
+
+
+def test_run_until_stopped(project):
+    """Test the watch loop with the polling backend."""
+    updates = []
+    stop = threading.Event()
+    watcher = KGWatcher(project, "docs", use_inotify=False, poll_interval=0.01, debounce=0.01)
+    watcher.start()
+    thread = threading.Thread(target=watcher.run, args=(stop, updates.append))
+    thread.start()
+    try:
+        (project / "docs" / "b.md").write_text("[concept:Beta] - Revised\n\n[rule:Rule] - A rule.\n")
+        deadline = time.monotonic() + 5
+        while not updates and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        thread.join()
+        watcher.close()
+
+    assert updates and updates[0].written == ["concepts.json", "rules.json"]
+    summary = yaml.safe_load((project / ".khora" / "context.yaml").read_text())["knowledge_graph_summary"]
+    assert summary["rule_count"] == 1
@@ -0,0 +1,138 @@
+"""
+Tests for the project file index.
+"""
+
+import os
+
+import pytest
+
+from khora_kernel_vnext.extensions.kg.extension import scan_markdown_files
+from khora_kernel_vnext.sdk.file_index import ProjectFileIndex, parse_ignore_file
+
+
+def _touch(root, *paths):
+    for path in paths:
+        file_path = root / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text("x", encoding="utf-8")
+
+
+@pytest.fixture
+def project(tmp_path):
+    _touch(
+        tmp_path,
+        "README.md",
+        "src/pkg/__init__.py",
+        "src/pkg/module.py",
+        "src/pkg/__pycache__/module.cpython-312.pyc",
+        "node_modules/lib/index.js",
+        ".git/HEAD",
+        "build/out.py",
+        "docs/guide.md",
+        "docs/draft.tmp",
+        "docs/keep.tmp",
+        "docs/generated/api.md",
+        "docs/generated/index.md",
+    )
+    (tmp_path / ".gitignore").write_text(
+        "# build output\n/build/\n*.tmp\n!keep.tmp\n", encoding="utf-8"
+    )
+    (tmp_path / "docs" / ".khoraignore").write_text("generated/*\n!generated/index.md\n", encoding="utf-8")
+    return tmp_path
+
+
+def test_files_prunes_default_and_ignored_dirs(project):
+    index = ProjectFileIndex(project)
+
+    assert index.files() == [
+        ".gitignore",
+        "README.md",
+        "docs/.khoraignore",
+        "docs/generated/index.md",
+        "docs/guide.md",
+        "docs/keep.tmp",
+        "src/pkg/__init__.py",
+        "src/pkg/module.py",
+    ]
+    assert index.files("docs", suffixes=(".md",)) == ["docs/generated/index.md", "docs/guide.md"]
+    assert index.files("build") == []
+    assert index.files("missing") == []
+
+
+def test_ignored_directories_are_never_listed(project, monkeypatch):
+    listed = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        listed.append(os.path.relpath(path, project))
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    index = ProjectFileIndex(project)
+    index.files()
+    index.files("src")
+
+    assert not {"node_modules", ".git", "build", "src/pkg/__pycache__"} & set(listed)
+    # Each directory is listed once, even across repeated queries
+    assert len(listed) == len(set(listed))
+
+
+def test_ignore_patterns():
+    rules = parse_ignore_file("# comment\n\n/root-only\nlogs/\n**/deep/*.log\n\\!bang\n", "sub")
+
+    assert [(r.base, r.negate, r.dir_only, r.anchored) for r in rules] == [
+        ("sub", False, False, True),
+        ("sub", False, True, False),
+        ("sub", False, False, True),
+        ("sub", False, False, False),
+    ]
+    assert rules[2].regex.match("deep/a.log")
+    assert rules[2].regex.match("x/y/deep/a.log")
+    assert not rules[2].regex.match("deep/x/a.log")
+    assert rules[3].regex.match("!bang")
+
+
+def test_is_ignored_and_exists(project):
+    index = ProjectFileIndex(project)
+
+    assert index.is_ignored("build/out.py")
+    assert index.is_ignored("docs/draft.tmp")
+    assert not index.is_ignored("docs/keep.tmp")
+    assert index.is_ignored("docs/generated/api.md")
+    assert index.is_ignored("node_modules/lib/index.js")
+    # Existence checks see ignored files too
+    assert index.exists("build/out.py")
+    assert index.is_dir("docs/generated")
+    assert index.is_file("README.md")
+    assert not index.exists("docs/missing.md")
+    assert index.stat("README.md").st_size == 1
+    assert index.stat("missing") is None
+
+    assert ProjectFileIndex(project, use_ignore_files=False).files("build") == ["build/out.py"]
+
+
+def test_scan_markdown_files_honors_ignore_files(project):
+    (project / "docs" / "guide.md").write_text("[concept:Guide] - Kept\n", encoding="utf-8")
+    (project / "docs" / "generated" / "api.md").write_text("[concept:Api] - Ignored\n", encoding="utf-8")
+
+    concepts, _, _ = scan_markdown_files(project / "docs")
+
+    assert [(c.name, c.source_file) for c in concepts] == [("Guide", os.path.join("docs", "guide.md"))]
+
+
+def test_walk_does_not_follow_directory_symlinks(project):
+    (project / "docs" / "sub").mkdir()
+    try:
+        os.symlink("..", project / "docs" / "sub" / "loop", target_is_directory=True)
+        os.symlink(project / "src", project / "docs" / "code", target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("symbolic links are not supported")
+    (project / "docs" / "guide.md").write_text("[concept:Guide] - Once\n", encoding="utf-8")
+    index = ProjectFileIndex(project)
+
+    assert index.files("docs", suffixes=(".md",)) == ["docs/generated/index.md", "docs/guide.md"]
+    assert index.files("docs", suffixes=(".py",)) == []
+    # Existence checks still follow links
+    assert index.is_dir("docs/sub/loop")
+    concepts, _, _ = scan_markdown_files(project / "docs")
+    assert [c.name for c in concepts] == ["Guide"]